@@ -5,13 +5,16 @@
 
 import cv2
 import numpy as np
-import easyocr
-from PIL import Image, ImageGrab, ImageEnhance
+from PIL import ImageGrab
 import time
 import os
 import pyautogui
 from pathlib import Path
 import logging
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent))
+from src.ui_automation.ocr_engine import OCREngine, DESKTOP_PREPROCESSING, calculate_center
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -25,6 +28,7 @@ class AutoFileOpener:
         logger.info("正在初始化自动化文件打开器...")
         
         # OCR配置
+        self.ocr_engine = OCREngine({'preprocessing': DESKTOP_PREPROCESSING})
         self.ocr_reader = None
         self._init_ocr()
         
@@ -40,7 +44,7 @@ class AutoFileOpener:
     def _init_ocr(self):
         """初始化OCR"""
         try:
-            self.ocr_reader = easyocr.Reader(['ch_sim', 'en'], gpu=False, verbose=False)
+            self.ocr_reader = self.ocr_engine.load()
             logger.info("✅ OCR初始化成功")
         except Exception as e:
             logger.error(f"❌ OCR初始化失败: {e}")
@@ -196,11 +200,8 @@ class AutoFileOpener:
             screenshot_np = np.array(screenshot)
             screenshot_cv = cv2.cvtColor(screenshot_np, cv2.COLOR_RGB2BGR)
             
-            # 预处理图像
-            processed_image = self._preprocess_image(screenshot_cv)
-            
-            # OCR识别
-            results = self.ocr_reader.readtext(processed_image, detail=1, paragraph=False)
+            # 预处理并识别（画面未变化时复用已有结果）
+            results = self.ocr_engine.readtext(screenshot_cv)
             
             # 分析结果
             best_matches = []
@@ -209,7 +210,7 @@ class AutoFileOpener:
                 match_score = self._calculate_match_score(text, "info.json")
                 
                 if match_score > 0.3:  # 降低阈值
-                    center = self._calculate_center(bbox)
+                    center = calculate_center(bbox)
                     best_matches.append({
                         'text': text,
                         'confidence': confidence,
@@ -231,33 +232,6 @@ class AutoFileOpener:
             logger.error(f"  OCR查找失败: {e}")
             return None
     
-    def _preprocess_image(self, image):
-        """图像预处理"""
-        try:
-            # 转换为PIL图像
-            pil_image = Image.fromarray(cv2.cvtColor(image, cv2.COLOR_RGB2BGR))
-            
-            # 放大图像
-            new_size = (int(pil_image.width * 1.5), int(pil_image.height * 1.5))
-            pil_image = pil_image.resize(new_size, Image.LANCZOS)
-            
-            # 增强对比度
-            enhancer = ImageEnhance.Contrast(pil_image)
-            pil_image = enhancer.enhance(1.3)
-            
-            # 增强锐度
-            enhancer = ImageEnhance.Sharpness(pil_image)
-            pil_image = enhancer.enhance(1.3)
-            
-            # 转换回OpenCV格式
-            processed = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
-            
-            return processed
-            
-        except Exception as e:
-            logger.error(f"    图像预处理失败: {e}")
-            return image
-    
     def _calculate_match_score(self, text, filename):
         """计算文本匹配度"""
         if not text or not filename:
@@ -281,17 +255,6 @@ class AutoFileOpener:
         
         return 0.0
     
-    def _calculate_center(self, bbox):
-        """计算边界框中心点"""
-        try:
-            x1, y1 = bbox[0]
-            x3, y3 = bbox[2]
-            center_x = int((x1 + x3) / 2)
-            center_y = int((y1 + y3) / 2)
-            return (center_x, center_y)
-        except:
-            return (0, 0)
-    
     def _try_preset_positions(self):
         """尝试预设位置"""
         # 基于文件类型的预设位置
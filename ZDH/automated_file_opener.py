@@ -6,8 +6,7 @@
 
 import cv2
 import numpy as np
-import easyocr
-from PIL import Image, ImageGrab, ImageEnhance, ImageFilter
+from PIL import ImageGrab
 import time
 import os
 import subprocess
@@ -16,6 +15,10 @@ import pyperclip
 from pathlib import Path
 import json
 import logging
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent))
+from src.ui_automation.ocr_engine import OCREngine, DESKTOP_PREPROCESSING, calculate_center
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -29,6 +32,7 @@ class AutomatedFileOpener:
         logger.info("正在初始化自动化文件打开器...")
         
         # OCR配置
+        self.ocr_engine = OCREngine({'preprocessing': DESKTOP_PREPROCESSING})
         self.ocr_reader = None
         self._init_ocr()
         
@@ -49,7 +53,7 @@ class AutomatedFileOpener:
     def _init_ocr(self):
         """初始化OCR"""
         try:
-            self.ocr_reader = easyocr.Reader(['ch_sim', 'en'], gpu=False, verbose=False)
+            self.ocr_reader = self.ocr_engine.load()
             logger.info("✅ OCR初始化成功")
         except Exception as e:
             logger.error(f"❌ OCR初始化失败: {e}")
@@ -195,30 +199,19 @@ class AutomatedFileOpener:
             return None
         
         try:
-            # 截取屏幕
-            screenshot = ImageGrab.grab()
-            screenshot_np = np.array(screenshot)
-            screenshot_cv = cv2.cvtColor(screenshot_np, cv2.COLOR_RGB2BGR)
-            
-            # 预处理图像
-            processed_image = self._preprocess_image(screenshot_cv)
-            
-            # OCR识别
-            results = self.ocr_reader.readtext(processed_image, detail=1, paragraph=False)
+            # 截取屏幕并识别预处理后的图像（画面未变化时复用已有结果）
+            index = self._screen_ocr_index(preprocess=True)
             
             # 分析结果
             best_matches = []
-            for bbox, text, confidence in results:
-                # 计算匹配度
-                match_score = self._calculate_match_score(text, "info.json")
-                
+            for item_index, match_score in self._calculate_match_score(index, "info.json").items():
                 if match_score > 0.3:  # 降低阈值
-                    center = self._calculate_center(bbox)
+                    item = index.items[item_index]
                     best_matches.append({
-                        'text': text,
-                        'confidence': confidence,
+                        'text': item.text,
+                        'confidence': item.confidence,
                         'match_score': match_score,
-                        'position': center
+                        'position': calculate_center(item.bbox)
                     })
             
             # 按匹配度排序
@@ -235,66 +228,26 @@ class AutomatedFileOpener:
             logger.error(f"  OCR查找失败: {e}")
             return None
     
-    def _preprocess_image(self, image):
-        """图像预处理"""
-        try:
-            # 转换为PIL图像
-            pil_image = Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
-            
-            # 放大图像
-            new_size = (int(pil_image.width * 1.5), int(pil_image.height * 1.5))
-            pil_image = pil_image.resize(new_size, Image.LANCZOS)
-            
-            # 增强对比度
-            enhancer = ImageEnhance.Contrast(pil_image)
-            pil_image = enhancer.enhance(1.3)
-            
-            # 增强锐度
-            enhancer = ImageEnhance.Sharpness(pil_image)
-            pil_image = enhancer.enhance(1.3)
-            
-            # 转换回OpenCV格式
-            processed = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
-            
-            return processed
-            
-        except Exception as e:
-            logger.error(f"    图像预处理失败: {e}")
-            return image
+    def _screen_ocr_index(self, preprocess=False):
+        """截取屏幕并返回OCR空间索引（同一画面的识别结果由OCR引擎缓存，如先后查找"记事本"和"notepad"只识别一次）"""
+        screenshot = ImageGrab.grab()
+        screenshot_cv = cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR)
+        return self.ocr_engine.index(screenshot_cv, preprocess=preprocess)
     
-    def _calculate_match_score(self, text, filename):
-        """计算文本匹配度"""
-        if not text or not filename:
-            return 0.0
-        
-        text_lower = text.lower()
-        filename_lower = filename.lower()
+    def _calculate_match_score(self, index, filename):
+        """计算本帧各文本的匹配度 {文本序号: 匹配度}，允许少量识别错误"""
+        scores = {}
         
         # 完全匹配
-        if filename_lower in text_lower:
-            return 1.0
+        for match in index.fuzzy.search(filename):
+            scores[match.index] = match.score
         
         # 部分匹配
-        if any(part in text_lower for part in filename_lower.split('.')):
-            return 0.8
-        
-        # 字符重叠度
-        common_chars = set(text_lower) & set(filename_lower)
-        if len(common_chars) >= min(len(text_lower), len(filename_lower)) * 0.5:
-            return 0.4
+        for part in filename.split('.'):
+            for match in index.fuzzy.search(part) if part else ():
+                scores[match.index] = max(scores.get(match.index, 0.0), 0.8 * match.score)
         
-        return 0.0
-    
-    def _calculate_center(self, bbox):
-        """计算边界框中心点"""
-        try:
-            x1, y1 = bbox[0]
-            x3, y3 = bbox[2]
-            center_x = int((x1 + x3) / 2)
-            center_y = int((y1 + y3) / 2)
-            return (center_x, center_y)
-        except:
-            return (0, 0)
+        return scores
     
     def _try_preset_positions(self):
         """尝试预设位置"""
@@ -391,20 +344,16 @@ class AutomatedFileOpener:
     def _find_menu_option(self, option_text):
         """查找菜单选项"""
         try:
-            # 截取屏幕
-            screenshot = ImageGrab.grab()
-            screenshot_np = np.array(screenshot)
-            screenshot_cv = cv2.cvtColor(screenshot_np, cv2.COLOR_RGB2BGR)
-            
-            # OCR识别
+            # 截取屏幕并OCR识别
             if self.ocr_reader:
-                results = self.ocr_reader.readtext(screenshot_cv, detail=1, paragraph=False)
+                index = self._screen_ocr_index()
                 
-                for bbox, text, confidence in results:
-                    if option_text.lower() in text.lower():
-                        center = self._calculate_center(bbox)
-                        logger.info(f"      找到菜单选项: '{text}' 位置: {center}")
-                        return center
+                match = index.fuzzy.best(option_text)
+                if match:
+                    item = index.items[match.index]
+                    center = calculate_center(item.bbox)
+                    logger.info(f"      找到菜单选项: '{item.text}' 位置: {center}")
+                    return center
             
             return None
             
@@ -440,20 +389,16 @@ class AutomatedFileOpener:
     def _find_application(self, app_name):
         """查找应用程序"""
         try:
-            # 截取屏幕
-            screenshot = ImageGrab.grab()
-            screenshot_np = np.array(screenshot)
-            screenshot_cv = cv2.cvtColor(screenshot_np, cv2.COLOR_RGB2BGR)
-            
-            # OCR识别
+            # 截取屏幕并OCR识别
             if self.ocr_reader:
-                results = self.ocr_reader.readtext(screenshot_cv, detail=1, paragraph=False)
+                index = self._screen_ocr_index()
                 
-                for bbox, text, confidence in results:
-                    if app_name.lower() in text.lower():
-                        center = self._calculate_center(bbox)
-                        logger.info(f"      找到应用程序: '{text}' 位置: {center}")
-                        return center
+                match = index.fuzzy.best(app_name)
+                if match:
+                    item = index.items[match.index]
+                    center = calculate_center(item.bbox)
+                    logger.info(f"      找到应用程序: '{item.text}' 位置: {center}")
+                    return center
             
             return None
             
@@ -0,0 +1,21 @@
+"""
+基准测试公共工具
+"""
+
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+# 项目根目录（标注文件中的帧路径相对该目录）
+project_root = Path(__file__).parent.parent
+
+
+def resolve_path(path: str) -> Path:
+    """解析相对项目根目录的路径"""
+    resolved = Path(path)
+    return resolved if resolved.is_absolute() else project_root / resolved
+
+
+def percentile(values: List[float], q: float) -> float:
+    return float(np.percentile(values, q)) if values else 0.0
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+定位器离线基准测试
+通过回放截图后端把录制帧送入BeikeUILocator，对照标注的目标框统计各策略的
+耗时分位数、命中率与定位误差，并与保存的基线比较，出现回归时以非零状态退出。
+无需Windows桌面，可在Linux无界面环境运行。
+
+用法:
+    python benchmarks/locator_benchmark.py
+    python benchmarks/locator_benchmark.py --ocr                 # 同时测量OCR策略（需已下载easyocr模型）
+    python benchmarks/locator_benchmark.py --update-baseline     # 以本次结果覆盖基线
+    python benchmarks/locator_benchmark.py --no-latency-check    # 只比较命中率与误差（跨机器运行时）
+"""
+
+import sys
+import json
+import math
+import time
+import argparse
+import tempfile
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.utils.config_manager import config_manager
+from src.ui_automation.beike_ui_locator import BeikeUILocator
+from src.ui_automation.capture import ReplayCaptureBackend
+from benchmarks.common import resolve_path, percentile
+
+DEFAULT_GROUND_TRUTH = project_root / "benchmarks" / "data" / "locator_ground_truth.json"
+DEFAULT_BASELINE = project_root / "benchmarks" / "baselines" / "locator_baseline.json"
+
+# 单独测量的策略（顺序即执行顺序），最后再测量auto整体流程
+STRATEGIES = ["image", "color", "ocr", "coordinate"]
+
+# 回归判定容差
+DEFAULT_TOLERANCES = {
+    "hit_rate_drop": 0.02,      # 命中率允许下降的绝对值
+    "latency_ratio": 1.5,       # p90耗时允许为基线的倍数
+    "latency_floor": 0.005,     # p90耗时比较的绝对下限（秒），避免微秒级抖动误报
+    "error_increase": 5.0       # 平均定位误差允许增加的像素数
+}
+
+Box = Tuple[int, int, int, int]
+
+
+def load_ground_truth(path: Path) -> Dict[str, Any]:
+    """
+    加载标注文件
+
+    格式:
+        {
+          "frames": [{"frame": "screenshots/x.png", "targets": {"目标名": {"box": [l, t, r, b]}}}],
+          "templates": {"目标名": {"frame": "screenshots/x.png", "box": [l, t, r, b]}}
+        }
+    帧路径相对项目根目录
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        ground_truth = json.load(f)
+
+    for frame in ground_truth.get("frames", []):
+        frame["path"] = resolve_path(frame["frame"])
+    for template in ground_truth.get("templates", {}).values():
+        template["path"] = resolve_path(template["frame"])
+    return ground_truth
+
+
+def box_center(box: Box) -> Tuple[float, float]:
+    left, top, right, bottom = box
+    return ((left + right) / 2, (top + bottom) / 2)
+
+
+def evaluate(result: Optional[Tuple[int, int]], box: Box) -> Tuple[bool, Optional[float]]:
+    """判定定位结果：是否落在目标框内，以及到目标框中心的距离（像素）"""
+    if result is None:
+        return False, None
+    left, top, right, bottom = box
+    x, y = result
+    center_x, center_y = box_center(box)
+    return (left <= x < right and top <= y < bottom), math.hypot(x - center_x, y - center_y)
+
+
+def write_templates(ground_truth: Dict[str, Any], template_dir: Path):
+    """从标注帧中裁剪模板图像写入临时模板目录"""
+    template_dir.mkdir(parents=True, exist_ok=True)
+    for name, template in ground_truth.get("templates", {}).items():
+        image = cv2.imread(str(template["path"]), cv2.IMREAD_COLOR)
+        if image is None:
+            raise FileNotFoundError(f"无法读取模板帧: {template['path']}")
+        left, top, right, bottom = template["box"]
+        cv2.imwrite(str(template_dir / f"{name}.png"), image[top:bottom, left:right])
+
+
+def build_locator(work_dir: Path, backend: ReplayCaptureBackend, enable_ocr: bool,
+                  seed: int = 0) -> BeikeUILocator:
+    """创建使用回放后端与临时缓存文件的定位器，避免读写项目数据目录；自适应排序使用固定种子"""
+    base = config_manager.get_beike_ui_config()
+
+    def section(name: str, **overrides) -> Dict[str, Any]:
+        return {**base.get(name, {}), **overrides}
+
+    config = {
+        "racing": section("racing", enabled=False),
+        "window_anchor": section("window_anchor", enabled=False, title=""),
+        "adaptive_ordering": section("adaptive_ordering",
+                                     stats_file=str(work_dir / "locator_stats.json"), seed=seed),
+        "coordinate_cache": section("coordinate_cache",
+                                    cache_file=str(work_dir / "coordinate_cache.json")),
+        "color_matching": section("color_matching",
+                                  signature_file=str(work_dir / "color_signatures.json")),
+        "image_templates": section("image_templates", base_path=str(work_dir / "templates"),
+                                   derived_path=str(work_dir / "templates" / ".derived")),
+        "ocr": section("ocr", enabled=enable_ocr)
+    }
+    return BeikeUILocator(config=config, capture_backend=backend)
+
+
+def run_benchmark(ground_truth: Dict[str, Any], enable_ocr: bool = False,
+                  repeat: int = 1, seed: int = 0) -> Dict[str, Any]:
+    """
+    执行基准测试
+
+    Args:
+        ground_truth: load_ground_truth加载的标注
+        enable_ocr: 是否测量OCR策略
+        repeat: 全部帧的重复轮数
+        seed: 自适应排序随机数种子
+
+    Returns:
+        {"strategies": {策略: 汇总}, "frames", "targets", "samples"}
+    """
+    frames = ground_truth["frames"]
+    samples: Dict[str, List[Dict[str, Any]]] = {}
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        work_dir = Path(temp_dir)
+        write_templates(ground_truth, work_dir / "templates")
+        backend = ReplayCaptureBackend([frame["path"] for frame in frames], loop=False)
+        locator = build_locator(work_dir, backend, enable_ocr, seed)
+
+        strategies = [s for s in STRATEGIES if s != "ocr" or locator.ocr_reader is not None]
+        try:
+            for _ in range(repeat):
+                for index, frame in enumerate(frames):
+                    backend.set_frame(index)
+                    for target_name, target in frame["targets"].items():
+                        box = tuple(target["box"])
+                        for method in strategies + ["auto"]:
+                            start = time.perf_counter()
+                            result = locator.locate_element(target_name, method)
+                            duration = time.perf_counter() - start
+
+                            hit, error = evaluate(result, box)
+                            samples.setdefault(method, []).append({
+                                "frame": frame["frame"],
+                                "target": target_name,
+                                "duration": duration,
+                                "hit": hit,
+                                "error": error
+                            })
+        finally:
+            locator.close()
+
+    return {
+        "strategies": {method: summarize(method_samples) for method, method_samples in samples.items()},
+        "frames": len(frames),
+        "targets": sum(len(frame["targets"]) for frame in frames),
+        "samples": samples
+    }
+
+
+def summarize(samples: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """汇总单个策略的样本"""
+    durations = [s["duration"] for s in samples]
+    errors = [s["error"] for s in samples if s["error"] is not None]
+    hits = sum(1 for s in samples if s["hit"])
+    found = len(errors)
+
+    return {
+        "count": len(samples),
+        "hit_rate": hits / len(samples) if samples else 0.0,
+        # 返回了坐标但不在目标框内
+        "false_positives": found - hits,
+        "mean_error": float(np.mean(errors)) if errors else None,
+        "p50": percentile(durations, 50),
+        "p90": percentile(durations, 90),
+        "p99": percentile(durations, 99)
+    }
+
+
+def compare_to_baseline(current: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]],
+                        tolerances: Dict[str, float] = None,
+                        check_latency: bool = True) -> List[str]:
+    """
+    与基线比较
+
+    Args:
+        current: 本次各策略汇总
+        baseline: 基线各策略汇总
+        tolerances: 回归容差，缺省使用DEFAULT_TOLERANCES
+        check_latency: 是否比较耗时
+
+    Returns:
+        回归描述列表，为空表示无回归
+    """
+    tolerances = {**DEFAULT_TOLERANCES, **(tolerances or {})}
+    regressions = []
+
+    for method, base in baseline.items():
+        result = current.get(method)
+        if result is None:
+            # 未测量的策略（如本次未启用OCR）不参与比较
+            continue
+
+        if result["hit_rate"] < base["hit_rate"] - tolerances["hit_rate_drop"]:
+            regressions.append(f"{method}: 命中率 {result['hit_rate']:.2%} < 基线 {base['hit_rate']:.2%}")
+
+        if base.get("mean_error") is not None and result.get("mean_error") is not None:
+            if result["mean_error"] > base["mean_error"] + tolerances["error_increase"]:
+                regressions.append(f"{method}: 平均误差 {result['mean_error']:.1f}px > "
+                                   f"基线 {base['mean_error']:.1f}px")
+
+        if check_latency:
+            limit = max(base["p90"] * tolerances["latency_ratio"], tolerances["latency_floor"])
+            if result["p90"] > limit:
+                regressions.append(f"{method}: p90耗时 {result['p90'] * 1000:.1f}ms > "
+                                   f"允许值 {limit * 1000:.1f}ms")
+
+    return regressions
+
+
+def format_table(strategies: Dict[str, Dict[str, Any]]) -> str:
+    """格式化结果表"""
+    lines = [f"{'策略':<12}{'样本':>6}{'命中率':>9}{'误报':>6}{'误差(px)':>10}"
+             f"{'p50(ms)':>10}{'p90(ms)':>10}{'p99(ms)':>10}"]
+    for method, s in strategies.items():
+        error = f"{s['mean_error']:.1f}" if s["mean_error"] is not None else "-"
+        lines.append(f"{method:<12}{s['count']:>6}{s['hit_rate']:>9.1%}{s['false_positives']:>6}{error:>10}"
+                     f"{s['p50'] * 1000:>10.1f}{s['p90'] * 1000:>10.1f}{s['p99'] * 1000:>10.1f}")
+    return "\n".join(lines)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="定位器离线基准测试")
+    parser.add_argument("--ground-truth", default=str(DEFAULT_GROUND_TRUTH), help="标注文件")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="基线文件")
+    parser.add_argument("--ocr", action="store_true", help="测量OCR策略（需要easyocr模型）")
+    parser.add_argument("--repeat", type=int, default=1, help="重复轮数")
+    parser.add_argument("--seed", type=int, default=0, help="随机数种子")
+    parser.add_argument("--update-baseline", action="store_true", help="以本次结果覆盖基线")
+    parser.add_argument("--no-latency-check", action="store_true", help="不比较耗时")
+    parser.add_argument("--output", help="把完整结果（含逐样本数据）写入JSON文件")
+    args = parser.parse_args(argv)
+
+    ground_truth = load_ground_truth(Path(args.ground_truth))
+    report = run_benchmark(ground_truth, enable_ocr=args.ocr, repeat=args.repeat, seed=args.seed)
+
+    print(f"帧数: {report['frames']}  目标数: {report['targets']}  轮数: {args.repeat}")
+    print(format_table(report["strategies"]))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump({"strategies": report["strategies"], "tolerances": DEFAULT_TOLERANCES},
+                      f, ensure_ascii=False, indent=2)
+        print(f"基线已更新: {baseline_path}")
+        return 0
+
+    if not baseline_path.exists():
+        print(f"基线不存在，跳过比较: {baseline_path}")
+        return 0
+
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+
+    regressions = compare_to_baseline(report["strategies"], baseline["strategies"],
+                                      baseline.get("tolerances"),
+                                      check_latency=not args.no_latency_check)
+    if regressions:
+        print("\n发现性能回归:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        return 1
+
+    print("\n与基线相比无回归")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
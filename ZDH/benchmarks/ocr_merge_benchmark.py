@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+OCR相似文本合并基准测试
+生成文本框密集的合成屏幕（文件列表或表格单元格排布，部分文本带有抖动的重复识别框），
+分别用原逐对比较的合并（字符集重叠启发式）和空间索引聚类合并运行OCR引擎的后处理阶段，
+记录合并与后处理耗时，以及被错误合并掉的文本数和未合并的重复框数。
+
+用法:
+    python benchmarks/ocr_merge_benchmark.py
+    python benchmarks/ocr_merge_benchmark.py --sizes 300 1000 --duplicate-ratio 0.2
+    python benchmarks/ocr_merge_benchmark.py --layouts sheet
+    python benchmarks/ocr_merge_benchmark.py --output reports/ocr_merge.json
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+from pathlib import Path
+from typing import Dict, Any, List, Tuple
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from benchmarks.common import percentile
+from src.ui_automation.ocr_engine import OCREngine, POSTPROCESS_STAGES, merge_text_group, register_postprocess_stage
+
+DEFAULT_SIZES = [100, 300, 600, 1000]
+
+# 排布：(列宽, 行高, 行距)
+LAYOUTS = {
+    "files": (360, 28, 12),     # 文件列表：较长的文件名，原启发式几乎把所有文本并为少数几组
+    "sheet": (80, 22, 6)        # 表格：短单元格文本，原启发式不合并，逐对比较全部完成
+}
+
+# 识别器常见的字符混淆
+CONFUSIONS = {"o": "0", "0": "o", "l": "1", "1": "l", "i": "l", "s": "5", "S": "5", "B": "8", "e": "c"}
+
+NAME_PATTERNS = [
+    "report_{i:03d}.pdf", "IMG_{i:04d}.jpg", "notes_{i}.txt", "data{i}.json",
+    "文档{i}", "项目计划{i}.doc", "Meeting {i}", "screenshot_{i}.png"
+]
+
+CELL_PATTERNS = ["{v}", "{v}%", "¥{v}", "第{v}项", "{v}B"]
+
+
+def _corrupt(text: str, rng: random.Random) -> str:
+    """模拟一次误识别：替换一个易混淆字符"""
+    positions = [i for i, char in enumerate(text) if char in CONFUSIONS]
+    if not positions:
+        return text
+    i = rng.choice(positions)
+    return text[:i] + CONFUSIONS[text[i]] + text[i + 1:]
+
+
+def generate_screen(count: int, duplicate_ratio: float = 0.1, seed: int = 0,
+                    layout: str = "files", width: int = 2880) -> List[Tuple[Any, str, float, int]]:
+    """
+    生成密集屏幕的识别结果
+
+    文本按layout排布（每行多列），duplicate_ratio比例的文本额外产生一个位置抖动、可能带误识别的重复框
+
+    Returns:
+        [(bbox, text, confidence, 真实文本序号)]，重复框与原框的真实文本序号相同
+    """
+    rng = random.Random(seed)
+    column_width, line_height, spacing = LAYOUTS[layout]
+    columns = max(1, width // column_width)
+    results = []
+    truth = 0
+    while len(results) < count:
+        row, column = divmod(truth, columns)
+        if layout == "files":
+            text = rng.choice(NAME_PATTERNS).format(i=truth)
+        else:
+            text = rng.choice(CELL_PATTERNS).format(v=rng.randint(0, 99))
+        left = 20 + column * column_width
+        top = 20 + row * (line_height + spacing)
+        right = left + min(column_width - 8, 14 * len(text))
+        bottom = top + line_height
+        results.append(([[left, top], [right, top], [right, bottom], [left, bottom]],
+                        text, rng.uniform(0.5, 0.99), truth))
+
+        if rng.random() < duplicate_ratio and len(results) < count:
+            dx, dy = rng.randint(-4, 4), rng.randint(-3, 3)
+            results.append(([[left + dx, top + dy], [right + dx, top + dy],
+                             [right + dx, bottom + dy], [left + dx, bottom + dy]],
+                            _corrupt(text, rng), rng.uniform(0.3, 0.9), truth))
+        truth += 1
+    return results
+
+
+def legacy_are_texts_similar(text1: str, text2: str) -> bool:
+    """原相似判断：相同扩展名或字符集重叠"""
+    if not text1 or not text2:
+        return False
+    text1_lower = text1.lower()
+    text2_lower = text2.lower()
+    extensions1 = [ext for ext in ['.json', '.txt', '.doc', '.pdf'] if ext in text1_lower]
+    extensions2 = [ext for ext in ['.json', '.txt', '.doc', '.pdf'] if ext in text2_lower]
+    if extensions1 and extensions2 and extensions1 == extensions2:
+        return True
+    if len(text1_lower) > 3 and len(text2_lower) > 3:
+        common_chars = set(text1_lower) & set(text2_lower)
+        if len(common_chars) >= min(len(text1_lower), len(text2_lower)) * 0.6:
+            return True
+    return False
+
+
+def legacy_merge_similar_texts(engine, results: List[Dict], target_text: str = None) -> List[Dict]:
+    """原逐对比较的合并（O(n²)）"""
+    if len(results) <= 1:
+        return results
+    merged = []
+    used_indices = set()
+    for i, result1 in enumerate(results):
+        if i in used_indices:
+            continue
+        similar_group = [result1]
+        used_indices.add(i)
+        for j, result2 in enumerate(results[i + 1:], i + 1):
+            if j in used_indices:
+                continue
+            if legacy_are_texts_similar(result1['cleaned_text'], result2['cleaned_text']):
+                similar_group.append(result2)
+                used_indices.add(j)
+        if len(similar_group) > 1:
+            merged.append(merge_text_group(similar_group))
+        else:
+            merged.append(result1)
+    return merged
+
+
+def evaluate(merged: List[Dict], truth_of: Dict[int, int], truths: int) -> Dict[str, int]:
+    """统计被错误合并掉的文本数与未合并的重复框数"""
+    kept = [truth_of[id(result['bbox'])] for result in merged]
+    return {
+        "output": len(merged),
+        "lost_texts": truths - len(set(kept)),
+        "duplicates_left": len(kept) - len(set(kept))
+    }
+
+
+def run_benchmark(sizes: List[int], layouts: List[str] = None, duplicate_ratio: float = 0.1,
+                  repeat: int = 5, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    对每种排布、每个屏幕规模分别测量原合并与索引合并
+
+    Returns:
+        [{"layout", "size", "method", "merge_p50_ms", "postprocess_p50_ms", "output", "lost_texts", "duplicates_left"}]
+    """
+    # 合并阶段以外的后处理阶段相同，合并阶段计时
+    merge_times: List[float] = []
+    stages = {
+        "pairwise": legacy_merge_similar_texts,
+        "indexed": POSTPROCESS_STAGES["merge"]
+    }
+    engines = {}
+    for method, stage in stages.items():
+        register_postprocess_stage(f"{method}_merge_timed",
+                                   lambda engine, results, target_text=None, stage=stage:
+                                   _timed(stage, engine, results, target_text, merge_times))
+        engines[method] = OCREngine({"postprocessing": ["clean", "boost", f"{method}_merge_timed", "sort"]})
+
+    rows = []
+    for layout, size in ((layout, size) for layout in layouts or list(LAYOUTS) for size in sizes):
+        screen = generate_screen(size, duplicate_ratio, seed, layout)
+        raw = [(bbox, text, confidence) for bbox, text, confidence, _ in screen]
+        truth_of = {id(bbox): truth for bbox, _, _, truth in screen}
+        truths = len({truth for *_, truth in screen})
+
+        for method, engine in engines.items():
+            merge_times.clear()
+            postprocess_times = []
+            merged = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                merged = engine.postprocess(raw)
+                postprocess_times.append((time.perf_counter() - start) * 1000)
+
+            row = {
+                "layout": layout,
+                "size": size,
+                "method": method,
+                "merge_p50_ms": percentile(merge_times, 50),
+                "postprocess_p50_ms": percentile(postprocess_times, 50)
+            }
+            row.update(evaluate(merged, truth_of, truths))
+            rows.append(row)
+    return rows
+
+
+def _timed(stage, engine, results: List[Dict], target_text: str, times: List[float]) -> List[Dict]:
+    start = time.perf_counter()
+    merged = stage(engine, results, target_text)
+    times.append((time.perf_counter() - start) * 1000)
+    return merged
+
+
+def format_table(rows: List[Dict[str, Any]]) -> str:
+    """格式化结果表"""
+    header = (f"{'排布':<6} {'框数':>6} {'方法':<10} {'合并p50(ms)':>12} {'后处理p50(ms)':>14} {'合并占比':>8} "
+              f"{'输出':>6} {'误合并丢失':>10} {'残留重复':>8}")
+    lines = [header, "-" * len(header)]
+    for row in rows:
+        share = row["merge_p50_ms"] / row["postprocess_p50_ms"] if row["postprocess_p50_ms"] else 0.0
+        lines.append(
+            f"{row['layout']:<6} {row['size']:>6} {row['method']:<10} {row['merge_p50_ms']:>12.2f} "
+            f"{row['postprocess_p50_ms']:>14.2f} {share:>8.0%} {row['output']:>6} "
+            f"{row['lost_texts']:>10} {row['duplicates_left']:>8}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="OCR相似文本合并基准测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="屏幕上的文本框数")
+    parser.add_argument("--layouts", nargs="+", choices=list(LAYOUTS), default=list(LAYOUTS), help="屏幕排布")
+    parser.add_argument("--duplicate-ratio", type=float, default=0.1, help="带重复识别框的文本比例")
+    parser.add_argument("--repeat", type=int, default=5, help="每个规模的重复次数")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--output", help="把完整结果写入JSON文件")
+    args = parser.parse_args(argv)
+
+    rows = run_benchmark(args.sizes, args.layouts, args.duplicate_ratio, args.repeat, args.seed)
+    print(format_table(rows))
+
+    if args.output:
+        output_path = Path(args.output)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "timestamp": time.strftime("%Y%m%d_%H%M%S"),
+                "duplicate_ratio": args.duplicate_ratio,
+                "results": rows
+            }, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+OCR预处理基准测试
+在标注的帧语料上运行各预处理实现及参数网格，记录识别准确率（期望文本召回率、文本相似度）
+与端到端耗时（预处理 + OCR），输出准确率/耗时的Pareto表，用数据选择默认预处理参数。
+
+用法:
+    python benchmarks/ocr_preprocess_benchmark.py                      # 需已下载easyocr模型
+    python benchmarks/ocr_preprocess_benchmark.py --preprocess-only    # 只测预处理耗时（无需模型）
+    python benchmarks/ocr_preprocess_benchmark.py --grid '{"resize": [1.0, 2.0], "contrast": [1.0]}'
+    python benchmarks/ocr_preprocess_benchmark.py --output reports/ocr_preprocess.json
+"""
+
+import re
+import sys
+import json
+import time
+import argparse
+import itertools
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Callable, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image, ImageEnhance, ImageFilter
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from benchmarks.common import resolve_path, percentile
+
+DEFAULT_CORPUS = project_root / "benchmarks" / "data" / "ocr_corpus.json"
+
+# 默认参数网格（与现有实现使用的取值范围一致）
+DEFAULT_GRID = {
+    "resize": [1.0, 1.5, 2.0],
+    "contrast": [1.0, 1.3],
+    "sharpness": [1.0, 1.3],
+    "denoise": [False],
+    "gray": [False, True]
+}
+
+# 各实现调用readtext使用统一参数，只比较预处理本身
+DEFAULT_READTEXT_KWARGS = {"detail": 1, "paragraph": False}
+
+# 检测框中心允许超出期望文本框的像素数
+MATCH_MARGIN = 10
+# 文本相似度达到该值视为识别正确
+MATCH_SIMILARITY = 0.8
+
+Preprocessor = Callable[[np.ndarray], np.ndarray]
+
+
+def load_corpus(path: Path) -> Dict[str, Any]:
+    """
+    加载语料文件
+
+    格式:
+        {"samples": [{"name", "frame": "screenshots/x.png", "region": [l, t, r, b],
+                      "texts": [{"text": "期望文本", "box": [l, t, r, b]}]}]}
+    帧路径相对项目根目录，region与box均为帧内坐标，region缺省为整帧
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        corpus = json.load(f)
+
+    for sample in corpus.get("samples", []):
+        frame = cv2.imread(str(resolve_path(sample["frame"])), cv2.IMREAD_COLOR)
+        if frame is None:
+            raise FileNotFoundError(f"无法读取语料帧: {sample['frame']}")
+        region = sample.get("region")
+        if region:
+            left, top, right, bottom = region
+            frame = frame[top:bottom, left:right]
+        sample["image"] = np.ascontiguousarray(frame)
+        sample["offset"] = tuple(region[:2]) if region else (0, 0)
+    return corpus
+
+
+def _instance_without_reader(cls):
+    """创建不初始化OCR引擎的实例（只使用其预处理方法）"""
+    subclass = type(cls.__name__, (cls,), {"_init_ocr": lambda self: None})
+    return subclass()
+
+
+def existing_variants() -> Tuple[Dict[str, Preprocessor], Dict[str, str]]:
+    """
+    现有的预处理实现
+
+    Returns:
+        ({名称: 预处理函数}, {名称: 无法加载的原因})
+    """
+    loaders = {
+        "ImprovedOCR.preprocess_image": lambda: _instance_without_reader(
+            __import__("src.ui_automation.improved_ocr", fromlist=["ImprovedOCR"]).ImprovedOCR
+        ).preprocess_image,
+        "OptimizedOCRSystem.preprocess_image_optimized": lambda: _instance_without_reader(
+            __import__("optimized_ocr_system").OptimizedOCRSystem
+        ).preprocess_image_optimized,
+        "EnhancedFileFinder._preprocess_image": lambda: _instance_without_reader(
+            __import__("enhanced_file_finder").EnhancedFileFinder
+        )._preprocess_image,
+        "PreprocessPipeline[gray]": lambda: __import__(
+            "src.ui_automation.ocr_preprocess", fromlist=["PreprocessPipeline"]
+        ).PreprocessPipeline({"grayscale_output": True}).run,
+        # 依赖pyautogui，无桌面环境下可能无法导入
+        "EdgeBaiduAutomation._preprocess_image": lambda: _instance_without_reader(
+            __import__("edge_baidu_automation").EdgeBaiduAutomation
+        )._preprocess_image,
+    }
+
+    variants: Dict[str, Preprocessor] = {}
+    unavailable: Dict[str, str] = {}
+    for name, loader in loaders.items():
+        try:
+            variants[name] = loader()
+        except Exception as e:
+            unavailable[name] = f"{type(e).__name__}: {e}"
+    return variants, unavailable
+
+
+def make_grid_variant(resize: float = 1.0, contrast: float = 1.0, sharpness: float = 1.0,
+                      denoise: bool = False, gray: bool = False) -> Preprocessor:
+    """按参数组合构造预处理函数（与现有实现相同的PIL处理链）"""
+    def preprocess(image: np.ndarray) -> np.ndarray:
+        pil_image = Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+        if resize != 1.0:
+            pil_image = pil_image.resize((int(pil_image.width * resize), int(pil_image.height * resize)),
+                                         Image.LANCZOS)
+        if contrast != 1.0:
+            pil_image = ImageEnhance.Contrast(pil_image).enhance(contrast)
+        if sharpness != 1.0:
+            pil_image = ImageEnhance.Sharpness(pil_image).enhance(sharpness)
+        if denoise:
+            pil_image = pil_image.filter(ImageFilter.MedianFilter(size=3))
+        if gray:
+            return np.array(pil_image.convert('L'))
+        return cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
+    return preprocess
+
+
+def grid_variants(grid: Dict[str, List[Any]]) -> Dict[str, Preprocessor]:
+    """展开参数网格"""
+    keys = list(grid)
+    variants = {}
+    for values in itertools.product(*(grid[key] for key in keys)):
+        params = dict(zip(keys, values))
+        label = ",".join(f"{key}={_format_param(value)}" for key, value in params.items())
+        variants[f"grid[{label}]"] = make_grid_variant(**params)
+    return variants
+
+
+def _format_param(value: Any) -> str:
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    return f"{value:g}" if isinstance(value, float) else str(value)
+
+
+def build_variants(grid: Dict[str, List[Any]] = None,
+                   include_existing: bool = True) -> Tuple[Dict[str, Preprocessor], Dict[str, str]]:
+    """全部待测预处理：原图、现有实现与参数网格"""
+    variants: Dict[str, Preprocessor] = {"original": lambda image: image}
+    unavailable: Dict[str, str] = {}
+    if include_existing:
+        existing, unavailable = existing_variants()
+        variants.update(existing)
+    variants.update(grid_variants(DEFAULT_GRID if grid is None else grid))
+    return variants, unavailable
+
+
+def normalize_text(text: str) -> str:
+    return re.sub(r"\s+", "", text or "").lower()
+
+
+def match_texts(expected: List[Dict[str, Any]], detections: List[Tuple[Any, str, float]],
+                scale: Tuple[float, float], offset: Tuple[int, int]) -> List[Dict[str, Any]]:
+    """
+    将检测结果与期望文本对照
+
+    Args:
+        expected: 期望文本 [{"text", "box"}]（帧坐标）
+        detections: readtext结果 [(bbox, text, confidence)]（预处理后图像坐标）
+        scale: 预处理后图像相对原区域的缩放 (x, y)
+        offset: 区域在帧内的左上角
+
+    Returns:
+        每个期望文本的匹配结果 {"text", "found", "similarity", "confidence"}
+    """
+    mapped = []
+    for bbox, text, confidence in detections:
+        xs = [point[0] for point in bbox]
+        ys = [point[1] for point in bbox]
+        center = ((min(xs) + max(xs)) / 2 / scale[0] + offset[0],
+                  (min(ys) + max(ys)) / 2 / scale[1] + offset[1])
+        mapped.append((center, normalize_text(text), confidence))
+
+    matches = []
+    for item in expected:
+        left, top, right, bottom = item["box"]
+        target = normalize_text(item["text"])
+        best_similarity, best_confidence = 0.0, None
+        for (x, y), text, confidence in mapped:
+            if not (left - MATCH_MARGIN <= x <= right + MATCH_MARGIN and
+                    top - MATCH_MARGIN <= y <= bottom + MATCH_MARGIN):
+                continue
+            similarity = 1.0 if target and target in text else SequenceMatcher(None, target, text).ratio()
+            if similarity > best_similarity:
+                best_similarity, best_confidence = similarity, confidence
+        matches.append({
+            "text": item["text"],
+            "found": best_similarity >= MATCH_SIMILARITY,
+            "similarity": best_similarity,
+            "confidence": best_confidence
+        })
+    return matches
+
+
+def run_benchmark(corpus: Dict[str, Any], variants: Dict[str, Preprocessor], reader: Any = None,
+                  repeat: int = 1, readtext_kwargs: Dict[str, Any] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    执行基准测试
+
+    Args:
+        corpus: load_corpus加载的语料
+        variants: {名称: 预处理函数}
+        reader: OCR引擎（提供readtext），为None时只测量预处理
+        repeat: 每个样本的重复次数
+        readtext_kwargs: readtext参数
+
+    Returns:
+        {变体名: 汇总}
+    """
+    readtext_kwargs = {**DEFAULT_READTEXT_KWARGS, **(readtext_kwargs or {})}
+    results = {}
+
+    for name, preprocess in variants.items():
+        preprocess_times, totals, matches = [], [], []
+        output_pixels = 0
+        error = None
+
+        for sample in corpus["samples"]:
+            image = sample["image"]
+            for run in range(repeat):
+                start = time.perf_counter()
+                try:
+                    processed = preprocess(image)
+                except Exception as e:
+                    error = f"{type(e).__name__}: {e}"
+                    break
+                preprocessed_at = time.perf_counter()
+                detections = reader.readtext(processed, **readtext_kwargs) if reader is not None else []
+                end = time.perf_counter()
+
+                preprocess_times.append(preprocessed_at - start)
+                totals.append(end - start)
+                output_pixels = max(output_pixels, processed.shape[0] * processed.shape[1])
+                if reader is not None and run == 0:
+                    scale = (processed.shape[1] / image.shape[1], processed.shape[0] / image.shape[0])
+                    matches.extend(match_texts(sample["texts"], detections, scale, sample["offset"]))
+            if error:
+                break
+
+        results[name] = summarize(preprocess_times, totals, matches, output_pixels,
+                                  reader is not None, error)
+    return results
+
+
+def summarize(preprocess_times: List[float], totals: List[float], matches: List[Dict[str, Any]],
+              output_pixels: int, measured_accuracy: bool, error: Optional[str] = None) -> Dict[str, Any]:
+    """汇总单个预处理变体"""
+    found = [m for m in matches if m["found"]]
+    return {
+        "error": error,
+        "expected": len(matches),
+        "recall": len(found) / len(matches) if measured_accuracy and matches else None,
+        "similarity": float(np.mean([m["similarity"] for m in matches]))
+        if measured_accuracy and matches else None,
+        "mean_confidence": float(np.mean([m["confidence"] for m in found])) if found else None,
+        "preprocess_p50": percentile(preprocess_times, 50),
+        "total_p50": percentile(totals, 50),
+        "total_p90": percentile(totals, 90),
+        "output_pixels": output_pixels,
+        "missed": [m["text"] for m in matches if not m["found"]]
+    }
+
+
+def pareto_front(results: Dict[str, Dict[str, Any]]) -> List[str]:
+    """
+    准确率/耗时的Pareto最优变体
+
+    准确率按 (召回率, 文本相似度) 比较，耗时按端到端p50比较；
+    不被任何其他变体在两方面同时不差且至少一方面更好的变体为最优
+    """
+    candidates = {name: r for name, r in results.items() if not r["error"] and r["recall"] is not None}
+
+    def accuracy(r: Dict[str, Any]) -> Tuple[float, float]:
+        return (r["recall"], r["similarity"])
+
+    front = []
+    for name, r in candidates.items():
+        dominated = any(
+            accuracy(other) >= accuracy(r) and other["total_p50"] <= r["total_p50"] and
+            (accuracy(other) > accuracy(r) or other["total_p50"] < r["total_p50"])
+            for other_name, other in candidates.items() if other_name != name
+        )
+        if not dominated:
+            front.append(name)
+    return sorted(front, key=lambda name: candidates[name]["total_p50"])
+
+
+def format_table(results: Dict[str, Dict[str, Any]], front: List[str]) -> str:
+    """格式化结果表（按端到端耗时排序，*为Pareto最优）"""
+    lines = [f"  {'变体':<58}{'召回率':>8}{'相似度':>8}{'预处理(ms)':>12}{'总耗时p50(ms)':>15}{'输出像素':>12}"]
+    for name, r in sorted(results.items(), key=lambda item: item[1]["total_p50"]):
+        if r["error"]:
+            lines.append(f"  {name:<58}失败: {r['error']}")
+            continue
+        recall = f"{r['recall']:.0%}" if r["recall"] is not None else "-"
+        similarity = f"{r['similarity']:.2f}" if r["similarity"] is not None else "-"
+        mark = "*" if name in front else " "
+        lines.append(f"{mark} {name:<58}{recall:>8}{similarity:>8}{r['preprocess_p50'] * 1000:>12.1f}"
+                     f"{r['total_p50'] * 1000:>15.1f}{r['output_pixels']:>12}")
+    return "\n".join(lines)
+
+
+def create_reader(languages: str = "ch_sim+en"):
+    """创建与各实现相同配置的easyocr引擎"""
+    import easyocr
+    return easyocr.Reader(languages.split('+'), gpu=False, verbose=False)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="OCR预处理基准测试")
+    parser.add_argument("--corpus", default=str(DEFAULT_CORPUS), help="语料文件")
+    parser.add_argument("--grid", help="参数网格JSON，如 '{\"resize\": [1.0, 2.0]}'")
+    parser.add_argument("--no-existing", action="store_true", help="不测量现有实现，只测参数网格")
+    parser.add_argument("--preprocess-only", action="store_true", help="只测量预处理耗时（无需OCR模型）")
+    parser.add_argument("--language", default="ch_sim+en", help="OCR语言")
+    parser.add_argument("--repeat", type=int, default=1, help="每个样本的重复次数")
+    parser.add_argument("--output", help="把完整结果写入JSON文件")
+    args = parser.parse_args(argv)
+
+    corpus = load_corpus(Path(args.corpus))
+    grid = json.loads(args.grid) if args.grid else None
+    variants, unavailable = build_variants(grid, include_existing=not args.no_existing)
+    for name, reason in unavailable.items():
+        print(f"跳过 {name}: {reason}")
+
+    reader = None
+    if not args.preprocess_only:
+        try:
+            reader = create_reader(args.language)
+        except Exception as e:
+            print(f"OCR引擎初始化失败: {e}\n可使用 --preprocess-only 只测量预处理耗时")
+            return 2
+
+    texts = sum(len(sample["texts"]) for sample in corpus["samples"])
+    print(f"样本数: {len(corpus['samples'])}  期望文本: {texts}  变体数: {len(variants)}")
+    results = run_benchmark(corpus, variants, reader, repeat=args.repeat)
+    front = pareto_front(results)
+    print(format_table(results, front))
+    if front:
+        print(f"\nPareto最优（*）: {', '.join(front)}")
+
+    if args.output:
+        output_path = Path(args.output)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "timestamp": time.strftime("%Y%m%d_%H%M%S"),
+                "corpus": str(args.corpus),
+                "preprocess_only": reader is None,
+                "unavailable": unavailable,
+                "pareto_front": front,
+                "results": results
+            }, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,8 +5,7 @@ Edge浏览器自动化测试 - 打开Edge并访问百度网站
 
 import cv2
 import numpy as np
-import easyocr
-from PIL import Image, ImageGrab, ImageEnhance
+from PIL import ImageGrab
 import time
 import os
 import pyautogui
@@ -14,8 +13,14 @@ from pathlib import Path
 import logging
 import subprocess
 import psutil
+import sys
 import warnings
 
+sys.path.insert(0, str(Path(__file__).parent))
+from src.ui_automation.settle_detector import SettleDetector
+from src.ui_automation.ocr_engine import OCREngine, DESKTOP_PREPROCESSING
+from src.utils.config_manager import config_manager
+
 # 忽略PyTorch相关警告
 warnings.filterwarnings("ignore", category=UserWarning, module="torch")
 
@@ -31,12 +36,18 @@ class EdgeBaiduAutomation:
         logger.info("正在初始化Edge浏览器自动化测试器...")
         
         # OCR配置
+        self.ocr_engine = OCREngine({'preprocessing': DESKTOP_PREPROCESSING})
         self.ocr_reader = None
         self._init_ocr()
         
-        # 安全设置
+        # 界面稳定检测：页面加载等待以界面静止为准，而不是固定时长 (ui_automation.settle)
+        self.settle_detector = SettleDetector(config_manager.get_ui_config().get('settle', {}))
+        # 网页加载期间的短暂停顿较多，需要更长的静止时间
+        self.page_quiet_period = 0.8
+        
+        # 安全设置（启用稳定检测时不再需要每次调用后的固定停顿，关闭时恢复原有的0.5秒）
         pyautogui.FAILSAFE = True
-        pyautogui.PAUSE = 0.5  # 增加延迟，确保操作稳定
+        pyautogui.PAUSE = 0.05 if self.settle_detector.enabled else 0.5
         
         # 目标网址
         self.target_url = "www.baidu.com"
@@ -46,7 +57,7 @@ class EdgeBaiduAutomation:
     def _init_ocr(self):
         """初始化OCR"""
         try:
-            self.ocr_reader = easyocr.Reader(['ch_sim', 'en'], gpu=False, verbose=False)
+            self.ocr_reader = self.ocr_engine.load()
             logger.info("✅ OCR初始化成功")
         except Exception as e:
             logger.error(f"❌ OCR初始化失败: {e}")
@@ -297,7 +308,9 @@ class EdgeBaiduAutomation:
             
             # 按回车键
             pyautogui.press('enter')
-            time.sleep(3.0)  # 等待页面加载
+            # 等待页面开始加载并稳定
+            self.settle_detector.wait(baseline=3.0, max_wait=10.0, require_change=True,
+                                      quiet_period=self.page_quiet_period)
             
             logger.info("    ✅ 成功按回车访问网站")
             return True
@@ -308,30 +321,7 @@ class EdgeBaiduAutomation:
     
     def _preprocess_image(self, image):
         """图像预处理"""
-        try:
-            # 转换为PIL图像
-            pil_image = Image.fromarray(cv2.cvtColor(image, cv2.COLOR_RGB2BGR))
-            
-            # 放大图像
-            new_size = (int(pil_image.width * 1.5), int(pil_image.height * 1.5))
-            pil_image = pil_image.resize(new_size, Image.LANCZOS)
-            
-            # 增强对比度
-            enhancer = ImageEnhance.Contrast(pil_image)
-            pil_image = enhancer.enhance(1.3)
-            
-            # 增强锐度
-            enhancer = ImageEnhance.Sharpness(pil_image)
-            pil_image = enhancer.enhance(1.3)
-            
-            # 转换回OpenCV格式
-            processed = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
-            
-            return processed
-            
-        except Exception as e:
-            logger.error(f"    图像预处理失败: {e}")
-            return image
+        return self.ocr_engine.preprocess(image)
     
     def _verify_baidu_loaded(self):
         """验证是否成功访问百度"""
@@ -339,7 +329,8 @@ class EdgeBaiduAutomation:
             logger.info("  验证是否成功访问百度...")
             
             # 等待页面加载
-            time.sleep(5.0)
+            self.settle_detector.wait(baseline=5.0, max_wait=5.0,
+                                      quiet_period=self.page_quiet_period)
             
             # 方法1: 使用OCR检查页面标题
             if self.ocr_reader:
@@ -350,11 +341,8 @@ class EdgeBaiduAutomation:
                     screenshot_np = np.array(screenshot)
                     screenshot_cv = cv2.cvtColor(screenshot_np, cv2.COLOR_RGB2BGR)
                     
-                    # 预处理图像
-                    processed_image = self._preprocess_image(screenshot_cv)
-                    
-                    # OCR识别
-                    results = self.ocr_reader.readtext(processed_image, detail=1, paragraph=False)
+                    # 预处理并识别
+                    results = self.ocr_engine.readtext(screenshot_cv)
                     
                     # 检查是否包含百度相关文本
                     baidu_keywords = ['百度', 'baidu', '百度一下', '搜索']
@@ -396,8 +384,9 @@ class EdgeBaiduAutomation:
             # 方法3: 检查页面是否加载完成
             logger.info("    方法3: 检查页面加载状态")
             try:
-                # 等待一段时间让页面完全加载
-                time.sleep(3.0)
+                # 等待页面完全加载
+                self.settle_detector.wait(baseline=3.0, max_wait=3.0,
+                                          quiet_period=self.page_quiet_period)
                 
                 # 检查是否有加载指示器消失
                 logger.info("    ✅ 页面加载完成")
@@ -413,19 +402,6 @@ class EdgeBaiduAutomation:
             logger.error(f"    验证百度网站加载时发生错误: {e}")
             return False
     
-    def _calculate_center(self, bbox):
-        """计算边界框中心点"""
-        try:
-            x1, y1 = bbox[0]
-            x3, y3 = bbox[2]
-            center_x = int((x1 + x3) / 2)
-            center_y = int((y1 + y3) / 2)
-            return (center_x, center_y)
-        except:
-            return (0, 0)
-    
-
-    
     def run_test_case(self):
         """运行测试用例"""
         print("\n🚀 开始执行Edge浏览器自动化测试用例")
@@ -452,6 +428,9 @@ class EdgeBaiduAutomation:
                 print(f"❌ 未能成功完成自动化操作")
             
             print(f"⏱️  执行时间: {execution_time:.2f}秒")
+            settle_stats = self.settle_detector.report()
+            print(f"⏱️  界面稳定等待: {settle_stats['total_waited']:.2f}秒 "
+                  f"(原固定等待 {settle_stats['total_baseline']:.2f}秒，节省 {settle_stats['time_saved']:.2f}秒)")
             print("=" * 60)
             
             return success
@@ -6,13 +6,26 @@
 
 import cv2
 import numpy as np
-import easyocr
-from PIL import Image, ImageGrab, ImageEnhance, ImageFilter
+from PIL import ImageGrab
 import time
 import os
 from pathlib import Path
 import subprocess
 import re
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent))
+from src.ui_automation.ocr_engine import OCREngine, calculate_center
+
+# 1.5倍放大、增强对比度
+OCR_CONFIG = {
+    'preprocessing': {
+        'stages': [
+            {'name': 'resize', 'factor': 1.5, 'interpolation': 'lanczos'},
+            {'name': 'contrast', 'factor': 1.3}
+        ]
+    }
+}
 
 class EnhancedFileFinder:
     """增强的文件查找系统"""
@@ -22,6 +35,7 @@ class EnhancedFileFinder:
         print("正在初始化增强文件查找系统...")
         
         # OCR配置
+        self.ocr_engine = OCREngine(OCR_CONFIG)
         self.ocr_reader = None
         self._init_ocr()
         
@@ -42,7 +56,7 @@ class EnhancedFileFinder:
     def _init_ocr(self):
         """初始化OCR"""
         try:
-            self.ocr_reader = easyocr.Reader(['ch_sim', 'en'], gpu=False, verbose=False)
+            self.ocr_reader = self.ocr_engine.load()
             print("✅ OCR初始化成功")
         except Exception as e:
             print(f"❌ OCR初始化失败: {e}")
@@ -136,30 +150,19 @@ class EnhancedFileFinder:
             return None
         
         try:
-            # 截取屏幕
-            screenshot = ImageGrab.grab()
-            screenshot_np = np.array(screenshot)
-            screenshot_cv = cv2.cvtColor(screenshot_np, cv2.COLOR_RGB2BGR)
-            
-            # 预处理图像
-            processed_image = self._preprocess_image(screenshot_cv)
-            
-            # OCR识别
-            results = self.ocr_reader.readtext(processed_image, detail=1, paragraph=False)
+            # 截取屏幕并识别（画面未变化时复用已有结果）
+            index = self._screen_ocr_index()
             
             # 分析结果
             best_matches = []
-            for bbox, text, confidence in results:
-                # 计算匹配度
-                match_score = self._calculate_match_score(text, filename, file_type)
-                
+            for item_index, match_score in self._calculate_match_score(index, filename, file_type).items():
                 if match_score > 0.3:  # 降低阈值
-                    center = self._calculate_center(bbox)
+                    item = index.items[item_index]
                     best_matches.append({
-                        'text': text,
-                        'confidence': confidence,
+                        'text': item.text,
+                        'confidence': item.confidence,
                         'match_score': match_score,
-                        'position': center
+                        'position': calculate_center(item.bbox)
                     })
             
             # 按匹配度排序
@@ -176,66 +179,39 @@ class EnhancedFileFinder:
             print(f"   OCR查找失败: {e}")
             return None
     
+    def _screen_ocr_index(self):
+        """截取屏幕，返回预处理后图像OCR结果的索引"""
+        screenshot = ImageGrab.grab()
+        screenshot_cv = cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR)
+        # 精确、模糊查找和桌面分析共享同一画面的识别结果
+        return self.ocr_engine.index(screenshot_cv)
+    
     def _preprocess_image(self, image):
         """图像预处理"""
-        try:
-            # 转换为PIL图像
-            pil_image = Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
-            
-            # 放大图像
-            new_size = (int(pil_image.width * 1.5), int(pil_image.height * 1.5))
-            pil_image = pil_image.resize(new_size, Image.LANCZOS)
-            
-            # 增强对比度
-            enhancer = ImageEnhance.Contrast(pil_image)
-            pil_image = enhancer.enhance(1.3)
-            
-            # 转换回OpenCV格式
-            processed = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
-            
-            return processed
-            
-        except Exception as e:
-            print(f"   图像预处理失败: {e}")
-            return image
+        return self.ocr_engine.preprocess(image)
     
-    def _calculate_match_score(self, text, filename, file_type=None):
-        """计算文本匹配度"""
-        if not text or not filename:
-            return 0.0
+    def _calculate_match_score(self, index, filename, file_type=None):
+        """计算本帧各文本的匹配度 {文本序号: 匹配度}，各级匹配均允许少量识别错误"""
+        scores = {}
         
-        text_lower = text.lower()
-        filename_lower = filename.lower()
+        def add(matches, weight):
+            for match in matches:
+                scores[match.index] = max(scores.get(match.index, 0.0), weight * match.score)
         
         # 完全匹配
-        if filename_lower in text_lower:
-            return 1.0
+        add(index.fuzzy.search(filename), 1.0)
         
         # 部分匹配
-        if any(part in text_lower for part in filename_lower.split('.')):
-            return 0.8
+        for part in filename.split('.'):
+            if part:
+                add(index.fuzzy.search(part), 0.8)
         
         # 文件扩展名匹配
-        if file_type and any(ext in text_lower for ext in self.file_patterns.get(file_type, [])):
-            return 0.6
-        
-        # 字符重叠度
-        common_chars = set(text_lower) & set(filename_lower)
-        if len(common_chars) >= min(len(text_lower), len(filename_lower)) * 0.5:
-            return 0.4
+        if file_type:
+            for ext in self.file_patterns.get(file_type, []):
+                add(index.fuzzy.search(ext, max_distance=0), 0.6)
         
-        return 0.0
-    
-    def _calculate_center(self, bbox):
-        """计算边界框中心点"""
-        try:
-            x1, y1 = bbox[0]
-            x3, y3 = bbox[2]
-            center_x = int((x1 + x3) / 2)
-            center_y = int((y1 + y3) / 2)
-            return (center_x, center_y)
-        except:
-            return (0, 0)
+        return scores
     
     def _find_file_fuzzy(self, filename, file_type=None):
         """模糊匹配查找"""
@@ -243,29 +219,18 @@ class EnhancedFileFinder:
             return None
         
         try:
-            # 截取屏幕
-            screenshot = ImageGrab.grab()
-            screenshot_np = np.array(screenshot)
-            screenshot_cv = cv2.cvtColor(screenshot_np, cv2.COLOR_RGB2BGR)
+            # 截取屏幕并识别（画面未变化时复用已有结果）
+            index = self._screen_ocr_index()
             
-            # 预处理
-            processed_image = self._preprocess_image(screenshot_cv)
-            
-            # OCR识别
-            results = self.ocr_reader.readtext(processed_image, detail=1, paragraph=False)
-            
-            # 模糊匹配
+            # 模糊匹配（使用更宽松的匹配策略）
             fuzzy_matches = []
-            for bbox, text, confidence in results:
-                # 使用更宽松的匹配策略
-                fuzzy_score = self._calculate_fuzzy_score(text, filename, file_type)
-                
+            for item_index, fuzzy_score in self._calculate_fuzzy_score(index, filename, file_type).items():
                 if fuzzy_score > 0.2:  # 更低的阈值
-                    center = self._calculate_center(bbox)
+                    item = index.items[item_index]
                     fuzzy_matches.append({
-                        'text': text,
+                        'text': item.text,
                         'fuzzy_score': fuzzy_score,
-                        'position': center
+                        'position': calculate_center(item.bbox)
                     })
             
             # 按模糊匹配度排序
@@ -282,36 +247,27 @@ class EnhancedFileFinder:
             print(f"   模糊匹配失败: {e}")
             return None
     
-    def _calculate_fuzzy_score(self, text, filename, file_type=None):
-        """计算模糊匹配度"""
-        if not text or not filename:
-            return 0.0
-        
-        text_lower = text.lower()
-        filename_lower = filename.lower()
-        
-        # 分词匹配
-        filename_words = re.findall(r'[a-zA-Z0-9]+', filename_lower)
-        text_words = re.findall(r'[a-zA-Z0-9]+', text_lower)
-        
-        # 计算单词匹配度
-        word_matches = 0
+    def _calculate_fuzzy_score(self, index, filename, file_type=None):
+        """计算本帧各文本的模糊匹配度 {文本序号: 模糊度}"""
+        # 分词匹配：每个单词在各文本中的最佳匹配
+        filename_words = sorted(set(re.findall(r'[a-zA-Z0-9]+', filename.lower())))
+        word_scores = {}
         for word in filename_words:
-            if any(word in tw for tw in text_words):
-                word_matches += 1
+            for match in index.fuzzy.search(word):
+                best = word_scores.setdefault(match.index, {})
+                best[word] = max(best.get(word, 0.0), match.score)
         
-        if filename_words:
-            word_score = word_matches / len(filename_words)
-        else:
-            word_score = 0.0
-        
-        # 字符相似度
-        char_similarity = len(set(text_lower) & set(filename_lower)) / len(set(text_lower) | set(filename_lower))
+        # 整体相似度（放宽编辑距离上限）
+        name_scores = {match.index: match.score
+                       for match in index.fuzzy.search(filename, max_distance=len(filename) // 2)}
         
         # 综合评分
-        fuzzy_score = (word_score * 0.6) + (char_similarity * 0.4)
+        scores = {}
+        for item_index in set(word_scores) | set(name_scores):
+            word_score = sum(word_scores.get(item_index, {}).values()) / len(filename_words) if filename_words else 0.0
+            scores[item_index] = (word_score * 0.6) + (name_scores.get(item_index, 0.0) * 0.4)
         
-        return fuzzy_score
+        return scores
     
     def _try_preset_positions(self, filename):
         """尝试预设位置"""
@@ -341,23 +297,15 @@ class EnhancedFileFinder:
             return
         
         try:
-            # 截取屏幕
-            screenshot = ImageGrab.grab()
-            screenshot_np = np.array(screenshot)
-            screenshot_cv = cv2.cvtColor(screenshot_np, cv2.COLOR_RGB2BGR)
-            
-            # 预处理
-            processed_image = self._preprocess_image(screenshot_cv)
-            
-            # OCR识别
-            results = self.ocr_reader.readtext(processed_image, detail=1, paragraph=False)
+            # 截取屏幕并识别（画面未变化时复用已有结果）
+            results = [item.as_result() for item in self._screen_ocr_index().items]
             
             # 分析结果
             file_like_texts = []
             for bbox, text, confidence in results:
                 # 检查是否像文件名
                 if self._looks_like_filename(text):
-                    center = self._calculate_center(bbox)
+                    center = calculate_center(bbox)
                     file_like_texts.append({
                         'text': text,
                         'confidence': confidence,
@@ -6,11 +6,13 @@
 
 import cv2
 import numpy as np
-import easyocr
-from PIL import Image, ImageGrab, ImageEnhance, ImageFilter
-import time
+from PIL import ImageGrab
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent))
+from src.ui_automation.ocr_engine import OCREngine
+
 class OptimizedOCRSystem:
     """优化的OCR系统"""
     
@@ -18,10 +20,6 @@ class OptimizedOCRSystem:
         """初始化"""
         print("正在初始化优化的OCR系统...")
         
-        # OCR配置
-        self.ocr_reader = None
-        self._init_ocr()
-        
         # 基于测试结果的最佳配置
         self.optimized_config = {
             'preprocessing_method': 'enhance_sharpness',  # 最佳方法
@@ -33,12 +31,36 @@ class OptimizedOCRSystem:
             'morphology_enabled': True  # 启用形态学处理
         }
         
+        # 统一OCR引擎：按最佳配置组装预处理阶段，识别器与按帧识别结果在进程内共享
+        self.ocr_engine = OCREngine(self._engine_config())
+        
+        # OCR配置
+        self.ocr_reader = None
+        self._init_ocr()
+        
         print("✅ 优化的OCR系统初始化完成")
     
+    def _engine_config(self):
+        """由最佳配置生成OCR引擎配置"""
+        stages = [
+            {'name': 'resize', 'factor': self.optimized_config['resize_factor'], 'interpolation': 'lanczos'},
+            {'name': 'contrast', 'factor': self.optimized_config['enhance_contrast']},
+            {'name': 'sharpen', 'factor': self.optimized_config['enhance_sharpness']}
+        ]
+        if self.optimized_config['denoise_enabled']:
+            stages.append({'name': 'denoise', 'size': 3})
+        if self.optimized_config['morphology_enabled']:
+            stages.append({'name': 'morphology', 'kernel': 2})
+        return {
+            'confidence_threshold': self.optimized_config['confidence_threshold'],
+            'preprocessing': {'stages': stages},
+            'postprocessing': ['clean', 'boost', 'sort']
+        }
+    
     def _init_ocr(self):
         """初始化OCR"""
         try:
-            self.ocr_reader = easyocr.Reader(['ch_sim', 'en'], gpu=False, verbose=False)
+            self.ocr_reader = self.ocr_engine.load()
             print("✅ OCR初始化成功")
         except Exception as e:
             print(f"❌ OCR初始化失败: {e}")
@@ -46,148 +68,13 @@ class OptimizedOCRSystem:
     
     def preprocess_image_optimized(self, image):
         """优化的图像预处理"""
-        try:
-            # 转换为PIL图像
-            pil_image = Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
-            
-            # 1. 适度放大
-            new_size = (int(pil_image.width * self.optimized_config['resize_factor']),
-                       int(pil_image.height * self.optimized_config['resize_factor']))
-            pil_image = pil_image.resize(new_size, Image.LANCZOS)
-            
-            # 2. 增强对比度
-            enhancer = ImageEnhance.Contrast(pil_image)
-            pil_image = enhancer.enhance(self.optimized_config['enhance_contrast'])
-            
-            # 3. 增强锐度（最佳方法）
-            enhancer = ImageEnhance.Sharpness(pil_image)
-            pil_image = enhancer.enhance(self.optimized_config['enhance_sharpness'])
-            
-            # 4. 降噪处理
-            if self.optimized_config['denoise_enabled']:
-                pil_image = pil_image.filter(ImageFilter.MedianFilter(size=3))
-            
-            # 5. 形态学处理
-            if self.optimized_config['morphology_enabled']:
-                gray_array = np.array(pil_image.convert('L'))
-                kernel = np.ones((2, 2), np.uint8)
-                gray_array = cv2.morphologyEx(gray_array, cv2.MORPH_CLOSE, kernel)
-                pil_image = Image.fromarray(gray_array)
-            
-            # 转换回OpenCV格式
-            processed_image = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
-            
-            return processed_image
-            
-        except Exception as e:
-            print(f"图像预处理失败: {e}")
-            return image
+        return self.ocr_engine.preprocess(image)
     
     def recognize_text_optimized(self, image, target_text=None):
-        """优化的文本识别"""
+        """优化的文本识别，返回按提升后置信度排序的增强结果"""
         if not self.ocr_reader:
             return []
-        
-        try:
-            # 优化的预处理
-            processed_image = self.preprocess_image_optimized(image)
-            
-            # OCR识别
-            results = self.ocr_reader.readtext(
-                processed_image,
-                detail=1,
-                paragraph=False
-            )
-            
-            # 结果后处理
-            enhanced_results = []
-            for bbox, text, confidence in results:
-                # 清理文本
-                cleaned_text = self._clean_text(text)
-                
-                # 提升置信度
-                boosted_confidence = self._boost_confidence(confidence, cleaned_text, target_text)
-                
-                # 计算中心点
-                center = self._calculate_center(bbox)
-                
-                enhanced_results.append({
-                    'bbox': bbox,
-                    'original_text': text,
-                    'cleaned_text': cleaned_text,
-                    'confidence': confidence,
-                    'boosted_confidence': boosted_confidence,
-                    'center': center,
-                    'area': self._calculate_area(bbox)
-                })
-            
-            # 按提升后的置信度排序
-            enhanced_results.sort(key=lambda x: x['boosted_confidence'], reverse=True)
-            
-            return enhanced_results
-            
-        except Exception as e:
-            print(f"OCR识别失败: {e}")
-            return []
-    
-    def _clean_text(self, text):
-        """清理文本"""
-        if not text:
-            return ""
-        
-        # 去除噪声字符
-        noise_chars = ['|', '\\', '/', '-', '_', '=', '+', '*', '&', '^', '%', '$', '#', '@', '!']
-        cleaned = text
-        for char in noise_chars:
-            cleaned = cleaned.replace(char, '')
-        
-        # 去除多余空格
-        cleaned = ' '.join(cleaned.split())
-        return cleaned.strip()
-    
-    def _boost_confidence(self, confidence, text, target_text=None):
-        """提升置信度"""
-        boosted = confidence
-        
-        # 基于文本长度提升
-        if len(text) >= 3:
-            boosted += 0.1
-        
-        # 基于文件扩展名提升
-        if any(ext in text.lower() for ext in ['.txt', '.json', '.doc', '.pdf']):
-            boosted += 0.15
-        
-        # 基于文本质量提升
-        if text.isalnum():
-            boosted += 0.1
-        
-        # 基于目标匹配提升
-        if target_text and target_text.lower() in text.lower():
-            boosted += 0.2
-        
-        return min(boosted, 1.0)
-    
-    def _calculate_center(self, bbox):
-        """计算中心点"""
-        try:
-            x1, y1 = bbox[0]
-            x3, y3 = bbox[2]
-            center_x = int((x1 + x3) / 2)
-            center_y = int((y1 + y3) / 2)
-            return (center_x, center_y)
-        except:
-            return (0, 0)
-    
-    def _calculate_area(self, bbox):
-        """计算面积"""
-        try:
-            x1, y1 = bbox[0]
-            x3, y3 = bbox[2]
-            width = abs(x3 - x1)
-            height = abs(y3 - y1)
-            return width * height
-        except:
-            return 0
+        return self.ocr_engine.recognize(image, target_text)
     
     def find_text_optimized(self, image, target_text, min_confidence=0.5):
         """优化的文本查找"""
@@ -9,6 +9,7 @@ import requests
 from typing import Dict, Any, Optional, List
 from src.utils.logger import get_logger
 from src.utils.config_manager import config_manager
+from src.utils.metrics import metrics
 
 
 class ClaudeClient:
@@ -330,6 +331,7 @@ class ClaudeClient:
                 # 记录响应时间
                 response_time = time.time() - start_time
                 self.logger.log_ai_request(request_type, prompt[:100], response_time)
+                metrics.observe_span("ai_call", response_time, action=request_type)
                 
                 return result
                 
@@ -7,6 +7,7 @@ import asyncio
 import uvicorn
 from fastapi import FastAPI, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, JSONResponse
 from pydantic import BaseModel
 from typing import Dict, Any, List, Optional
 import json
@@ -15,6 +16,8 @@ from pathlib import Path
 
 from src.utils.logger import get_logger
 from src.utils.config_manager import config_manager
+from src.utils.metrics import metrics
+from src.utils.sampling_profiler import SamplingProfiler
 from src.ai_interface.claude_client import ClaudeClient
 from src.orchestrator.test_executor import TestExecutor
 from src.ui_automation.ui_executor import UIExecutor
@@ -38,6 +41,8 @@ class TestExecutionRequest(BaseModel):
     environment: str = "default"
     data_overrides: Optional[Dict[str, Any]] = None
     beike_ui_config: Optional[Dict[str, Any]] = None
+    trace: Optional[bool] = None  # 记录Chrome Trace Event时间线
+    profile: Optional[bool] = None  # 在cProfile下执行每个步骤
 
 
 class TestSuiteExecutionRequest(BaseModel):
@@ -46,6 +51,8 @@ class TestSuiteExecutionRequest(BaseModel):
     data_overrides: Optional[Dict[str, Any]] = None
     beike_ui_config: Optional[Dict[str, Any]] = None
     parallel: bool = True
+    trace: Optional[bool] = None
+    profile: Optional[bool] = None
 
 
 # 创建FastAPI应用
@@ -69,6 +76,7 @@ logger = get_logger("Orchestrator")
 ai_client: Optional[ClaudeClient] = None
 test_executor: Optional[TestExecutor] = None
 ui_executor: Optional[UIExecutor] = None
+sampling_profiler = SamplingProfiler(config_manager.get_monitoring_config().get('sampling_profiler', {}))
 
 
 @app.on_event("startup")
@@ -87,6 +95,10 @@ async def startup_event():
         # 验证配置
         config_manager.validate()
         
+        # 长时间运行时持续采样
+        if config_manager.get_monitoring_config().get('sampling_profiler', {}).get('enabled', False):
+            sampling_profiler.start()
+        
         logger.info("系统启动成功")
         
     except Exception as e:
@@ -103,6 +115,8 @@ async def shutdown_event():
         if test_executor:
             test_executor.shutdown()
         
+        sampling_profiler.stop()
+        
         logger.info("系统已关闭")
         
     except Exception as e:
@@ -132,6 +146,16 @@ async def health_check():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# 性能指标
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """以Prometheus文本格式输出热点路径耗时直方图"""
+    return PlainTextResponse(
+        metrics.render_prometheus(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 # 业务流程分析
 @app.post("/api/v1/analyze")
 async def analyze_business_flow(request: BusinessFlowAnalysisRequest):
@@ -221,7 +245,9 @@ async def execute_test_case(request: TestExecutionRequest):
             test_case=test_case,
             environment=request.environment,
             data_overrides=request.data_overrides,
-            beike_ui_config=request.beike_ui_config
+            beike_ui_config=request.beike_ui_config,
+            trace=request.trace,
+            profile=request.profile
         )
         
         return {
@@ -251,7 +277,9 @@ async def execute_test_suite(request: TestSuiteExecutionRequest):
             environment=request.environment,
             data_overrides=request.data_overrides,
             beike_ui_config=request.beike_ui_config,
-            parallel=request.parallel
+            parallel=request.parallel,
+            trace=request.trace,
+            profile=request.profile
         )
         
         return {
@@ -287,6 +315,30 @@ async def get_execution_status(execution_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# 执行轨迹
+@app.get("/api/v1/execute/{execution_id}/trace")
+async def get_execution_trace(execution_id: str):
+    """下载执行轨迹（Chrome Trace Event JSON，可在chrome://tracing或Perfetto中打开）"""
+    try:
+        if not test_executor:
+            raise HTTPException(status_code=500, detail="测试执行器未初始化")
+        
+        trace = test_executor.get_execution_trace(execution_id)
+        if trace is None:
+            raise HTTPException(status_code=404, detail="执行记录不存在或未记录轨迹")
+        
+        return JSONResponse(
+            content=trace,
+            headers={"Content-Disposition": f'attachment; filename="trace_{execution_id}.json"'}
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"获取执行轨迹失败: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # 执行摘要
 @app.get("/api/v1/execute/summary")
 async def get_execution_summary():
@@ -479,6 +531,38 @@ async def reload_config():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# 采样性能分析（管理接口）
+@app.get("/api/v1/admin/profiler")
+async def get_profiler_status(limit: int = 20):
+    """采样分析器状态、实测开销与热点函数"""
+    return {**sampling_profiler.status(), "top_frames": sampling_profiler.top_frames(limit)}
+
+
+@app.post("/api/v1/admin/profiler/start")
+async def start_profiler(reset: bool = False):
+    """启动采样分析器"""
+    if reset:
+        sampling_profiler.reset()
+    sampling_profiler.start()
+    return sampling_profiler.status()
+
+
+@app.post("/api/v1/admin/profiler/stop")
+async def stop_profiler():
+    """停止采样分析器（保留已聚合数据）"""
+    sampling_profiler.stop()
+    return sampling_profiler.status()
+
+
+@app.get("/api/v1/admin/profiler/collapsed", response_class=PlainTextResponse)
+async def get_profiler_collapsed(thread: Optional[str] = None, reset: bool = False):
+    """折叠栈文本，可直接输入flamegraph.pl或speedscope生成火焰图"""
+    text = sampling_profiler.collapsed(thread)
+    if reset:
+        sampling_profiler.reset()
+    return PlainTextResponse(text)
+
+
 # 系统信息接口
 @app.get("/api/v1/system/info")
 async def get_system_info():
@@ -11,6 +11,9 @@ from pathlib import Path
 import json
 from src.utils.logger import get_logger
 from src.utils.config_manager import config_manager
+from src.utils.metrics import metrics
+from src.utils import tracing
+from src.utils.step_profiler import StepProfiler
 from src.ui_automation.ui_executor import UIExecutor
 from src.ai_interface.claude_client import ClaudeClient
 
@@ -35,6 +38,13 @@ class TestExecutor:
         self.max_retries = self.config.get('retry', {}).get('max_attempts', 3)
         self.retry_delay = self.config.get('retry', {}).get('delay_between_attempts', 5)
         
+        # 执行轨迹（Chrome Trace Event格式），按执行或配置启用
+        self.tracing_config = config_manager.get_monitoring_config().get('tracing', {})
+        self.traces: Dict[str, tracing.TraceRecorder] = {}
+        
+        # 步骤性能分析（仅对标记的执行启用）
+        self.step_profiler = StepProfiler(self.config.get('profiling', {}))
+        
         # 执行状态
         self.executions: Dict[str, Dict[str, Any]] = {}
         self.execution_queue: List[Dict[str, Any]] = []
@@ -48,21 +58,33 @@ class TestExecutor:
     def execute_test_case(self, test_case: Dict[str, Any], 
                          environment: str = "default",
                          data_overrides: Dict[str, Any] = None,
-                         beike_ui_config: Dict[str, Any] = None) -> str:
+                         beike_ui_config: Dict[str, Any] = None,
+                         trace: bool = None,
+                         profile: bool = None) -> str:
         """
         执行单个测试用例
         
         Args:
             test_case: 测试用例
             environment: 测试环境
-            data_overrides: 数据覆盖
+            data_overrides: 数据覆盖（可包含 "trace": true 启用轨迹记录，
+                            "profile": true 启用步骤性能分析）
             beike_ui_config: 贝壳库UI配置
+            trace: 是否记录执行轨迹，默认按data_overrides和monitoring.tracing配置
+            profile: 是否在cProfile下执行每个步骤，默认按data_overrides
             
         Returns:
             执行ID
         """
         execution_id = str(uuid.uuid4())
         
+        if trace is None:
+            trace = bool((data_overrides or {}).get('trace', self.tracing_config.get('enabled', False)))
+        if trace:
+            self.traces[execution_id] = tracing.TraceRecorder(
+                execution_id, self.tracing_config.get('max_events', 100000)
+            )
+        
         # 创建执行记录
         execution_record = {
             "id": execution_id,
@@ -77,7 +99,11 @@ class TestExecutor:
             "results": [],
             "screenshots": [],
             "logs": [],
-            "errors": []
+            "errors": [],
+            "trace_enabled": bool(trace),
+            "profile_enabled": bool(profile if profile is not None
+                                    else (data_overrides or {}).get('profile', False)),
+            "profiles": []
         }
         
         self.executions[execution_id] = execution_record
@@ -96,7 +122,9 @@ class TestExecutor:
                           environment: str = "default",
                           data_overrides: Dict[str, Any] = None,
                           beike_ui_config: Dict[str, Any] = None,
-                          parallel: bool = True) -> List[str]:
+                          parallel: bool = True,
+                          trace: bool = None,
+                          profile: bool = None) -> List[str]:
         """
         执行测试套件
         
@@ -106,6 +134,8 @@ class TestExecutor:
             data_overrides: 数据覆盖
             beike_ui_config: 贝壳库UI配置
             parallel: 是否并行执行
+            trace: 是否记录执行轨迹
+            profile: 是否进行步骤性能分析
             
         Returns:
             执行ID列表
@@ -117,7 +147,7 @@ class TestExecutor:
             futures = []
             for test_case in test_cases:
                 execution_id = self.execute_test_case(
-                    test_case, environment, data_overrides, beike_ui_config
+                    test_case, environment, data_overrides, beike_ui_config, trace, profile
                 )
                 execution_ids.append(execution_id)
             
@@ -128,7 +158,7 @@ class TestExecutor:
             # 串行执行
             for test_case in test_cases:
                 execution_id = self.execute_test_case(
-                    test_case, environment, data_overrides, beike_ui_config
+                    test_case, environment, data_overrides, beike_ui_config, trace, profile
                 )
                 execution_ids.append(execution_id)
                 
@@ -139,6 +169,12 @@ class TestExecutor:
     
     def _execute_test_case_worker(self, execution_id: str):
         """测试用例执行工作线程"""
+        with tracing.activate(self.traces.get(execution_id)):
+            with metrics.span("test_case"):
+                self._run_test_case(execution_id)
+    
+    def _run_test_case(self, execution_id: str):
+        """执行测试用例的前置条件、步骤与后置条件"""
         execution = self.executions[execution_id]
         test_case = execution["test_case"]
         
@@ -151,7 +187,9 @@ class TestExecutor:
             self.logger.info(f"开始执行测试用例: {test_case.get('name', 'Unknown')}")
             
             # 执行前置条件
-            if not self._execute_preconditions(test_case, execution):
+            with metrics.span("preconditions"):
+                preconditions_ok = self._execute_preconditions(test_case, execution)
+            if not preconditions_ok:
                 execution["status"] = "failed"
                 execution["errors"].append("前置条件执行失败")
                 return
@@ -171,7 +209,8 @@ class TestExecutor:
                         break
             
             # 执行后置条件
-            self._execute_postconditions(test_case, execution)
+            with metrics.span("postconditions"):
+                self._execute_postconditions(test_case, execution)
             
             # 确定最终状态
             if execution["status"] != "failed":
@@ -203,6 +242,21 @@ class TestExecutor:
     
     def _execute_test_step(self, step: Dict[str, Any], 
                           execution: Dict[str, Any]) -> Dict[str, Any]:
+        """执行测试步骤（标记性能分析的执行在cProfile下运行）"""
+        if not execution.get("profile_enabled"):
+            return self._run_test_step(step, execution)
+        
+        step_id = step.get('step_id', 'unknown')
+        step_result, report = self.step_profiler.run(
+            f"{execution['id']}/step_{step_id}", self._run_test_step, step, execution
+        )
+        step_result["profile"] = report
+        if report.get("prof_path"):
+            execution["profiles"].append(report["prof_path"])
+        return step_result
+    
+    def _run_test_step(self, step: Dict[str, Any], 
+                       execution: Dict[str, Any]) -> Dict[str, Any]:
         """执行测试步骤"""
         step_id = step.get('step_id', 'unknown')
         action = step.get('action', '')
@@ -289,6 +343,8 @@ class TestExecutor:
             # 记录步骤完成
             step_result["end_time"] = time.time()
             step_result["duration"] = step_result["end_time"] - step_result["start_time"]
+            metrics.observe_span("step", step_result["duration"], action=action,
+                                 result="passed" if step_result["success"] else "failed")
             
             status = "成功" if step_result["success"] else "失败"
             self.logger.log_test_step(
@@ -375,6 +431,13 @@ class TestExecutor:
         """获取执行状态"""
         return self.executions.get(execution_id)
     
+    def get_execution_trace(self, execution_id: str) -> Optional[Dict[str, Any]]:
+        """获取执行轨迹（Chrome Trace Event JSON），未记录轨迹返回None"""
+        recorder = self.traces.get(execution_id)
+        if recorder is None:
+            return None
+        return recorder.to_chrome_trace()
+    
     def get_all_executions(self) -> List[Dict[str, Any]]:
         """获取所有执行记录"""
         return list(self.executions.values())
@@ -431,6 +494,7 @@ class TestExecutor:
                 self.stop_execution(execution_id)
             
             del self.executions[execution_id]
+            self.traces.pop(execution_id, None)
             if execution_id in self.execution_queue:
                 self.execution_queue.remove(execution_id)
         
@@ -448,8 +512,9 @@ class TestExecutor:
                 report_path = f"data/reports/execution_{execution_id}.json"
                 Path(report_path).parent.mkdir(parents=True, exist_ok=True)
                 
-                with open(report_path, 'w', encoding='utf-8') as f:
-                    json.dump(execution, f, ensure_ascii=False, indent=2)
+                with metrics.span("artifact_write", action="report"):
+                    with open(report_path, 'w', encoding='utf-8') as f:
+                        json.dump(execution, f, ensure_ascii=False, indent=2)
                 
                 return report_path
             
@@ -476,4 +541,7 @@ class TestExecutor:
         # 关闭线程池
         self.executor.shutdown(wait=True)
         
+        # 输出性能指标摘要
+        metrics.log_summary()
+        
         self.logger.info("测试执行器已关闭")
@@ -3,32 +3,118 @@
 实现多层级识别策略：图像识别 > 坐标定位 > 颜色匹配 > OCR文本
 """
 
+import os
+import threading
 import cv2
 import numpy as np
 import easyocr
 from pathlib import Path
 from typing import Optional, Tuple, Dict, Any, List
-from PIL import Image, ImageGrab
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from PIL import Image
 import time
 from src.utils.logger import get_logger
 from src.utils.config_manager import config_manager
+from src.utils.metrics import metrics
+from src.utils import tracing
+from src.ui_automation.color_signature import ColorSignatureStore
+from src.ui_automation.template_store import TemplateStore, TemplateData
+from src.ui_automation.coordinate_store import CoordinateStore, ANY_SCREEN
+from src.ui_automation.window_rect import WindowRectProvider
+from src.ui_automation.strategy_stats import StrategyStats
+from src.ui_automation.capture import (
+    CaptureBackend, Frame, create_capture_backend, frame_origin, grab_frame, to_frame_point, to_screen_point
+)
+from src.ui_automation.two_stage_ocr import TwoStageOCR
+from src.ui_automation.ocr_spatial_index import OCRIndexCache, OCRSpatialIndex
+from src.ui_automation.ocr_engine import open_reader, reader_closed, shared_index_cache
+from src.ui_automation.ocr_lexicon import build_lexicon
 
 
 class BeikeUILocator:
     """贝壳库UI定位器"""
     
-    def __init__(self):
-        """初始化定位器"""
+    # 策略名 -> 定位方法名
+    STRATEGY_METHODS = {
+        'image_recognition': '_locate_by_image',
+        'coordinate_positioning': '_locate_by_coordinate',
+        'color_matching': '_locate_by_color',
+        'ocr_text': '_locate_by_ocr'
+    }
+    
+    STRATEGY_LABELS = {
+        'image_recognition': '图像识别',
+        'coordinate_positioning': '坐标',
+        'color_matching': '颜色匹配',
+        'ocr_text': 'OCR'
+    }
+    
+    # 基于截图的策略（竞速模式下并发执行）
+    FRAME_STRATEGIES = ('image_recognition', 'color_matching', 'ocr_text')
+    
+    # 策略名作为指定方法时的别名
+    METHOD_ALIASES = {
+        'image_recognition': 'image',
+        'coordinate_positioning': 'coordinate',
+        'color_matching': 'color',
+        'ocr_text': 'ocr'
+    }
+    
+    def __init__(self, config: Dict[str, Any] = None, capture_backend: CaptureBackend = None):
+        """
+        初始化定位器
+        
+        Args:
+            config: 覆盖beike_ui配置的配置段（按顶层键覆盖，如基准测试使用临时缓存路径）
+            capture_backend: 截图后端，默认按beike_ui.capture配置创建
+        """
         self.logger = get_logger("BeikeUILocator")
-        self.config = config_manager.get_beike_ui_config()
+        self.config = {**config_manager.get_beike_ui_config(), **(config or {})}
+        
+        # 图像识别配置：ui_automation.image_recognition，可被beike_ui.image_recognition覆盖
+        self.image_config: Dict[str, Any] = {
+            **config_manager.get_ui_config().get('image_recognition', {}),
+            **self.config.get('image_recognition', {})
+        }
+        
+        # 坐标缓存配置：ui_automation.coordinate_positioning，可被beike_ui.coordinate_cache覆盖
+        self.coordinate_config: Dict[str, Any] = {
+            **config_manager.get_ui_config().get('coordinate_positioning', {}),
+            **self.config.get('coordinate_cache', {})
+        }
         
         # 初始化组件
-        self.template_images: Dict[str, np.ndarray] = {}
-        self.coordinate_cache: Dict[str, Tuple[int, int]] = {}
+        self.template_images: Optional[TemplateStore] = None
+        self.coordinate_cache: Optional[CoordinateStore] = None
         self.color_patterns: Dict[str, Dict[str, Any]] = {}
+        self.color_signatures = ColorSignatureStore(self.config.get('color_matching', {}))
+        self.last_screenshot: Optional[np.ndarray] = None
+        capture_config = self.config.get('capture', {})
+        self.capture_backend: CaptureBackend = capture_backend or create_capture_backend(
+            capture_config.get('backend', 'auto'), capture_config
+        )
+        # window: 只截取被测窗口矩形，识别结果换算回屏幕坐标
+        self.capture_scope = capture_config.get('scope', 'screen')
+        self.adaptive_config: Dict[str, Any] = self.config.get('adaptive_ordering', {})
+        self.strategy_stats = StrategyStats(self.adaptive_config)
+        
+        # 竞速模式：基于截图的策略并发执行，取第一个可信结果
+        self.racing_config: Dict[str, Any] = self.config.get('racing', {})
+        self._race_pool: Optional[ThreadPoolExecutor] = None
+        self._race_pool_lock = threading.Lock()
+        self._screen_key: Optional[str] = None
+        self._screen_key_time = 0.0
+        
+        # 窗口锚定：坐标缓存按被测窗口的相对位置存储
+        self.window_config: Dict[str, Any] = self.config.get('window_anchor', {})
+        self.window_provider = WindowRectProvider(ttl=self.window_config.get('rect_ttl', 0.5))
+        if self.window_config.get('title'):
+            self.window_provider.attach(title=self.window_config['title'])
         
         # 初始化OCR
         self.ocr_reader = None
+        self.two_stage_ocr: Optional[TwoStageOCR] = None
+        self.ocr_index_cache: Optional[OCRIndexCache] = None
         if self.config.get('ocr', {}).get('enabled', True):
             self._init_ocr()
         
@@ -37,14 +123,34 @@ class BeikeUILocator:
     
     def _init_ocr(self):
         """初始化OCR"""
+        self.two_stage_ocr = None
+        self.ocr_index_cache = None
         try:
             languages = self.config.get('ocr', {}).get('language', 'ch_sim+en')
-            self.ocr_reader = easyocr.Reader(languages.split('+'))
+            # 识别器在进程内共享（启用OCR服务时连接常驻的服务进程），同一语言的模型只加载一次
+            self.ocr_reader = open_reader(languages.split('+'), self.config.get('ocr', {}).get('server'),
+                                          easyocr.Reader)
             self.logger.info("OCR初始化成功")
+            
+            # 两阶段识别：检测一次后只识别候选框（需要识别器提供detect/recognize，OCR服务客户端只提供readtext）
+            two_stage_config = self.config.get('ocr', {}).get('two_stage', {})
+            if two_stage_config.get('enabled', True) and hasattr(self.ocr_reader, 'detect'):
+                self.two_stage_ocr = TwoStageOCR(self.ocr_reader, two_stage_config)
+            
+            # 整帧识别结果的空间索引，按帧缓存供使用同一识别器的各调用方共享
+            self.ocr_index_cache = shared_index_cache(
+                self.ocr_reader, self.config.get('ocr', {}).get('spatial_index', {})
+            )
         except Exception as e:
             self.logger.warning(f"OCR初始化失败: {e}")
             self.ocr_reader = None
     
+    def _ensure_ocr(self):
+        """共享识别器已关闭（OCR服务等待超时后作废）时重新取识别器，并重建依赖它的两阶段识别与索引缓存"""
+        if self.ocr_reader is not None and reader_closed(self.ocr_reader):
+            self.logger.info("OCR识别器已关闭，重新连接")
+            self._init_ocr()
+    
     def _load_config(self):
         """加载配置"""
         # 加载坐标缓存
@@ -58,35 +164,56 @@ class BeikeUILocator:
     
     def _load_coordinate_cache(self):
         """加载坐标缓存"""
-        cache_config = self.config.get('coordinate_cache', {})
-        if cache_config.get('enabled', True):
-            cache_file = Path("data/coordinate_cache.json")
-            if cache_file.exists():
+        self.coordinate_cache = CoordinateStore(
+            cache_file=self.coordinate_config.get('cache_file', 'data/coordinate_cache.json'),
+            expiry=self.coordinate_config.get('cache_expiry', 3600),
+            validation_interval=self.coordinate_config.get('validation_interval', 300),
+            flush_delay=self.coordinate_config.get('flush_delay', 1.0),
+            screen_key_provider=self._get_screen_key
+        )
+    
+    def _get_screen_key(self) -> str:
+        """当前屏幕键 "宽x高@DPI"，用于区分不同分辨率下的坐标缓存"""
+        now = time.time()
+        if self._screen_key is not None and now - self._screen_key_time < 5:
+            return self._screen_key
+        
+        screen_key = ANY_SCREEN
+        try:
+            backend_size = self.capture_backend.screen_size()
+            if backend_size is not None:
+                # 回放等后端自带屏幕尺寸
+                screen_key = f"{backend_size[0]}x{backend_size[1]}@96"
+            elif os.name == 'nt':
+                import ctypes
+                user32 = ctypes.windll.user32
+                width, height = user32.GetSystemMetrics(0), user32.GetSystemMetrics(1)
                 try:
-                    import json
-                    with open(cache_file, 'r', encoding='utf-8') as f:
-                        self.coordinate_cache = json.load(f)
-                    self.logger.info(f"加载坐标缓存: {len(self.coordinate_cache)} 项")
-                except Exception as e:
-                    self.logger.warning(f"加载坐标缓存失败: {e}")
+                    dpi = user32.GetDpiForSystem()
+                except AttributeError:
+                    dpi = 96
+                screen_key = f"{width}x{height}@{dpi}"
+            elif self.last_screenshot is not None and not isinstance(self.last_screenshot, Frame):
+                height, width = self.last_screenshot.shape[:2]
+                screen_key = f"{width}x{height}@96"
+        except Exception as e:
+            self.logger.debug(f"获取屏幕信息失败: {e}")
+        
+        self._screen_key = screen_key
+        self._screen_key_time = now
+        return screen_key
     
     def _load_image_templates(self):
-        """加载图像模板"""
+        """建立图像模板库（仅索引文件，模板在首次使用时加载）"""
         template_config = self.config.get('image_templates', {})
-        base_path = Path(template_config.get('base_path', 'data/templates'))
         
-        if base_path.exists():
-            for template_file in base_path.glob("*.png"):
-                template_name = template_file.stem
-                try:
-                    template = cv2.imread(str(template_file))
-                    if template is not None:
-                        self.template_images[template_name] = template
-                        self.logger.debug(f"加载图像模板: {template_name}")
-                except Exception as e:
-                    self.logger.warning(f"加载图像模板失败 {template_name}: {e}")
-        
-        self.logger.info(f"加载图像模板: {len(self.template_images)} 个")
+        self.template_images = TemplateStore(
+            base_path=template_config.get('base_path', 'data/templates'),
+            cache_size=self.image_config.get('template_cache_size', 100),
+            derived_path=template_config.get('derived_path'),
+            pyramid_levels=self.image_config.get('pyramid_levels', 1),
+            build_edges=self.image_config.get('match_edges', False)
+        )
     
     def _load_color_patterns(self):
         """加载颜色模式"""
@@ -120,7 +247,8 @@ class BeikeUILocator:
         
         Args:
             target_name: 目标元素名称
-            method: 定位方法 ("auto", "image", "coordinate", "color", "ocr")
+            method: 定位方法 ("auto", "race", "image", "coordinate", "color", "ocr"，
+                    也可使用策略名如 "image_recognition")
             
         Returns:
             元素坐标 (x, y)，未找到返回None
@@ -128,43 +256,46 @@ class BeikeUILocator:
         start_time = time.time()
         
         try:
-            if method == "auto":
+            if method == "race" or (method == "auto" and self.racing_config.get('enabled', False)):
+                recognition_priority = self.config.get('recognition_priority', [
+                    'image_recognition', 'coordinate_positioning', 
+                    'color_matching', 'ocr_text'
+                ])
+                if self.adaptive_config.get('enabled', True):
+                    recognition_priority = self.strategy_stats.order(target_name, recognition_priority)
+                
+                result = self._locate_by_race(target_name, recognition_priority)
+                if result is None:
+                    self.logger.warning(f"所有定位方法都失败: {target_name}")
+                return result
+            
+            elif method == "auto":
                 # 按优先级尝试不同方法
                 recognition_priority = self.config.get('recognition_priority', [
                     'image_recognition', 'coordinate_positioning', 
                     'color_matching', 'ocr_text'
                 ])
                 
+                # 自适应排序：按该目标历史成功率与耗时的期望代价排序
+                if self.adaptive_config.get('enabled', True):
+                    recognition_priority = self.strategy_stats.order(target_name, recognition_priority)
+                
                 for method_name in recognition_priority:
-                    if method_name == 'image_recognition':
-                        result = self._locate_by_image(target_name)
-                        if result:
-                            self.logger.info(f"图像识别定位成功: {target_name}")
-                            return result
+                    if method_name not in self.STRATEGY_METHODS:
+                        continue
                     
-                    elif method_name == 'coordinate_positioning':
-                        result = self._locate_by_coordinate(target_name)
-                        if result:
-                            self.logger.info(f"坐标定位成功: {target_name}")
-                            return result
-                    
-                    elif method_name == 'color_matching':
-                        result = self._locate_by_color(target_name)
-                        if result:
-                            self.logger.info(f"颜色匹配定位成功: {target_name}")
-                            return result
-                    
-                    elif method_name == 'ocr_text':
-                        result = self._locate_by_ocr(target_name)
-                        if result:
-                            self.logger.info(f"OCR定位成功: {target_name}")
-                            return result
+                    result = self._run_strategy(target_name, method_name)
+                    if result:
+                        self.logger.info(f"{self.STRATEGY_LABELS[method_name]}定位成功: {target_name}")
+                        self._on_strategy_success(target_name, method_name, result)
+                        return result
                 
                 self.logger.warning(f"所有定位方法都失败: {target_name}")
                 return None
             
             else:
                 # 使用指定方法
+                method = self.METHOD_ALIASES.get(method, method)
                 if method == "image":
                     return self._locate_by_image(target_name)
                 elif method == "coordinate":
@@ -184,36 +315,165 @@ class BeikeUILocator:
         finally:
             duration = time.time() - start_time
             self.logger.debug(f"定位耗时: {duration:.3f}秒")
+            metrics.observe_span("locate_element", duration, target=target_name, action=method)
+    
+    def _run_strategy(self, target_name: str, method_name: str,
+                      screenshot: Optional[np.ndarray] = None,
+                      cancel: Optional[threading.Event] = None) -> Optional[Tuple[int, int]]:
+        """执行单个定位策略并记录成功率与耗时（cancel置位后放弃，结果不计入统计）"""
+        locate = getattr(self, self.STRATEGY_METHODS[method_name])
+        
+        strategy_start = time.time()
+        if screenshot is not None and method_name in self.FRAME_STRATEGIES:
+            result = locate(target_name, screenshot=screenshot, cancel=cancel)
+        else:
+            result = locate(target_name)
+        
+        if cancel is not None and cancel.is_set():
+            return None
+        
+        duration = time.time() - strategy_start
+        metrics.observe_span("locate", duration, strategy=method_name, target=target_name,
+                             result="hit" if result is not None else "miss")
+        if self.adaptive_config.get('enabled', True):
+            self.strategy_stats.record(target_name, method_name, result is not None, duration)
+        return result
+    
+    def _get_race_pool(self) -> ThreadPoolExecutor:
+        """竞速线程池（延迟创建）"""
+        with self._race_pool_lock:
+            if self._race_pool is None:
+                self._race_pool = ThreadPoolExecutor(
+                    max_workers=self.racing_config.get('max_workers', len(self.FRAME_STRATEGIES)),
+                    thread_name_prefix="locator-race"
+                )
+            return self._race_pool
+    
+    def _retire_race_pool(self, pool: ThreadPoolExecutor):
+        """不再向仍有落败策略在运行的线程池提交任务，下次竞速使用新线程池"""
+        with self._race_pool_lock:
+            if self._race_pool is pool:
+                self._race_pool = None
+        pool.shutdown(wait=False)
+    
+    def _locate_by_race(self, target_name: str, priority: List[str]) -> Optional[Tuple[int, int]]:
+        """
+        竞速定位：坐标缓存先行，未命中时在同一张截图上并发执行其余策略
+        
+        第一个成功结果出现后，再等待tie_break_window秒让优先级更高且仍在运行的策略完成，
+        最终取优先级最高的成功结果；未开始的策略被取消，仍在运行的策略经取消事件在下一个
+        检查点退出，其结果被丢弃
+        """
+        if 'coordinate_positioning' in priority:
+            result = self._run_strategy(target_name, 'coordinate_positioning')
+            if result:
+                self.logger.info(f"坐标定位成功: {target_name}")
+                return result
+        
+        frame_strategies = [m for m in priority if m in self.FRAME_STRATEGIES]
+        if not frame_strategies:
+            return None
+        
+        screenshot = self._capture_screen()
+        if screenshot is None:
+            return None
+        
+        pool = self._get_race_pool()
+        cancel = threading.Event()
+        # 竞速线程继承调用方的轨迹上下文
+        futures = {
+            pool.submit(tracing.bind_context(self._run_strategy),
+                        target_name, method_name, screenshot, cancel): method_name
+            for method_name in frame_strategies
+        }
+        
+        tie_break_window = self.racing_config.get('tie_break_window', 0.05)
+        deadline = time.time() + self.racing_config.get('timeout', 30)
+        tie_deadline = None
+        results: Dict[str, Tuple[int, int]] = {}
+        pending = set(futures)
+        
+        while pending:
+            remaining = (tie_deadline or deadline) - time.time()
+            if remaining <= 0:
+                break
+            
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    self.logger.error(f"竞速策略失败 {futures[future]}: {e}")
+                    result = None
+                if result:
+                    results[futures[future]] = result
+            
+            if results:
+                best_rank = min(frame_strategies.index(m) for m in results)
+                higher_running = any(frame_strategies.index(futures[f]) < best_rank for f in pending)
+                if not higher_running:
+                    break
+                if tie_deadline is None:
+                    tie_deadline = min(deadline, time.time() + tie_break_window)
+        
+        cancel.set()
+        running = [future for future in pending if not future.cancel() and not future.done()]
+        if running:
+            # 单次识别调用无法中断，落败策略可能还要运行一段时间，后续竞速不在其后排队
+            self._retire_race_pool(pool)
+        
+        if not results:
+            return None
+        
+        winner = min(results, key=frame_strategies.index)
+        result = results[winner]
+        self.logger.info(f"{self.STRATEGY_LABELS[winner]}定位成功(竞速): {target_name}")
+        self._on_strategy_success(target_name, winner, result)
+        return result
+    
+    def _on_strategy_success(self, target_name: str, method_name: str, result: Tuple[int, int]):
+        """定位成功后的学习：颜色签名与坐标缓存"""
+        if method_name in ('image_recognition', 'ocr_text'):
+            self._learn_color_signature(target_name, result)
+        # 颜色匹配只凭颜色分布判断，单独命中不足以写入坐标缓存
+        if method_name not in ('coordinate_positioning', 'color_matching'):
+            self._auto_update_coordinate_cache(target_name, result)
     
-    def _locate_by_image(self, target_name: str) -> Optional[Tuple[int, int]]:
+    def _locate_by_image(self, target_name: str, screenshot: Optional[np.ndarray] = None,
+                         cancel: Optional[threading.Event] = None) -> Optional[Tuple[int, int]]:
         """通过图像模板匹配定位元素"""
         if target_name not in self.template_images:
             self.logger.warning(f"图像模板不存在: {target_name}")
             return None
         
         try:
-            # 截取屏幕
-            screenshot = self._capture_screen()
-            if screenshot is None:
+            # 获取模板（首次使用时加载并预计算）
+            template = self.template_images.get(target_name)
+            if template is None:
                 return None
             
-            # 获取模板
-            template = self.template_images[target_name]
+            if template.std < 1e-3:
+                self.logger.warning(f"图像模板无纹理，无法匹配: {target_name}")
+                return None
             
-            # 模板匹配
-            confidence_threshold = self.config.get('image_recognition', {}).get('confidence_threshold', 0.8)
+            # 截取屏幕（竞速模式下由调用方传入共享截图）
+            if screenshot is None:
+                screenshot = self._capture_screen()
+            if screenshot is None:
+                return None
             
-            result = cv2.matchTemplate(screenshot, template, cv2.TM_CCOEFF_NORMED)
-            min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
+            # 模板匹配
+            confidence_threshold = self.image_config.get('confidence_threshold', 0.8)
+            max_val, max_loc = self._match_template(screenshot, template, confidence_threshold, cancel)
             
             if max_val >= confidence_threshold:
                 # 计算中心点
-                h, w = template.shape[:2]
+                w, h = template.size
                 center_x = max_loc[0] + w // 2
                 center_y = max_loc[1] + h // 2
                 
                 self.logger.debug(f"图像匹配成功: {target_name}, 置信度: {max_val:.3f}")
-                return (center_x, center_y)
+                return to_screen_point(screenshot, (center_x, center_y))
             else:
                 self.logger.debug(f"图像匹配失败: {target_name}, 置信度: {max_val:.3f}")
                 return None
@@ -222,26 +482,140 @@ class BeikeUILocator:
             self.logger.error(f"图像定位失败 {target_name}: {e}")
             return None
     
+    def _match_template(self, screenshot: np.ndarray, template: TemplateData, confidence_threshold: float,
+                        cancel: Optional[threading.Event] = None) -> Tuple[float, Tuple[int, int]]:
+        """
+        金字塔由粗到细的模板匹配
+        
+        Returns:
+            (最高得分, 左上角坐标)，竞速已结束时粗匹配后放弃，返回粗匹配结果
+        """
+        screen_gray = cv2.cvtColor(screenshot, cv2.COLOR_BGR2GRAY)
+        match_edges = template.edges is not None
+        
+        def prepare(image: np.ndarray) -> np.ndarray:
+            return cv2.Canny(image, 50, 150) if match_edges else image
+        
+        level = len(template.pyramid) - 1
+        full_template = template.edges if match_edges else template.gray
+        
+        if level == 0:
+            result = cv2.matchTemplate(prepare(screen_gray), full_template, cv2.TM_CCOEFF_NORMED)
+            _, max_val, _, max_loc = cv2.minMaxLoc(result)
+            return max_val, max_loc
+        
+        # 粗匹配：在缩小的屏幕上定位候选位置
+        screen_level = screen_gray
+        for _ in range(level):
+            screen_level = cv2.pyrDown(screen_level)
+        coarse_template = template.pyramid[level]
+        if match_edges:
+            coarse_template = cv2.Canny(np.ascontiguousarray(coarse_template), 50, 150)
+        
+        result = cv2.matchTemplate(prepare(screen_level), coarse_template, cv2.TM_CCOEFF_NORMED)
+        _, coarse_val, _, coarse_loc = cv2.minMaxLoc(result)
+        
+        coarse_slack = self.image_config.get('coarse_slack', 0.15)
+        if coarse_val < confidence_threshold - coarse_slack or (cancel is not None and cancel.is_set()):
+            return coarse_val, coarse_loc
+        
+        # 精匹配：在原始分辨率的候选区域内确认
+        scale = 2 ** level
+        pad = 2 * scale
+        w, h = template.size
+        screen_h, screen_w = screen_gray.shape[:2]
+        x1 = max(0, coarse_loc[0] * scale - pad)
+        y1 = max(0, coarse_loc[1] * scale - pad)
+        x2 = min(screen_w, coarse_loc[0] * scale + w + pad)
+        y2 = min(screen_h, coarse_loc[1] * scale + h + pad)
+        
+        roi = prepare(screen_gray[y1:y2, x1:x2])
+        if roi.shape[0] < h or roi.shape[1] < w:
+            return coarse_val, (coarse_loc[0] * scale, coarse_loc[1] * scale)
+        
+        result = cv2.matchTemplate(roi, full_template, cv2.TM_CCOEFF_NORMED)
+        _, max_val, _, max_loc = cv2.minMaxLoc(result)
+        return max_val, (x1 + max_loc[0], y1 + max_loc[1])
+    
+    def attach_window(self, window: Any = None, title: str = None, key: str = None):
+        """
+        关联被测应用窗口，之后的坐标缓存以窗口相对坐标存储
+        
+        Args:
+            window: pywinauto窗口对象 (如 UIExecutor.current_window)
+            title: 窗口标题正则
+            key: 窗口缓存键
+        """
+        self.window_provider.attach(window=window, title=title, key=key)
+    
+    def _get_window_rect(self) -> Optional[Tuple[int, int, int, int]]:
+        """获取被测窗口矩形，未启用窗口锚定或窗口不可用时返回None"""
+        if not self.window_config.get('enabled', True):
+            return None
+        return self.window_provider.get_rect()
+    
+    def _get_window_screen_key(self) -> str:
+        """窗口相对坐标的缓存键: window:窗口键@DPI"""
+        dpi = self._get_screen_key().rpartition('@')[2] or "96"
+        return f"window:{self.window_provider.window_key}@{dpi}"
+    
     def _locate_by_coordinate(self, target_name: str) -> Optional[Tuple[int, int]]:
         """通过缓存坐标定位元素"""
-        if target_name in self.coordinate_cache:
-            coordinates = self.coordinate_cache[target_name]
-            self.logger.debug(f"坐标缓存命中: {target_name}")
-            return coordinates
+        if not self.coordinate_config.get('enabled', True):
+            return None
+        
+        entry = None
+        window_rect = self._get_window_rect()
+        if window_rect is not None:
+            entry = self.coordinate_cache.get_entry(target_name, self._get_window_screen_key(),
+                                                    fallback_any=False)
         
-        self.logger.debug(f"坐标缓存未命中: {target_name}")
-        return None
+        if entry is not None:
+            # 窗口相对坐标按当前窗口矩形换算
+            coordinates = self.window_provider.to_screen(
+                (entry["x"], entry["y"]), tuple(entry["window_size"]), window_rect
+            )
+            left, top, right, bottom = window_rect
+            if not (left <= coordinates[0] < right and top <= coordinates[1] < bottom):
+                self.logger.debug(f"窗口相对坐标超出窗口范围: {target_name}")
+                return None
+        else:
+            entry = self.coordinate_cache.get_entry(target_name)
+            if entry is None:
+                self.logger.debug(f"坐标缓存未命中: {target_name}")
+                return None
+            coordinates = (entry["x"], entry["y"])
+        
+        # 超过校验间隔的条目需重新确认仍在屏幕范围内
+        if self.coordinate_cache.needs_validation(entry):
+            if not self.validate_coordinates(target_name, coordinates):
+                self.coordinate_cache.remove(target_name, entry["screen"])
+                return None
+            self.coordinate_cache.mark_validated(entry)
+        
+        self.logger.debug(f"坐标缓存命中: {target_name}")
+        return coordinates
     
-    def _locate_by_color(self, target_name: str) -> Optional[Tuple[int, int]]:
+    def _locate_by_color(self, target_name: str, screenshot: Optional[np.ndarray] = None,
+                         cancel: Optional[threading.Event] = None) -> Optional[Tuple[int, int]]:
         """通过颜色模式定位元素"""
         try:
-            # 截取屏幕
-            screenshot = self._capture_screen()
+            # 截取屏幕（竞速模式下由调用方传入共享截图）
+            if screenshot is None:
+                screenshot = self._capture_screen()
             if screenshot is None:
                 return None
             
+            # 优先使用学习到的颜色签名
+            result = self.color_signatures.locate(target_name, screenshot)
+            if result:
+                self.logger.debug(f"颜色签名匹配成功: {target_name}")
+                return to_screen_point(screenshot, result)
+            
             # 查找匹配的颜色模式
             for pattern_name, pattern in self.color_patterns.items():
+                if cancel is not None and cancel.is_set():
+                    return None
                 if target_name.lower() in pattern_name.lower():
                     primary_color = pattern['primary']
                     tolerance = pattern['tolerance']
@@ -266,7 +640,7 @@ class BeikeUILocator:
                             center_y = int(M["m01"] / M["m00"])
                             
                             self.logger.debug(f"颜色匹配成功: {target_name}, 模式: {pattern_name}")
-                            return (center_x, center_y)
+                            return to_screen_point(screenshot, (center_x, center_y))
             
             self.logger.debug(f"颜色匹配失败: {target_name}")
             return None
@@ -275,24 +649,48 @@ class BeikeUILocator:
             self.logger.error(f"颜色定位失败 {target_name}: {e}")
             return None
     
-    def _locate_by_ocr(self, target_name: str) -> Optional[Tuple[int, int]]:
+    def _locate_by_ocr(self, target_name: str, screenshot: Optional[np.ndarray] = None,
+                       cancel: Optional[threading.Event] = None) -> Optional[Tuple[int, int]]:
         """通过OCR文本识别定位元素"""
+        self._ensure_ocr()
         if self.ocr_reader is None:
             self.logger.warning("OCR未初始化")
             return None
         
         try:
-            # 截取屏幕
-            screenshot = self._capture_screen()
+            # 截取屏幕（竞速模式下由调用方传入共享截图）
+            if screenshot is None:
+                screenshot = self._capture_screen()
             if screenshot is None:
                 return None
             
+            ocr_config = self.config.get('ocr', {})
+            confidence_threshold = ocr_config.get('confidence_threshold', 0.7)
+            
+            # 受限识别：只解码目标及已知词汇中的字符，结果吸附到最接近的词条
+            constrained_config = ocr_config.get('constrained', {})
+            allowlist = None
+            if constrained_config.get('enabled', False):
+                lexicon = build_lexicon([target_name], constrained_config)
+                allowlist = lexicon.allowlist
+                matcher = lambda text: (lexicon.snap(text) or (None,))[0] == target_name
+            else:
+                matcher = lambda text: target_name.lower() in text.lower()
+            
             # OCR识别
-            results = self.ocr_reader.readtext(screenshot)
-            confidence_threshold = self.config.get('ocr', {}).get('confidence_threshold', 0.7)
+            if self.two_stage_ocr is not None:
+                with metrics.span("ocr_inference", target=target_name, action="two_stage"):
+                    match = self.two_stage_ocr.find(screenshot, target_name, confidence_threshold,
+                                                    matcher=matcher, allowlist=allowlist, cancel=cancel)
+                results = [match] if match else []
+            elif cancel is not None and cancel.is_set():
+                return None
+            else:
+                with metrics.span("ocr_inference", target=target_name):
+                    results = self.ocr_reader.readtext(screenshot, allowlist=allowlist)
             
             for (bbox, text, confidence) in results:
-                if confidence >= confidence_threshold and target_name.lower() in text.lower():
+                if confidence >= confidence_threshold and matcher(text):
                     # 计算文本中心点
                     top_left = bbox[0]
                     bottom_right = bbox[2]
@@ -301,7 +699,7 @@ class BeikeUILocator:
                     center_y = int((top_left[1] + bottom_right[1]) / 2)
                     
                     self.logger.debug(f"OCR识别成功: {target_name}, 文本: {text}, 置信度: {confidence:.3f}")
-                    return (center_x, center_y)
+                    return to_screen_point(screenshot, (center_x, center_y))
             
             self.logger.debug(f"OCR识别失败: {target_name}")
             return None
@@ -310,51 +708,127 @@ class BeikeUILocator:
             self.logger.error(f"OCR定位失败 {target_name}: {e}")
             return None
     
-    def _capture_screen(self) -> Optional[np.ndarray]:
-        """截取屏幕"""
+    def ocr_index(self, screenshot: Optional[np.ndarray] = None) -> Optional[OCRSpatialIndex]:
+        """
+        获取整帧OCR结果的空间索引（同一帧只识别一次）
+        
+        Args:
+            screenshot: 截图，默认截取当前屏幕
+            
+        Returns:
+            空间索引（屏幕坐标），OCR不可用或截图失败时返回None
+        """
+        self._ensure_ocr()
+        if self.ocr_index_cache is None:
+            return None
+        
         try:
-            # 使用PIL截屏
-            screenshot = ImageGrab.grab()
-            screenshot_np = np.array(screenshot)
+            if screenshot is None:
+                screenshot = self._capture_screen()
+            if screenshot is None:
+                return None
+            # 缓存按帧内容共享，区域截图的结果在取出后平移到屏幕坐标
+            return self.ocr_index_cache.get(screenshot).translated(*frame_origin(screenshot))
+        
+        except Exception as e:
+            self.logger.error(f"构建OCR空间索引失败: {e}")
+            return None
+    
+    def locate_texts(self, targets: List[str],
+                     screenshot: Optional[np.ndarray] = None) -> Dict[str, Optional[Tuple[int, int]]]:
+        """
+        批量定位多个文本（整帧识别一次，经模糊匹配索引查找各目标，允许少量识别错误）
+        
+        Args:
+            targets: 目标文本列表
+            screenshot: 截图，默认截取当前屏幕
             
-            # 转换为OpenCV格式 (BGR)
-            screenshot_cv = cv2.cvtColor(screenshot_np, cv2.COLOR_RGB2BGR)
+        Returns:
+            {目标文本: 中心坐标或None}
+        """
+        located: Dict[str, Optional[Tuple[int, int]]] = {target: None for target in targets}
+        index = self.ocr_index(screenshot)
+        if index is None:
+            return located
+        
+        confidence_threshold = self.config.get('ocr', {}).get('confidence_threshold', 0.7)
+        for target in targets:
+            for match in index.fuzzy.search(target):
+                item = index.items[match.index]
+                if item.confidence >= confidence_threshold:
+                    located[target] = (int(item.center[0]), int(item.center[1]))
+                    break
+        
+        self.logger.debug(f"批量文本定位: {sum(v is not None for v in located.values())}/{len(targets)}")
+        return located
+    
+    def _capture_region(self) -> Optional[Tuple[int, int, int, int]]:
+        """截图区域：窗口范围截图时为被测窗口矩形，窗口不可用或整屏截图时为None"""
+        if self.capture_scope != 'window':
+            return None
+        return self.window_provider.get_rect()
+    
+    def _capture_screen(self) -> Optional[np.ndarray]:
+        """截取屏幕（窗口范围截图时只截取被测窗口，返回的Frame记录窗口在屏幕上的原点）"""
+        try:
+            region = self._capture_region()
+            with metrics.span("capture", action=self.capture_backend.name):
+                # 截图后端返回OpenCV格式 (BGR)
+                screenshot_cv = grab_frame(self.capture_backend, region)
+            if screenshot_cv is None:
+                return None
+            if self.capture_backend.reuses_buffer:
+                # 截图会被竞速线程和颜色签名学习继续使用，不能随后端缓冲区被下次截图覆盖
+                screenshot_cv = screenshot_cv.copy()
             
+            self.last_screenshot = screenshot_cv
             return screenshot_cv
         
         except Exception as e:
             self.logger.error(f"截屏失败: {e}")
             return None
     
-    def update_coordinate_cache(self, target_name: str, coordinates: Tuple[int, int]):
-        """更新坐标缓存"""
-        self.coordinate_cache[target_name] = coordinates
-        
-        # 保存到文件
-        cache_file = Path("data/coordinate_cache.json")
-        cache_file.parent.mkdir(parents=True, exist_ok=True)
-        
+    def _learn_color_signature(self, target_name: str, coordinates: Tuple[int, int]):
+        """根据成功定位时的截图学习目标颜色签名"""
         try:
-            import json
-            with open(cache_file, 'w', encoding='utf-8') as f:
-                json.dump(self.coordinate_cache, f, ensure_ascii=False, indent=2)
+            size = None
+            if target_name in self.template_images:
+                template = self.template_images.get(target_name)
+                size = template.size if template is not None else None
+            
+            self.color_signatures.learn(target_name, self.last_screenshot,
+                                        to_frame_point(self.last_screenshot, coordinates), size)
         except Exception as e:
-            self.logger.warning(f"保存坐标缓存失败: {e}")
+            self.logger.debug(f"学习颜色签名失败 {target_name}: {e}")
+    
+    def _auto_update_coordinate_cache(self, target_name: str, coordinates: Tuple[int, int]):
+        """识别定位成功后按配置自动刷新坐标缓存"""
+        if self.coordinate_config.get('auto_update', True):
+            self.update_coordinate_cache(target_name, coordinates)
+    
+    def update_coordinate_cache(self, target_name: str, coordinates: Tuple[int, int]):
+        """更新坐标缓存（写入文件经过防抖与原子替换）"""
+        window_rect = self._get_window_rect()
+        if window_rect is not None:
+            left, top, right, bottom = window_rect
+            if left <= coordinates[0] < right and top <= coordinates[1] < bottom:
+                offset = self.window_provider.to_relative(coordinates, window_rect)
+                self.coordinate_cache.set(
+                    target_name, offset, self._get_window_screen_key(),
+                    extra={"window_size": [right - left, bottom - top]}
+                )
+                return
+        
+        self.coordinate_cache.set(target_name, coordinates)
     
     def add_image_template(self, target_name: str, template_path: str):
         """添加图像模板"""
         try:
             template = cv2.imread(template_path)
             if template is not None:
-                self.template_images[target_name] = template
-                self.logger.info(f"添加图像模板: {target_name}")
-                
                 # 保存到模板目录
-                template_dir = Path(self.config.get('image_templates', {}).get('base_path', 'data/templates'))
-                template_dir.mkdir(parents=True, exist_ok=True)
-                
-                save_path = template_dir / f"{target_name}.png"
-                cv2.imwrite(str(save_path), template)
+                self.template_images.add(target_name, template)
+                self.logger.info(f"添加图像模板: {target_name}")
             else:
                 self.logger.error(f"加载图像模板失败: {template_path}")
         
@@ -365,7 +839,11 @@ class BeikeUILocator:
         """验证坐标有效性"""
         try:
             # 检查坐标是否在屏幕范围内
-            screen_width, screen_height = ImageGrab.grab().size
+            screen_size = self.capture_backend.screen_size()
+            if screen_size is None:
+                height, width = self.capture_backend.grab().shape[:2]
+                screen_size = (width, height)
+            screen_width, screen_height = screen_size
             
             x, y = coordinates
             if 0 <= x < screen_width and 0 <= y < screen_height:
@@ -378,21 +856,35 @@ class BeikeUILocator:
             self.logger.error(f"验证坐标失败 {target_name}: {e}")
             return False
     
+    def close(self):
+        """释放资源：关闭竞速线程池并写入未保存的缓存与统计"""
+        with self._race_pool_lock:
+            if self._race_pool is not None:
+                self._race_pool.shutdown(wait=False, cancel_futures=True)
+                self._race_pool = None
+        self.coordinate_cache.close()
+        self.strategy_stats.save()
+        self.color_signatures.save()
+        self.capture_backend.close()
+    
     def get_element_info(self, target_name: str) -> Dict[str, Any]:
         """获取元素信息"""
+        cached_coordinates = self._locate_by_coordinate(target_name)
         info = {
             "name": target_name,
             "has_template": target_name in self.template_images,
-            "has_coordinates": target_name in self.coordinate_cache,
+            "has_coordinates": cached_coordinates is not None,
+            "has_color_signature": self.color_signatures.has_signature(target_name),
             "template_size": None,
             "cached_coordinates": None
         }
         
         if target_name in self.template_images:
-            template = self.template_images[target_name]
-            info["template_size"] = (template.shape[1], template.shape[0])
+            template = self.template_images.get(target_name)
+            if template is not None:
+                info["template_size"] = template.size
         
-        if target_name in self.coordinate_cache:
-            info["cached_coordinates"] = self.coordinate_cache[target_name]
+        if cached_coordinates is not None:
+            info["cached_coordinates"] = cached_coordinates
         
         return info
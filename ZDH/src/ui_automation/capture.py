@@ -0,0 +1,426 @@
+"""
+屏幕截图后端
+提供可替换的截图方式：PIL截屏（默认）、X11共享内存截屏（Linux/Xvfb，复用预分配缓冲区）
+以及回放录制帧的回放后端（离线基准测试、无桌面环境）
+所有后端返回OpenCV格式 (BGR) 的图像数组；grab_frame截取区域（如被测窗口）并记录其屏幕原点
+"""
+
+import os
+import sys
+import ctypes
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Tuple, List, Dict, Any, Sequence, Union
+import numpy as np
+import cv2
+from src.utils.logger import get_logger
+from src.ui_automation.xlib import (
+    XLibrary, XShmSegmentInfo, ZPIXMAP, ALL_PLANES, IPC_PRIVATE, IPC_CREAT, IPC_RMID
+)
+
+
+# (left, top, right, bottom)
+Region = Tuple[int, int, int, int]
+
+
+class CaptureBackend:
+    """截图后端基类"""
+
+    name = "base"
+    # grab返回的数组是否为后端复用的缓冲区（下次截图时被覆盖）
+    reuses_buffer = False
+
+    def grab(self, region: Optional[Region] = None) -> Optional[np.ndarray]:
+        """截取屏幕（或区域），返回BGR图像"""
+        raise NotImplementedError
+
+    def screen_size(self) -> Optional[Tuple[int, int]]:
+        """后端自身决定的屏幕尺寸 (宽, 高)，返回None时由调用方查询系统"""
+        return None
+
+    def close(self):
+        """释放资源"""
+
+
+class PILCaptureBackend(CaptureBackend):
+    """通过PIL ImageGrab截屏"""
+
+    name = "pil"
+
+    def grab(self, region: Optional[Region] = None) -> Optional[np.ndarray]:
+        from PIL import ImageGrab
+
+        screenshot = np.asarray(ImageGrab.grab(bbox=region))
+        return cv2.cvtColor(screenshot, cv2.COLOR_RGB2BGR)
+
+
+def clamp_region(region: Optional[Region], size: Tuple[int, int]) -> Optional[Region]:
+    """
+    将区域裁剪到屏幕范围内
+
+    Args:
+        region: (left, top, right, bottom)，None表示整个屏幕
+        size: 屏幕尺寸 (宽, 高)
+
+    Returns:
+        裁剪后的区域，与屏幕无交集时返回None
+    """
+    width, height = size
+    if region is None:
+        return (0, 0, width, height)
+    left, top, right, bottom = (int(v) for v in region)
+    left, top = max(0, left), max(0, top)
+    right, bottom = min(width, right), min(height, bottom)
+    if right <= left or bottom <= top:
+        return None
+    return (left, top, right, bottom)
+
+
+class Frame(np.ndarray):
+    """
+    带屏幕原点的区域截图
+
+    像素坐标加上origin即为屏幕坐标；由grab_frame创建，copy()与整帧视图保留原点
+    """
+
+    def __array_finalize__(self, obj):
+        self.origin: Tuple[int, int] = getattr(obj, 'origin', (0, 0))
+
+
+def with_origin(image: np.ndarray, origin: Tuple[int, int]) -> np.ndarray:
+    """标记图像左上角对应的屏幕坐标（原点为 (0, 0) 时原样返回）"""
+    if tuple(origin) == (0, 0) and not isinstance(image, Frame):
+        return image
+    frame = image.view(Frame)
+    frame.origin = (int(origin[0]), int(origin[1]))
+    return frame
+
+
+def frame_origin(image: Optional[np.ndarray]) -> Tuple[int, int]:
+    """图像左上角对应的屏幕坐标，整屏截图为 (0, 0)"""
+    return getattr(image, 'origin', (0, 0))
+
+
+def to_screen_point(image: np.ndarray, point: Tuple[float, float]) -> Tuple[int, int]:
+    """截图内的像素坐标转换为屏幕坐标"""
+    left, top = frame_origin(image)
+    return (int(point[0]) + left, int(point[1]) + top)
+
+
+def to_frame_point(image: np.ndarray, point: Tuple[float, float]) -> Tuple[int, int]:
+    """屏幕坐标转换为截图内的像素坐标"""
+    left, top = frame_origin(image)
+    return (int(point[0]) - left, int(point[1]) - top)
+
+
+def bgra_to_bgr(frame: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """BGRA帧转换为BGR，out形状匹配时直接写入out（不分配新数组）"""
+    height, width = frame.shape[:2]
+    if out is None or out.shape != (height, width, 3):
+        out = np.empty((height, width, 3), dtype=np.uint8)
+    cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR, dst=out)
+    return out
+
+
+class _XShmImage:
+    """一个固定尺寸的共享内存XImage及其像素视图"""
+
+    def __init__(self, lib: XLibrary, display: int, visual: int, depth: int, width: int, height: int):
+        self.lib = lib
+        self.display = display
+        self.info = XShmSegmentInfo()
+        self.image = lib.xext.XShmCreateImage(display, visual, depth, ZPIXMAP, None,
+                                              ctypes.byref(self.info), width, height)
+        if not self.image:
+            raise RuntimeError("XShmCreateImage失败")
+
+        ximage = self.image.contents
+        if ximage.bits_per_pixel != 32:
+            lib.x11.XFree(self.image)
+            raise RuntimeError(f"不支持的像素格式: {ximage.bits_per_pixel}位")
+
+        size = ximage.bytes_per_line * height
+        self.info.shmid = lib.libc.shmget(IPC_PRIVATE, size, IPC_CREAT | 0o600)
+        if self.info.shmid < 0:
+            lib.x11.XFree(self.image)
+            raise RuntimeError("shmget失败")
+        address = lib.libc.shmat(self.info.shmid, None, 0)
+        if address in (None, ctypes.c_void_p(-1).value):
+            lib.libc.shmctl(self.info.shmid, IPC_RMID, None)
+            lib.x11.XFree(self.image)
+            raise RuntimeError("shmat失败")
+        self.info.shmaddr = address
+        self.info.readOnly = 0
+        ximage.data = address
+
+        errors = lib.errors
+        attached = lib.xext.XShmAttach(display, ctypes.byref(self.info))
+        lib.x11.XSync(display, 0)
+        # X服务器也已附加后即可标记删除，双方都分离后系统自动回收
+        lib.libc.shmctl(self.info.shmid, IPC_RMID, None)
+        if not attached or lib.errors != errors:
+            lib.libc.shmdt(address)
+            lib.x11.XFree(self.image)
+            raise RuntimeError("XShmAttach失败（X服务器与当前进程不在同一主机？）")
+
+        buffer = (ctypes.c_uint8 * size).from_address(address)
+        self.pixels = np.ndarray((height, width, 4), dtype=np.uint8, buffer=buffer,
+                                 strides=(ximage.bytes_per_line, 4, 1))
+
+    def read(self, root: int, left: int, top: int) -> bool:
+        """把根窗口 (left, top) 起的内容读入共享内存"""
+        errors = self.lib.errors
+        ok = self.lib.xext.XShmGetImage(self.display, root, self.image, left, top, ALL_PLANES)
+        return bool(ok) and self.lib.errors == errors
+
+    def close(self):
+        self.lib.xext.XShmDetach(self.display, ctypes.byref(self.info))
+        self.lib.x11.XSync(self.display, 0)
+        self.lib.libc.shmdt(self.info.shmaddr)
+        self.lib.x11.XFree(self.image)
+        self.pixels = None
+
+
+class XShmCaptureBackend(CaptureBackend):
+    """
+    通过X11共享内存扩展 (MIT-SHM) 截屏
+
+    X服务器把帧缓冲直接写入与本进程共享的内存段，再原地转换到预分配的BGR缓冲区，
+    每帧不再分配PIL图像和numpy数组，适合Linux/Xvfb上的高频采样（如界面稳定检测）。
+    返回的数组是缓冲区视图，在同一线程下次截取同尺寸区域时被覆盖，需要保留时应自行copy()
+    """
+
+    name = "xshm"
+    reuses_buffer = True
+
+    def __init__(self, display: Optional[str] = None, cache_size: int = 4):
+        """
+        初始化X11共享内存截图后端
+
+        Args:
+            display: X显示名，默认取DISPLAY环境变量
+            cache_size: 缓存的共享内存图像个数（每种区域尺寸一个）
+
+        Raises:
+            OSError: 缺少libX11/libXext
+            RuntimeError: 无法连接X服务器或服务器不支持MIT-SHM
+        """
+        self.logger = get_logger("XShmCaptureBackend")
+        self.lib = XLibrary.get()
+        self.cache_size = max(1, int(cache_size))
+
+        name = display or os.environ.get("DISPLAY")
+        self.display = self.lib.x11.XOpenDisplay(name.encode() if name else None)
+        if not self.display:
+            raise RuntimeError(f"无法连接X显示: {name}")
+        if not self.lib.xext.XShmQueryExtension(self.display):
+            self.lib.x11.XCloseDisplay(self.display)
+            self.display = None
+            raise RuntimeError("X服务器不支持MIT-SHM扩展")
+
+        screen = self.lib.x11.XDefaultScreen(self.display)
+        self.root = self.lib.x11.XRootWindow(self.display, screen)
+        self.visual = self.lib.x11.XDefaultVisual(self.display, screen)
+        self.depth = self.lib.x11.XDefaultDepth(self.display, screen)
+        self._size = (self.lib.x11.XDisplayWidth(self.display, screen),
+                      self.lib.x11.XDisplayHeight(self.display, screen))
+
+        # Xlib连接不是线程安全的，共享内存图像也只有一份，读取与转换在锁内完成
+        self._lock = threading.Lock()
+        self._images: "OrderedDict[Tuple[int, int], _XShmImage]" = OrderedDict()
+        self._local = threading.local()
+        self.logger.info(f"X11共享内存截图已启用: {name} {self._size[0]}x{self._size[1]}")
+
+    def _image(self, width: int, height: int) -> _XShmImage:
+        """取指定尺寸的共享内存图像，超出缓存个数时释放最久未用的"""
+        key = (width, height)
+        image = self._images.get(key)
+        if image is not None:
+            self._images.move_to_end(key)
+            return image
+
+        image = _XShmImage(self.lib, self.display, self.visual, self.depth, width, height)
+        self._images[key] = image
+        while len(self._images) > self.cache_size:
+            self._images.popitem(last=False)[1].close()
+        return image
+
+    def _output(self, width: int, height: int) -> np.ndarray:
+        """当前线程的BGR输出缓冲区"""
+        buffers = getattr(self._local, 'buffers', None)
+        if buffers is None:
+            buffers = self._local.buffers = OrderedDict()
+        key = (width, height)
+        out = buffers.get(key)
+        if out is None:
+            out = buffers[key] = np.empty((height, width, 3), dtype=np.uint8)
+            while len(buffers) > self.cache_size:
+                buffers.popitem(last=False)
+        else:
+            buffers.move_to_end(key)
+        return out
+
+    def grab(self, region: Optional[Region] = None) -> Optional[np.ndarray]:
+        if self.display is None:
+            return None
+        region = clamp_region(region, self._size)
+        if region is None:
+            return None
+
+        left, top, right, bottom = region
+        width, height = right - left, bottom - top
+        out = self._output(width, height)
+        with self._lock:
+            image = self._image(width, height)
+            if not image.read(self.root, left, top):
+                self.logger.debug(f"XShmGetImage失败: {region}")
+                return None
+            return bgra_to_bgr(image.pixels, out)
+
+    def screen_size(self) -> Optional[Tuple[int, int]]:
+        return self._size
+
+    def close(self):
+        with self._lock:
+            if self.display is None:
+                return
+            for image in self._images.values():
+                image.close()
+            self._images.clear()
+            self.lib.x11.XCloseDisplay(self.display)
+            self.display = None
+
+
+class ReplayCaptureBackend(CaptureBackend):
+    """回放录制帧的截图后端"""
+
+    name = "replay"
+
+    def __init__(self, frames: Sequence[Union[str, Path, np.ndarray]] = (), loop: bool = True):
+        """
+        初始化回放后端
+
+        Args:
+            frames: 帧文件路径或BGR图像数组
+            loop: 每次截图后是否自动前进到下一帧（False时停留在当前帧，由set_frame切换）
+        """
+        self.logger = get_logger("ReplayCaptureBackend")
+        self.frames: List[Union[Path, np.ndarray]] = [
+            frame if isinstance(frame, np.ndarray) else Path(frame) for frame in frames
+        ]
+        self.loop = loop
+        self.index = 0
+        self.grab_count = 0
+        self._cache: Dict[int, np.ndarray] = {}
+
+    @classmethod
+    def from_directory(cls, directory: Union[str, Path], pattern: str = "*.png",
+                       loop: bool = True) -> "ReplayCaptureBackend":
+        """按文件名顺序回放目录中的帧"""
+        return cls(sorted(Path(directory).glob(pattern)), loop=loop)
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def load(self, index: int) -> np.ndarray:
+        """加载第index帧（解码结果缓存复用）"""
+        frame = self._cache.get(index)
+        if frame is not None:
+            return frame
+
+        source = self.frames[index]
+        if isinstance(source, np.ndarray):
+            frame = source
+        else:
+            frame = cv2.imread(str(source), cv2.IMREAD_COLOR)
+            if frame is None:
+                raise FileNotFoundError(f"无法读取回放帧: {source}")
+        self._cache[index] = frame
+        return frame
+
+    def set_frame(self, index: int):
+        """切换到第index帧"""
+        if not 0 <= index < len(self.frames):
+            raise IndexError(f"回放帧序号超出范围: {index}")
+        self.index = index
+
+    def grab(self, region: Optional[Region] = None) -> Optional[np.ndarray]:
+        if not self.frames:
+            return None
+
+        frame = self.load(self.index)
+        self.grab_count += 1
+        if self.loop:
+            self.index = (self.index + 1) % len(self.frames)
+
+        if region is not None:
+            left, top, right, bottom = region
+            frame = frame[max(0, top):bottom, max(0, left):right]
+        return frame
+
+    def screen_size(self) -> Optional[Tuple[int, int]]:
+        if not self.frames:
+            return None
+        height, width = self.load(self.index).shape[:2]
+        return (width, height)
+
+    def close(self):
+        self._cache.clear()
+
+
+def grab_frame(backend: CaptureBackend, region: Optional[Region] = None) -> Optional[np.ndarray]:
+    """
+    截取屏幕区域并记录其屏幕原点
+
+    区域先裁剪到后端报告的屏幕范围内（原点随之调整）；区域为None或完全在屏幕外时截取整个屏幕
+
+    Returns:
+        区域截图为Frame（origin为区域左上角），整屏截图为普通数组
+    """
+    if region is not None:
+        size = backend.screen_size()
+        if size is not None:
+            region = clamp_region(region, size)
+    if region is None:
+        return backend.grab()
+
+    frame = backend.grab(region)
+    if frame is None:
+        return None
+    return with_origin(frame, region[:2])
+
+
+def create_capture_backend(name: str = "pil", config: Dict[str, Any] = None) -> CaptureBackend:
+    """
+    创建截图后端
+
+    Args:
+        name: 后端名称 ("pil", "xshm", "replay", "auto")；auto在有X显示的Linux上使用xshm，否则使用pil
+        config: 截图配置 (beike_ui.capture)
+
+    Returns:
+        截图后端实例
+    """
+    config = config or {}
+    logger = get_logger("CaptureBackend")
+
+    if name == "auto":
+        name = "xshm" if sys.platform.startswith("linux") and os.environ.get("DISPLAY") else "pil"
+
+    if name == "xshm":
+        try:
+            return XShmCaptureBackend(config.get('display'), config.get('xshm_cache_size', 4))
+        except (OSError, RuntimeError) as e:
+            logger.warning(f"X11共享内存截图不可用: {e}，使用pil")
+            return PILCaptureBackend()
+    if name == "pil":
+        return PILCaptureBackend()
+    if name == "replay":
+        if config.get('replay_dir'):
+            return ReplayCaptureBackend.from_directory(config['replay_dir'],
+                                                       config.get('replay_pattern', '*.png'))
+        return ReplayCaptureBackend(config.get('replay_frames', []))
+
+    logger.warning(f"未知截图后端: {name}，使用pil")
+    return PILCaptureBackend()
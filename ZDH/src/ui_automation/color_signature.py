@@ -0,0 +1,218 @@
+"""
+颜色签名库
+从成功定位中学习每个目标的色调/饱和度直方图，并通过直方图反向投影在目标常见区域内定位
+只有反向投影峰值明显高于搜索区域的中位数、且候选区域直方图与签名相近时才视为命中，
+避免签名以背景色为主时在任意同色区域上误匹配
+"""
+
+import json
+import cv2
+import numpy as np
+from pathlib import Path
+from typing import Optional, Tuple, Dict, Any, List
+from src.utils.logger import get_logger
+
+
+class ColorSignatureStore:
+    """按目标学习的颜色签名库"""
+
+    def __init__(self, config: Dict[str, Any] = None):
+        """
+        初始化颜色签名库
+
+        Args:
+            config: 颜色匹配配置 (beike_ui.color_matching)
+        """
+        self.logger = get_logger("ColorSignatureStore")
+        config = config or {}
+
+        self.enabled = config.get('learn_signatures', True)
+        self.signature_file = Path(config.get('signature_file', 'data/color_signatures.json'))
+        self.patch_size = int(config.get('patch_size', 48))
+        self.search_margin = int(config.get('search_margin', 150))
+        self.h_bins = int(config.get('h_bins', 18))
+        self.s_bins = int(config.get('s_bins', 16))
+        self.min_score = float(config.get('min_score', 0.5))
+        self.min_contrast = float(config.get('min_contrast', 0.3))
+        self.min_similarity = float(config.get('min_similarity', 0.5))
+        self.learning_rate = float(config.get('learning_rate', 0.3))
+        self.save_every = int(config.get('save_every', 20))
+        self._pending = 0
+
+        # 目标名 -> {"hist": np.ndarray(float32), "region": [x, y, w, h], "samples": int}
+        self.signatures: Dict[str, Dict[str, Any]] = {}
+        self._load()
+
+    def _load(self):
+        """加载颜色签名文件"""
+        if not self.signature_file.exists():
+            return
+
+        try:
+            with open(self.signature_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+
+            for target_name, entry in data.items():
+                hist = np.array(entry['hist'], dtype=np.float32)
+                if hist.size != self.h_bins * self.s_bins:
+                    self.logger.debug(f"颜色签名直方图尺寸不匹配，忽略: {target_name}")
+                    continue
+                self.signatures[target_name] = {
+                    "hist": hist.reshape(self.h_bins, self.s_bins),
+                    "region": list(entry['region']),
+                    "samples": int(entry.get('samples', 1))
+                }
+            self.logger.info(f"加载颜色签名: {len(self.signatures)} 项")
+        except Exception as e:
+            self.logger.warning(f"加载颜色签名失败: {e}")
+
+    def save(self):
+        """保存颜色签名文件（直方图量化为0-255整数以保持紧凑）"""
+        self._pending = 0
+        data = {}
+        for target_name, entry in self.signatures.items():
+            data[target_name] = {
+                "hist": np.round(entry["hist"]).astype(np.uint8).flatten().tolist(),
+                "region": [int(v) for v in entry["region"]],
+                "samples": entry["samples"]
+            }
+
+        try:
+            self.signature_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.signature_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        except Exception as e:
+            self.logger.warning(f"保存颜色签名失败: {e}")
+
+    def has_signature(self, target_name: str) -> bool:
+        """是否存在目标的颜色签名"""
+        return target_name in self.signatures
+
+    def _compute_histogram(self, hsv_patch: np.ndarray) -> np.ndarray:
+        """计算色调/饱和度直方图，归一化到0-255"""
+        hist = cv2.calcHist([hsv_patch], [0, 1], None,
+                            [self.h_bins, self.s_bins], [0, 180, 0, 256])
+        cv2.normalize(hist, hist, 0, 255, cv2.NORM_MINMAX)
+        return hist
+
+    def _patch_rect(self, center: Tuple[int, int], frame_shape: Tuple[int, ...],
+                    size: Optional[Tuple[int, int]] = None) -> Optional[List[int]]:
+        """计算以中心点为中心、裁剪到画面内的区域 [x, y, w, h]"""
+        frame_h, frame_w = frame_shape[:2]
+        w, h = size if size else (self.patch_size, self.patch_size)
+        x = max(0, int(center[0]) - w // 2)
+        y = max(0, int(center[1]) - h // 2)
+        w = min(w, frame_w - x)
+        h = min(h, frame_h - y)
+        if w <= 0 or h <= 0:
+            return None
+        return [x, y, w, h]
+
+    def learn(self, target_name: str, frame: np.ndarray, center: Tuple[int, int],
+              size: Optional[Tuple[int, int]] = None) -> bool:
+        """
+        从一次成功定位中学习颜色签名
+
+        Args:
+            target_name: 目标元素名称
+            frame: 定位时使用的屏幕截图 (BGR)
+            center: 定位到的中心点
+            size: 目标尺寸 (w, h)，默认使用patch_size
+
+        Returns:
+            是否学习成功
+        """
+        if not self.enabled or frame is None:
+            return False
+
+        rect = self._patch_rect(center, frame.shape, size)
+        if rect is None:
+            return False
+
+        x, y, w, h = rect
+        hsv_patch = cv2.cvtColor(frame[y:y + h, x:x + w], cv2.COLOR_BGR2HSV)
+        hist = self._compute_histogram(hsv_patch)
+
+        entry = self.signatures.get(target_name)
+        if entry is None:
+            self.signatures[target_name] = {"hist": hist, "region": rect, "samples": 1}
+        else:
+            # 指数滑动平均更新直方图；区域取最近一次定位的位置（搜索时再向外扩展search_margin），不累积并集
+            entry["hist"] = cv2.addWeighted(entry["hist"], 1.0 - self.learning_rate,
+                                            hist, self.learning_rate, 0)
+            entry["region"] = rect
+            entry["samples"] += 1
+
+        self.logger.debug(f"学习颜色签名: {target_name}, 区域: {rect}")
+        # 累积save_every次学习后写入一次文件，其余由close()写入
+        self._pending += 1
+        if self._pending >= self.save_every:
+            self.save()
+        return True
+
+    def locate(self, target_name: str, frame: np.ndarray) -> Optional[Tuple[int, int]]:
+        """
+        通过反向投影在目标常见区域内定位
+
+        Args:
+            target_name: 目标元素名称
+            frame: 屏幕截图 (BGR)
+
+        Returns:
+            元素坐标 (x, y)，未找到返回None
+        """
+        entry = self.signatures.get(target_name)
+        if entry is None or frame is None:
+            return None
+
+        frame_h, frame_w = frame.shape[:2]
+        rx, ry, rw, rh = entry["region"]
+
+        # 搜索区域：常见区域向外扩展search_margin
+        x1 = max(0, rx - self.search_margin)
+        y1 = max(0, ry - self.search_margin)
+        x2 = min(frame_w, rx + rw + self.search_margin)
+        y2 = min(frame_h, ry + rh + self.search_margin)
+        if x2 <= x1 or y2 <= y1:
+            return None
+
+        hsv_roi = cv2.cvtColor(frame[y1:y2, x1:x2], cv2.COLOR_BGR2HSV)
+        back_projection = cv2.calcBackProject([hsv_roi], [0, 1], entry["hist"],
+                                              [0, 180, 0, 256], 1)
+
+        # 目标尺寸（学习时的区域尺寸）窗口内的平均反向投影作为匹配得分
+        kernel = (max(1, min(rw, x2 - x1)), max(1, min(rh, y2 - y1)))
+        density = cv2.blur(back_projection.astype(np.float32), kernel)
+        _, max_val, _, max_loc = cv2.minMaxLoc(density)
+        score = max_val / 255.0
+        # 峰值必须明显高于搜索区域的典型值：签名颜色遍布整个区域（如背景色）时没有区分度
+        contrast = (max_val - float(np.median(density))) / 255.0
+
+        if score < self.min_score or contrast < self.min_contrast:
+            self.logger.debug(f"颜色签名匹配失败: {target_name}, 得分: {score:.3f}, 对比度: {contrast:.3f}")
+            return None
+
+        # 取峰值所在连通块的质心，而不是单个最大值点
+        mask = (density >= (max_val + float(np.median(density))) / 2).astype(np.uint8)
+        _, labels, _, centroids = cv2.connectedComponentsWithStats(mask)
+        cx, cy = centroids[labels[max_loc[1], max_loc[0]]]
+        center = (x1 + int(round(cx)), y1 + int(round(cy)))
+
+        # 候选区域的直方图需与签名相近
+        rect = self._patch_rect(center, frame.shape, (rw, rh))
+        if rect is None:
+            return None
+        px, py, pw, ph = rect
+        candidate = self._compute_histogram(cv2.cvtColor(frame[py:py + ph, px:px + pw], cv2.COLOR_BGR2HSV))
+        similarity = cv2.compareHist(entry["hist"], candidate, cv2.HISTCMP_CORREL)
+        if similarity < self.min_similarity:
+            self.logger.debug(f"颜色签名匹配失败: {target_name}, 直方图相似度: {similarity:.3f}")
+            return None
+
+        self.logger.debug(f"颜色签名匹配成功: {target_name}, 得分: {score:.3f}, 对比度: {contrast:.3f}")
+        return center
+
+    def forget(self, target_name: str):
+        """删除目标的颜色签名"""
+        if self.signatures.pop(target_name, None) is not None:
+            self.save()
@@ -0,0 +1,354 @@
+"""
+坐标缓存库
+按 目标/分辨率/DPI 存储坐标，支持过期、定期校验、防抖的原子写入，
+并通过文件锁保证多线程、多进程并发更新时不丢失、不损坏
+"""
+
+import json
+import os
+import atexit
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Tuple, Dict, Any, Callable, List
+from src.utils.logger import get_logger
+
+
+# 不区分分辨率的条目（旧格式迁移或无法获取屏幕信息时使用）
+ANY_SCREEN = "*"
+
+
+class _FileLock:
+    """跨进程文件锁（Windows使用msvcrt，其他平台使用fcntl）"""
+
+    def __init__(self, lock_path: Path, timeout: float = 10.0):
+        self.lock_path = lock_path
+        self.timeout = timeout
+        self._fd: Optional[int] = None
+
+    def __enter__(self):
+        self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+        self._fd = os.open(str(self.lock_path), os.O_RDWR | os.O_CREAT)
+        deadline = time.time() + self.timeout
+
+        while True:
+            try:
+                if os.name == 'nt':
+                    import msvcrt
+                    msvcrt.locking(self._fd, msvcrt.LK_NBLCK, 1)
+                else:
+                    import fcntl
+                    fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return self
+            except OSError:
+                if time.time() >= deadline:
+                    os.close(self._fd)
+                    self._fd = None
+                    raise TimeoutError(f"获取文件锁超时: {self.lock_path}")
+                time.sleep(0.05)
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._fd is None:
+            return
+        try:
+            if os.name == 'nt':
+                import msvcrt
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+
+class CoordinateStore:
+    """并发安全的坐标缓存"""
+
+    def __init__(self, cache_file: str = "data/coordinate_cache.json",
+                 expiry: float = 3600, validation_interval: float = 300,
+                 flush_delay: float = 1.0,
+                 screen_key_provider: Callable[[], str] = None):
+        """
+        初始化坐标缓存
+
+        Args:
+            cache_file: 缓存文件路径
+            expiry: 条目过期时间（秒），0表示永不过期
+            validation_interval: 条目需要重新校验的间隔（秒）
+            flush_delay: 写入防抖延迟（秒），0表示每次更新立即写入
+            screen_key_provider: 返回当前屏幕键（如 "1920x1080@96"）的函数
+        """
+        self.logger = get_logger("CoordinateStore")
+        self.cache_file = Path(cache_file)
+        self.lock_file = self.cache_file.with_name(self.cache_file.name + ".lock")
+        self.expiry = float(expiry)
+        self.validation_interval = float(validation_interval)
+        self.flush_delay = float(flush_delay)
+        self.screen_key_provider = screen_key_provider or (lambda: ANY_SCREEN)
+
+        # "目标|屏幕键" -> {"target", "screen", "x", "y", "updated_at", "validated_at"}
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._dirty: Dict[str, Dict[str, Any]] = {}
+        self._removed: Dict[str, float] = {}
+        self._lock = threading.RLock()
+        self._flush_timer: Optional[threading.Timer] = None
+
+        self.load()
+        atexit.register(self.flush)
+
+    @staticmethod
+    def make_key(target_name: str, screen: str) -> str:
+        return f"{target_name}|{screen}"
+
+    def _read_file(self) -> Dict[str, Dict[str, Any]]:
+        """读取缓存文件，兼容旧的 {"目标": [x, y]} 格式"""
+        if not self.cache_file.exists():
+            return {}
+
+        with open(self.cache_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        if isinstance(data, dict) and 'entries' in data:
+            return data['entries']
+
+        # 旧格式：不区分分辨率，以文件修改时间作为时间戳
+        mtime = self.cache_file.stat().st_mtime
+        entries = {}
+        for target_name, coordinates in data.items():
+            entries[self.make_key(target_name, ANY_SCREEN)] = {
+                "target": target_name,
+                "screen": ANY_SCREEN,
+                "x": int(coordinates[0]),
+                "y": int(coordinates[1]),
+                "updated_at": mtime,
+                "validated_at": mtime
+            }
+        return entries
+
+    def load(self):
+        """从文件加载缓存"""
+        try:
+            entries = self._read_file()
+            with self._lock:
+                self.entries = entries
+            self.logger.info(f"加载坐标缓存: {len(entries)} 项")
+        except Exception as e:
+            self.logger.warning(f"加载坐标缓存失败: {e}")
+
+    def _is_expired(self, entry: Dict[str, Any], now: float) -> bool:
+        return self.expiry > 0 and now - entry["updated_at"] > self.expiry
+
+    def get_entry(self, target_name: str, screen: str = None,
+                  fallback_any: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        获取未过期的缓存条目，优先当前屏幕的条目，其次不区分分辨率的条目
+
+        Args:
+            target_name: 目标元素名称
+            screen: 屏幕键，默认取当前屏幕
+            fallback_any: 是否回退到不区分分辨率的条目
+
+        Returns:
+            缓存条目，不存在或已过期返回None
+        """
+        screen = screen or self.screen_key_provider()
+        now = time.time()
+        keys = [self.make_key(target_name, screen)]
+        if fallback_any and screen != ANY_SCREEN:
+            keys.append(self.make_key(target_name, ANY_SCREEN))
+
+        with self._lock:
+            for key in keys:
+                entry = self.entries.get(key)
+                if entry is None:
+                    continue
+                if self._is_expired(entry, now):
+                    self.logger.debug(f"坐标缓存过期: {key}")
+                    self._remove_key(key)
+                    continue
+                return entry
+        return None
+
+    def get(self, target_name: str, screen: str = None) -> Optional[Tuple[int, int]]:
+        """获取缓存坐标"""
+        entry = self.get_entry(target_name, screen)
+        if entry is None:
+            return None
+        return (entry["x"], entry["y"])
+
+    def needs_validation(self, entry: Dict[str, Any]) -> bool:
+        """条目是否已超过校验间隔"""
+        return (self.validation_interval > 0 and
+                time.time() - entry.get("validated_at", entry["updated_at"]) > self.validation_interval)
+
+    def mark_validated(self, entry: Dict[str, Any]):
+        """标记条目已通过校验"""
+        with self._lock:
+            entry["validated_at"] = time.time()
+            key = self.make_key(entry["target"], entry["screen"])
+            self._dirty[key] = entry
+        self._schedule_flush()
+
+    def set(self, target_name: str, coordinates: Tuple[int, int], screen: str = None,
+            extra: Dict[str, Any] = None):
+        """
+        更新缓存坐标（防抖写入）
+
+        Args:
+            target_name: 目标元素名称
+            coordinates: 坐标 (x, y)
+            screen: 屏幕键，默认取当前屏幕
+            extra: 附加字段（如窗口相对坐标的参照信息）
+        """
+        screen = screen or self.screen_key_provider()
+        now = time.time()
+        key = self.make_key(target_name, screen)
+        entry = {
+            "target": target_name,
+            "screen": screen,
+            "x": int(coordinates[0]),
+            "y": int(coordinates[1]),
+            "updated_at": now,
+            "validated_at": now
+        }
+        if extra:
+            entry.update(extra)
+
+        with self._lock:
+            self.entries[key] = entry
+            self._dirty[key] = entry
+            self._removed.pop(key, None)
+        self._schedule_flush()
+
+    def remove(self, target_name: str, screen: str = None):
+        """删除目标在指定屏幕上的缓存"""
+        with self._lock:
+            self._remove_key(self.make_key(target_name, screen or self.screen_key_provider()))
+        self._schedule_flush()
+
+    def _remove_key(self, key: str):
+        if self.entries.pop(key, None) is not None:
+            self._dirty.pop(key, None)
+            self._removed[key] = time.time()
+
+    def targets(self) -> List[str]:
+        """所有缓存的目标名称"""
+        with self._lock:
+            return sorted({entry["target"] for entry in self.entries.values()})
+
+    def __contains__(self, target_name: str) -> bool:
+        return self.get_entry(target_name) is not None
+
+    def __getitem__(self, target_name: str) -> Tuple[int, int]:
+        coordinates = self.get(target_name)
+        if coordinates is None:
+            raise KeyError(target_name)
+        return coordinates
+
+    def __setitem__(self, target_name: str, coordinates: Tuple[int, int]):
+        self.set(target_name, coordinates)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self.entries)
+
+    def _schedule_flush(self):
+        """防抖：在flush_delay内的多次更新合并为一次写入"""
+        if self.flush_delay <= 0:
+            self.flush()
+            return
+
+        with self._lock:
+            if self._flush_timer is not None:
+                return
+            self._flush_timer = threading.Timer(self.flush_delay, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def flush(self):
+        """
+        将本进程的变更合并写入文件
+
+        持有文件锁期间重新读取文件，按条目时间戳合并其他进程的写入，
+        然后写入临时文件并原子替换，避免并发写入相互覆盖或产生半截文件
+        """
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if not self._dirty and not self._removed:
+                return
+            dirty = dict(self._dirty)
+            removed = dict(self._removed)
+            self._dirty.clear()
+            self._removed.clear()
+
+        try:
+            with _FileLock(self.lock_file):
+                try:
+                    on_disk = self._read_file()
+                except Exception as e:
+                    self.logger.warning(f"坐标缓存文件损坏，将重建: {e}")
+                    on_disk = {}
+
+                for key, entry in dirty.items():
+                    current = on_disk.get(key)
+                    if current is None or current["updated_at"] <= entry["updated_at"]:
+                        on_disk[key] = entry
+                    elif current.get("validated_at", 0) < entry.get("validated_at", 0):
+                        current["validated_at"] = entry["validated_at"]
+
+                for key, removed_at in removed.items():
+                    current = on_disk.get(key)
+                    if current is not None and current["updated_at"] <= removed_at:
+                        del on_disk[key]
+
+                now = time.time()
+                on_disk = {k: v for k, v in on_disk.items() if not self._is_expired(v, now)}
+                self._atomic_write({"version": 2, "entries": on_disk})
+
+            with self._lock:
+                # 采纳其他进程的更新，保留本进程尚未写入的变更
+                merged = dict(on_disk)
+                merged.update(self._dirty)
+                for key in self._removed:
+                    merged.pop(key, None)
+                self.entries = merged
+
+            self.logger.debug(f"保存坐标缓存: {len(on_disk)} 项")
+
+        except Exception as e:
+            self.logger.warning(f"保存坐标缓存失败: {e}")
+            with self._lock:
+                # 写入失败时保留变更以便下次重试
+                for key, entry in dirty.items():
+                    self._dirty.setdefault(key, entry)
+                for key, removed_at in removed.items():
+                    self._removed.setdefault(key, removed_at)
+
+    def _atomic_write(self, data: Dict[str, Any]):
+        """写入同目录临时文件后原子替换"""
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=str(self.cache_file.parent),
+                                        prefix=self.cache_file.name, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, str(self.cache_file))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def close(self):
+        """立即写入未保存的变更"""
+        self.flush()
+        try:
+            atexit.unregister(self.flush)
+        except Exception:
+            pass
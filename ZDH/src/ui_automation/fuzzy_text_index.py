@@ -0,0 +1,163 @@
+"""
+OCR文本模糊匹配索引
+对一帧的全部识别文本建立字符n-gram倒排索引（每帧一次），查找目标时先按共享n-gram数过滤候选
+（编辑距离不超过k时，目标至少有 n-gram种类数 - n x k 个n-gram出现在文本中），
+再用有界编辑距离（Myers位并行算法）确认；多个目标共用同一索引
+"""
+
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Set
+
+from src.ui_automation.ocr_lexicon import normalize
+
+
+@dataclass
+class FuzzyMatch:
+    """一个模糊匹配结果"""
+    index: int          # 在索引文本中的序号
+    text: str           # 原始文本
+    distance: int       # 编辑距离
+    score: float        # 1 - 编辑距离 / 目标长度
+
+
+def _pattern_masks(pattern: str) -> Dict[str, int]:
+    """各字符在pattern中出现位置的位掩码"""
+    masks: Dict[str, int] = {}
+    for i, char in enumerate(pattern):
+        masks[char] = masks.get(char, 0) | (1 << i)
+    return masks
+
+
+def _myers_distance(masks: Dict[str, int], length: int, text: str, substring: bool) -> int:
+    """Myers位并行编辑距离：逐个文本字符更新整列差分，每个字符只需常数次整数位运算"""
+    full = (1 << length) - 1
+    high = 1 << (length - 1)
+    positive, negative = full, 0
+    score = best = length
+    for char in text:
+        equal = masks.get(char, 0)
+        vertical = equal | negative
+        horizontal = (((equal & positive) + positive) ^ positive) | equal
+        h_positive = (negative | ~(horizontal | positive)) & full
+        h_negative = positive & horizontal
+        if h_positive & high:
+            score += 1
+        elif h_negative & high:
+            score -= 1
+        # 子串匹配时首行为0（可从文本任意位置开始），否则首行递增
+        h_positive = ((h_positive << 1) | (0 if substring else 1)) & full
+        h_negative = (h_negative << 1) & full
+        positive = (h_negative | ~(vertical | h_positive)) & full
+        negative = h_positive & vertical
+        best = min(best, score)
+    return best if substring else score
+
+
+def bounded_edit_distance(pattern: str, text: str, max_distance: int,
+                          substring: bool = False) -> Optional[int]:
+    """
+    有界编辑距离
+
+    Args:
+        pattern: 目标文本
+        text: 被匹配的文本
+        max_distance: 距离上限
+        substring: True时计算pattern与text任一子串的最小编辑距离（文本框中可能含有其他文字）
+
+    Returns:
+        编辑距离，超过上限时返回None
+    """
+    if not substring and abs(len(pattern) - len(text)) > max_distance:
+        return None
+    if not pattern:
+        return 0 if substring else len(text)
+    distance = _myers_distance(_pattern_masks(pattern), len(pattern), text, substring)
+    return distance if distance <= max_distance else None
+
+
+class FuzzyTextIndex:
+    """识别文本的n-gram模糊匹配索引"""
+
+    def __init__(self, texts: Sequence[str], n: int = 2, max_error_ratio: float = 0.25):
+        """
+        构建索引
+
+        Args:
+            texts: 一帧的全部识别文本
+            n: n-gram长度
+            max_error_ratio: 默认允许的编辑距离占目标长度的比例
+        """
+        self.texts = list(texts)
+        self.n = n
+        self.max_error_ratio = max_error_ratio
+        self.normalized = [normalize(text) for text in self.texts]
+
+        self._postings: Dict[str, List[int]] = {}
+        for index, text in enumerate(self.normalized):
+            for gram in self._grams(text):
+                self._postings.setdefault(gram, []).append(index)
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def _grams(self, text: str) -> Set[str]:
+        return {text[i:i + self.n] for i in range(len(text) - self.n + 1)}
+
+    def _candidates(self, target: str, max_distance: int) -> List[int]:
+        """按共享n-gram数过滤的候选文本序号"""
+        grams = self._grams(target)
+        required = len(grams) - self.n * max_distance
+        if required <= 0:
+            # 目标过短或允许的误差过大，n-gram无法过滤
+            return [index for index, text in enumerate(self.normalized) if text]
+
+        counts = Counter()
+        for gram in grams:
+            counts.update(self._postings.get(gram, ()))
+        return [index for index, count in counts.items() if count >= required]
+
+    def search(self, target: str, max_distance: int = None, substring: bool = True) -> List[FuzzyMatch]:
+        """
+        查找与目标匹配的全部文本
+
+        Args:
+            target: 目标文本（忽略空白与大小写）
+            max_distance: 最大编辑距离，默认为目标长度 x max_error_ratio
+            substring: 允许文本中包含目标以外的字符
+
+        Returns:
+            按编辑距离、长度差、序号排序的匹配列表
+        """
+        target = normalize(target)
+        if not target:
+            return []
+        if max_distance is None:
+            max_distance = int(len(target) * self.max_error_ratio)
+
+        # 目标的位掩码只计算一次，供全部候选复用
+        masks = _pattern_masks(target)
+        matches = []
+        for index in self._candidates(target, max_distance):
+            text = self.normalized[index]
+            if len(text) < len(target) - max_distance or (
+                    not substring and len(text) > len(target) + max_distance):
+                continue
+            distance = _myers_distance(masks, len(target), text, substring)
+            if distance <= max_distance:
+                matches.append(FuzzyMatch(index, self.texts[index], distance, 1.0 - distance / len(target)))
+
+        matches.sort(key=lambda match: (match.distance,
+                                        abs(len(self.normalized[match.index]) - len(target)),
+                                        match.index))
+        return matches
+
+    def best(self, target: str, max_distance: int = None, substring: bool = True) -> Optional[FuzzyMatch]:
+        """与目标最匹配的文本，没有满足距离上限的文本时返回None"""
+        matches = self.search(target, max_distance, substring)
+        return matches[0] if matches else None
+
+    def best_many(self, targets: Sequence[str], max_distance: int = None,
+                  substring: bool = True) -> Dict[str, Optional[FuzzyMatch]]:
+        """批量查找多个目标的最佳匹配"""
+        return {target: self.best(target, max_distance, substring) for target in targets}
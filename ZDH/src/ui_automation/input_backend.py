@@ -0,0 +1,295 @@
+"""
+键盘输入后端
+提供可插拔的文本注入方式：SendInput批量Unicode注入、剪贴板粘贴、逐键keybd_event（兼容模式）
+以及用于测试和非Windows平台的记录后端
+"""
+
+import ctypes
+import time
+from typing import List, Tuple, Dict, Any, Optional
+from src.utils.logger import get_logger
+
+
+# 虚拟键码（与win32con一致，避免在非Windows平台导入win32con）
+VK_TAB = 0x09
+VK_RETURN = 0x0D
+VK_SHIFT = 0x10
+VK_CONTROL = 0x11
+VK_DELETE = 0x2E
+
+# 剪贴板文本格式（系统在这几种格式之间自动转换，恢复Unicode文本即可还原）
+CF_TEXT = 1
+CF_OEMTEXT = 7
+CF_UNICODETEXT = 13
+CF_LOCALE = 16
+TEXT_CLIPBOARD_FORMATS = frozenset((CF_TEXT, CF_OEMTEXT, CF_UNICODETEXT, CF_LOCALE))
+
+KEYEVENTF_KEYUP = 0x0002
+KEYEVENTF_UNICODE = 0x0004
+INPUT_KEYBOARD = 1
+
+# 以虚拟键发送而不是Unicode字符的控制字符
+CONTROL_CHAR_KEYS = {
+    '\n': VK_RETURN,
+    '\t': VK_TAB
+}
+
+
+class KEYBDINPUT(ctypes.Structure):
+    _fields_ = [
+        ("wVk", ctypes.c_ushort),
+        ("wScan", ctypes.c_ushort),
+        ("dwFlags", ctypes.c_uint32),
+        ("time", ctypes.c_uint32),
+        ("dwExtraInfo", ctypes.c_size_t)
+    ]
+
+
+class MOUSEINPUT(ctypes.Structure):
+    _fields_ = [
+        ("dx", ctypes.c_int32),
+        ("dy", ctypes.c_int32),
+        ("mouseData", ctypes.c_uint32),
+        ("dwFlags", ctypes.c_uint32),
+        ("time", ctypes.c_uint32),
+        ("dwExtraInfo", ctypes.c_size_t)
+    ]
+
+
+class _INPUTUNION(ctypes.Union):
+    _fields_ = [("ki", KEYBDINPUT), ("mi", MOUSEINPUT)]
+
+
+class INPUT(ctypes.Structure):
+    _fields_ = [("type", ctypes.c_uint32), ("union", _INPUTUNION)]
+
+
+def build_key_events(text: str) -> List[Tuple[int, int, int]]:
+    """
+    将文本转换为键盘事件序列
+
+    非BMP字符按UTF-16拆分为代理对，换行/制表符以虚拟键发送，回车符忽略
+
+    Returns:
+        [(虚拟键码, 扫描码/UTF-16码元, 标志)]
+    """
+    events = []
+    for char in text:
+        if char == '\r':
+            continue
+
+        if char in CONTROL_CHAR_KEYS:
+            vk = CONTROL_CHAR_KEYS[char]
+            events.append((vk, 0, 0))
+            events.append((vk, 0, KEYEVENTF_KEYUP))
+            continue
+
+        encoded = char.encode('utf-16-le')
+        for i in range(0, len(encoded), 2):
+            code_unit = int.from_bytes(encoded[i:i + 2], 'little')
+            events.append((0, code_unit, KEYEVENTF_UNICODE))
+            events.append((0, code_unit, KEYEVENTF_UNICODE | KEYEVENTF_KEYUP))
+    return events
+
+
+def build_hotkey_events(keys: List[int]) -> List[Tuple[int, int, int]]:
+    """组合键事件：依次按下，逆序抬起"""
+    events = [(vk, 0, 0) for vk in keys]
+    events.extend((vk, 0, KEYEVENTF_KEYUP) for vk in reversed(keys))
+    return events
+
+
+class InputBackend:
+    """输入后端基类"""
+
+    name = "base"
+
+    def type_text(self, text: str):
+        """输入文本"""
+        raise NotImplementedError
+
+    def hotkey(self, *keys: int):
+        """按下组合键（或单个键）"""
+        raise NotImplementedError
+
+    def press_key(self, key: int):
+        """按下并抬起单个键"""
+        self.hotkey(key)
+
+
+class SendInputBackend(InputBackend):
+    """通过SendInput一次性批量注入Unicode字符（支持中文等非ASCII文本）"""
+
+    name = "sendinput"
+
+    def __init__(self, chunk_size: int = 2000):
+        self.chunk_size = max(2, int(chunk_size))
+
+    def _send(self, events: List[Tuple[int, int, int]]):
+        user32 = ctypes.windll.user32
+        for start in range(0, len(events), self.chunk_size):
+            chunk = events[start:start + self.chunk_size]
+            inputs = (INPUT * len(chunk))()
+            for i, (vk, scan, flags) in enumerate(chunk):
+                inputs[i].type = INPUT_KEYBOARD
+                inputs[i].union.ki = KEYBDINPUT(vk, scan, flags, 0, 0)
+
+            sent = user32.SendInput(len(chunk), inputs, ctypes.sizeof(INPUT))
+            if sent != len(chunk):
+                raise OSError(f"SendInput仅注入 {sent}/{len(chunk)} 个事件")
+
+    def type_text(self, text: str):
+        self._send(build_key_events(text))
+
+    def hotkey(self, *keys: int):
+        self._send(build_hotkey_events(list(keys)))
+
+
+class ClipboardPasteBackend(SendInputBackend):
+    """
+    通过剪贴板粘贴输入文本，完成后恢复原剪贴板内容
+
+    剪贴板中有文本以外的内容（图片、文件列表、富文本等）时无法完整恢复，不占用剪贴板，改用SendInput输入
+    """
+
+    name = "clipboard"
+
+    def __init__(self, restore_delay: float = 0.1, chunk_size: int = 2000):
+        super().__init__(chunk_size)
+        self.restore_delay = restore_delay
+        self.logger = get_logger("InputBackend")
+
+    @staticmethod
+    def _clipboard_formats(clipboard) -> List[int]:
+        formats = []
+        fmt = clipboard.EnumClipboardFormats(0)
+        while fmt:
+            formats.append(fmt)
+            fmt = clipboard.EnumClipboardFormats(fmt)
+        return formats
+
+    @staticmethod
+    def _set_clipboard_text(clipboard, text: Optional[str]):
+        clipboard.OpenClipboard()
+        try:
+            clipboard.EmptyClipboard()
+            if text is not None:
+                clipboard.SetClipboardData(CF_UNICODETEXT, text)
+        finally:
+            clipboard.CloseClipboard()
+
+    def type_text(self, text: str):
+        import win32clipboard
+
+        previous = None
+        win32clipboard.OpenClipboard()
+        try:
+            formats = self._clipboard_formats(win32clipboard)
+            text_only = set(formats) <= TEXT_CLIPBOARD_FORMATS
+            if text_only and CF_UNICODETEXT in formats:
+                previous = win32clipboard.GetClipboardData(CF_UNICODETEXT)
+        finally:
+            win32clipboard.CloseClipboard()
+
+        if not text_only:
+            self.logger.debug(f"剪贴板包含非文本内容 {formats}，改用SendInput输入")
+            super().type_text(text)
+            return
+
+        try:
+            self._set_clipboard_text(win32clipboard, text)
+            self.hotkey(VK_CONTROL, ord('V'))
+            # 等待目标应用读取剪贴板后再恢复
+            time.sleep(self.restore_delay)
+        finally:
+            self._set_clipboard_text(win32clipboard, previous)
+
+
+class KeyEventBackend(InputBackend):
+    """逐键keybd_event输入（兼容只接受真实按键的控件）"""
+
+    name = "keyevent"
+
+    def __init__(self, type_delay: float = 0.05):
+        self.type_delay = type_delay
+
+    def type_text(self, text: str):
+        import win32api
+
+        for char in text:
+            if char in CONTROL_CHAR_KEYS:
+                self.press_key(CONTROL_CHAR_KEYS[char])
+            elif ord(char) < 128:
+                # VkKeyScan: 低字节为虚拟键码，高字节第0位表示需要Shift
+                scan = win32api.VkKeyScan(char)
+                vk, shift = scan & 0xFF, scan & 0x100
+                if shift:
+                    win32api.keybd_event(VK_SHIFT, 0, 0, 0)
+                win32api.keybd_event(vk, 0, 0, 0)
+                win32api.keybd_event(vk, 0, KEYEVENTF_KEYUP, 0)
+                if shift:
+                    win32api.keybd_event(VK_SHIFT, 0, KEYEVENTF_KEYUP, 0)
+            else:
+                # 非ASCII字符没有对应按键，退回Unicode注入
+                SendInputBackend().type_text(char)
+
+            time.sleep(self.type_delay)
+
+    def hotkey(self, *keys: int):
+        import win32api
+
+        for vk in keys:
+            win32api.keybd_event(vk, 0, 0, 0)
+        for vk in reversed(keys):
+            win32api.keybd_event(vk, 0, KEYEVENTF_KEYUP, 0)
+
+
+class RecordingBackend(InputBackend):
+    """记录输入调用而不真正注入（用于测试和非Windows平台）"""
+
+    name = "recording"
+
+    def __init__(self):
+        self.calls: List[Tuple[str, Any]] = []
+        self.events: List[Tuple[int, int, int]] = []
+
+    def type_text(self, text: str):
+        self.calls.append(("type_text", text))
+        self.events.extend(build_key_events(text))
+
+    def hotkey(self, *keys: int):
+        self.calls.append(("hotkey", keys))
+        self.events.extend(build_hotkey_events(list(keys)))
+
+    @property
+    def typed_text(self) -> str:
+        """所有type_text调用拼接的文本"""
+        return "".join(arg for call, arg in self.calls if call == "type_text")
+
+
+def create_input_backend(name: str = "sendinput", config: Dict[str, Any] = None) -> InputBackend:
+    """
+    创建输入后端
+
+    Args:
+        name: 后端名称 ("sendinput", "clipboard", "keyevent", "recording")
+        config: 操作配置 (ui_automation.operations)
+
+    Returns:
+        输入后端实例
+    """
+    config = config or {}
+    logger = get_logger("InputBackend")
+
+    if name == "sendinput":
+        return SendInputBackend(config.get('input_chunk_size', 2000))
+    if name == "clipboard":
+        return ClipboardPasteBackend(config.get('clipboard_restore_delay', 0.1),
+                                     config.get('input_chunk_size', 2000))
+    if name == "keyevent":
+        return KeyEventBackend(config.get('type_delay', 0.05))
+    if name == "recording":
+        return RecordingBackend()
+
+    logger.warning(f"未知输入后端: {name}，使用sendinput")
+    return SendInputBackend(config.get('input_chunk_size', 2000))
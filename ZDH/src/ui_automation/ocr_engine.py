@@ -0,0 +1,389 @@
+"""
+统一OCR引擎
+各模块与脚本共用的OCR流程：预处理（PreprocessPipeline阶段配置）→ 识别（按语言与参数在进程内共享的识别器，
+可选分块多进程）→ 后处理（可插拔阶段：文本清理、置信度提升、相似文本合并、排序）；
+同一识别器的整帧识别结果按帧缓存为空间索引，由使用该识别器的所有调用方共享
+"""
+
+import threading
+import weakref
+from typing import Dict, Any, List, Optional, Tuple, Callable, Sequence
+
+import numpy as np
+from src.utils.logger import get_logger
+from src.utils.metrics import metrics
+from src.ui_automation.ocr_preprocess import PreprocessPipeline
+from src.ui_automation.ocr_spatial_index import OCRIndexCache, OCRSpatialIndex
+from src.ui_automation.ocr_text_merge import cluster_similar_texts
+from src.ui_automation.tiled_ocr import TiledOCR
+from src.ui_automation.ocr_server import DEFAULT_ADDRESS, connect_server
+
+
+NOISE_CHARS = ['|', '\\', '/', '-', '_', '=', '+', '*', '&', '^', '%', '$', '#', '@', '!']
+FILE_EXTENSIONS = ['.json', '.txt', '.doc', '.pdf', '.jpg', '.png']
+
+DEFAULT_READTEXT: Dict[str, Any] = {'detail': 1, 'paragraph': False}
+
+# 桌面脚本通用的预处理：1.5倍放大、对比度1.3、锐度1.3
+DESKTOP_PREPROCESSING: Dict[str, Any] = {
+    'stages': [
+        {'name': 'resize', 'factor': 1.5, 'interpolation': 'lanczos'},
+        {'name': 'contrast', 'factor': 1.3},
+        {'name': 'sharpen', 'factor': 1.3}
+    ]
+}
+DEFAULT_POSTPROCESSING: List[str] = ['clean', 'boost', 'merge', 'sort']
+
+# 后处理阶段：(engine, results, target_text) -> results
+PostprocessStage = Callable[['OCREngine', List[Dict[str, Any]], Optional[str]], List[Dict[str, Any]]]
+
+
+def clean_text(text: str) -> str:
+    """清理文本，去除噪声字符与多余空白"""
+    if not text:
+        return ""
+    cleaned = text
+    for char in NOISE_CHARS:
+        cleaned = cleaned.replace(char, '')
+    return ' '.join(cleaned.split())
+
+
+def boost_confidence(confidence: float, text: str, target_text: str = None) -> float:
+    """提升置信度，基于文本质量和目标匹配度"""
+    boosted = confidence
+    lower = text.lower()
+
+    # 1. 基于文本长度提升
+    if len(text) >= 3:
+        boosted += 0.1
+
+    # 2. 基于文本质量提升
+    if text.isalnum() or any(ext in lower for ext in FILE_EXTENSIONS[:4]):
+        boosted += 0.15
+
+    # 3. 基于目标匹配提升
+    if target_text and target_text.lower() in lower:
+        boosted += 0.2
+
+    # 4. 基于文件扩展名提升
+    if any(ext in lower for ext in FILE_EXTENSIONS):
+        boosted += 0.1
+
+    return min(boosted, 1.0)
+
+
+def calculate_center(bbox) -> Tuple[int, int]:
+    """计算边界框中心点"""
+    try:
+        x1, y1 = bbox[0]
+        x3, y3 = bbox[2]
+        return (int((x1 + x3) / 2), int((y1 + y3) / 2))
+    except (TypeError, ValueError, IndexError):
+        return (0, 0)
+
+
+def calculate_area(bbox) -> int:
+    """计算边界框面积"""
+    try:
+        x1, y1 = bbox[0]
+        x3, y3 = bbox[2]
+        return int(abs(x3 - x1) * abs(y3 - y1))
+    except (TypeError, ValueError, IndexError):
+        return 0
+
+
+def merge_text_group(group: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """合并文本组：保留置信度最高的结果，记录合并数"""
+    best_result = max(group, key=lambda x: x['boosted_confidence'])
+    best_result['merged_count'] = len(group)
+    return best_result
+
+
+def _stage_clean(engine: 'OCREngine', results: List[Dict[str, Any]], target_text: str = None) -> List[Dict[str, Any]]:
+    for result in results:
+        result['cleaned_text'] = clean_text(result['original_text'])
+        result['text_length'] = len(result['cleaned_text'])
+    return results
+
+
+def _stage_boost(engine: 'OCREngine', results: List[Dict[str, Any]], target_text: str = None) -> List[Dict[str, Any]]:
+    for result in results:
+        result['boosted_confidence'] = boost_confidence(result['confidence'], result['cleaned_text'], target_text)
+    return results
+
+
+def _stage_merge(engine: 'OCREngine', results: List[Dict[str, Any]], target_text: str = None) -> List[Dict[str, Any]]:
+    """合并位置相近且文本相似的重复识别框（空间索引取候选对，字符串相似度确认）"""
+    if len(results) <= 1:
+        return results
+
+    groups = cluster_similar_texts(
+        [(result['bbox'], result['cleaned_text'], result['boosted_confidence']) for result in results],
+        distance_factor=float(engine.merge_config.get('distance_factor', 1.0)),
+        min_similarity=float(engine.merge_config.get('min_similarity', 0.8))
+    )
+    return [merge_text_group([results[i] for i in group]) if len(group) > 1 else results[group[0]]
+            for group in groups]
+
+
+def _stage_sort(engine: 'OCREngine', results: List[Dict[str, Any]], target_text: str = None) -> List[Dict[str, Any]]:
+    results.sort(key=lambda x: x['boosted_confidence'], reverse=True)
+    return results
+
+
+POSTPROCESS_STAGES: Dict[str, PostprocessStage] = {
+    'clean': _stage_clean,
+    'boost': _stage_boost,
+    'merge': _stage_merge,
+    'sort': _stage_sort
+}
+
+
+def register_postprocess_stage(name: str, stage: PostprocessStage):
+    """注册后处理阶段，之后可在ocr.postprocessing配置中按名称使用"""
+    POSTPROCESS_STAGES[name] = stage
+
+
+def create_easyocr_reader(languages: List[str], **reader_kwargs):
+    """创建easyocr引擎（默认CPU模式）"""
+    import easyocr
+    reader_kwargs.setdefault('gpu', False)
+    reader_kwargs.setdefault('verbose', False)
+    return easyocr.Reader(languages, **reader_kwargs)
+
+
+_readers: Dict[Tuple, Any] = {}
+_index_caches: "weakref.WeakKeyDictionary[Any, OCRIndexCache]" = weakref.WeakKeyDictionary()
+_registry_lock = threading.Lock()
+
+
+def reader_closed(reader: Any) -> bool:
+    """识别器是否已关闭（如等待超时后作废的服务客户端）"""
+    return getattr(reader, 'closed', False) is True
+
+
+def shared_reader(languages: Sequence[str], reader_factory: Callable[..., Any] = None, **reader_kwargs) -> Any:
+    """
+    取进程内共享的识别器，同一语言、参数和创建函数的识别器只加载一次模型
+
+    Args:
+        languages: OCR语言列表
+        reader_factory: 创建识别器的函数 factory(languages, **reader_kwargs)，默认为create_easyocr_reader
+        **reader_kwargs: 创建参数
+
+    Raises:
+        识别器创建失败时抛出原异常（不缓存失败结果）
+    """
+    reader_factory = reader_factory or create_easyocr_reader
+    key = (reader_factory, tuple(languages), tuple(sorted(reader_kwargs.items())))
+    # 模型加载耗时较长，加载期间持锁，避免并发调用方重复加载同一模型
+    with _registry_lock:
+        reader = _readers.get(key)
+        # 已关闭的识别器（如等待超时后作废的服务客户端）不再复用，重新创建
+        if reader is None or reader_closed(reader):
+            reader = reader_factory(list(languages), **reader_kwargs)
+            _readers[key] = reader
+        return reader
+
+
+def open_reader(languages: Sequence[str], server_config: Dict[str, Any] = None,
+                reader_factory: Callable[..., Any] = None, **reader_kwargs) -> Any:
+    """
+    取识别器：启用OCR服务 (ocr.server.enabled) 时连接服务进程（模型常驻，帧经共享内存传递），
+    服务不可用时回退到进程内的共享识别器
+
+    Raises:
+        进程内识别器创建失败时抛出原异常
+    """
+    server_config = server_config or {}
+    if server_config.get('enabled', False):
+        try:
+            return shared_reader(languages, connect_server,
+                                 address=server_config.get('address', DEFAULT_ADDRESS),
+                                 authkey=server_config.get('authkey'),
+                                 timeout=float(server_config.get('timeout', 60.0)),
+                                 authkey_file=server_config.get('authkey_file'))
+        except Exception as e:
+            get_logger("OCREngine").warning(f"OCR服务不可用，使用进程内识别器: {e}")
+    return shared_reader(languages, reader_factory, **reader_kwargs)
+
+
+def shared_index_cache(reader: Any, config: Dict[str, Any] = None) -> OCRIndexCache:
+    """取识别器共享的按帧空间索引缓存（配置以首次创建时为准）"""
+    with _registry_lock:
+        cache = _index_caches.get(reader)
+        if cache is None:
+            cache = OCRIndexCache(reader, config)
+            _index_caches[reader] = cache
+        return cache
+
+
+def clear_shared_readers():
+    """释放全部共享识别器与缓存"""
+    with _registry_lock:
+        _readers.clear()
+        _index_caches.clear()
+
+
+class OCREngine:
+    """统一OCR引擎"""
+
+    def __init__(self, config: Dict[str, Any] = None, reader: Any = None,
+                 reader_factory: Callable[..., Any] = None, reader_kwargs: Dict[str, Any] = None):
+        """
+        初始化OCR引擎（识别器在首次使用时加载）
+
+        Args:
+            config: OCR配置 (ui_automation.ocr)
+                language: 语言，如 "ch_sim+en"
+                preprocessing: 预处理流水线配置
+                readtext: 默认识别参数
+                postprocessing: 后处理阶段名列表，缺省为DEFAULT_POSTPROCESSING
+                merge: 相似文本合并参数
+                tiling: 分块多进程识别配置（启用后主进程不加载识别器）
+                server: 进程外OCR服务配置（启用且服务可用时由服务进程识别）
+                spatial_index: 按帧索引缓存配置
+            reader: 直接使用的识别器（不经共享注册表）
+            reader_factory: 创建进程内识别器的函数，同一函数与参数的识别器在进程内共享
+            reader_kwargs: 创建识别器的参数
+        """
+        self.logger = get_logger("OCREngine")
+        self.config = config or {}
+
+        self.languages = self.config.get('language', 'ch_sim+en').split('+')
+        self.confidence_threshold = float(self.config.get('confidence_threshold', 0.6))
+        self.preprocess_pipeline = PreprocessPipeline(self.config.get('preprocessing', {}))
+        self.readtext_kwargs = dict(self.config.get('readtext', DEFAULT_READTEXT))
+        self.merge_config: Dict[str, Any] = self.config.get('merge', {})
+
+        self.postprocess_stages: List[str] = list(self.config.get('postprocessing', DEFAULT_POSTPROCESSING))
+        for name in self.postprocess_stages:
+            if name not in POSTPROCESS_STAGES:
+                raise ValueError(f"不支持的后处理阶段: {name}")
+
+        # 同一帧按不同预处理配置识别的结果分别缓存
+        self.variant = repr((self.preprocess_pipeline.stages, self.preprocess_pipeline.grayscale_output))
+
+        tiling_config = self.config.get('tiling', {})
+        self.tiled_ocr: Optional[TiledOCR] = None
+        if tiling_config.get('enabled', False):
+            self.tiled_ocr = TiledOCR(tiling_config, self.languages)
+
+        self._reader = reader
+        # 直接传入的识别器由调用方管理，不自动重新连接
+        self._shared_reader = reader is None
+        self._reader_factory = reader_factory
+        self._reader_kwargs = reader_kwargs or {}
+        self._load_error: Optional[Exception] = None
+
+    def load(self) -> Any:
+        """加载（或取共享的）识别器，失败时抛出异常；共享识别器已关闭（服务等待超时后作废）时重新取"""
+        if self.tiled_ocr is not None:
+            return self.tiled_ocr
+        if self._reader is None or (self._shared_reader and reader_closed(self._reader)):
+            try:
+                self._reader = open_reader(self.languages, self.config.get('server'),
+                                           self._reader_factory, **self._reader_kwargs)
+            except Exception as e:
+                self._load_error = e
+                raise
+        return self._reader
+
+    @property
+    def reader(self) -> Optional[Any]:
+        """识别器，无法加载时为None（加载失败后不再重试）"""
+        if self._load_error is not None:
+            return None
+        try:
+            return self.load()
+        except Exception as e:
+            self.logger.warning(f"OCR引擎加载失败: {e}")
+            return None
+
+    @property
+    def index_cache(self) -> Optional[OCRIndexCache]:
+        """识别器共享的按帧索引缓存"""
+        reader = self.reader
+        return shared_index_cache(reader, self.config.get('spatial_index', {})) if reader is not None else None
+
+    def preprocess(self, image: np.ndarray) -> np.ndarray:
+        """按配置的阶段预处理图像（结果位于复用缓冲区，仅供本次识别使用）"""
+        with metrics.span("ocr_preprocess"):
+            try:
+                return self.preprocess_pipeline.run(image)
+            except Exception as e:
+                self.logger.error(f"图像预处理失败: {e}")
+                return image
+
+    def index(self, image: np.ndarray, key: str = None, preprocess: bool = True,
+              **readtext_kwargs) -> Optional[OCRSpatialIndex]:
+        """
+        识别整帧并返回空间索引，同一帧、同一预处理与识别参数只识别一次
+
+        Args:
+            image: 帧图像
+            key: 帧键，默认按内容计算
+            preprocess: 是否先按配置预处理
+            **readtext_kwargs: 覆盖默认识别参数
+        """
+        cache = self.index_cache
+        if cache is None:
+            return None
+        kwargs = dict(self.readtext_kwargs, **readtext_kwargs)
+        if preprocess:
+            return cache.get(image, key, prepare=self.preprocess, variant=self.variant, **kwargs)
+        return cache.get(image, key, **kwargs)
+
+    def readtext(self, image: np.ndarray, preprocess: bool = True,
+                 **readtext_kwargs) -> List[Tuple[Any, str, float]]:
+        """识别整帧，返回readtext格式的结果 [(bbox, text, confidence)]（按阅读顺序）"""
+        index = self.index(image, preprocess=preprocess, **readtext_kwargs)
+        return [item.as_result() for item in index.items] if index is not None else []
+
+    def postprocess(self, results: Sequence[Tuple[Any, str, float]],
+                    target_text: str = None) -> List[Dict[str, Any]]:
+        """依次执行配置的后处理阶段，返回增强结果"""
+        enhanced = [{
+            'bbox': bbox,
+            'original_text': text,
+            'cleaned_text': text,
+            'confidence': confidence,
+            'boosted_confidence': confidence,
+            'center': calculate_center(bbox),
+            'area': calculate_area(bbox),
+            'text_length': len(text)
+        } for bbox, text, confidence in results]
+
+        for name in self.postprocess_stages:
+            enhanced = POSTPROCESS_STAGES[name](self, enhanced, target_text)
+        return enhanced
+
+    def recognize(self, image: np.ndarray, target_text: str = None, preprocess: bool = True,
+                  **readtext_kwargs) -> List[Dict[str, Any]]:
+        """识别图像中的文本，返回后处理后的增强结果"""
+        if self.reader is None:
+            self.logger.warning("OCR引擎未初始化")
+            return []
+        try:
+            results = self.readtext(image, preprocess, **readtext_kwargs)
+            self.logger.debug(f"OCR识别完成，识别到 {len(results)} 个文本区域")
+            return self.postprocess(results, target_text)
+        except Exception as e:
+            self.logger.error(f"OCR识别失败: {e}")
+            return []
+
+    def find_text(self, image: np.ndarray, target_text: str, min_confidence: float = None,
+                  **readtext_kwargs) -> Optional[Dict[str, Any]]:
+        """查找包含目标文本的最佳结果（按提升后置信度），未找到时返回None"""
+        if min_confidence is None:
+            min_confidence = self.confidence_threshold
+        for result in self.recognize(image, target_text, **readtext_kwargs):
+            if (result['boosted_confidence'] >= min_confidence and
+                    target_text.lower() in result['cleaned_text'].lower()):
+                return result
+        return None
+
+    def close(self):
+        """释放分块识别进程池"""
+        if self.tiled_ocr is not None:
+            self.tiled_ocr.close()
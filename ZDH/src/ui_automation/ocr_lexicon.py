@@ -0,0 +1,77 @@
+"""
+OCR受限识别词表
+由目标文本（及配置的已知词汇）生成字符白名单和候选词表：识别器只解码白名单内的字符，
+识别结果再吸附到最接近的词表条目，减少噪声屏幕上的误识别和重试
+"""
+
+from difflib import SequenceMatcher
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+
+def normalize(text: str) -> str:
+    return "".join((text or "").split()).lower()
+
+
+def similarity(text: str, entry: str) -> float:
+    """识别文本与词条的相似度 (0-1)，忽略空白与大小写"""
+    text, entry = normalize(text), normalize(entry)
+    if not text or not entry:
+        return 0.0
+    return SequenceMatcher(None, text, entry).ratio()
+
+
+class Lexicon:
+    """受限识别的候选词表"""
+
+    def __init__(self, entries: Iterable[str], extra_chars: str = "", min_similarity: float = 0.8):
+        """
+        初始化词表
+
+        Args:
+            entries: 候选词条（目标文本与已知词汇）
+            extra_chars: 额外允许的字符
+            min_similarity: 吸附到词条的最低相似度
+        """
+        self.entries: List[str] = list(dict.fromkeys(entry for entry in entries if entry))
+        self.min_similarity = min_similarity
+
+        chars = set(extra_chars)
+        for entry in self.entries:
+            for char in entry:
+                chars.add(char)
+                # 识别器常混淆西文大小写
+                if char.isascii() and char.isalpha():
+                    chars.update((char.lower(), char.upper()))
+        self.allowlist = "".join(sorted(chars))
+
+    def snap(self, text: str) -> Optional[Tuple[str, float]]:
+        """
+        把识别文本吸附到最接近的词条
+
+        Returns:
+            (词条, 相似度)，没有词条达到最低相似度时返回None
+        """
+        best_entry, best_score = None, 0.0
+        for entry in self.entries:
+            score = similarity(text, entry)
+            if score > best_score:
+                best_entry, best_score = entry, score
+        if best_entry is None or best_score < self.min_similarity:
+            return None
+        return best_entry, best_score
+
+
+def build_lexicon(targets: Iterable[str], config: Dict[str, Any] = None) -> Lexicon:
+    """
+    按受限识别配置为目标文本构造词表
+
+    Args:
+        targets: 目标文本
+        config: 受限识别配置 (ocr.constrained)：vocabulary 已知词汇、extra_chars、min_similarity
+    """
+    config = config or {}
+    return Lexicon(
+        list(targets) + list(config.get('vocabulary', [])),
+        extra_chars=config.get('extra_chars', ""),
+        min_similarity=float(config.get('min_similarity', 0.8))
+    )
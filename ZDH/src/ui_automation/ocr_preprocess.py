@@ -0,0 +1,141 @@
+"""
+OCR图像预处理流水线
+全程在单通道灰度图上用OpenCV处理，各阶段写入按线程复用的预分配缓冲区，
+避免BGR/RGB/PIL/numpy之间的反复转换与整帧拷贝；阶段及参数由配置决定
+"""
+
+import threading
+from typing import Dict, Any, List, Tuple
+
+import cv2
+import numpy as np
+from src.utils.logger import get_logger
+
+
+# 与原PIL处理链等价的默认阶段：2倍放大、对比度1.5、锐度1.3、3x3中值滤波、自适应阈值、闭运算
+DEFAULT_STAGES: List[Dict[str, Any]] = [
+    {'name': 'resize', 'factor': 2.0},
+    {'name': 'contrast', 'factor': 1.5},
+    {'name': 'sharpen', 'factor': 1.3},
+    {'name': 'denoise', 'size': 3},
+    {'name': 'adaptive_threshold', 'block_size': 11, 'c': 2},
+    {'name': 'morphology', 'kernel': 2}
+]
+
+INTERPOLATIONS = {
+    'nearest': cv2.INTER_NEAREST,
+    'linear': cv2.INTER_LINEAR,
+    'area': cv2.INTER_AREA,
+    'cubic': cv2.INTER_CUBIC,
+    'lanczos': cv2.INTER_LANCZOS4
+}
+
+# PIL ImageFilter.SMOOTH 卷积核（ImageEnhance.Sharpness的退化图像）
+_SMOOTH_KERNEL = np.array([[1, 1, 1], [1, 5, 1], [1, 1, 1]], dtype=np.float32) / 13
+
+
+class PreprocessPipeline:
+    """单色彩空间、缓冲区复用的OCR预处理流水线"""
+
+    def __init__(self, config: Dict[str, Any] = None):
+        """
+        初始化预处理流水线
+
+        Args:
+            config: 预处理配置 (ui_automation.ocr.preprocessing)
+                stages: 阶段列表，每项 {"name": 阶段名, ...参数}，缺省为DEFAULT_STAGES
+                grayscale_output: 直接输出灰度图交给easyocr（否则转换为BGR）
+        """
+        self.logger = get_logger("PreprocessPipeline")
+        config = config or {}
+
+        self.stages: List[Dict[str, Any]] = [dict(stage) for stage in config.get('stages', DEFAULT_STAGES)]
+        self.grayscale_output = config.get('grayscale_output', False)
+        for stage in self.stages:
+            if not hasattr(self, f"_stage_{stage.get('name')}"):
+                raise ValueError(f"不支持的预处理阶段: {stage.get('name')}")
+
+        self._kernels: Dict[int, np.ndarray] = {}
+        self._local = threading.local()
+
+    @property
+    def scale(self) -> float:
+        """输出相对输入的缩放倍数"""
+        scale = 1.0
+        for stage in self.stages:
+            if stage['name'] == 'resize':
+                scale *= float(stage.get('factor', 1.0))
+        return scale
+
+    def _buffer(self, key: Any, shape: Tuple[int, ...]) -> np.ndarray:
+        """取本线程的预分配缓冲区，尺寸变化时重新分配"""
+        buffers = getattr(self._local, 'buffers', None)
+        if buffers is None:
+            buffers = self._local.buffers = {}
+        buffer = buffers.get(key)
+        if buffer is None or buffer.shape != shape:
+            buffer = np.empty(shape, dtype=np.uint8)
+            buffers[key] = buffer
+        return buffer
+
+    def run(self, image: np.ndarray) -> np.ndarray:
+        """
+        执行预处理
+
+        Args:
+            image: BGR或灰度图像
+
+        Returns:
+            预处理后的图像（灰度或BGR）；结果位于复用缓冲区，下次调用会被覆盖，需要保留时请复制
+        """
+        if image.ndim == 3:
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=self._buffer('gray', image.shape[:2]))
+        else:
+            gray = image
+
+        for index, stage in enumerate(self.stages):
+            gray = getattr(self, f"_stage_{stage['name']}")(gray, stage, index)
+
+        if self.grayscale_output:
+            return gray
+        return cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR, dst=self._buffer('output', gray.shape + (3,)))
+
+    def _stage_resize(self, image: np.ndarray, stage: Dict[str, Any], index: int) -> np.ndarray:
+        factor = float(stage.get('factor', 2.0))
+        if factor == 1.0:
+            return image
+        height, width = image.shape[:2]
+        size = (int(width * factor), int(height * factor))
+        interpolation = INTERPOLATIONS.get(stage.get('interpolation', 'lanczos'), cv2.INTER_LANCZOS4)
+        return cv2.resize(image, size, dst=self._buffer(index, (size[1], size[0])),
+                          interpolation=interpolation)
+
+    def _stage_contrast(self, image: np.ndarray, stage: Dict[str, Any], index: int) -> np.ndarray:
+        # 与ImageEnhance.Contrast相同：以平均灰度为中心线性拉伸
+        factor = float(stage.get('factor', 1.5))
+        mean = int(cv2.mean(image)[0] + 0.5)
+        return cv2.addWeighted(image, factor, image, 0, mean * (1 - factor),
+                               dst=self._buffer(index, image.shape))
+
+    def _stage_sharpen(self, image: np.ndarray, stage: Dict[str, Any], index: int) -> np.ndarray:
+        # 与ImageEnhance.Sharpness相同：在平滑图像与原图之间外插
+        factor = float(stage.get('factor', 1.3))
+        smooth = cv2.filter2D(image, -1, _SMOOTH_KERNEL, dst=self._buffer((index, 'smooth'), image.shape),
+                              borderType=cv2.BORDER_REPLICATE)
+        return cv2.addWeighted(image, factor, smooth, 1 - factor, 0, dst=self._buffer(index, image.shape))
+
+    def _stage_denoise(self, image: np.ndarray, stage: Dict[str, Any], index: int) -> np.ndarray:
+        return cv2.medianBlur(image, int(stage.get('size', 3)), dst=self._buffer(index, image.shape))
+
+    def _stage_adaptive_threshold(self, image: np.ndarray, stage: Dict[str, Any], index: int) -> np.ndarray:
+        return cv2.adaptiveThreshold(image, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY,
+                                     int(stage.get('block_size', 11)), float(stage.get('c', 2)),
+                                     dst=self._buffer(index, image.shape))
+
+    def _stage_morphology(self, image: np.ndarray, stage: Dict[str, Any], index: int) -> np.ndarray:
+        size = int(stage.get('kernel', 2))
+        kernel = self._kernels.get(size)
+        if kernel is None:
+            kernel = self._kernels[size] = np.ones((size, size), np.uint8)
+        return cv2.morphologyEx(image, cv2.MORPH_CLOSE, kernel, dst=self._buffer(index, image.shape))
+
@@ -0,0 +1,511 @@
+"""
+进程外OCR服务
+常驻的服务进程持有一组OCR工作进程（各自加载一次模型），同一主机上的多个测试进程共用这组已加载的模型；
+客户端把帧写入自己的共享内存段，只经本地连接发送段名、形状等元数据，工作进程直接在共享内存上
+构造numpy视图识别（不拷贝、不序列化整帧），识别结果经同一连接返回
+
+连接以pickle传递请求，认证密钥等同于在服务进程中执行代码的权限：不提供默认密钥，
+未配置时使用当前用户运行目录下仅本人可读写 (0600) 的随机密钥文件，服务首次启动时生成
+"""
+
+import os
+import sys
+import secrets
+import queue
+import threading
+import argparse
+import multiprocessing
+from multiprocessing import shared_memory
+from multiprocessing.connection import Client, Connection, Listener
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple, Callable, Sequence
+
+import numpy as np
+from src.utils.logger import get_logger
+
+
+DEFAULT_ADDRESS = "127.0.0.1:47600"
+AUTHKEY_FILE_NAME = "zdh-ocr.key"
+
+# 工作进程内缓存的已附加共享内存段数（每个客户端一个段）
+_ATTACHED_SEGMENTS = 8
+
+
+def parse_address(address: Any) -> Tuple[str, int]:
+    """解析服务地址，"host:port" 或 (host, port)"""
+    if isinstance(address, str):
+        host, _, port = address.rpartition(':')
+        return host or "127.0.0.1", int(port)
+    return tuple(address)
+
+
+def default_authkey_path() -> Path:
+    """默认密钥文件：$XDG_RUNTIME_DIR/zdh-ocr.key，无运行目录时为 ~/.zdh/zdh-ocr.key"""
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return Path(runtime_dir) / AUTHKEY_FILE_NAME
+    return Path.home() / ".zdh" / AUTHKEY_FILE_NAME
+
+
+def load_authkey(path: Any = None, create: bool = False) -> bytes:
+    """
+    读取服务认证密钥文件
+
+    Args:
+        path: 密钥文件路径，默认为default_authkey_path()
+        create: 文件不存在时生成随机密钥（权限0600）
+
+    Raises:
+        文件不存在且不生成时抛出FileNotFoundError；
+        文件不属于当前用户或其他用户可访问时抛出PermissionError
+    """
+    path = Path(path) if path else default_authkey_path()
+    if create:
+        path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            pass
+        else:
+            with os.fdopen(fd, 'w') as f:
+                f.write(secrets.token_hex(32))
+
+    if hasattr(os, 'getuid'):
+        stat = path.stat()
+        if stat.st_uid != os.getuid() or stat.st_mode & 0o077:
+            raise PermissionError(f"OCR服务密钥文件必须仅当前用户可访问 (0600): {path}")
+    authkey = path.read_text().strip().encode()
+    if not authkey:
+        raise ValueError(f"OCR服务密钥文件为空: {path}")
+    return authkey
+
+
+def resolve_authkey(authkey: Any = None, authkey_file: Any = None, create: bool = False) -> bytes:
+    """显式配置的密钥优先，否则读取（服务端按需生成）密钥文件"""
+    if authkey:
+        return authkey if isinstance(authkey, bytes) else str(authkey).encode()
+    return load_authkey(authkey_file, create)
+
+
+def create_easyocr_reader(languages: List[str]):
+    """工作进程中创建easyocr引擎（CPU模式）"""
+    import easyocr
+    return easyocr.Reader(languages, gpu=False, verbose=False)
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """附加到客户端创建的共享内存段（段的生命周期由客户端管理）"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+    # Python 3.13以前附加也会登记到资源跟踪器（进程退出时会删除客户端的段），
+    # 附加期间跳过登记；工作进程单线程处理请求，临时替换不影响其他线程
+    from multiprocessing import resource_tracker
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+def _plain(results: Sequence) -> List[Tuple[Any, str, float]]:
+    """把识别结果转换为Python原生类型（numpy标量序列化开销大）"""
+    plain = []
+    for bbox, text, confidence in results:
+        plain.append(([[int(x), int(y)] for x, y in bbox], str(text), float(confidence)))
+    return plain
+
+
+def _worker_main(conn: Connection, reader_factory: Callable[[List[str]], Any], languages: List[str],
+                 threads: int):
+    """工作进程：加载一次模型，循环处理共享内存中的帧"""
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+    try:
+        reader = reader_factory(languages)
+    except Exception as e:
+        conn.send(('error', f"OCR引擎加载失败: {e}"))
+        return
+    conn.send(('ok', None))
+
+    segments: "OrderedDict[str, shared_memory.SharedMemory]" = OrderedDict()
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            break
+        if request is None:
+            break
+
+        try:
+            segment = segments.get(request['shm'])
+            if segment is None or segment.size < request['nbytes']:
+                if segment is not None:
+                    segment.close()
+                segment = segments[request['shm']] = _attach(request['shm'])
+            segments.move_to_end(request['shm'])
+            while len(segments) > _ATTACHED_SEGMENTS:
+                segments.popitem(last=False)[1].close()
+
+            frame = np.ndarray(request['shape'], dtype=request['dtype'], buffer=segment.buf)
+            try:
+                reply = ('ok', _plain(reader.readtext(frame, **request.get('kwargs', {}))))
+            finally:
+                # 视图释放后共享内存段才能关闭
+                del frame
+        except Exception as e:
+            reply = ('error', f"{type(e).__name__}: {e}")
+        conn.send(reply)
+
+    for segment in segments.values():
+        segment.close()
+
+
+class OCRServer:
+    """进程外OCR服务"""
+
+    def __init__(self, config: Dict[str, Any] = None, languages: Sequence[str] = None,
+                 reader_factory: Callable[[List[str]], Any] = create_easyocr_reader):
+        """
+        初始化OCR服务
+
+        Args:
+            config: 服务配置 (ui_automation.ocr.server)
+                address: 监听地址 "host:port"（端口为0时自动选择）
+                authkey: 连接认证密钥，未配置时使用密钥文件
+                authkey_file: 密钥文件路径，默认为default_authkey_path()，不存在时生成
+                workers: OCR工作进程数
+                threads_per_worker: 每进程torch线程数
+                start_method: 工作进程启动方式
+            languages: OCR语言
+            reader_factory: 工作进程中创建OCR引擎的函数（需可被子进程导入）
+        """
+        self.logger = get_logger("OCRServer")
+        config = config or {}
+
+        self.address = parse_address(config.get('address', DEFAULT_ADDRESS))
+        self.authkey = resolve_authkey(config.get('authkey'), config.get('authkey_file'), create=True)
+        self.workers = max(1, int(config.get('workers', 1)))
+        self.threads_per_worker = max(1, int(config.get('threads_per_worker', 0) or
+                                             (multiprocessing.cpu_count() // self.workers)))
+        self.start_method = config.get('start_method', 'spawn')
+        self.languages = list(languages or ['ch_sim', 'en'])
+        self.reader_factory = reader_factory
+        self.config = config
+
+        self._idle: "queue.Queue[Connection]" = queue.Queue()
+        self._processes: List[multiprocessing.Process] = []
+        self._listener: Optional[Listener] = None
+        self._stopped = threading.Event()
+        self._process: Optional[multiprocessing.Process] = None
+
+    def _start_workers(self):
+        """启动工作进程并等待各自加载完模型"""
+        context = multiprocessing.get_context(self.start_method)
+        connections = []
+        for _ in range(self.workers):
+            parent, child = context.Pipe()
+            process = context.Process(
+                target=_worker_main,
+                args=(child, self.reader_factory, self.languages, self.threads_per_worker),
+                daemon=True
+            )
+            process.start()
+            child.close()
+            self._processes.append(process)
+            connections.append(parent)
+
+        for conn in connections:
+            status, message = conn.recv()
+            if status != 'ok':
+                raise RuntimeError(message)
+            self._idle.put(conn)
+        self.logger.info(f"OCR工作进程已就绪: {self.workers} 个进程，每进程 {self.threads_per_worker} 个线程")
+
+    def serve_forever(self, ready: Connection = None):
+        """
+        在当前进程运行服务，直到收到shutdown请求
+
+        Args:
+            ready: 服务就绪后发送实际监听地址的连接（由start使用）
+        """
+        try:
+            self._start_workers()
+            self._listener = Listener(self.address, authkey=self.authkey)
+        except Exception as e:
+            if ready is not None:
+                ready.send(('error', str(e)))
+            self._stop_workers()
+            raise
+
+        self.address = self._listener.address
+        self.logger.info(f"OCR服务已启动: {self.address[0]}:{self.address[1]}")
+        if ready is not None:
+            ready.send(('ok', self.address))
+
+        while not self._stopped.is_set():
+            try:
+                conn = self._listener.accept()
+            except (OSError, multiprocessing.AuthenticationError) as e:
+                self.logger.warning(f"拒绝OCR客户端连接: {e}")
+                continue
+            threading.Thread(target=self._handle_client, args=(conn,), daemon=True).start()
+
+        self._listener.close()
+        self._stop_workers()
+        self.logger.info("OCR服务已停止")
+
+    def _handle_client(self, conn: Connection):
+        """处理一个客户端连接上的全部请求"""
+        with conn:
+            while not self._stopped.is_set():
+                try:
+                    request = conn.recv()
+                except (EOFError, OSError):
+                    break
+
+                op = request.get('op')
+                if op == 'readtext':
+                    reply = self._dispatch(request)
+                elif op == 'ping':
+                    reply = ('ok', {'languages': self.languages, 'workers': self.workers})
+                elif op == 'shutdown':
+                    reply = ('ok', None)
+                    self._stopped.set()
+                    # 关闭监听套接字不会唤醒阻塞的accept，连接一次使其返回
+                    Client(self.address, authkey=self.authkey).close()
+                else:
+                    reply = ('error', f"不支持的请求: {op}")
+
+                try:
+                    conn.send(reply)
+                except OSError:
+                    # 客户端等待超时后已断开
+                    break
+
+    def _dispatch(self, request: Dict[str, Any]) -> Tuple[str, Any]:
+        """把识别请求交给空闲的工作进程（全部繁忙时排队等待）"""
+        worker = self._idle.get()
+        try:
+            worker.send(request)
+            reply = worker.recv()
+        except (EOFError, OSError) as e:
+            self.logger.error(f"OCR工作进程异常退出: {e}")
+            return ('error', f"OCR工作进程异常退出: {e}")
+        self._idle.put(worker)
+        return reply
+
+    def _stop_workers(self):
+        while not self._idle.empty():
+            conn = self._idle.get()
+            try:
+                conn.send(None)
+            except OSError:
+                pass
+            conn.close()
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._processes.clear()
+
+    def start(self, timeout: float = 120.0) -> Tuple[str, int]:
+        """
+        在后台进程中启动服务，等待模型加载完成
+
+        Returns:
+            实际监听地址 (host, port)
+        """
+        context = multiprocessing.get_context(self.start_method)
+        parent, child = context.Pipe()
+        self._process = context.Process(target=_run_server,
+                                        args=(self.config, self.languages, self.reader_factory, child))
+        self._process.start()
+        child.close()
+
+        if not parent.poll(timeout):
+            self._process.terminate()
+            raise TimeoutError("OCR服务启动超时")
+        status, payload = parent.recv()
+        if status != 'ok':
+            self._process.join()
+            raise RuntimeError(f"OCR服务启动失败: {payload}")
+        self.address = payload
+        return self.address
+
+    def stop(self, timeout: float = 10.0):
+        """停止start启动的后台服务"""
+        if self._process is None:
+            return
+        try:
+            with OCRClient(self.address, self.authkey) as client:
+                client.shutdown()
+        except OSError:
+            pass
+        self._process.join(timeout)
+        if self._process.is_alive():
+            self._process.terminate()
+        self._process = None
+
+
+def _run_server(config: Dict[str, Any], languages: List[str], reader_factory: Callable[[List[str]], Any],
+                ready: Connection):
+    OCRServer(config, languages, reader_factory).serve_forever(ready)
+
+
+class OCRClient:
+    """OCR服务客户端，提供与easyocr相同的readtext接口"""
+
+    def __init__(self, address: Any = DEFAULT_ADDRESS, authkey: Any = None, timeout: float = 60.0,
+                 authkey_file: Any = None):
+        """
+        连接OCR服务
+
+        Args:
+            address: 服务地址
+            authkey: 连接认证密钥，未指定时读取密钥文件
+            timeout: 单次识别的等待上限（秒）
+            authkey_file: 密钥文件路径，默认为default_authkey_path()
+
+        Raises:
+            服务未启动时抛出ConnectionRefusedError，密钥文件不存在时抛出FileNotFoundError
+        """
+        self.logger = get_logger("OCRClient")
+        authkey = resolve_authkey(authkey, authkey_file)
+        self.address = parse_address(address)
+        self.timeout = timeout
+        self._conn = Client(self.address, authkey=authkey)
+        self._segment: Optional[shared_memory.SharedMemory] = None
+        self._frame: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> 'OCRClient':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def closed(self) -> bool:
+        """连接是否已关闭（超时或通信失败后客户端作废，需重新连接）"""
+        return self._conn.closed
+
+    def _request(self, request: Dict[str, Any]) -> Any:
+        if self._conn.closed:
+            raise ConnectionError("OCR服务连接已关闭")
+        try:
+            self._conn.send(request)
+            if not self._conn.poll(self.timeout):
+                raise TimeoutError(f"OCR服务未在 {self.timeout} 秒内响应")
+            status, payload = self._conn.recv()
+        except (OSError, EOFError):
+            # 超时的迟到回复仍留在连接上，工作进程也可能仍在读取共享内存段：
+            # 继续使用会把上一帧的结果当作下一帧返回，因此作废连接与段
+            self._invalidate()
+            raise
+        if status != 'ok':
+            raise RuntimeError(payload)
+        return payload
+
+    def ping(self) -> Dict[str, Any]:
+        """服务信息 {"languages", "workers"}"""
+        with self._lock:
+            return self._request({'op': 'ping'})
+
+    def frame_buffer(self, shape: Tuple[int, ...], dtype: Any = np.uint8) -> np.ndarray:
+        """
+        共享内存中的帧缓冲区；调用方直接写入（如截图）后传给readtext，可省去一次整帧拷贝
+
+        缓冲区在下次调用frame_buffer或readtext传入其他图像时可能被覆盖
+        """
+        dtype = np.dtype(dtype)
+        nbytes = int(np.prod(shape)) * dtype.itemsize
+        if self._segment is None or self._segment.size < nbytes:
+            self._release_segment()
+            self._segment = shared_memory.SharedMemory(create=True, size=max(nbytes, 1))
+        if self._frame is None or self._frame.shape != tuple(shape) or self._frame.dtype != dtype:
+            self._frame = np.ndarray(shape, dtype=dtype, buffer=self._segment.buf)
+        return self._frame
+
+    def readtext(self, image: np.ndarray, **readtext_kwargs) -> List[Tuple[Any, str, float]]:
+        """识别图像，返回 [(bbox, text, confidence)]"""
+        with self._lock:
+            # 已作废的客户端不再分配共享内存段（随后无人释放）
+            if self._conn.closed:
+                raise ConnectionError("OCR服务连接已关闭")
+            if image is not self._frame:
+                np.copyto(self.frame_buffer(image.shape, image.dtype), image)
+            return self._request({
+                'op': 'readtext',
+                'shm': self._segment.name,
+                'nbytes': self._frame.nbytes,
+                'shape': self._frame.shape,
+                'dtype': self._frame.dtype.str,
+                'kwargs': readtext_kwargs
+            })
+
+    def shutdown(self):
+        """请求服务停止"""
+        with self._lock:
+            self._request({'op': 'shutdown'})
+
+    def _release_segment(self):
+        self._frame = None
+        if self._segment is not None:
+            self._segment.close()
+            self._segment.unlink()
+            self._segment = None
+
+    def _invalidate(self):
+        self._conn.close()
+        # 仅解除当前进程的映射并删除段名，工作进程已附加的映射在其关闭前仍有效
+        self._release_segment()
+
+    def close(self):
+        """断开连接并释放共享内存段"""
+        with self._lock:
+            self._invalidate()
+
+
+def connect_server(languages: Sequence[str], address: Any = DEFAULT_ADDRESS, authkey: Any = None,
+                   timeout: float = 60.0, authkey_file: Any = None) -> OCRClient:
+    """
+    连接OCR服务并确认服务加载的语言包含所需语言
+
+    Raises:
+        服务未启动时抛出ConnectionRefusedError，语言不满足时抛出ValueError
+    """
+    client = OCRClient(address, authkey, timeout, authkey_file)
+    missing = set(languages) - set(client.ping()['languages'])
+    if missing:
+        client.close()
+        raise ValueError(f"OCR服务未加载语言: {sorted(missing)}")
+    return client
+
+
+def main(argv: List[str] = None) -> int:
+    from src.utils.config_manager import config_manager
+
+    ocr_config = config_manager.get_ui_config().get('ocr', {})
+    server_config = dict(ocr_config.get('server', {}))
+
+    parser = argparse.ArgumentParser(description="进程外OCR服务")
+    parser.add_argument("--address", default=server_config.get('address', DEFAULT_ADDRESS), help="监听地址 host:port")
+    parser.add_argument("--workers", type=int, default=server_config.get('workers', 1), help="OCR工作进程数")
+    parser.add_argument("--language", default=ocr_config.get('language', 'ch_sim+en'), help="OCR语言，如 ch_sim+en")
+    args = parser.parse_args(argv)
+
+    server_config.update(address=args.address, workers=args.workers)
+    OCRServer(server_config, args.language.split('+')).serve_forever()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,338 @@
+"""
+OCR结果空间索引
+把一帧的OCR结果按文本框中心分桶到均匀网格中，支持最近k个、半径内、矩形内、
+右侧/下方等查询，只访问查询点附近的网格；索引按帧构建一次，由各调用方共享
+"""
+
+import heapq
+import math
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Tuple, Callable, Iterable
+
+import numpy as np
+from src.utils.logger import get_logger
+from src.utils.metrics import metrics
+from src.ui_automation.two_stage_ocr import TwoStageOCR
+from src.ui_automation.fuzzy_text_index import FuzzyTextIndex
+
+
+# (left, top, right, bottom)
+Box = Tuple[float, float, float, float]
+
+
+@dataclass
+class OCRItem:
+    """一条OCR识别结果"""
+    bbox: Any                       # 识别器返回的原始四点框
+    text: str
+    confidence: float
+    box: Box                        # 外接矩形
+    center: Tuple[float, float]
+    source: int = -1                # 在输入结果中的序号
+
+    @property
+    def width(self) -> float:
+        return self.box[2] - self.box[0]
+
+    @property
+    def height(self) -> float:
+        return self.box[3] - self.box[1]
+
+    def as_result(self) -> Tuple[Any, str, float]:
+        """还原为readtext格式 (bbox, text, confidence)"""
+        return self.bbox, self.text, self.confidence
+
+
+def _bounding_box(bbox) -> Box:
+    xs = [float(point[0]) for point in bbox]
+    ys = [float(point[1]) for point in bbox]
+    return (min(xs), min(ys), max(xs), max(ys))
+
+
+class OCRSpatialIndex:
+    """OCR结果的网格空间索引"""
+
+    def __init__(self, results: Iterable[Tuple[Any, str, float]], cell_size: float = 0):
+        """
+        构建索引
+
+        Args:
+            results: readtext结果 [(bbox, text, confidence)]
+            cell_size: 网格边长（像素），0为按文本框高度中位数自动选择
+        """
+        self.items: List[OCRItem] = []
+        for source, (bbox, text, confidence) in enumerate(results):
+            box = _bounding_box(bbox)
+            center = ((box[0] + box[2]) / 2, (box[1] + box[3]) / 2)
+            self.items.append(OCRItem(bbox, text, float(confidence), box, center, source))
+        # 阅读顺序：从上到下、从左到右
+        self.items.sort(key=lambda item: (item.box[1], item.box[0]))
+
+        if not cell_size:
+            heights = [item.height for item in self.items if item.height > 0]
+            # 每格约容纳几行文本，查询半径通常为数个行高
+            cell_size = 4 * float(np.median(heights)) if heights else 64.0
+        self.cell_size = max(1.0, float(cell_size))
+
+        self.max_width = max((item.width for item in self.items), default=0.0)
+        self.max_height = max((item.height for item in self.items), default=0.0)
+
+        self._cells: Dict[Tuple[int, int], List[int]] = {}
+        for index, item in enumerate(self.items):
+            self._cells.setdefault(self._cell(*item.center), []).append(index)
+
+        if self._cells:
+            columns = [cell[0] for cell in self._cells]
+            rows = [cell[1] for cell in self._cells]
+            self._extent = (min(columns), min(rows), max(columns), max(rows))
+        else:
+            self._extent = (0, 0, -1, -1)
+
+        self._fuzzy: Optional[FuzzyTextIndex] = None
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    @property
+    def fuzzy(self) -> FuzzyTextIndex:
+        """本帧文本的模糊匹配索引（首次使用时构建，序号与items一致）"""
+        if self._fuzzy is None:
+            self._fuzzy = FuzzyTextIndex([item.text for item in self.items])
+        return self._fuzzy
+
+    def translated(self, dx: float, dy: float) -> "OCRSpatialIndex":
+        """
+        平移后的索引（区域截图的识别结果换算到屏幕坐标）
+
+        文本与阅读顺序不变，模糊匹配索引与原索引共用；偏移为0时返回自身
+        """
+        if not dx and not dy:
+            return self
+        index = OCRSpatialIndex(
+            [([[point[0] + dx, point[1] + dy] for point in item.bbox], item.text, item.confidence)
+             for item in self.items],
+            self.cell_size
+        )
+        for moved, item in zip(index.items, self.items):
+            moved.source = item.source
+        index._fuzzy = self._fuzzy
+        return index
+
+    def _cell(self, x: float, y: float) -> Tuple[int, int]:
+        return int(math.floor(x / self.cell_size)), int(math.floor(y / self.cell_size))
+
+    def _range(self, left: float, top: float, right: float, bottom: float) -> Iterable[OCRItem]:
+        """中心点落在矩形所覆盖网格内的候选项"""
+        col_min, row_min = self._cell(left, top)
+        col_max, row_max = self._cell(right, bottom)
+        col_min, row_min = max(col_min, self._extent[0]), max(row_min, self._extent[1])
+        col_max, row_max = min(col_max, self._extent[2]), min(row_max, self._extent[3])
+        for row in range(row_min, row_max + 1):
+            for col in range(col_min, col_max + 1):
+                for index in self._cells.get((col, row), ()):
+                    yield self.items[index]
+
+    def query(self, min_confidence: float = 0.0,
+              predicate: Callable[[OCRItem], bool] = None) -> List[OCRItem]:
+        """按阅读顺序返回满足条件的全部结果"""
+        return [item for item in self.items
+                if item.confidence >= min_confidence and (predicate is None or predicate(item))]
+
+    def nearest(self, x: float, y: float, k: int = 1, max_distance: float = None,
+                min_confidence: float = 0.0,
+                predicate: Callable[[OCRItem], bool] = None) -> List[Tuple[float, OCRItem]]:
+        """
+        距离点最近的k个结果（按中心点距离）
+
+        从查询点所在网格逐圈向外扩展，已找到k个且第k个不远于未访问网格的最近可能距离时停止
+
+        Returns:
+            [(距离, 结果)]，按距离升序
+        """
+        if not self.items or k <= 0:
+            return []
+
+        center_col, center_row = self._cell(x, y)
+        max_ring = max(abs(center_col - self._extent[0]), abs(center_col - self._extent[2]),
+                       abs(center_row - self._extent[1]), abs(center_row - self._extent[3]))
+        # 最大堆（取负距离）保存当前最近的k个
+        best: List[Tuple[float, int]] = []
+
+        for ring in range(max_ring + 1):
+            # 未访问的网格（第ring圈及以外）中的点距查询点至少 (ring-1) x 网格边长
+            if ring and len(best) == k and -best[0][0] <= (ring - 1) * self.cell_size:
+                break
+            if max_distance is not None and (ring - 1) * self.cell_size > max_distance:
+                break
+
+            for col in range(center_col - ring, center_col + ring + 1):
+                for row in range(center_row - ring, center_row + ring + 1):
+                    if max(abs(col - center_col), abs(row - center_row)) != ring:
+                        continue
+                    for index in self._cells.get((col, row), ()):
+                        item = self.items[index]
+                        if item.confidence < min_confidence or (predicate is not None and not predicate(item)):
+                            continue
+                        distance = math.hypot(item.center[0] - x, item.center[1] - y)
+                        if max_distance is not None and distance > max_distance:
+                            continue
+                        if len(best) < k:
+                            heapq.heappush(best, (-distance, index))
+                        elif distance < -best[0][0]:
+                            heapq.heapreplace(best, (-distance, index))
+
+        return [(-negative, self.items[index]) for negative, index in sorted(best, reverse=True)]
+
+    def within_radius(self, x: float, y: float, radius: float,
+                      min_confidence: float = 0.0) -> List[Tuple[float, OCRItem]]:
+        """中心点在半径内的结果，按距离升序"""
+        found = []
+        for item in self._range(x - radius, y - radius, x + radius, y + radius):
+            if item.confidence < min_confidence:
+                continue
+            distance = math.hypot(item.center[0] - x, item.center[1] - y)
+            if distance <= radius:
+                found.append((distance, item))
+        found.sort(key=lambda pair: pair[0])
+        return found
+
+    def inside_rect(self, rect: Box, fully: bool = False, min_confidence: float = 0.0) -> List[OCRItem]:
+        """
+        矩形内的结果（按阅读顺序）
+
+        Args:
+            rect: (left, top, right, bottom)
+            fully: True时要求整个文本框在矩形内，否则只要求中心点在矩形内
+        """
+        left, top, right, bottom = rect
+        found = []
+        for item in self._range(left, top, right, bottom):
+            if item.confidence < min_confidence:
+                continue
+            if fully:
+                inside = (item.box[0] >= left and item.box[1] >= top and
+                          item.box[2] <= right and item.box[3] <= bottom)
+            else:
+                inside = left <= item.center[0] <= right and top <= item.center[1] <= bottom
+            if inside:
+                found.append(item)
+        found.sort(key=lambda item: (item.box[1], item.box[0]))
+        return found
+
+    def right_of(self, anchor: Box, max_distance: float = None, min_overlap: float = 0.5,
+                 min_confidence: float = 0.0) -> List[Tuple[float, OCRItem]]:
+        """
+        锚点框右侧同一行的结果（如标签右边的值）
+
+        Args:
+            anchor: 锚点框 (left, top, right, bottom)
+            max_distance: 最大水平间距，None为不限制
+            min_overlap: 垂直方向重叠占较矮框高度的最低比例
+
+        Returns:
+            [(水平间距, 结果)]，按间距升序
+        """
+        left, top, right, bottom = anchor
+        reach = max_distance if max_distance is not None else self.cell_size * (self._extent[2] + 2)
+        margin = self.max_height / 2
+        found = []
+        for item in self._range(right, top - margin, right + reach + self.max_width / 2, bottom + margin):
+            gap = item.box[0] - right
+            if item.confidence < min_confidence or item.center[0] <= right or gap > reach:
+                continue
+            overlap = min(bottom, item.box[3]) - max(top, item.box[1])
+            if overlap >= min_overlap * min(bottom - top, item.height):
+                found.append((max(0.0, gap), item))
+        found.sort(key=lambda pair: pair[0])
+        return found
+
+    def below(self, anchor: Box, max_distance: float = None, min_overlap: float = 0.5,
+              min_confidence: float = 0.0) -> List[Tuple[float, OCRItem]]:
+        """
+        锚点框下方同一列的结果（如图标下方的名称）
+
+        Args:
+            anchor: 锚点框 (left, top, right, bottom)
+            max_distance: 最大垂直间距，None为不限制
+            min_overlap: 水平方向重叠占较窄框宽度的最低比例
+
+        Returns:
+            [(垂直间距, 结果)]，按间距升序
+        """
+        left, top, right, bottom = anchor
+        reach = max_distance if max_distance is not None else self.cell_size * (self._extent[3] + 2)
+        margin = self.max_width / 2
+        found = []
+        for item in self._range(left - margin, bottom, right + margin, bottom + reach + self.max_height / 2):
+            gap = item.box[1] - bottom
+            if item.confidence < min_confidence or item.center[1] <= bottom or gap > reach:
+                continue
+            overlap = min(right, item.box[2]) - max(left, item.box[0])
+            if overlap >= min_overlap * min(right - left, item.width):
+                found.append((max(0.0, gap), item))
+        found.sort(key=lambda pair: pair[0])
+        return found
+
+
+class OCRIndexCache:
+    """按帧缓存的OCR空间索引：同一帧只识别、建索引一次"""
+
+    def __init__(self, reader: Any, config: Dict[str, Any] = None):
+        """
+        初始化索引缓存
+
+        Args:
+            reader: 提供readtext的OCR引擎
+            config: 空间索引配置 (ocr.spatial_index)：cache_size 缓存帧数，cell_size 网格边长
+        """
+        self.logger = get_logger("OCRIndexCache")
+        config = config or {}
+
+        self.reader = reader
+        self.cache_size = int(config.get('cache_size', 2))
+        self.cell_size = float(config.get('cell_size', 0))
+        self._cache: "OrderedDict[str, OCRSpatialIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, image: np.ndarray, key: str = None,
+            prepare: Callable[[np.ndarray], np.ndarray] = None, variant: str = None,
+            **readtext_kwargs) -> OCRSpatialIndex:
+        """
+        取帧的空间索引，未缓存时识别整帧并建索引
+
+        Args:
+            image: 帧图像
+            key: 帧键，默认对整帧像素取哈希（只有内容完全相同的帧共享索引，
+                 只差一个字形的帧也会重新识别）；调用方可传入截图序号等唯一标识
+            prepare: 识别前的预处理（仅在未命中缓存时执行）
+            variant: 预处理的标识，默认为prepare的限定名（同一函数按不同配置预处理时应分别指定）
+            **readtext_kwargs: 传给readtext的参数
+        """
+        key = key or TwoStageOCR.frame_key(image)
+        # 同一帧不同预处理/识别参数的结果分别缓存
+        if prepare is not None or readtext_kwargs:
+            variant = variant or getattr(prepare, '__qualname__', '')
+            key = f"{key}:{variant}:{sorted(readtext_kwargs.items())}"
+        with self._lock:
+            index = self._cache.get(key)
+            if index is not None:
+                self._cache.move_to_end(key)
+                return index
+
+        with metrics.span("ocr_inference", action="index"):
+            results = self.reader.readtext(prepare(image) if prepare else image, **readtext_kwargs)
+        index = OCRSpatialIndex(results, self.cell_size)
+        self.logger.debug(f"OCR空间索引已构建: {len(index)} 个文本框")
+
+        with self._lock:
+            self._cache[key] = index
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return index
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._cache.clear()
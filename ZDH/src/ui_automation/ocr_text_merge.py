@@ -0,0 +1,63 @@
+"""
+OCR相似文本合并
+同一文本常被检测为多个相互重叠或紧邻的框（不同预处理、图块接缝、检测抖动），
+按框的空间距离经空间索引取候选对，再以归一化字符串相似度确认，并查集聚类后合并；
+候选对只来自相邻网格，整体接近线性
+"""
+
+from typing import Any, List, Tuple, Sequence
+
+from src.ui_automation.ocr_lexicon import normalize, similarity
+from src.ui_automation.ocr_spatial_index import OCRSpatialIndex
+
+
+def _find(parents: List[int], index: int) -> int:
+    while parents[index] != index:
+        parents[index] = parents[parents[index]]
+        index = parents[index]
+    return index
+
+
+def cluster_similar_texts(results: Sequence[Tuple[Any, str, float]], distance_factor: float = 1.0,
+                          min_similarity: float = 0.8) -> List[List[int]]:
+    """
+    把位置相近且文本相似的结果聚为一组
+
+    两个结果属于同一组的条件：中心距离不超过 distance_factor x 较高框的高度，
+    且归一化（忽略空白与大小写）后的字符串相似度不低于min_similarity；条件可传递
+
+    Args:
+        results: [(bbox, text, confidence)]
+        distance_factor: 中心距离上限（以行高为单位）
+        min_similarity: 最低字符串相似度 (0-1)
+
+    Returns:
+        各组在results中的序号列表，组按最小序号排序，组内升序
+    """
+    index = OCRSpatialIndex(results)
+    normalized = {item.source: normalize(item.text) for item in index.items}
+    parents = list(range(len(results)))
+
+    for item in index.items:
+        text = normalized[item.source]
+        if not text:
+            continue
+        # 距离上限以较高框的行高为准：每对只由较高（等高时序号较大）的一方查询并比较
+        for distance, other in index.within_radius(item.center[0], item.center[1],
+                                                   distance_factor * item.height):
+            if (other.height, other.source) >= (item.height, item.source):
+                continue
+            other_text = normalized[other.source]
+            if not other_text:
+                continue
+            # 长度差异过大时相似度不可能达到阈值，跳过逐字符比较
+            if 2 * min(len(text), len(other_text)) < min_similarity * (len(text) + len(other_text)):
+                continue
+            root, other_root = _find(parents, item.source), _find(parents, other.source)
+            if root != other_root and similarity(text, other_text) >= min_similarity:
+                parents[max(root, other_root)] = min(root, other_root)
+
+    groups = {}
+    for source in range(len(results)):
+        groups.setdefault(_find(parents, source), []).append(source)
+    return sorted(groups.values(), key=lambda group: group[0])
@@ -0,0 +1,170 @@
+"""
+界面稳定检测
+通过比较降采样后的连续帧差异判断界面是否已静止，替代操作后的固定等待
+"""
+
+import time
+import threading
+from dataclasses import dataclass
+from typing import Optional, Tuple, Callable, Dict, Any
+import numpy as np
+import cv2
+from src.utils.logger import get_logger
+
+
+# (left, top, right, bottom)
+Region = Tuple[int, int, int, int]
+
+
+@dataclass
+class SettleResult:
+    """一次稳定等待的结果"""
+    settled: bool       # 是否在上限内达到稳定
+    waited: float       # 实际等待时间（秒）
+    baseline: float     # 被替代的固定等待时间（秒）
+    frames: int         # 采样帧数
+    changed: bool       # 等待期间是否观察到界面变化
+
+    @property
+    def saved(self) -> float:
+        """相对固定等待节省的时间（秒），可能为负"""
+        return self.baseline - self.waited
+
+
+def grab_screen(region: Optional[Region] = None) -> np.ndarray:
+    """截取屏幕（或区域）为RGB数组"""
+    from PIL import ImageGrab
+    return np.asarray(ImageGrab.grab(bbox=region))
+
+
+class SettleDetector:
+    """界面稳定检测器"""
+
+    def __init__(self, config: Dict[str, Any] = None,
+                 capture: Callable[[Optional[Region]], np.ndarray] = None):
+        """
+        初始化稳定检测器
+
+        Args:
+            config: 稳定检测配置 (ui_automation.settle)
+            capture: 截图函数，参数为区域，返回图像数组（测试时可替换）
+        """
+        self.logger = get_logger("SettleDetector")
+        config = config or {}
+
+        self.enabled = config.get('enabled', True)
+        self.quiet_period = float(config.get('quiet_period', 0.3))
+        self.poll_interval = float(config.get('poll_interval', 0.05))
+        self.max_wait = float(config.get('max_wait', 5.0))
+        self.diff_threshold = float(config.get('diff_threshold', 2.0))
+        self.downscale_width = int(config.get('downscale_width', 160))
+        self.capture = capture or grab_screen
+
+        self._lock = threading.Lock()
+        self.stats = {
+            "calls": 0,
+            "timeouts": 0,
+            "total_waited": 0.0,
+            "total_baseline": 0.0
+        }
+
+    def _sample(self, region: Optional[Region]) -> Optional[np.ndarray]:
+        """截取一帧并降采样为灰度小图"""
+        try:
+            frame = np.asarray(self.capture(region))
+        except Exception as e:
+            self.logger.debug(f"稳定检测截图失败: {e}")
+            return None
+
+        if frame.ndim == 3:
+            frame = cv2.cvtColor(frame[:, :, :3], cv2.COLOR_RGB2GRAY)
+
+        height, width = frame.shape[:2]
+        if width > self.downscale_width:
+            scale = self.downscale_width / width
+            frame = cv2.resize(frame, (self.downscale_width, max(1, int(height * scale))),
+                               interpolation=cv2.INTER_AREA)
+        return frame
+
+    def frame_delta(self, previous: np.ndarray, current: np.ndarray) -> float:
+        """两帧的平均绝对差（0-255）"""
+        if previous.shape != current.shape:
+            return 255.0
+        return float(cv2.absdiff(previous, current).mean())
+
+    def wait(self, baseline: float = 0.0, region: Optional[Region] = None,
+             max_wait: float = None, quiet_period: float = None,
+             require_change: bool = False) -> SettleResult:
+        """
+        等待界面稳定
+
+        Args:
+            baseline: 被替代的固定等待时间，用于统计节省的时间
+            region: 只观察该屏幕区域
+            max_wait: 等待上限（秒），默认取配置
+            quiet_period: 连续无变化多久视为稳定，默认取配置
+            require_change: 先等到界面发生变化再开始计算静止时间（用于启动应用、
+                打开文件等界面必然变化但可能延迟出现的场景）
+
+        Returns:
+            稳定等待结果
+        """
+        max_wait = self.max_wait if max_wait is None else float(max_wait)
+        quiet_period = self.quiet_period if quiet_period is None else float(quiet_period)
+
+        if not self.enabled:
+            time.sleep(baseline)
+            return self._record(SettleResult(True, baseline, baseline, 0, False))
+
+        start = time.perf_counter()
+        previous = self._sample(region)
+        if previous is None:
+            # 无法截图时退回固定等待
+            time.sleep(baseline)
+            return self._record(SettleResult(False, time.perf_counter() - start, baseline, 0, False))
+
+        frames = 1
+        changed = False
+        # require_change时在首次变化前不开始计时
+        quiet_since = None if require_change else start
+
+        while True:
+            elapsed = time.perf_counter() - start
+            if quiet_since is not None and time.perf_counter() - quiet_since >= quiet_period:
+                return self._record(SettleResult(True, elapsed, baseline, frames, changed))
+            if elapsed >= max_wait:
+                self.logger.debug(f"界面未在 {max_wait:.1f}s 内稳定")
+                return self._record(SettleResult(False, elapsed, baseline, frames, changed))
+
+            time.sleep(self.poll_interval)
+            current = self._sample(region)
+            if current is None:
+                continue
+            frames += 1
+
+            if self.frame_delta(previous, current) > self.diff_threshold:
+                changed = True
+                quiet_since = time.perf_counter()
+            previous = current
+
+    def _record(self, result: SettleResult) -> SettleResult:
+        with self._lock:
+            self.stats["calls"] += 1
+            self.stats["total_waited"] += result.waited
+            self.stats["total_baseline"] += result.baseline
+            if not result.settled:
+                self.stats["timeouts"] += 1
+        return result
+
+    def report(self) -> Dict[str, Any]:
+        """累计统计：实际等待时间、原固定等待时间与节省的时间"""
+        with self._lock:
+            stats = dict(self.stats)
+        stats["time_saved"] = stats["total_baseline"] - stats["total_waited"]
+        return stats
+
+    def reset_stats(self):
+        """清空累计统计"""
+        with self._lock:
+            for key in self.stats:
+                self.stats[key] = 0 if key in ("calls", "timeouts") else 0.0
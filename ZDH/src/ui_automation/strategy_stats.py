@@ -0,0 +1,207 @@
+"""
+定位策略统计
+按目标记录各定位策略的成功率与耗时，并据此按期望代价对策略排序（代价加权的Thompson采样）
+"""
+
+import json
+import os
+import random
+import atexit
+import tempfile
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+from src.utils.logger import get_logger
+
+
+# 尚无耗时数据时各策略的默认代价（秒）
+DEFAULT_COSTS = {
+    'coordinate_positioning': 0.001,
+    'color_matching': 0.05,
+    'image_recognition': 0.1,
+    'ocr_text': 2.0
+}
+
+
+class StrategyStats:
+    """按目标统计定位策略的成功率与耗时"""
+
+    def __init__(self, config: Dict[str, Any] = None):
+        """
+        初始化策略统计
+
+        Args:
+            config: 自适应排序配置 (beike_ui.adaptive_ordering)
+        """
+        self.logger = get_logger("StrategyStats")
+        config = config or {}
+
+        self.stats_file = Path(config.get('stats_file', 'data/locator_stats.json'))
+        self.exploration_floor = float(config.get('exploration_floor', 0.05))
+        self.exploration_rate = float(config.get('exploration_rate', 0.05))
+        self.latency_alpha = float(config.get('latency_alpha', 0.2))
+        self.drift_window = int(config.get('drift_window', 10))
+        self.drift_threshold = float(config.get('drift_threshold', 0.5))
+        self.save_every = int(config.get('save_every', 20))
+        self.default_costs = {**DEFAULT_COSTS, **config.get('default_costs', {})}
+
+        # 目标名 -> 策略名 -> {"attempts", "successes", "latency"}
+        self.stats: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        # (目标名, 策略名) -> 最近结果窗口，仅用于漂移检测，不持久化
+        self._recent: Dict[tuple, deque] = {}
+        self._pending = 0
+        self._lock = threading.RLock()
+        # 指定seed时探索与采样可复现（基准测试用），默认使用系统随机源
+        self._random = random.Random(config.get('seed'))
+
+        self._load()
+        atexit.register(self.save)
+
+    def _load(self):
+        """加载统计文件"""
+        if not self.stats_file.exists():
+            return
+        try:
+            with open(self.stats_file, 'r', encoding='utf-8') as f:
+                self.stats = json.load(f)
+            self.logger.info(f"加载定位策略统计: {len(self.stats)} 个目标")
+        except Exception as e:
+            self.logger.warning(f"加载定位策略统计失败: {e}")
+
+    def save(self):
+        """原子写入统计文件"""
+        with self._lock:
+            if self._pending == 0:
+                return
+            data = json.loads(json.dumps(self.stats))
+            self._pending = 0
+
+        try:
+            self.stats_file.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=str(self.stats_file.parent),
+                                            prefix=self.stats_file.name, suffix=".tmp")
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, str(self.stats_file))
+        except Exception as e:
+            self.logger.warning(f"保存定位策略统计失败: {e}")
+
+    def record(self, target_name: str, strategy: str, success: bool, duration: float):
+        """
+        记录一次定位尝试
+
+        Args:
+            target_name: 目标元素名称
+            strategy: 策略名称
+            success: 是否成功
+            duration: 耗时（秒）
+        """
+        with self._lock:
+            entry = self.stats.setdefault(target_name, {}).setdefault(
+                strategy, {"attempts": 0, "successes": 0, "latency": None}
+            )
+            entry["attempts"] += 1
+            if success:
+                entry["successes"] += 1
+            if entry["latency"] is None:
+                entry["latency"] = duration
+            else:
+                entry["latency"] += self.latency_alpha * (duration - entry["latency"])
+
+            recent = self._recent.setdefault((target_name, strategy), deque(maxlen=self.drift_window))
+            recent.append(1 if success else 0)
+            self._check_drift(target_name, strategy, entry, recent)
+
+            self._pending += 1
+            should_save = self._pending >= self.save_every
+
+        if should_save:
+            self.save()
+
+    def _check_drift(self, target_name: str, strategy: str, entry: Dict[str, Any], recent: deque):
+        """最近窗口的成功率与长期成功率偏离过大时，以最近窗口重置统计"""
+        if len(recent) < self.drift_window or entry["attempts"] < 2 * self.drift_window:
+            return
+
+        overall_rate = entry["successes"] / entry["attempts"]
+        recent_rate = sum(recent) / len(recent)
+        if abs(recent_rate - overall_rate) > self.drift_threshold:
+            self.logger.info(f"定位策略表现漂移，重置统计: {target_name}/{strategy} "
+                             f"({overall_rate:.2f} -> {recent_rate:.2f})")
+            entry["attempts"] = len(recent)
+            entry["successes"] = sum(recent)
+
+    def reset(self, target_name: str = None):
+        """重置统计（不指定目标时重置全部）"""
+        with self._lock:
+            if target_name is None:
+                self.stats.clear()
+                self._recent.clear()
+            else:
+                self.stats.pop(target_name, None)
+                for key in [k for k in self._recent if k[0] == target_name]:
+                    del self._recent[key]
+            self._pending += 1
+
+    def expected_cost(self, target_name: str, strategy: str, sample: bool = True) -> float:
+        """
+        策略的期望代价：耗时 / 成功概率
+
+        成功概率取Beta后验的采样值（sample=False时取均值），并以exploration_floor为下限
+        """
+        with self._lock:
+            entry = self.stats.get(target_name, {}).get(strategy)
+            attempts = entry["attempts"] if entry else 0
+            successes = entry["successes"] if entry else 0
+            latency = entry["latency"] if entry and entry["latency"] is not None else None
+
+        if latency is None:
+            latency = self.default_costs.get(strategy, 1.0)
+
+        alpha, beta = successes + 1, attempts - successes + 1
+        if sample:
+            probability = self._random.betavariate(alpha, beta)
+        else:
+            probability = alpha / (alpha + beta)
+
+        return latency / max(probability, self.exploration_floor)
+
+    def order(self, target_name: str, strategies: List[str]) -> List[str]:
+        """
+        按期望代价对策略排序
+
+        Args:
+            target_name: 目标元素名称
+            strategies: 静态优先级列表（无统计数据时原样返回，也作为同代价时的次序）
+
+        Returns:
+            排序后的策略列表
+        """
+        with self._lock:
+            if target_name not in self.stats:
+                return list(strategies)
+
+        ranked = sorted(
+            strategies,
+            key=lambda s: (self.expected_cost(target_name, s), strategies.index(s))
+        )
+
+        # 探索：偶尔把一个非首选策略提前，避免低估的策略永远得不到尝试
+        if len(ranked) > 1 and self._random.random() < self.exploration_rate:
+            explored = ranked.pop(self._random.randrange(1, len(ranked)))
+            ranked.insert(0, explored)
+
+        return ranked
+
+    def get_target_stats(self, target_name: str) -> Dict[str, Dict[str, Any]]:
+        """获取目标的统计摘要"""
+        with self._lock:
+            result = {}
+            for strategy, entry in self.stats.get(target_name, {}).items():
+                result[strategy] = {
+                    **entry,
+                    "success_rate": entry["successes"] / entry["attempts"] if entry["attempts"] else 0.0,
+                    "expected_cost": self.expected_cost(target_name, strategy, sample=False)
+                }
+            return result
@@ -0,0 +1,271 @@
+"""
+图像模板库
+按需加载图像模板，预计算并缓存匹配所需的派生数据（灰度图、金字塔、标准差、边缘图），
+以LRU限制内存占用，并将派生数据持久化为可内存映射的 .npy 文件
+"""
+
+import json
+import threading
+import cv2
+import numpy as np
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Iterator
+from src.utils.logger import get_logger
+
+
+@dataclass
+class TemplateData:
+    """模板及其预计算的派生数据"""
+    name: str
+    gray: np.ndarray
+    pyramid: List[np.ndarray]
+    std: float
+    edges: Optional[np.ndarray] = None
+    source_path: Optional[Path] = None
+    image: Optional[np.ndarray] = field(default=None, repr=False)
+
+    @property
+    def size(self):
+        """模板尺寸 (w, h)"""
+        return (self.gray.shape[1], self.gray.shape[0])
+
+
+class TemplateStore:
+    """延迟加载、LRU限容的图像模板库"""
+
+    def __init__(self, base_path: str, cache_size: int = 100,
+                 derived_path: Optional[str] = None, pyramid_levels: int = 1,
+                 build_edges: bool = False):
+        """
+        初始化模板库
+
+        Args:
+            base_path: 模板PNG目录
+            cache_size: 内存中最多保留的模板数
+            derived_path: 派生数据 (.npy) 目录，默认为 base_path/.derived
+            pyramid_levels: 金字塔层数（不含原始分辨率）
+            build_edges: 是否预计算边缘图
+        """
+        self.logger = get_logger("TemplateStore")
+        self.base_path = Path(base_path)
+        self.cache_size = max(1, int(cache_size))
+        self.derived_path = Path(derived_path) if derived_path else self.base_path / ".derived"
+        self.pyramid_levels = max(0, int(pyramid_levels))
+        self.build_edges = build_edges
+
+        # 名称 -> 模板文件路径（仅索引，不读取像素）
+        self._index: Dict[str, Path] = {}
+        # 名称 -> 内存中添加、没有对应文件的模板
+        self._memory_templates: Dict[str, np.ndarray] = {}
+        self._cache: "OrderedDict[str, TemplateData]" = OrderedDict()
+        self._lock = threading.RLock()
+
+        self.refresh_index()
+
+    def refresh_index(self):
+        """重新扫描模板目录（只列出文件，不加载图像）"""
+        with self._lock:
+            self._index = {}
+            if self.base_path.exists():
+                for template_file in self.base_path.glob("*.png"):
+                    self._index[template_file.stem] = template_file
+        self.logger.info(f"索引图像模板: {len(self._index)} 个")
+
+    def names(self) -> List[str]:
+        """所有可用模板名称"""
+        with self._lock:
+            return sorted(set(self._index) | set(self._memory_templates))
+
+    def __contains__(self, name: str) -> bool:
+        with self._lock:
+            return name in self._index or name in self._memory_templates
+
+    def __len__(self) -> int:
+        return len(self.names())
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names())
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        """获取原始彩色模板（兼容旧的 template_images 字典用法）"""
+        entry = self.get(name)
+        if entry is None:
+            raise KeyError(name)
+        if entry.image is None:
+            entry.image = cv2.imread(str(entry.source_path))
+        return entry.image
+
+    def __setitem__(self, name: str, image: np.ndarray):
+        """注册内存模板"""
+        with self._lock:
+            self._memory_templates[name] = image
+            self._cache.pop(name, None)
+
+    def get(self, name: str) -> Optional[TemplateData]:
+        """
+        获取模板派生数据，首次使用时加载
+
+        Args:
+            name: 模板名称
+
+        Returns:
+            模板数据，不存在返回None
+        """
+        with self._lock:
+            entry = self._cache.get(name)
+            if entry is not None:
+                self._cache.move_to_end(name)
+                return entry
+
+            if name in self._memory_templates:
+                image = self._memory_templates[name]
+                entry = self._build(name, image)
+                entry.image = image
+            elif name in self._index:
+                entry = self._load(name, self._index[name])
+            else:
+                return None
+
+            if entry is None:
+                return None
+
+            self._cache[name] = entry
+            while len(self._cache) > self.cache_size:
+                evicted, _ = self._cache.popitem(last=False)
+                self.logger.debug(f"淘汰图像模板: {evicted}")
+            return entry
+
+    def _build(self, name: str, image: np.ndarray, source_path: Optional[Path] = None) -> TemplateData:
+        """从彩色图像计算派生数据"""
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+        pyramid = [gray]
+        for _ in range(self.pyramid_levels):
+            if min(pyramid[-1].shape[:2]) < 16:
+                break
+            pyramid.append(cv2.pyrDown(pyramid[-1]))
+
+        # 标准差用于识别无纹理的模板（TM_CCOEFF_NORMED对其无定义）
+        std = float(np.std(gray))
+        edges = cv2.Canny(gray, 50, 150) if self.build_edges else None
+
+        return TemplateData(
+            name=name,
+            gray=gray,
+            pyramid=pyramid,
+            std=std,
+            edges=edges,
+            source_path=source_path
+        )
+
+    def _load(self, name: str, template_file: Path) -> Optional[TemplateData]:
+        """加载模板：派生数据有效时内存映射 .npy，否则读取PNG并重新计算"""
+        entry = self._load_derived(name, template_file)
+        if entry is not None:
+            self.logger.debug(f"内存映射图像模板: {name}")
+            return entry
+
+        try:
+            image = cv2.imread(str(template_file))
+            if image is None:
+                self.logger.warning(f"加载图像模板失败: {name}")
+                return None
+        except Exception as e:
+            self.logger.warning(f"加载图像模板失败 {name}: {e}")
+            return None
+
+        entry = self._build(name, image, template_file)
+        entry.image = image
+        self._save_derived(entry, template_file)
+        self.logger.debug(f"加载图像模板: {name}")
+        return entry
+
+    def _derived_dir(self, name: str) -> Path:
+        return self.derived_path / name
+
+    def _load_derived(self, name: str, template_file: Path) -> Optional[TemplateData]:
+        """读取持久化的派生数据，源文件变化或配置不符时视为失效"""
+        derived_dir = self._derived_dir(name)
+        meta_file = derived_dir / "meta.json"
+        if not meta_file.exists():
+            return None
+
+        try:
+            with open(meta_file, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+
+            stat = template_file.stat()
+            if (meta.get('mtime') != stat.st_mtime or meta.get('file_size') != stat.st_size
+                    or meta.get('pyramid_levels') != self.pyramid_levels
+                    or (self.build_edges and not meta.get('has_edges'))):
+                return None
+
+            pyramid = [np.load(derived_dir / f"pyramid_{level}.npy", mmap_mode='r')
+                       for level in range(meta['pyramid_count'])]
+            edges = None
+            if self.build_edges:
+                edges = np.load(derived_dir / "edges.npy", mmap_mode='r')
+
+            return TemplateData(
+                name=name,
+                gray=pyramid[0],
+                pyramid=pyramid,
+                std=meta['std'],
+                edges=edges,
+                source_path=template_file
+            )
+        except Exception as e:
+            self.logger.debug(f"读取模板派生数据失败 {name}: {e}")
+            return None
+
+    def _save_derived(self, entry: TemplateData, template_file: Path):
+        """持久化派生数据"""
+        derived_dir = self._derived_dir(entry.name)
+        try:
+            derived_dir.mkdir(parents=True, exist_ok=True)
+            for level, layer in enumerate(entry.pyramid):
+                np.save(derived_dir / f"pyramid_{level}.npy", np.ascontiguousarray(layer))
+            if entry.edges is not None:
+                np.save(derived_dir / "edges.npy", entry.edges)
+
+            stat = template_file.stat()
+            meta = {
+                "mtime": stat.st_mtime,
+                "file_size": stat.st_size,
+                "pyramid_levels": self.pyramid_levels,
+                "pyramid_count": len(entry.pyramid),
+                "has_edges": entry.edges is not None,
+                "std": entry.std
+            }
+            with open(derived_dir / "meta.json", 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+        except Exception as e:
+            self.logger.debug(f"保存模板派生数据失败 {entry.name}: {e}")
+
+    def add(self, name: str, image: np.ndarray) -> Path:
+        """
+        添加模板并写入模板目录
+
+        Args:
+            name: 模板名称
+            image: 彩色模板图像
+
+        Returns:
+            模板文件路径
+        """
+        self.base_path.mkdir(parents=True, exist_ok=True)
+        save_path = self.base_path / f"{name}.png"
+        cv2.imwrite(str(save_path), image)
+
+        with self._lock:
+            self._index[name] = save_path
+            self._memory_templates.pop(name, None)
+            self._cache.pop(name, None)
+            # 派生数据在下次加载时按新的mtime重新生成
+        return save_path
+
+    def cached_names(self) -> List[str]:
+        """当前驻留内存的模板名称（LRU顺序，最近使用在后）"""
+        with self._lock:
+            return list(self._cache.keys())
@@ -0,0 +1,233 @@
+"""
+分块多进程OCR
+把整帧切分为相互重叠的图块，在进程池中并行识别（每个工作进程持有一个OCR引擎），
+再合并跨越图块接缝的文本框并去重，结果与easyocr.readtext相同：[(bbox, text, confidence)]
+"""
+
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple, Callable
+
+import numpy as np
+from src.utils.logger import get_logger
+
+
+# (x, y, 宽, 高)
+Tile = Tuple[int, int, int, int]
+# (left, top, right, bottom)
+Box = Tuple[float, float, float, float]
+
+# 工作进程内的OCR引擎
+_worker_reader = None
+
+
+def create_easyocr_reader(languages: List[str]):
+    """工作进程中创建easyocr引擎（CPU模式）"""
+    import easyocr
+    return easyocr.Reader(languages, gpu=False, verbose=False)
+
+
+def _init_worker(reader_factory: Callable[[List[str]], Any], languages: List[str], threads: int):
+    global _worker_reader
+    try:
+        # 每个进程只用分到的核，避免进程数 x torch线程数超额订阅
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    _worker_reader = reader_factory(languages)
+
+
+def _read_tile(tile_image: np.ndarray, readtext_kwargs: Dict[str, Any]) -> List[Tuple[Any, str, float]]:
+    return _worker_reader.readtext(tile_image, **readtext_kwargs)
+
+
+def tile_grid(width: int, height: int, tile_size: int, overlap: int) -> List[Tile]:
+    """
+    计算覆盖整幅图像的重叠图块
+
+    相邻图块重叠overlap像素，最后一行/列与图像边缘对齐
+    """
+    def starts(length: int) -> List[int]:
+        if length <= tile_size:
+            return [0]
+        step = max(1, tile_size - overlap)
+        positions = list(range(0, length - tile_size, step))
+        positions.append(length - tile_size)
+        return positions
+
+    tiles = []
+    for y in starts(height):
+        for x in starts(width):
+            tiles.append((x, y, min(tile_size, width - x), min(tile_size, height - y)))
+    return tiles
+
+
+def _box(bbox) -> Box:
+    xs = [point[0] for point in bbox]
+    ys = [point[1] for point in bbox]
+    return (min(xs), min(ys), max(xs), max(ys))
+
+
+def _area(box: Box) -> float:
+    return max(0.0, box[2] - box[0]) * max(0.0, box[3] - box[1])
+
+
+def _overlap_ratio(a: Box, b: Box) -> float:
+    """交集面积占较小框面积的比例"""
+    intersection = _area((max(a[0], b[0]), max(a[1], b[1]), min(a[2], b[2]), min(a[3], b[3])))
+    smaller = min(_area(a), _area(b))
+    return intersection / smaller if smaller > 0 else 0.0
+
+
+def _same_line(a: Box, b: Box) -> bool:
+    """两个片段垂直方向大部分重叠且水平方向相交"""
+    vertical = min(a[3], b[3]) - max(a[1], b[1])
+    return vertical >= 0.5 * min(a[3] - a[1], b[3] - b[1]) and min(a[2], b[2]) >= max(a[0], b[0])
+
+
+def _join_text(left: str, right: str) -> str:
+    """拼接左右片段，去掉两者在重叠区域重复识别的部分"""
+    for k in range(min(len(left), len(right)), 0, -1):
+        if left.endswith(right[:k]):
+            return left + right[k:]
+    return left + right
+
+
+def _points(box: Box) -> List[List[int]]:
+    left, top, right, bottom = (int(round(v)) for v in box)
+    return [[left, top], [right, top], [right, bottom], [left, bottom]]
+
+
+def merge_detections(detections: List[Dict[str, Any]], duplicate_ratio: float = 0.5) -> List[Tuple[Any, str, float]]:
+    """
+    合并各图块的识别结果
+
+    Args:
+        detections: [{"box": 整帧坐标框, "text", "confidence", "cut": 是否被图块内部边缘截断}]
+        duplicate_ratio: 交集占较小框比例达到该值视为同一文本
+
+    Returns:
+        [(bbox, text, confidence)]，按从上到下、从左到右排序
+    """
+    kept: List[Dict[str, Any]] = []
+
+    # 1. 完整文本框按置信度去重（重叠区内同一文本会被相邻图块各识别一次）
+    for detection in sorted((d for d in detections if not d["cut"]), key=lambda d: -d["confidence"]):
+        if all(_overlap_ratio(detection["box"], other["box"]) < duplicate_ratio for other in kept):
+            kept.append(detection)
+
+    # 2. 被接缝截断的片段：已有完整结果时丢弃，否则（文本比重叠区更长）拼接同一行的片段
+    fragments = [d for d in detections if d["cut"] and
+                 all(_overlap_ratio(d["box"], other["box"]) < duplicate_ratio for other in kept)]
+    fragments.sort(key=lambda d: d["box"][0])
+    merged: List[Dict[str, Any]] = []
+    for fragment in fragments:
+        for group in merged:
+            if _same_line(group["box"], fragment["box"]):
+                box = group["box"]
+                group["box"] = (min(box[0], fragment["box"][0]), min(box[1], fragment["box"][1]),
+                                max(box[2], fragment["box"][2]), max(box[3], fragment["box"][3]))
+                group["text"] = _join_text(group["text"], fragment["text"])
+                group["confidence"] = min(group["confidence"], fragment["confidence"])
+                break
+        else:
+            merged.append(dict(fragment))
+
+    results = kept + merged
+    results.sort(key=lambda d: (d["box"][1], d["box"][0]))
+    return [(_points(d["box"]), d["text"], d["confidence"]) for d in results]
+
+
+class TiledOCR:
+    """分块多进程OCR"""
+
+    def __init__(self, config: Dict[str, Any] = None, languages: List[str] = None,
+                 reader_factory: Callable[[List[str]], Any] = create_easyocr_reader):
+        """
+        初始化分块OCR
+
+        Args:
+            config: 分块配置 (ui_automation.ocr.tiling)
+            languages: OCR语言
+            reader_factory: 工作进程中创建OCR引擎的函数（需可被子进程导入）
+        """
+        self.logger = get_logger("TiledOCR")
+        config = config or {}
+
+        self.tile_size = int(config.get('tile_size', 1024))
+        # 重叠宽度应不小于最长单行文本的宽度，保证每个文本至少在一个图块中完整出现
+        self.overlap = int(config.get('overlap', 160))
+        self.edge_margin = int(config.get('edge_margin', 2))
+        self.duplicate_ratio = float(config.get('duplicate_ratio', 0.5))
+        self.workers = int(config.get('workers', 0) or os.cpu_count() or 1)
+        self.threads_per_worker = int(config.get('threads_per_worker', 0) or
+                                      max(1, (os.cpu_count() or 1) // self.workers))
+        self.start_method = config.get('start_method', 'spawn')
+        self.languages = languages or ['ch_sim', 'en']
+        self.reader_factory = reader_factory
+
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """进程池（延迟创建，各进程启动时加载一次OCR引擎）"""
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context(self.start_method),
+                initializer=_init_worker,
+                initargs=(self.reader_factory, self.languages, self.threads_per_worker)
+            )
+            self.logger.info(f"分块OCR进程池已启动: {self.workers} 个进程，"
+                             f"每进程 {self.threads_per_worker} 个线程")
+        return self._pool
+
+    def readtext(self, image: np.ndarray, **readtext_kwargs) -> List[Tuple[Any, str, float]]:
+        """
+        分块识别整幅图像
+
+        Args:
+            image: 图像（BGR或灰度）
+            **readtext_kwargs: 传给各进程readtext的参数
+
+        Returns:
+            [(bbox, text, confidence)]，bbox为整幅图像坐标
+        """
+        height, width = image.shape[:2]
+        tiles = tile_grid(width, height, self.tile_size, self.overlap)
+
+        pool = self._get_pool()
+        futures = [
+            pool.submit(_read_tile, np.ascontiguousarray(image[y:y + h, x:x + w]), readtext_kwargs)
+            for x, y, w, h in tiles
+        ]
+
+        detections = []
+        for (x, y, w, h), future in zip(tiles, futures):
+            for bbox, text, confidence in future.result():
+                left, top, right, bottom = _box(bbox)
+                box = (left + x, top + y, right + x, bottom + y)
+                detections.append({
+                    "box": box,
+                    "text": text,
+                    "confidence": float(confidence),
+                    "cut": self._is_cut(box, (x, y, w, h), width, height)
+                })
+
+        return merge_detections(detections, self.duplicate_ratio)
+
+    def _is_cut(self, box: Box, tile: Tile, width: int, height: int) -> bool:
+        """文本框是否贴着图块的内部边缘（非图像边缘），即可能被截断"""
+        x, y, w, h = tile
+        margin = self.edge_margin
+        return ((x > 0 and box[0] <= x + margin) or
+                (y > 0 and box[1] <= y + margin) or
+                (x + w < width and box[2] >= x + w - margin) or
+                (y + h < height and box[3] >= y + h - margin))
+
+    def close(self):
+        """关闭进程池"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
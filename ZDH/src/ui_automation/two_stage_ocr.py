@@ -0,0 +1,197 @@
+"""
+两阶段OCR
+查找指定文本时先对整帧做一次文本检测（按帧缓存），按期望文本长度、宽高比和感兴趣区域筛选候选框，
+只对候选框运行识别器，找到第一个可信匹配即停止，避免识别屏幕上所有文本
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple, Callable
+
+import cv2
+import numpy as np
+from src.utils.logger import get_logger
+from src.utils.metrics import metrics
+
+
+# (left, top, right, bottom)
+Box = Tuple[int, int, int, int]
+
+
+def expected_width_units(text: str) -> float:
+    """估算文本宽度（以字高为单位）：中日韩字符约为方形，西文字符约为半宽"""
+    units = 0.0
+    for char in text:
+        if char.isspace():
+            units += 0.3
+        elif ord(char) >= 0x2E80:
+            units += 1.0
+        else:
+            units += 0.55
+    return units
+
+
+class TwoStageOCR:
+    """检测一次、按需识别的OCR"""
+
+    def __init__(self, reader: Any, config: Dict[str, Any] = None):
+        """
+        初始化两阶段OCR
+
+        Args:
+            reader: easyocr.Reader（提供detect与recognize）
+            config: 两阶段配置 (beike_ui.ocr.two_stage)
+        """
+        self.logger = get_logger("TwoStageOCR")
+        config = config or {}
+
+        self.reader = reader
+        self.cache_size = int(config.get('cache_size', 4))
+        # 候选框宽高比下限 = 期望宽度 x 该系数（检测框可能包含相邻文字，不设上限时只过滤过短的框）
+        self.min_aspect_factor = float(config.get('min_aspect_factor', 0.5))
+        self.max_aspect_factor = float(config.get('max_aspect_factor', 0))
+        self.batch_size = int(config.get('batch_size', 4))
+        self.detect_kwargs: Dict[str, Any] = config.get('detect_kwargs', {})
+        self.recognize_kwargs: Dict[str, Any] = config.get('recognize_kwargs', {})
+
+        # 帧键 -> 候选框列表（只缓存检测结果，识别总是在当前帧上进行）
+        self._cache: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.last_stats: Dict[str, int] = {}
+
+    @staticmethod
+    def frame_key(image: np.ndarray) -> str:
+        """
+        帧内容键
+
+        对全部像素取哈希：只差一个字形的两帧也必须得到不同的键（降采样哈希会让小字变化碰撞，
+        复用上一帧的结果）；整帧哈希的代价仍远小于文本检测
+        """
+        digest = hashlib.blake2b(np.ascontiguousarray(image).data, digest_size=16)
+        digest.update(f"{image.shape}{image.dtype}".encode())
+        return digest.hexdigest()
+
+    def detect(self, image: np.ndarray, key: str = None) -> List[Dict[str, Any]]:
+        """
+        检测文本框（同一帧只检测一次）
+
+        Args:
+            image: BGR图像
+            key: 帧键，默认按整帧内容计算（调用方可传入截图序号等唯一标识）
+
+        Returns:
+            [{"box", "horizontal" 或 "free"}]
+        """
+        key = key or self.frame_key(image)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+
+        with metrics.span("ocr_inference", action="detect"):
+            horizontal_list, free_list = self.reader.detect(image, **self.detect_kwargs)
+
+        boxes = []
+        for x_min, x_max, y_min, y_max in horizontal_list[0]:
+            boxes.append({"box": (int(x_min), int(y_min), int(x_max), int(y_max)),
+                          "horizontal": [x_min, x_max, y_min, y_max]})
+        for polygon in free_list[0]:
+            xs = [point[0] for point in polygon]
+            ys = [point[1] for point in polygon]
+            boxes.append({"box": (int(min(xs)), int(min(ys)), int(max(xs)), int(max(ys))),
+                          "free": polygon})
+
+        with self._lock:
+            self._cache[key] = boxes
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return boxes
+
+    def candidates(self, boxes: List[Dict[str, Any]], target_text: str,
+                   roi: Optional[Box] = None) -> List[Dict[str, Any]]:
+        """按宽高比和感兴趣区域筛选候选框，最接近期望宽度的排在前面"""
+        expected = max(expected_width_units(target_text), 0.5)
+        scored = []
+        for candidate in boxes:
+            left, top, right, bottom = candidate["box"]
+            height = max(1, bottom - top)
+            aspect = (right - left) / height
+
+            if aspect < expected * self.min_aspect_factor:
+                continue
+            if self.max_aspect_factor and aspect > expected * self.max_aspect_factor:
+                continue
+            if roi is not None:
+                center_x, center_y = (left + right) / 2, (top + bottom) / 2
+                if not (roi[0] <= center_x < roi[2] and roi[1] <= center_y < roi[3]):
+                    continue
+            scored.append((abs(np.log(aspect / expected)), candidate))
+
+        scored.sort(key=lambda item: item[0])
+        return [candidate for _, candidate in scored]
+
+    def find(self, image: np.ndarray, target_text: str, min_confidence: float = 0.7,
+             matcher: Callable[[str], bool] = None, roi: Optional[Box] = None,
+             key: str = None, allowlist: str = None,
+             cancel: Optional[threading.Event] = None) -> Optional[Tuple[Any, str, float]]:
+        """
+        查找目标文本
+
+        Args:
+            image: BGR图像
+            target_text: 目标文本
+            min_confidence: 最低置信度
+            matcher: 判断识别文本是否匹配，默认不区分大小写包含目标文本
+            roi: 感兴趣区域 (left, top, right, bottom)
+            key: 帧键，默认按内容计算
+            allowlist: 识别字符白名单（受限识别）
+            cancel: 取消事件，置位后在下一批识别前放弃（竞速中落败时）
+
+        Returns:
+            第一个可信匹配 (bbox, text, confidence)，未找到或被取消返回None
+        """
+        if matcher is None:
+            target_lower = target_text.lower()
+            matcher = lambda text: target_lower in text.lower()
+
+        recognize_kwargs = dict(self.recognize_kwargs)
+        if allowlist:
+            recognize_kwargs['allowlist'] = allowlist
+
+        boxes = self.detect(image, key)
+        candidates = self.candidates(boxes, target_text, roi)
+        if not candidates:
+            self.last_stats = {"detected": len(boxes), "candidates": 0, "recognized": 0}
+            return None
+
+        # 识别总是使用当前帧的像素，不复用缓存中其他帧的图像
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+        self.last_stats = {"detected": len(boxes), "candidates": len(candidates), "recognized": 0}
+
+        for start in range(0, len(candidates), self.batch_size):
+            if cancel is not None and cancel.is_set():
+                return None
+            batch = candidates[start:start + self.batch_size]
+            with metrics.span("ocr_inference", action="recognize"):
+                results = self.reader.recognize(
+                    gray,
+                    horizontal_list=[c["horizontal"] for c in batch if "horizontal" in c],
+                    free_list=[c["free"] for c in batch if "free" in c],
+                    detail=1,
+                    paragraph=False,
+                    **recognize_kwargs
+                )
+            self.last_stats["recognized"] += len(batch)
+
+            for bbox, text, confidence in results:
+                if confidence >= min_confidence and matcher(text):
+                    return bbox, text, confidence
+
+        return None
+
+    def clear_cache(self):
+        """清空检测缓存"""
+        with self._lock:
+            self._cache.clear()
@@ -14,7 +14,12 @@ import win32con
 import win32gui
 from src.utils.logger import get_logger
 from src.utils.config_manager import config_manager
+from src.utils.metrics import metrics
 from src.ui_automation.beike_ui_locator import BeikeUILocator
+from src.ui_automation.input_backend import (
+    create_input_backend, InputBackend, VK_CONTROL, VK_DELETE, VK_RETURN
+)
+from src.ui_automation.settle_detector import SettleDetector, SettleResult
 
 
 class UIExecutor:
@@ -32,6 +37,19 @@ class UIExecutor:
         self.wait_timeout = self.config.get('operations', {}).get('wait_timeout', 30)
         self.retry_count = self.config.get('operations', {}).get('retry_count', 3)
         
+        # 输入后端：默认批量Unicode注入，per_key_targets中的控件使用逐键输入
+        operations_config = self.config.get('operations', {})
+        self.input_backend: InputBackend = create_input_backend(
+            operations_config.get('input_backend', 'sendinput'), operations_config
+        )
+        self.per_key_backend: InputBackend = create_input_backend('keyevent', operations_config)
+        self.per_key_targets = set(operations_config.get('per_key_targets', []))
+        
+        # 界面稳定检测：替代操作后的固定等待（与定位器使用同一截图后端采样）
+        settle_config = self.config.get('settle', {})
+        self.settle_detector = SettleDetector(settle_config, capture=self.locator.capture_backend.grab)
+        self.launch_max_wait = settle_config.get('launch_max_wait', 10.0)
+        
         # 当前应用和窗口
         self.current_app: Optional[Application] = None
         self.current_window: Optional[WindowSpecification] = None
@@ -63,12 +81,17 @@ class UIExecutor:
                 # 启动新应用程序
                 self.logger.info("启动新应用程序")
                 self.current_app = Application().start(app_path)
-                time.sleep(2)  # 等待应用启动
+                # 等待应用窗口出现并绘制完成
+                self.wait_for_settle(baseline=2, region=None, max_wait=self.launch_max_wait,
+                                     require_change=True)
             
             # 获取主窗口
             self.current_window = self.current_app.window()
             self.logger.info(f"主窗口标题: {self.current_window.window_text()}")
             
+            # 坐标缓存锚定到主窗口
+            self.locator.attach_window(self.current_window, key=app_name)
+            
             return True
         
         except Exception as e:
@@ -100,7 +123,7 @@ class UIExecutor:
                 if coordinates is None:
                     if attempt < max_attempts - 1:
                         self.logger.warning(f"定位元素失败，等待后重试: {target}")
-                        time.sleep(1)
+                        metrics.sleep(1, "retry")
                         continue
                     else:
                         self.logger.error(f"定位元素失败: {target}")
@@ -108,23 +131,24 @@ class UIExecutor:
                 
                 # 执行点击
                 x, y = coordinates
-                if click_type == "left":
-                    win32api.SetCursorPos((x, y))
-                    win32api.mouse_event(win32con.MOUSEEVENTF_LEFTDOWN, x, y, 0, 0)
-                    time.sleep(self.click_delay)
-                    win32api.mouse_event(win32con.MOUSEEVENTF_LEFTUP, x, y, 0, 0)
-                elif click_type == "right":
-                    win32api.SetCursorPos((x, y))
-                    win32api.mouse_event(win32con.MOUSEEVENTF_RIGHTDOWN, x, y, 0, 0)
-                    time.sleep(self.click_delay)
-                    win32api.mouse_event(win32con.MOUSEEVENTF_RIGHTUP, x, y, 0, 0)
-                elif click_type == "double":
-                    win32api.SetCursorPos((x, y))
-                    for _ in range(2):
+                with metrics.span("input", action=f"click_{click_type}", target=target):
+                    if click_type == "left":
+                        win32api.SetCursorPos((x, y))
                         win32api.mouse_event(win32con.MOUSEEVENTF_LEFTDOWN, x, y, 0, 0)
                         time.sleep(self.click_delay)
                         win32api.mouse_event(win32con.MOUSEEVENTF_LEFTUP, x, y, 0, 0)
+                    elif click_type == "right":
+                        win32api.SetCursorPos((x, y))
+                        win32api.mouse_event(win32con.MOUSEEVENTF_RIGHTDOWN, x, y, 0, 0)
                         time.sleep(self.click_delay)
+                        win32api.mouse_event(win32con.MOUSEEVENTF_RIGHTUP, x, y, 0, 0)
+                    elif click_type == "double":
+                        win32api.SetCursorPos((x, y))
+                        for _ in range(2):
+                            win32api.mouse_event(win32con.MOUSEEVENTF_LEFTDOWN, x, y, 0, 0)
+                            time.sleep(self.click_delay)
+                            win32api.mouse_event(win32con.MOUSEEVENTF_LEFTUP, x, y, 0, 0)
+                            time.sleep(self.click_delay)
                 
                 self.logger.info(f"点击成功: {target} at ({x}, {y})")
                 return True
@@ -132,15 +156,42 @@ class UIExecutor:
             except Exception as e:
                 self.logger.error(f"点击失败 {target}: {e}")
                 if attempt < max_attempts - 1:
-                    time.sleep(1)
+                    metrics.sleep(1, "retry")
                     continue
                 else:
                     return False
         
         return False
     
+    def wait_for_settle(self, baseline: float = 0.5, **kwargs) -> SettleResult:
+        """
+        等待界面稳定（已关联窗口时只观察窗口区域）
+        
+        Args:
+            baseline: 被替代的固定等待时间
+            **kwargs: 传递给SettleDetector.wait的参数
+            
+        Returns:
+            稳定等待结果
+        """
+        if 'region' not in kwargs:
+            kwargs['region'] = self.locator._get_window_rect()
+        result = self.settle_detector.wait(baseline=baseline, **kwargs)
+        metrics.observe_span("settle", result.waited)
+        return result
+    
+    def get_settle_stats(self) -> Dict[str, Any]:
+        """稳定检测累计统计（含相对固定等待节省的时间）"""
+        return self.settle_detector.report()
+    
+    def _get_input_backend(self, target: str, per_key: bool = None) -> InputBackend:
+        """选择输入后端：显式指定或目标在per_key_targets中时使用逐键输入"""
+        if per_key is None:
+            per_key = target in self.per_key_targets
+        return self.per_key_backend if per_key else self.input_backend
+    
     def input_text(self, target: str, text: str, method: str = "auto", 
-                   clear_first: bool = True) -> bool:
+                   clear_first: bool = True, per_key: bool = None) -> bool:
         """
         输入文本
         
@@ -149,6 +200,7 @@ class UIExecutor:
             text: 要输入的文本
             method: 定位方法
             clear_first: 是否先清空
+            per_key: 是否逐键输入（默认按per_key_targets配置）
             
         Returns:
             输入是否成功
@@ -166,33 +218,22 @@ class UIExecutor:
             x, y = coordinates
             win32api.SetCursorPos((x, y))
             win32api.mouse_event(win32con.MOUSEEVENTF_LEFTDOWN, x, y, 0, 0)
-            time.sleep(self.click_delay)
+            metrics.sleep(self.click_delay, "click")
             win32api.mouse_event(win32con.MOUSEEVENTF_LEFTUP, x, y, 0, 0)
-            time.sleep(0.5)  # 等待焦点
+            self.wait_for_settle(baseline=0.5)  # 等待焦点
+            
+            backend = self._get_input_backend(target, per_key)
             
             # 清空现有内容
             if clear_first:
-                win32api.keybd_event(win32con.VK_CONTROL, 0, 0, 0)
-                win32api.keybd_event(ord('A'), 0, 0, 0)
-                win32api.keybd_event(ord('A'), 0, win32con.KEYEVENTF_KEYUP, 0)
-                win32api.keybd_event(win32con.VK_CONTROL, 0, win32con.KEYEVENTF_KEYUP, 0)
-                time.sleep(0.1)
-                win32api.keybd_event(win32con.VK_DELETE, 0, 0, 0)
-                win32api.keybd_event(win32con.VK_DELETE, 0, win32con.KEYEVENTF_KEYUP, 0)
-                time.sleep(0.1)
+                backend.hotkey(VK_CONTROL, ord('A'))
+                metrics.sleep(0.1, "clear")
+                backend.press_key(VK_DELETE)
+                metrics.sleep(0.1, "clear")
             
             # 输入文本
-            for char in text:
-                if char.isupper():
-                    win32api.keybd_event(win32con.VK_SHIFT, 0, 0, 0)
-                    win32api.keybd_event(ord(char.upper()), 0, 0, 0)
-                    win32api.keybd_event(ord(char.upper()), 0, win32con.KEYEVENTF_KEYUP, 0)
-                    win32api.keybd_event(win32con.VK_SHIFT, 0, win32con.KEYEVENTF_KEYUP, 0)
-                else:
-                    win32api.keybd_event(ord(char.upper()), 0, 0, 0)
-                    win32api.keybd_event(ord(char.upper()), 0, win32con.KEYEVENTF_KEYUP, 0)
-                
-                time.sleep(self.type_delay)
+            with metrics.span("input", action="type", target=target):
+                backend.type_text(text)
             
             self.logger.info(f"文本输入成功: {target} -> {text}")
             return True
@@ -226,7 +267,7 @@ class UIExecutor:
             if not self.click_element(target, method):
                 return False
             
-            time.sleep(0.5)  # 等待下拉菜单展开
+            self.wait_for_settle(baseline=0.5, region=None)  # 等待下拉菜单展开（菜单可能超出窗口）
             
             # 查找并选择选项
             # 这里可以使用OCR识别下拉选项，或者通过键盘导航
@@ -234,15 +275,13 @@ class UIExecutor:
             option_lower = option.lower()
             
             # 模拟键盘输入选项名称
-            for char in option:
-                win32api.keybd_event(ord(char.upper()), 0, 0, 0)
-                win32api.keybd_event(ord(char.upper()), 0, win32con.KEYEVENTF_KEYUP, 0)
-                time.sleep(self.type_delay)
+            backend = self._get_input_backend(target)
+            with metrics.span("input", action="select", target=target):
+                backend.type_text(option)
             
             # 按回车确认选择
-            time.sleep(0.2)
-            win32api.keybd_event(win32con.VK_RETURN, 0, 0, 0)
-            win32api.keybd_event(win32con.VK_RETURN, 0, win32con.KEYEVENTF_KEYUP, 0)
+            metrics.sleep(0.2, "select")
+            backend.press_key(VK_RETURN)
             
             self.logger.info(f"选项选择成功: {target} -> {option}")
             return True
@@ -277,11 +316,11 @@ class UIExecutor:
                     self.logger.info(f"元素出现: {target}")
                     return True
                 
-                time.sleep(0.5)  # 等待间隔
+                metrics.sleep(0.5, "poll")  # 等待间隔
                 
             except Exception as e:
                 self.logger.debug(f"等待元素时出错: {e}")
-                time.sleep(0.5)
+                metrics.sleep(0.5, "poll")
         
         self.logger.warning(f"等待元素超时: {target}")
         return False
@@ -312,11 +351,11 @@ class UIExecutor:
                     self.logger.info(f"元素消失: {target}")
                     return True
                 
-                time.sleep(0.5)  # 等待间隔
+                metrics.sleep(0.5, "poll")  # 等待间隔
                 
             except Exception as e:
                 self.logger.debug(f"等待元素消失时出错: {e}")
-                time.sleep(0.5)
+                metrics.sleep(0.5, "poll")
         
         self.logger.warning(f"等待元素消失超时: {target}")
         return False
@@ -345,7 +384,8 @@ class UIExecutor:
             screenshot = self.locator._capture_screen()
             if screenshot is not None:
                 # 保存截图
-                cv2.imwrite(str(save_path), screenshot)
+                with metrics.span("artifact_write", action="screenshot"):
+                    cv2.imwrite(str(save_path), screenshot)
                 self.logger.info(f"截图保存成功: {save_path}")
                 return str(save_path)
             else:
@@ -387,19 +427,22 @@ class UIExecutor:
             
             # 移动到源元素
             win32api.SetCursorPos((start_x, start_y))
-            time.sleep(0.2)
+            metrics.sleep(0.2, "drag")
             
             # 按下鼠标左键
             win32api.mouse_event(win32con.MOUSEEVENTF_LEFTDOWN, start_x, start_y, 0, 0)
-            time.sleep(0.2)
+            metrics.sleep(0.2, "drag")
             
             # 移动到目标元素
             win32api.SetCursorPos((end_x, end_y))
-            time.sleep(0.2)
+            metrics.sleep(0.2, "drag")
             
             # 释放鼠标左键
             win32api.mouse_event(win32con.MOUSEEVENTF_LEFTUP, end_x, end_y, 0, 0)
             
+            # 拖拽可能移动了窗口
+            self.locator.window_provider.invalidate()
+            
             self.logger.info(f"拖拽操作成功: {source} -> {target}")
             return True
             
@@ -433,7 +476,7 @@ class UIExecutor:
             # 移动到目标元素
             x, y = coordinates
             win32api.SetCursorPos((x, y))
-            time.sleep(0.2)
+            metrics.sleep(0.2, "scroll")
             
             # 执行滚动
             if direction == "down":
@@ -466,33 +509,22 @@ class UIExecutor:
         try:
             self.logger.info(f"获取元素文本: {target}")
             
-            # 使用OCR获取文本
-            if self.locator.ocr_reader is not None:
-                # 截取屏幕
-                screenshot = self.locator._capture_screen()
-                if screenshot is not None:
-                    # OCR识别
-                    results = self.locator.ocr_reader.readtext(screenshot)
-                    confidence_threshold = self.config.get('ocr', {}).get('confidence_threshold', 0.7)
-                    
-                    # 查找目标元素附近的文本
-                    target_coords = self.locator.locate_element(target, method)
-                    if target_coords:
-                        target_x, target_y = target_coords
-                        
-                        for (bbox, text, confidence) in results:
-                            if confidence >= confidence_threshold:
-                                # 检查文本是否在目标元素附近
-                                bbox_center_x = (bbox[0][0] + bbox[2][0]) / 2
-                                bbox_center_y = (bbox[0][1] + bbox[2][1]) / 2
-                                
-                                # 简单的距离检查（可以优化）
-                                distance = ((bbox_center_x - target_x) ** 2 + 
-                                          (bbox_center_y - target_y) ** 2) ** 0.5
-                                
-                                if distance < 100:  # 100像素内的文本
-                                    self.logger.info(f"获取元素文本成功: {target} -> {text}")
-                                    return text
+            # 使用OCR获取文本：整帧识别结果建空间索引，取距目标最近的文本
+            index = self.locator.ocr_index()
+            if index is not None:
+                ocr_config = self.config.get('ocr', {})
+                confidence_threshold = ocr_config.get('confidence_threshold', 0.7)
+                max_distance = ocr_config.get('text_max_distance', 100)
+                
+                target_coords = self.locator.locate_element(target, method)
+                if target_coords:
+                    target_x, target_y = target_coords
+                    nearest = index.nearest(target_x, target_y, k=1, max_distance=max_distance,
+                                            min_confidence=confidence_threshold)
+                    if nearest:
+                        text = nearest[0][1].text
+                        self.logger.info(f"获取元素文本成功: {target} -> {text}")
+                        return text
             
             self.logger.warning(f"无法获取元素文本: {target}")
             return None
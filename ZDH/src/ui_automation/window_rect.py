@@ -0,0 +1,271 @@
+"""
+窗口矩形提供器
+解析被测应用窗口的屏幕矩形并短时缓存，用于窗口相对坐标的换算与窗口范围截图
+Windows下通过pywin32查找窗口，Linux下按标题在X11窗口树中查找（Xvfb）
+"""
+
+import os
+import re
+import time
+import ctypes
+from typing import Optional, Tuple, Callable, Any
+from src.utils.logger import get_logger
+
+
+# (left, top, right, bottom)
+Rect = Tuple[int, int, int, int]
+
+
+class WindowRectProvider:
+    """被测应用窗口矩形提供器"""
+
+    def __init__(self, ttl: float = 0.5, resolver: Callable[[], Optional[Rect]] = None):
+        """
+        初始化窗口矩形提供器
+
+        Args:
+            ttl: 窗口矩形缓存时间（秒）
+            resolver: 自定义矩形解析函数（非Windows平台或测试时使用）
+        """
+        self.logger = get_logger("WindowRectProvider")
+        self.ttl = float(ttl)
+        self.resolver = resolver
+
+        self.window: Any = None
+        self.title_pattern: Optional[str] = None
+        self.window_key: Optional[str] = None
+        self._handle: Optional[int] = None
+        self._display: Optional[int] = None
+
+        self._rect: Optional[Rect] = None
+        self._rect_time = 0.0
+        self._last_rect: Optional[Rect] = None
+        self.move_count = 0
+
+    @property
+    def attached(self) -> bool:
+        """是否已关联窗口"""
+        return (self.resolver is not None or self.window is not None
+                or self.title_pattern is not None)
+
+    def attach(self, window: Any = None, title: str = None, key: str = None,
+               resolver: Callable[[], Optional[Rect]] = None):
+        """
+        关联被测窗口
+
+        Args:
+            window: pywinauto窗口对象 (如 UIExecutor.current_window)
+            title: 窗口标题正则，用于按标题查找窗口
+            key: 缓存键（默认使用标题正则或窗口类名）
+            resolver: 自定义矩形解析函数
+        """
+        self.window = window
+        self.title_pattern = title
+        self.resolver = resolver or self.resolver
+        self.window_key = key or title
+        self._handle = None
+        self._last_rect = None
+        self.invalidate()
+
+        if self.window_key is None and window is not None:
+            try:
+                self.window_key = window.class_name()
+            except Exception:
+                self.window_key = "main_window"
+        if self.window_key is None:
+            self.window_key = "main_window"
+
+        self.logger.info(f"关联窗口: {self.window_key}")
+
+    def detach(self):
+        """取消关联窗口"""
+        self.window = None
+        self.title_pattern = None
+        self.window_key = None
+        self._handle = None
+        self._last_rect = None
+        self.invalidate()
+
+    def invalidate(self):
+        """使缓存的窗口矩形失效（窗口可能被移动或缩放时调用）"""
+        self._rect = None
+        self._rect_time = 0.0
+
+    def get_rect(self) -> Optional[Rect]:
+        """
+        获取窗口矩形
+
+        Returns:
+            (left, top, right, bottom)，窗口不可用返回None
+        """
+        if not self.attached:
+            return None
+
+        now = time.time()
+        if self._rect is not None and now - self._rect_time < self.ttl:
+            return self._rect
+
+        try:
+            rect = self._resolve_rect()
+        except Exception as e:
+            self.logger.debug(f"获取窗口矩形失败: {e}")
+            rect = None
+
+        if rect is not None and (rect[2] - rect[0] <= 0 or rect[0] <= -32000):
+            # 最小化或不可见
+            rect = None
+
+        if rect is not None:
+            if self._last_rect is not None and rect != self._last_rect:
+                self.move_count += 1
+                self.logger.debug(f"窗口位置变化: {self._last_rect} -> {rect}")
+            self._last_rect = rect
+
+        self._rect = rect
+        self._rect_time = now
+        return rect
+
+    def _resolve_rect(self) -> Optional[Rect]:
+        """解析窗口矩形"""
+        if self.resolver is not None:
+            return self.resolver()
+        if os.name != 'nt':
+            return self._resolve_x11_rect()
+
+        import win32gui
+
+        if self._handle is None or not win32gui.IsWindow(self._handle):
+            self._handle = self._find_handle()
+            if self._handle is None:
+                return None
+
+        return tuple(win32gui.GetWindowRect(self._handle))
+
+    def _find_handle(self) -> Optional[int]:
+        """通过窗口对象或标题查找窗口句柄"""
+        if self.window is not None:
+            try:
+                return self.window.handle
+            except Exception as e:
+                self.logger.debug(f"获取窗口句柄失败: {e}")
+
+        if self.title_pattern:
+            import win32gui
+
+            pattern = re.compile(self.title_pattern)
+            handles = []
+
+            def callback(hwnd, _):
+                if win32gui.IsWindowVisible(hwnd) and pattern.search(win32gui.GetWindowText(hwnd)):
+                    handles.append(hwnd)
+                return True
+
+            win32gui.EnumWindows(callback, None)
+            if handles:
+                return handles[0]
+
+        return None
+
+    def _resolve_x11_rect(self) -> Optional[Rect]:
+        """Linux下按标题正则查找X11窗口并取其屏幕矩形"""
+        if not self.title_pattern:
+            return None
+
+        from src.ui_automation.xlib import XLibrary, XWindowAttributes, IS_VIEWABLE
+
+        lib = XLibrary.get()
+        if self._display is None:
+            self._display = lib.x11.XOpenDisplay(None) or None
+            if self._display is None:
+                return None
+        display = self._display
+        root = lib.x11.XRootWindow(display, lib.x11.XDefaultScreen(display))
+
+        attributes = XWindowAttributes()
+
+        def viewable(window: int) -> bool:
+            errors = lib.errors
+            status = lib.x11.XGetWindowAttributes(display, window, ctypes.byref(attributes))
+            return bool(status) and lib.errors == errors and attributes.map_state == IS_VIEWABLE
+
+        if self._handle is None or not viewable(self._handle):
+            self._handle = self._find_x11_window(lib, display, root, re.compile(self.title_pattern), viewable)
+            if self._handle is None:
+                return None
+
+        x, y, child = ctypes.c_int(), ctypes.c_int(), ctypes.c_ulong()
+        lib.x11.XTranslateCoordinates(display, self._handle, root, 0, 0,
+                                      ctypes.byref(x), ctypes.byref(y), ctypes.byref(child))
+        return (x.value, y.value, x.value + attributes.width, y.value + attributes.height)
+
+    def _find_x11_window(self, lib: Any, display: int, root: int, pattern: "re.Pattern",
+                         viewable: Callable[[int], bool]) -> Optional[int]:
+        """深度优先遍历窗口树，返回第一个标题匹配且可见的窗口"""
+        net_wm_name = lib.x11.XInternAtom(display, b"_NET_WM_NAME", 0)
+        utf8_string = lib.x11.XInternAtom(display, b"UTF8_STRING", 0)
+
+        stack = [root]
+        while stack:
+            window = stack.pop()
+            if window != root:
+                title = self._x11_window_title(lib, display, window, net_wm_name, utf8_string)
+                if title and pattern.search(title) and viewable(window):
+                    return window
+
+            root_return, parent = ctypes.c_ulong(), ctypes.c_ulong()
+            children = ctypes.POINTER(ctypes.c_ulong)()
+            count = ctypes.c_uint()
+            if lib.x11.XQueryTree(display, window, ctypes.byref(root_return), ctypes.byref(parent),
+                                  ctypes.byref(children), ctypes.byref(count)) and children:
+                # 子窗口按从下到上的堆叠顺序返回，出栈时先访问最上层的窗口
+                stack.extend(children[i] for i in range(count.value))
+                lib.x11.XFree(children)
+        return None
+
+    @staticmethod
+    def _x11_window_title(lib: Any, display: int, window: int, net_wm_name: int,
+                          utf8_string: int) -> Optional[str]:
+        """窗口标题：优先_NET_WM_NAME (UTF-8)，其次WM_NAME"""
+        actual_type, actual_format = ctypes.c_ulong(), ctypes.c_int()
+        items, remaining, data = ctypes.c_ulong(), ctypes.c_ulong(), ctypes.c_void_p()
+        status = lib.x11.XGetWindowProperty(display, window, net_wm_name, 0, 1024, 0, utf8_string,
+                                            ctypes.byref(actual_type), ctypes.byref(actual_format),
+                                            ctypes.byref(items), ctypes.byref(remaining), ctypes.byref(data))
+        if status == 0 and data.value:
+            try:
+                if items.value:
+                    return ctypes.string_at(data.value, items.value).decode('utf-8', 'replace')
+            finally:
+                lib.x11.XFree(data)
+
+        name = ctypes.c_void_p()
+        if lib.x11.XFetchName(display, window, ctypes.byref(name)) and name.value:
+            try:
+                return ctypes.string_at(name.value).decode('utf-8', 'replace')
+            finally:
+                lib.x11.XFree(name)
+        return None
+
+    def to_relative(self, point: Tuple[int, int], rect: Rect) -> Tuple[int, int]:
+        """屏幕坐标转换为窗口相对坐标"""
+        return (int(point[0]) - rect[0], int(point[1]) - rect[1])
+
+    def to_screen(self, offset: Tuple[int, int], recorded_size: Tuple[int, int],
+                  rect: Rect) -> Tuple[int, int]:
+        """
+        窗口相对坐标转换为屏幕坐标
+
+        窗口尺寸变化时，位于记录窗口右半/下半部分的点按右/下边缘锚定
+        """
+        left, top, right, bottom = rect
+        width, height = right - left, bottom - top
+        recorded_w, recorded_h = recorded_size
+        rx, ry = offset
+
+        if (width, height) != (recorded_w, recorded_h):
+            if rx > recorded_w / 2:
+                rx = width - (recorded_w - rx)
+            if ry > recorded_h / 2:
+                ry = height - (recorded_h - ry)
+
+        return (left + rx, top + ry)
@@ -0,0 +1,152 @@
+"""
+X11动态库绑定
+通过ctypes加载libX11、libXext与libc中截图和窗口查找用到的函数（Linux/Xvfb），不依赖python-xlib
+"""
+
+import ctypes
+import ctypes.util
+import threading
+from typing import Optional
+
+
+ZPIXMAP = 2
+ALL_PLANES = ctypes.c_ulong(-1).value
+IS_VIEWABLE = 2
+IPC_PRIVATE = 0
+IPC_CREAT = 0o1000
+IPC_RMID = 0
+
+
+class XImage(ctypes.Structure):
+    # 只声明用到的前部字段，结构体由Xlib分配
+    _fields_ = [
+        ("width", ctypes.c_int),
+        ("height", ctypes.c_int),
+        ("xoffset", ctypes.c_int),
+        ("format", ctypes.c_int),
+        ("data", ctypes.c_void_p),
+        ("byte_order", ctypes.c_int),
+        ("bitmap_unit", ctypes.c_int),
+        ("bitmap_bit_order", ctypes.c_int),
+        ("bitmap_pad", ctypes.c_int),
+        ("depth", ctypes.c_int),
+        ("bytes_per_line", ctypes.c_int),
+        ("bits_per_pixel", ctypes.c_int)
+    ]
+
+
+class XShmSegmentInfo(ctypes.Structure):
+    _fields_ = [
+        ("shmseg", ctypes.c_ulong),
+        ("shmid", ctypes.c_int),
+        ("shmaddr", ctypes.c_void_p),
+        ("readOnly", ctypes.c_int)
+    ]
+
+
+class XWindowAttributes(ctypes.Structure):
+    _fields_ = [
+        ("x", ctypes.c_int),
+        ("y", ctypes.c_int),
+        ("width", ctypes.c_int),
+        ("height", ctypes.c_int),
+        ("border_width", ctypes.c_int),
+        ("depth", ctypes.c_int),
+        ("visual", ctypes.c_void_p),
+        ("root", ctypes.c_ulong),
+        ("class_", ctypes.c_int),
+        ("bit_gravity", ctypes.c_int),
+        ("win_gravity", ctypes.c_int),
+        ("backing_store", ctypes.c_int),
+        ("backing_planes", ctypes.c_ulong),
+        ("backing_pixel", ctypes.c_ulong),
+        ("save_under", ctypes.c_int),
+        ("colormap", ctypes.c_ulong),
+        ("map_installed", ctypes.c_int),
+        ("map_state", ctypes.c_int),
+        ("all_event_masks", ctypes.c_long),
+        ("your_event_mask", ctypes.c_long),
+        ("do_not_propagate_mask", ctypes.c_long),
+        ("override_redirect", ctypes.c_int),
+        ("screen", ctypes.c_void_p)
+    ]
+
+
+_XErrorHandler = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.c_void_p)
+
+
+def _load_library(name: str) -> ctypes.CDLL:
+    path = ctypes.util.find_library(name)
+    if path is None:
+        raise OSError(f"找不到动态库: {name}")
+    return ctypes.CDLL(path)
+
+
+def _declare(function, restype, *argtypes):
+    function.restype = restype
+    function.argtypes = list(argtypes)
+
+
+class XLibrary:
+    """libX11/libXext/libc中用到的函数（进程内加载一次）"""
+
+    _instance: Optional["XLibrary"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        x11 = _load_library("X11")
+        xext = _load_library("Xext")
+        libc = ctypes.CDLL(None)
+
+        p, c_int, c_ulong = ctypes.c_void_p, ctypes.c_int, ctypes.c_ulong
+        _declare(x11.XOpenDisplay, p, ctypes.c_char_p)
+        _declare(x11.XCloseDisplay, c_int, p)
+        _declare(x11.XDefaultScreen, c_int, p)
+        _declare(x11.XRootWindow, c_ulong, p, c_int)
+        _declare(x11.XDefaultVisual, p, p, c_int)
+        _declare(x11.XDefaultDepth, c_int, p, c_int)
+        _declare(x11.XDisplayWidth, c_int, p, c_int)
+        _declare(x11.XDisplayHeight, c_int, p, c_int)
+        _declare(x11.XSync, c_int, p, c_int)
+        _declare(x11.XFree, c_int, p)
+        _declare(x11.XSetErrorHandler, p, p)
+        _declare(x11.XQueryTree, c_int, p, c_ulong, ctypes.POINTER(c_ulong), ctypes.POINTER(c_ulong),
+                 ctypes.POINTER(ctypes.POINTER(c_ulong)), ctypes.POINTER(ctypes.c_uint))
+        _declare(x11.XFetchName, c_int, p, c_ulong, ctypes.POINTER(p))
+        _declare(x11.XInternAtom, c_ulong, p, ctypes.c_char_p, c_int)
+        _declare(x11.XGetWindowProperty, c_int, p, c_ulong, c_ulong, ctypes.c_long, ctypes.c_long, c_int,
+                 c_ulong, ctypes.POINTER(c_ulong), ctypes.POINTER(c_int), ctypes.POINTER(c_ulong),
+                 ctypes.POINTER(c_ulong), ctypes.POINTER(p))
+        _declare(x11.XGetWindowAttributes, c_int, p, c_ulong, ctypes.POINTER(XWindowAttributes))
+        _declare(x11.XTranslateCoordinates, c_int, p, c_ulong, c_ulong, c_int, c_int,
+                 ctypes.POINTER(c_int), ctypes.POINTER(c_int), ctypes.POINTER(c_ulong))
+
+        _declare(xext.XShmQueryExtension, c_int, p)
+        _declare(xext.XShmCreateImage, ctypes.POINTER(XImage), p, p, ctypes.c_uint, c_int, p,
+                 ctypes.POINTER(XShmSegmentInfo), ctypes.c_uint, ctypes.c_uint)
+        _declare(xext.XShmAttach, c_int, p, ctypes.POINTER(XShmSegmentInfo))
+        _declare(xext.XShmDetach, c_int, p, ctypes.POINTER(XShmSegmentInfo))
+        _declare(xext.XShmGetImage, c_int, p, c_ulong, ctypes.POINTER(XImage), c_int, c_int, c_ulong)
+
+        _declare(libc.shmget, c_int, c_int, ctypes.c_size_t, c_int)
+        _declare(libc.shmat, p, c_int, p, c_int)
+        _declare(libc.shmdt, c_int, p)
+        _declare(libc.shmctl, c_int, c_int, c_int, p)
+
+        self.x11, self.xext, self.libc = x11, xext, libc
+        self.errors = 0
+        # 默认的X错误处理会直接结束进程，改为计数后由调用方检查
+        self._handler = _XErrorHandler(self._on_error)
+        x11.XSetErrorHandler(ctypes.cast(self._handler, ctypes.c_void_p))
+
+    def _on_error(self, display, event) -> int:
+        self.errors += 1
+        return 0
+
+    @classmethod
+    def get(cls) -> "XLibrary":
+        """加载（首次调用时）并返回进程内唯一的绑定，缺少动态库时抛出OSError"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
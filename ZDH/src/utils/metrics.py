@@ -0,0 +1,215 @@
+"""
+性能指标
+记录热点路径的耗时区间（截图、各定位策略、OCR、输入注入、产物写入、AI调用等），
+按 区间/策略/目标/操作 标签聚合为直方图，并输出Prometheus文本格式
+"""
+
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, List, Tuple, Iterator
+from src.utils import tracing
+
+
+# 默认直方图桶上界（秒），覆盖从坐标缓存命中到AI调用的耗时范围
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# 耗时区间直方图的指标名
+SPAN_METRIC = "span_duration_seconds"
+
+METRIC_DESCRIPTIONS = {
+    SPAN_METRIC: "热点路径耗时区间（秒），按 span/strategy/target/action 标签区分"
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """按标签组合分组的直方图"""
+
+    def __init__(self, name: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+                 description: str = ""):
+        self.name = name
+        self.buckets = tuple(sorted(buckets))
+        self.description = description
+        # 标签组合 -> {"buckets": [各桶计数], "sum": 总和, "count": 次数}
+        self.series: Dict[LabelKey, Dict[str, Any]] = {}
+
+    def observe(self, value: float, labels: LabelKey):
+        series = self.series.get(labels)
+        if series is None:
+            series = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            self.series[labels] = series
+
+        for i, upper in enumerate(self.buckets):
+            if value <= upper:
+                series["buckets"][i] += 1
+                break
+        series["sum"] += value
+        series["count"] += 1
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: LabelKey, extra: Tuple[str, str] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape_label(v)}"' for k, v in pairs) + "}"
+
+
+class MetricsRegistry:
+    """线程安全的直方图指标注册表"""
+
+    def __init__(self, namespace: str = "zdh", buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+                 enabled: bool = True):
+        """
+        初始化指标注册表
+
+        Args:
+            namespace: 指标名前缀
+            buckets: 默认直方图桶上界（秒）
+            enabled: 是否记录指标（关闭时span/observe为空操作）
+        """
+        self.namespace = namespace
+        self.buckets = tuple(buckets)
+        self.enabled = enabled
+        self.histograms: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def _histogram(self, name: str) -> Histogram:
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = Histogram(name, self.buckets, METRIC_DESCRIPTIONS.get(name, ""))
+            self.histograms[name] = histogram
+        return histogram
+
+    def observe(self, name: str, value: float, **labels: Any):
+        """
+        记录一次观测值
+
+        Args:
+            name: 指标名（不含前缀）
+            value: 观测值（秒）
+            **labels: 标签，值为None的标签会被忽略
+        """
+        if not self.enabled:
+            return
+        key = tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+        with self._lock:
+            self._histogram(name).observe(float(value), key)
+
+    def observe_span(self, span: str, duration: float, **labels: Any):
+        """记录一个刚结束的耗时区间（同时写入当前执行的轨迹）"""
+        self.observe(SPAN_METRIC, duration, span=span, **labels)
+        tracing.record_span(span, time.perf_counter() - duration, duration, labels)
+
+    @contextmanager
+    def span(self, span: str, **labels: Any) -> Iterator[Dict[str, Any]]:
+        """
+        计时上下文：退出时把耗时记入区间直方图
+
+        上下文返回的字典可在区间内补充标签（如定位结果）
+
+        用法:
+            with metrics.span("locate", strategy="ocr_text", target=name) as span_labels:
+                ...
+                span_labels["result"] = "hit"
+        """
+        if not self.enabled and tracing.current_recorder() is None:
+            yield {}
+            return
+
+        extra_labels: Dict[str, Any] = {}
+        start = time.perf_counter()
+        try:
+            yield extra_labels
+        finally:
+            self.observe_span(span, time.perf_counter() - start, **{**labels, **extra_labels})
+
+    def sleep(self, seconds: float, reason: str = "sleep"):
+        """计时的固定等待，便于在指标和轨迹中看到等待占用的时间"""
+        with self.span("sleep", action=reason):
+            time.sleep(seconds)
+
+    def snapshot(self) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        指标快照
+
+        Returns:
+            {指标名: [{"labels": {...}, "count", "sum", "avg"}]}
+        """
+        with self._lock:
+            result = {}
+            for name, histogram in self.histograms.items():
+                result[name] = [
+                    {
+                        "labels": dict(labels),
+                        "count": series["count"],
+                        "sum": series["sum"],
+                        "avg": series["sum"] / series["count"] if series["count"] else 0.0
+                    }
+                    for labels, series in histogram.series.items()
+                ]
+            return result
+
+    def render_prometheus(self) -> str:
+        """输出Prometheus文本格式（exposition format 0.0.4）"""
+        lines = []
+        with self._lock:
+            for name in sorted(self.histograms):
+                histogram = self.histograms[name]
+                full_name = f"{self.namespace}_{name}" if self.namespace else name
+                if histogram.description:
+                    lines.append(f"# HELP {full_name} {histogram.description}")
+                lines.append(f"# TYPE {full_name} histogram")
+
+                for labels in sorted(histogram.series):
+                    series = histogram.series[labels]
+                    cumulative = 0
+                    for upper, count in zip(histogram.buckets, series["buckets"]):
+                        cumulative += count
+                        bucket_labels = _format_labels(labels, ('le', repr(float(upper))))
+                        lines.append(f"{full_name}_bucket{bucket_labels} {cumulative}")
+                    lines.append(f"{full_name}_bucket{_format_labels(labels, ('le', '+Inf'))} {series['count']}")
+                    lines.append(f"{full_name}_sum{_format_labels(labels)} {series['sum']!r}")
+                    lines.append(f"{full_name}_count{_format_labels(labels)} {series['count']}")
+
+        return "\n".join(lines) + "\n"
+
+    def log_summary(self):
+        """把各区间的平均耗时写入性能日志"""
+        from src.utils.logger import logger_manager
+
+        for name, series_list in self.snapshot().items():
+            for series in series_list:
+                label_text = ",".join(f"{k}={v}" for k, v in sorted(series["labels"].items()))
+                logger_manager.log_performance_metric(
+                    f"{name}[{label_text}] avg({series['count']})", round(series["avg"], 4), "s"
+                )
+
+    def reset(self):
+        """清空所有指标"""
+        with self._lock:
+            self.histograms.clear()
+
+
+def _create_registry() -> MetricsRegistry:
+    """按monitoring.performance配置创建全局注册表"""
+    try:
+        from src.utils.config_manager import config_manager
+        performance_config = config_manager.get_monitoring_config().get('performance', {})
+    except Exception:
+        performance_config = {}
+
+    return MetricsRegistry(
+        buckets=tuple(performance_config.get('histogram_buckets', DEFAULT_BUCKETS)),
+        enabled=performance_config.get('enabled', True)
+    )
+
+
+# 创建全局实例
+metrics = _create_registry()
@@ -0,0 +1,175 @@
+"""
+采样性能分析器
+后台线程定期采样进程内所有线程的调用栈，在内存中聚合为折叠栈（collapsed stacks），
+可直接用于flamegraph.pl、speedscope等火焰图工具；用于长时间运行时发现锁竞争和空转
+"""
+
+import os
+import sys
+import time
+import threading
+from collections import Counter
+from typing import Dict, Any, Optional, List
+from src.utils.logger import get_logger
+
+
+# 超出max_stacks后新出现的栈计入该键
+OVERFLOW_STACK = "[other]"
+
+
+class SamplingProfiler:
+    """低开销的线程栈采样分析器"""
+
+    def __init__(self, config: Dict[str, Any] = None):
+        """
+        初始化采样分析器
+
+        Args:
+            config: 采样分析配置 (monitoring.sampling_profiler)
+        """
+        self.logger = get_logger("SamplingProfiler")
+        config = config or {}
+
+        self.interval = float(config.get('interval', 0.02))
+        self.max_interval = float(config.get('max_interval', 1.0))
+        self.max_depth = int(config.get('max_depth', 64))
+        self.max_stacks = int(config.get('max_stacks', 20000))
+        # 采样耗时占墙钟时间的上限，超出时自动拉长采样间隔
+        self.max_overhead = float(config.get('max_overhead', 0.01))
+
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._current_interval = self.interval
+        self._sampling_time = 0.0
+        self._started_at: Optional[float] = None
+        self._running_time = 0.0
+        self._label_cache: Dict[Any, str] = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """启动采样线程"""
+        if self.running:
+            return
+        self._stop_event.clear()
+        self._started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        self.logger.info(f"采样分析器已启动，间隔 {self.interval * 1000:.0f}ms")
+
+    def stop(self):
+        """停止采样线程（保留已聚合的数据）"""
+        if not self.running:
+            return
+        self._stop_event.set()
+        self._thread.join(timeout=5)
+        self._thread = None
+        if self._started_at is not None:
+            self._running_time += time.perf_counter() - self._started_at
+            self._started_at = None
+        self.logger.info(f"采样分析器已停止，共 {self.samples} 次采样")
+
+    def reset(self):
+        """清空已聚合的数据"""
+        with self._lock:
+            self.stacks.clear()
+            self.samples = 0
+            self._sampling_time = 0.0
+            self._running_time = 0.0
+            if self._started_at is not None:
+                self._started_at = time.perf_counter()
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        while not self._stop_event.wait(self._current_interval):
+            start = time.perf_counter()
+            self.sample(exclude=own_ident)
+            elapsed = time.perf_counter() - start
+            self._adapt_interval(elapsed)
+
+    def _adapt_interval(self, elapsed: float):
+        """单次采样耗时相对间隔过高时拉长间隔，开销回落后逐步恢复"""
+        overhead = elapsed / (self._current_interval + elapsed)
+        if overhead > self.max_overhead:
+            self._current_interval = min(self.max_interval, self._current_interval * 2)
+        elif self._current_interval > self.interval and overhead < self.max_overhead / 4:
+            self._current_interval = max(self.interval, self._current_interval / 2)
+
+    def _frame_label(self, code) -> str:
+        label = self._label_cache.get(code)
+        if label is None:
+            label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            self._label_cache[code] = label
+        return label
+
+    def sample(self, exclude: int = None):
+        """
+        采样一次所有线程的调用栈
+
+        Args:
+            exclude: 不采样的线程ID（采样线程自身）
+        """
+        start = time.perf_counter()
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        collected = []
+
+        for ident, frame in sys._current_frames().items():
+            if ident == exclude:
+                continue
+            labels = []
+            while frame is not None and len(labels) < self.max_depth:
+                labels.append(self._frame_label(frame.f_code))
+                frame = frame.f_back
+            labels.append(thread_names.get(ident, f"thread-{ident}"))
+            collected.append(";".join(reversed(labels)))
+
+        with self._lock:
+            for stack in collected:
+                if stack in self.stacks or len(self.stacks) < self.max_stacks:
+                    self.stacks[stack] += 1
+                else:
+                    self.stacks[OVERFLOW_STACK] += 1
+            self.samples += 1
+            self._sampling_time += time.perf_counter() - start
+
+    def collapsed(self, thread_filter: str = None) -> str:
+        """
+        折叠栈文本：每行 "线程;外层函数;...;内层函数 次数"
+
+        Args:
+            thread_filter: 只输出线程名包含该字符串的栈
+        """
+        with self._lock:
+            items = sorted(self.stacks.items(), key=lambda item: -item[1])
+        lines = [f"{stack} {count}" for stack, count in items
+                 if thread_filter is None or thread_filter in stack.split(";", 1)[0]]
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def status(self) -> Dict[str, Any]:
+        """运行状态与实测开销"""
+        with self._lock:
+            running_time = self._running_time
+            if self._started_at is not None:
+                running_time += time.perf_counter() - self._started_at
+            return {
+                "running": self.running,
+                "samples": self.samples,
+                "unique_stacks": len(self.stacks),
+                "interval": self._current_interval,
+                "running_time": running_time,
+                "sampling_time": self._sampling_time,
+                "overhead": self._sampling_time / running_time if running_time > 0 else 0.0
+            }
+
+    def top_frames(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """按自身采样数（栈顶函数）排序的热点函数"""
+        counter: Counter = Counter()
+        with self._lock:
+            for stack, count in self.stacks.items():
+                counter[stack.rsplit(";", 1)[-1]] += count
+        return [{"frame": frame, "samples": count} for frame, count in counter.most_common(limit)]
@@ -0,0 +1,119 @@
+"""
+步骤性能分析
+按需在cProfile下执行单个测试步骤，保存完整的.prof文件并提取累计耗时最高的函数
+
+Python 3.12以前cProfile通过sys.setprofile挂在调用线程上，步骤提交到线程池的工作
+（竞速定位、截图、OCR线程等）不会出现在分析结果中，报告的"threads"字段标明分析范围
+"""
+
+import sys
+import cProfile
+import pstats
+import threading
+from pathlib import Path
+from typing import Callable, Any, Dict, List, Tuple
+from src.utils.logger import get_logger
+
+
+# Python 3.12起cProfile基于sys.monitoring，覆盖所有线程，但同一时刻只能有一个分析器
+_EXCLUSIVE = sys.version_info >= (3, 12)
+_exclusive_lock = threading.Lock()
+# 分析范围：all 所有线程，calling 仅调用线程
+PROFILE_THREADS = "all" if _EXCLUSIVE else "calling"
+
+
+class StepProfiler:
+    """步骤级确定性性能分析器"""
+
+    def __init__(self, config: Dict[str, Any] = None):
+        """
+        初始化步骤性能分析器
+
+        Args:
+            config: 性能分析配置 (test_execution.profiling)
+        """
+        self.logger = get_logger("StepProfiler")
+        config = config or {}
+
+        self.output_dir = Path(config.get('output_dir', 'data/profiles'))
+        self.top_n = int(config.get('top_n', 25))
+        self.sort_key = config.get('sort', 'cumulative')
+
+    def run(self, name: str, func: Callable[..., Any], *args, **kwargs) -> Tuple[Any, Dict[str, Any]]:
+        """
+        在cProfile下执行函数
+
+        Args:
+            name: 分析名称，用作.prof文件的相对路径（如 "执行ID/step_1"），
+                同名文件已存在时（步骤重试）依次保存为 step_1.2.prof、step_1.3.prof……
+            func: 要执行的函数
+            *args, **kwargs: 函数参数
+
+        Returns:
+            (函数返回值, 分析报告 {"prof_path", "attempt", "threads", "total_time", "top"})
+        """
+        acquired = not _EXCLUSIVE or _exclusive_lock.acquire(blocking=False)
+        if not acquired:
+            # 其他线程正在分析，本次不分析以免冲突
+            return func(*args, **kwargs), {"skipped": "另一个步骤正在进行性能分析"}
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                profiler.disable()
+        finally:
+            if _EXCLUSIVE:
+                _exclusive_lock.release()
+
+        return result, self._build_report(name, profiler)
+
+    def _build_report(self, name: str, profiler: cProfile.Profile) -> Dict[str, Any]:
+        """保存.prof文件并提取前N个函数"""
+        report: Dict[str, Any] = {"prof_path": None, "threads": PROFILE_THREADS}
+
+        try:
+            prof_path, report["attempt"] = self._reserve_path(name)
+            profiler.dump_stats(str(prof_path))
+            report["prof_path"] = str(prof_path)
+        except Exception as e:
+            self.logger.warning(f"保存性能分析文件失败 {name}: {e}")
+
+        stats = pstats.Stats(profiler)
+        report["total_time"] = stats.total_tt
+        report["top"] = self.top_functions(stats)
+        return report
+
+    def _reserve_path(self, name: str) -> Tuple[Path, int]:
+        """占用下一个未使用的.prof路径（独占创建，并发与重试的分析不会相互覆盖）"""
+        base = self.output_dir / name
+        base.parent.mkdir(parents=True, exist_ok=True)
+        attempt = 1
+        while True:
+            suffix = ".prof" if attempt == 1 else f".{attempt}.prof"
+            prof_path = base.with_name(base.name + suffix)
+            try:
+                with open(prof_path, 'x'):
+                    return prof_path, attempt
+            except FileExistsError:
+                attempt += 1
+
+    def top_functions(self, stats: pstats.Stats) -> List[Dict[str, Any]]:
+        """按排序键提取前N个函数"""
+        stats.sort_stats(self.sort_key)
+        top = []
+        for func in stats.fcn_list[:self.top_n]:
+            primitive_calls, total_calls, tottime, cumtime, _ = stats.stats[func]
+            filename, line, function = func
+            top.append({
+                "function": function,
+                "file": filename,
+                "line": line,
+                "ncalls": total_calls,
+                "primitive_calls": primitive_calls,
+                "tottime": tottime,
+                "cumtime": cumtime
+            })
+        return top
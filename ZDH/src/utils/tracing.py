@@ -0,0 +1,124 @@
+"""
+执行轨迹记录
+按执行记录Chrome Trace Event格式的时间线（可在 chrome://tracing 或 Perfetto 中查看），
+耗时区间通过 metrics.span 自动写入当前线程所属执行的轨迹
+"""
+
+import os
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Iterator
+
+
+# 当前上下文所属执行的轨迹记录器（工作线程与竞速线程通过上下文复制继承）
+_current_recorder: contextvars.ContextVar = contextvars.ContextVar("trace_recorder", default=None)
+
+
+class TraceRecorder:
+    """单次执行的轨迹记录器"""
+
+    def __init__(self, execution_id: str, max_events: int = 100000):
+        """
+        初始化轨迹记录器
+
+        Args:
+            execution_id: 执行ID
+            max_events: 最多保留的事件数，超出后丢弃并计数
+        """
+        self.execution_id = execution_id
+        self.max_events = max_events
+        self.pid = os.getpid()
+        self.events: List[Dict[str, Any]] = []
+        self.dropped = 0
+        self._thread_names: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def add_complete(self, name: str, category: str, start: float, duration: float,
+                     args: Dict[str, Any] = None):
+        """
+        添加完整事件（ph=X）
+
+        Args:
+            name: 事件名
+            category: 事件分类（区间类型）
+            start: 开始时间（time.perf_counter秒）
+            duration: 持续时间（秒）
+            args: 附加参数
+        """
+        thread = threading.current_thread()
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": start * 1e6,
+            "dur": duration * 1e6,
+            "pid": self.pid,
+            "tid": thread.ident,
+            "args": args or {}
+        }
+
+        with self._lock:
+            if thread.ident not in self._thread_names:
+                self._thread_names[thread.ident] = thread.name
+            if len(self.events) >= self.max_events:
+                self.dropped += 1
+                return
+            self.events.append(event)
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """导出为Chrome Trace Event JSON对象"""
+        with self._lock:
+            metadata = [{
+                "name": "process_name", "ph": "M", "pid": self.pid, "tid": 0,
+                "args": {"name": f"execution {self.execution_id}"}
+            }]
+            metadata.extend({
+                "name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid,
+                "args": {"name": name}
+            } for tid, name in self._thread_names.items())
+
+            return {
+                "traceEvents": metadata + sorted(self.events, key=lambda e: e["ts"]),
+                "displayTimeUnit": "ms",
+                "otherData": {
+                    "execution_id": self.execution_id,
+                    "dropped_events": self.dropped
+                }
+            }
+
+
+def current_recorder() -> Optional[TraceRecorder]:
+    """当前上下文的轨迹记录器，未启用轨迹时为None"""
+    return _current_recorder.get()
+
+
+@contextmanager
+def activate(recorder: Optional[TraceRecorder]) -> Iterator[Optional[TraceRecorder]]:
+    """在当前上下文中启用轨迹记录器"""
+    token = _current_recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _current_recorder.reset(token)
+
+
+def record_span(span: str, start: float, duration: float, labels: Dict[str, Any]):
+    """把耗时区间写入当前轨迹（未启用轨迹时为空操作）"""
+    recorder = _current_recorder.get()
+    if recorder is None:
+        return
+
+    detail = labels.get("strategy") or labels.get("action") or labels.get("target")
+    name = f"{span}:{detail}" if detail else span
+    recorder.add_complete(name, span, start, duration,
+                          {k: v for k, v in labels.items() if v is not None})
+
+
+def bind_context(func):
+    """绑定当前上下文，使提交到线程池的任务写入同一执行的轨迹"""
+    context = contextvars.copy_context()
+
+    def wrapper(*args, **kwargs):
+        return context.run(func, *args, **kwargs)
+    return wrapper
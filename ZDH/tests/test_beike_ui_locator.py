@@ -14,6 +14,7 @@ import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.ui_automation.beike_ui_locator import BeikeUILocator
+from src.ui_automation.capture import ReplayCaptureBackend
 
 
 class TestBeikeUILocator(unittest.TestCase):
@@ -40,7 +41,12 @@ class TestBeikeUILocator(unittest.TestCase):
         # Mock配置管理器
         self.mock_config = {
             'ocr': {'enabled': True, 'language': 'ch_sim+en'},
-            'coordinate_cache': {'enabled': True},
+            'coordinate_cache': {
+                'enabled': True,
+                'cache_file': str(self.coordinate_cache_dir / "coordinate_cache.json")
+            },
+            'color_matching': {'signature_file': str(self.data_dir / "color_signatures.json")},
+            'adaptive_ordering': {'stats_file': str(self.data_dir / "locator_stats.json")},
             'image_templates': {'base_path': str(self.templates_dir)},
             'recognition_priority': ['image_recognition', 'coordinate_positioning', 'color_matching', 'ocr_text']
         }
@@ -228,6 +234,139 @@ class TestBeikeUILocator(unittest.TestCase):
                         # 验证结果为None
                         self.assertIsNone(result)
     
+    @patch('src.ui_automation.beike_ui_locator.config_manager')
+    @patch('src.ui_automation.beike_ui_locator.easyocr')
+    def test_locate_element_adaptive_ordering(self, mock_easyocr, mock_config_manager):
+        """测试自适应排序跳过总是失败的昂贵策略"""
+        # Mock配置
+        mock_config = dict(self.mock_config)
+        mock_config['adaptive_ordering'] = dict(mock_config['adaptive_ordering'], exploration_rate=0)
+        mock_config['coordinate_cache'] = dict(mock_config['coordinate_cache'], auto_update=False)
+        mock_config_manager.get_beike_ui_config.return_value = mock_config
+        
+        # 创建定位器实例
+        locator = BeikeUILocator()
+        
+        # 该目标只有OCR能找到
+        for _ in range(20):
+            locator.strategy_stats.record("menu_item", "image_recognition", False, 0.5)
+            locator.strategy_stats.record("menu_item", "coordinate_positioning", False, 0.001)
+            locator.strategy_stats.record("menu_item", "color_matching", False, 0.3)
+            locator.strategy_stats.record("menu_item", "ocr_text", True, 0.2)
+        
+        with patch.object(locator, '_locate_by_image') as mock_image:
+            with patch.object(locator, '_locate_by_ocr') as mock_ocr:
+                mock_image.return_value = None
+                mock_ocr.return_value = (10, 20)
+                
+                result = locator.locate_element("menu_item", "auto")
+                
+                self.assertEqual(result, (10, 20))
+                mock_image.assert_not_called()
+    
+    @patch('src.ui_automation.beike_ui_locator.config_manager')
+    @patch('src.ui_automation.beike_ui_locator.easyocr')
+    def test_locate_element_race(self, mock_easyocr, mock_config_manager):
+        """测试竞速定位取第一个成功结果，无需等待慢速策略"""
+        import time
+        
+        # Mock配置
+        mock_config_manager.get_beike_ui_config.return_value = self.mock_config
+        
+        # 创建定位器实例
+        locator = BeikeUILocator()
+        frame = np.zeros((100, 100, 3), dtype=np.uint8)
+        
+        def slow_miss(target_name, screenshot=None, cancel=None):
+            time.sleep(0.5)
+            return None
+        
+        def fast_hit(target_name, screenshot=None, cancel=None):
+            self.assertIs(screenshot, frame)
+            return (10, 20)
+        
+        with patch.object(locator, '_capture_screen', return_value=frame), \
+                patch.object(locator, '_locate_by_image', side_effect=slow_miss), \
+                patch.object(locator, '_locate_by_color', return_value=None), \
+                patch.object(locator, '_locate_by_ocr', side_effect=fast_hit):
+            start_time = time.time()
+            result = locator.locate_element("search_box", "race")
+            duration = time.time() - start_time
+        
+        self.assertEqual(result, (10, 20))
+        self.assertLess(duration, 0.4)
+        locator.close()
+    
+    @patch('src.ui_automation.beike_ui_locator.config_manager')
+    @patch('src.ui_automation.beike_ui_locator.easyocr')
+    def test_locate_element_race_priority_tie_break(self, mock_easyocr, mock_config_manager):
+        """测试竞速定位在平局窗口内优先采用高优先级策略"""
+        import time
+        
+        # Mock配置
+        mock_config = dict(self.mock_config)
+        mock_config['racing'] = {'tie_break_window': 0.5}
+        mock_config_manager.get_beike_ui_config.return_value = mock_config
+        
+        # 创建定位器实例
+        locator = BeikeUILocator()
+        
+        def image_hit(target_name, screenshot=None, cancel=None):
+            time.sleep(0.1)
+            return (5, 5)
+        
+        with patch.object(locator, '_capture_screen', return_value=np.zeros((10, 10, 3), dtype=np.uint8)), \
+                patch.object(locator, '_locate_by_image', side_effect=image_hit), \
+                patch.object(locator, '_locate_by_color', return_value=None), \
+                patch.object(locator, '_locate_by_ocr', return_value=(10, 20)):
+            result = locator.locate_element("search_box", "race")
+        
+        self.assertEqual(result, (5, 5))
+        locator.close()
+    
+    @patch('src.ui_automation.beike_ui_locator.config_manager')
+    @patch('src.ui_automation.beike_ui_locator.easyocr')
+    def test_locate_element_race_cancels_losers(self, mock_easyocr, mock_config_manager):
+        """测试竞速结束后落败策略收到取消事件，后续竞速不在其后排队，其结果不计入统计"""
+        import time
+        import threading
+        
+        # Mock配置
+        mock_config = dict(self.mock_config)
+        mock_config['racing'] = {'max_workers': 2}
+        mock_config['coordinate_cache'] = dict(mock_config['coordinate_cache'], auto_update=False)
+        mock_config_manager.get_beike_ui_config.return_value = mock_config
+        
+        # 创建定位器实例
+        locator = BeikeUILocator()
+        observed = threading.Event()
+        calls = []
+        
+        def image_slow(target_name, screenshot=None, cancel=None):
+            calls.append(target_name)
+            if len(calls) == 1:
+                # 模拟无法中断的单次识别调用，结束后在检查点发现竞速已结束
+                time.sleep(0.8)
+                if cancel.is_set():
+                    observed.set()
+            return None
+        
+        with patch.object(locator, '_capture_screen', return_value=np.zeros((10, 10, 3), dtype=np.uint8)), \
+                patch.object(locator, '_locate_by_image', side_effect=image_slow), \
+                patch.object(locator, '_locate_by_color', return_value=None), \
+                patch.object(locator, '_locate_by_ocr', return_value=(10, 20)):
+            self.assertEqual(locator.locate_element("search_box", "race"), (10, 20))
+            self.assertIsNone(locator._race_pool)
+            
+            start_time = time.time()
+            self.assertEqual(locator.locate_element("search_box", "race"), (10, 20))
+            self.assertLess(time.time() - start_time, 0.5)
+            self.assertTrue(observed.wait(2))
+        
+        # 只有第二次竞速中完整执行的图像匹配被记录
+        self.assertEqual(locator.strategy_stats.get_target_stats("search_box")["image_recognition"]["attempts"], 1)
+        locator.close()
+    
     @patch('src.ui_automation.beike_ui_locator.config_manager')
     @patch('src.ui_automation.beike_ui_locator.easyocr')
     def test_update_coordinate_cache(self, mock_easyocr, mock_config_manager):
@@ -249,6 +388,88 @@ class TestBeikeUILocator(unittest.TestCase):
         self.assertIn("new_button", locator.coordinate_cache)
         self.assertEqual(locator.coordinate_cache["new_button"], (500, 600))
     
+    @patch('src.ui_automation.beike_ui_locator.config_manager')
+    @patch('src.ui_automation.beike_ui_locator.easyocr')
+    def test_locate_texts(self, mock_easyocr, mock_config_manager):
+        """测试批量文本定位（整帧识别一次，容忍少量识别错误）"""
+        mock_config_manager.get_beike_ui_config.return_value = self.mock_config
+        
+        mock_reader = Mock()
+        mock_reader.readtext.return_value = [
+            ([[100, 100], [200, 100], [200, 120], [100, 120]], "Commit to maln", 0.9),
+            ([[300, 300], [380, 300], [380, 320], [300, 320]], "info.json", 0.5),
+            ([[300, 400], [380, 400], [380, 420], [300, 420]], "回收站", 0.95)
+        ]
+        mock_easyocr.Reader.return_value = mock_reader
+        
+        locator = BeikeUILocator()
+        screenshot = np.zeros((600, 800, 3), dtype=np.uint8)
+        located = locator.locate_texts(["Commit to main", "info.json", "回收站", "设置"], screenshot)
+        
+        self.assertEqual(located["Commit to main"], (150, 110))
+        self.assertIsNone(located["info.json"])  # 置信度不足
+        self.assertEqual(located["回收站"], (340, 410))
+        self.assertIsNone(located["设置"])
+        self.assertEqual(mock_reader.readtext.call_count, 1)
+    
+    @patch('src.ui_automation.beike_ui_locator.config_manager')
+    @patch('src.ui_automation.beike_ui_locator.easyocr')
+    def test_window_relative_coordinate_cache(self, mock_easyocr, mock_config_manager):
+        """测试坐标缓存随窗口移动换算"""
+        # Mock配置
+        mock_config_manager.get_beike_ui_config.return_value = self.mock_config
+        
+        # 创建定位器实例，使用可控的窗口矩形
+        locator = BeikeUILocator()
+        window_rect = [(100, 100, 900, 700)]
+        locator.window_provider.ttl = 0
+        locator.window_provider.attach(key="test_app", resolver=lambda: window_rect[0])
+        
+        # 在窗口内记录坐标，并在右下角记录一个点
+        locator.update_coordinate_cache("ok_button", (150, 180))
+        locator.update_coordinate_cache("close_button", (880, 690))
+        
+        # 窗口移动后坐标随之平移
+        window_rect[0] = (300, 250, 1100, 850)
+        self.assertEqual(locator._locate_by_coordinate("ok_button"), (350, 330))
+        
+        # 窗口放大后右下角的点按右下边缘锚定
+        window_rect[0] = (300, 250, 1300, 950)
+        self.assertEqual(locator._locate_by_coordinate("close_button"), (1280, 940))
+        
+        locator.coordinate_cache.close()
+    
+    @patch('src.ui_automation.beike_ui_locator.config_manager')
+    @patch('src.ui_automation.beike_ui_locator.easyocr')
+    def test_window_scoped_capture(self, mock_easyocr, mock_config_manager):
+        """测试窗口范围截图只识别窗口区域，结果换算回屏幕坐标"""
+        mock_config = dict(self.mock_config, capture={'scope': 'window'})
+        mock_config_manager.get_beike_ui_config.return_value = mock_config
+        
+        mock_reader = Mock(spec=['readtext'])
+        mock_reader.readtext.return_value = [
+            ([[10, 20], [90, 20], [90, 40], [10, 40]], "确定", 0.9)
+        ]
+        mock_easyocr.Reader.return_value = mock_reader
+        
+        screen = np.zeros((600, 800, 3), dtype=np.uint8)
+        locator = BeikeUILocator(capture_backend=ReplayCaptureBackend([screen], loop=False))
+        window_rect = [(100, 50, 500, 350)]
+        locator.window_provider.ttl = 0
+        locator.window_provider.attach(key="test_app", resolver=lambda: window_rect[0])
+        
+        self.assertEqual(locator.locate_element("确定", "ocr"), (150, 80))
+        self.assertEqual(mock_reader.readtext.call_args[0][0].shape, (300, 400, 3))
+        self.assertEqual(locator.locate_texts(["确定"])["确定"], (150, 80))
+        self.assertEqual(locator._get_screen_key(), "800x600@96")
+        
+        # 窗口不可用时截取整个屏幕
+        window_rect[0] = None
+        self.assertEqual(locator.locate_element("确定", "ocr"), (50, 30))
+        self.assertEqual(mock_reader.readtext.call_args[0][0].shape, (600, 800, 3))
+        
+        locator.coordinate_cache.close()
+    
     @patch('src.ui_automation.beike_ui_locator.config_manager')
     @patch('src.ui_automation.beike_ui_locator.easyocr')
     def test_add_image_template(self, mock_easyocr, mock_config_manager):
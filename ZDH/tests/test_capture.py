@@ -0,0 +1,155 @@
+"""
+截图后端单元测试
+"""
+
+import os
+import unittest
+import tempfile
+import shutil
+import cv2
+import numpy as np
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from unittest.mock import patch
+from src.ui_automation.capture import (
+    ReplayCaptureBackend, PILCaptureBackend, create_capture_backend, clamp_region, bgra_to_bgr,
+    Frame, frame_origin, grab_frame, to_frame_point, to_screen_point
+)
+
+
+def make_frame(value: int, width: int = 64, height: int = 48) -> np.ndarray:
+    frame = np.zeros((height, width, 3), dtype=np.uint8)
+    frame[:, :] = value
+    return frame
+
+
+class TestReplayCaptureBackend(unittest.TestCase):
+    """回放截图后端测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = tempfile.mkdtemp()
+        for i, value in enumerate((10, 20, 30)):
+            cv2.imwrite(str(Path(self.temp_dir) / f"frame_{i:03d}.png"), make_frame(value))
+
+    def tearDown(self):
+        """测试后清理"""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_from_directory_loops_in_name_order(self):
+        """测试按文件名顺序循环回放"""
+        backend = ReplayCaptureBackend.from_directory(self.temp_dir)
+        self.assertEqual(len(backend), 3)
+
+        values = [int(backend.grab()[0, 0, 0]) for _ in range(4)]
+        self.assertEqual(values, [10, 20, 30, 10])
+        self.assertEqual(backend.grab_count, 4)
+
+    def test_fixed_frame_and_region(self):
+        """测试loop=False时停留在当前帧，并按区域裁剪"""
+        backend = ReplayCaptureBackend([make_frame(1), make_frame(2)], loop=False)
+        backend.set_frame(1)
+
+        self.assertEqual(int(backend.grab()[0, 0, 0]), 2)
+        self.assertEqual(int(backend.grab()[0, 0, 0]), 2)
+        self.assertEqual(backend.grab((10, 5, 30, 25)).shape, (20, 20, 3))
+        self.assertEqual(backend.screen_size(), (64, 48))
+
+        with self.assertRaises(IndexError):
+            backend.set_frame(2)
+
+    def test_empty_backend(self):
+        """测试无帧时返回None"""
+        backend = ReplayCaptureBackend()
+        self.assertIsNone(backend.grab())
+        self.assertIsNone(backend.screen_size())
+
+    def test_missing_frame_file(self):
+        """测试帧文件不存在时报错"""
+        backend = ReplayCaptureBackend([Path(self.temp_dir) / "missing.png"])
+        with self.assertRaises(FileNotFoundError):
+            backend.grab()
+
+    def test_factory(self):
+        """测试按名称创建后端"""
+        self.assertIsInstance(create_capture_backend("pil"), PILCaptureBackend)
+        self.assertIsInstance(create_capture_backend("unknown"), PILCaptureBackend)
+
+        backend = create_capture_backend("replay", {'replay_dir': self.temp_dir})
+        self.assertIsInstance(backend, ReplayCaptureBackend)
+        self.assertEqual(len(backend), 3)
+
+
+class TestWindowScopedCapture(unittest.TestCase):
+    """区域截图与坐标换算测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        screen = np.zeros((600, 800, 3), dtype=np.uint8)
+        screen[250:260, 400:410] = 255
+        self.backend = ReplayCaptureBackend([screen], loop=False)
+
+    def test_grab_frame_records_origin(self):
+        """测试区域截图记录屏幕原点，坐标可在截图与屏幕间换算"""
+        frame = grab_frame(self.backend, (300, 200, 500, 400))
+        self.assertIsInstance(frame, Frame)
+        self.assertEqual(frame.shape, (200, 200, 3))
+        self.assertEqual(frame_origin(frame), (300, 200))
+        self.assertEqual(int(frame[55, 105, 0]), 255)
+        self.assertEqual(to_screen_point(frame, (105, 55)), (405, 255))
+        self.assertEqual(to_frame_point(frame, (405, 255)), (105, 55))
+        self.assertEqual(frame_origin(frame.copy()), (300, 200))
+
+    def test_grab_frame_clamps_to_screen(self):
+        """测试部分在屏幕外的区域裁剪后原点随之调整"""
+        frame = grab_frame(self.backend, (-100, 500, 200, 700))
+        self.assertEqual(frame.shape, (100, 200, 3))
+        self.assertEqual(frame_origin(frame), (0, 500))
+
+    def test_full_screen(self):
+        """测试整屏截图与完全在屏幕外的区域返回普通数组"""
+        for region in (None, (900, 0, 1000, 100)):
+            frame = grab_frame(self.backend, region)
+            self.assertNotIsInstance(frame, Frame)
+            self.assertEqual(frame.shape, (600, 800, 3))
+            self.assertEqual(frame_origin(frame), (0, 0))
+            self.assertEqual(to_screen_point(frame, (5, 6)), (5, 6))
+
+
+class TestXShmHelpers(unittest.TestCase):
+    """X11共享内存截图辅助函数测试类（不需要X服务器）"""
+
+    def test_clamp_region(self):
+        """测试区域裁剪到屏幕范围"""
+        self.assertEqual(clamp_region(None, (800, 600)), (0, 0, 800, 600))
+        self.assertEqual(clamp_region((-10, 20, 900, 700), (800, 600)), (0, 20, 800, 600))
+        self.assertEqual(clamp_region((10.4, 20, 30, 40), (800, 600)), (10, 20, 30, 40))
+        self.assertIsNone(clamp_region((850, 0, 900, 10), (800, 600)))
+        self.assertIsNone(clamp_region((10, 10, 10, 20), (800, 600)))
+
+    def test_bgra_to_bgr_reuses_output(self):
+        """测试BGRA转BGR写入预分配缓冲区"""
+        frame = np.zeros((4, 6, 4), dtype=np.uint8)
+        frame[:, :] = (1, 2, 3, 255)
+        out = np.empty((4, 6, 3), dtype=np.uint8)
+
+        result = bgra_to_bgr(frame, out)
+        self.assertIs(result, out)
+        self.assertEqual(result[0, 0].tolist(), [1, 2, 3])
+        # 尺寸不匹配时分配新数组
+        self.assertEqual(bgra_to_bgr(frame[:2], out).shape, (2, 6, 3))
+
+    def test_factory_falls_back_without_display(self):
+        """测试没有X显示时xshm/auto回退到pil"""
+        with patch.dict(os.environ, {'DISPLAY': ''}):
+            self.assertIsInstance(create_capture_backend("auto"), PILCaptureBackend)
+            self.assertIsInstance(create_capture_backend("xshm"), PILCaptureBackend)
+        self.assertFalse(PILCaptureBackend.reuses_buffer)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+"""
+颜色签名库单元测试
+"""
+
+import unittest
+import tempfile
+import cv2
+import numpy as np
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.ui_automation.color_signature import ColorSignatureStore
+
+
+class TestColorSignatureStore(unittest.TestCase):
+    """颜色签名库测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.signature_file = Path(self.temp_dir) / "color_signatures.json"
+        self.config = {
+            'signature_file': str(self.signature_file),
+            'patch_size': 20,
+            'search_margin': 60
+        }
+
+    def tearDown(self):
+        """测试后清理"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+
+    def _create_frame(self, x: int, y: int) -> np.ndarray:
+        """创建灰色背景上带橙色按钮的测试画面"""
+        frame = np.full((300, 400, 3), 200, dtype=np.uint8)
+        frame[y:y + 20, x:x + 20] = [0, 128, 255]  # 橙色按钮 (BGR)
+        return frame
+
+    def test_learn_and_locate(self):
+        """测试学习后在移动的位置定位"""
+        store = ColorSignatureStore(self.config)
+        self.assertTrue(store.learn("orange_button", self._create_frame(100, 100), (110, 110)))
+
+        result = store.locate("orange_button", self._create_frame(130, 120))
+
+        self.assertIsNotNone(result)
+        self.assertLessEqual(abs(result[0] - 140), 3)
+        self.assertLessEqual(abs(result[1] - 130), 3)
+
+    def test_locate_restricted_to_region(self):
+        """测试常见区域之外的目标不被匹配"""
+        store = ColorSignatureStore(self.config)
+        store.learn("orange_button", self._create_frame(10, 10), (20, 20))
+
+        result = store.locate("orange_button", self._create_frame(350, 250))
+
+        self.assertIsNone(result)
+
+    def test_locate_without_signature(self):
+        """测试未学习的目标"""
+        store = ColorSignatureStore(self.config)
+        self.assertIsNone(store.locate("unknown", self._create_frame(100, 100)))
+
+    def test_persistence(self):
+        """测试签名保存与重新加载"""
+        store = ColorSignatureStore(self.config)
+        store.learn("orange_button", self._create_frame(100, 100), (110, 110))
+        self.assertFalse(self.signature_file.exists())
+        store.save()
+
+        reloaded = ColorSignatureStore(self.config)
+
+        self.assertTrue(reloaded.has_signature("orange_button"))
+        self.assertEqual(reloaded.signatures["orange_button"]["region"], [100, 100, 20, 20])
+        self.assertIsNotNone(reloaded.locate("orange_button", self._create_frame(105, 100)))
+
+
+    def test_background_signature_not_matched(self):
+        """测试以背景色为主的签名不会在空白画面上误匹配"""
+        store = ColorSignatureStore(dict(self.config, patch_size=48))
+        frame = np.full((300, 400, 3), 255, dtype=np.uint8)
+        cv2.putText(frame, "Save", (200, 130), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (40, 40, 40), 1)
+        store.learn("save_text", frame, (220, 125))
+
+        blank = np.full((300, 400, 3), 255, dtype=np.uint8)
+        self.assertIsNone(store.locate("save_text", blank))
+
+    def test_region_not_accumulated(self):
+        """测试常见区域取最近一次定位位置而不是累积并集"""
+        store = ColorSignatureStore(self.config)
+        store.learn("orange_button", self._create_frame(10, 10), (20, 20))
+        store.learn("orange_button", self._create_frame(300, 200), (310, 210))
+        self.assertEqual(store.signatures["orange_button"]["region"], [300, 200, 20, 20])
+        self.assertEqual(store.signatures["orange_button"]["samples"], 2)
+
+    def test_save_batched(self):
+        """测试累积save_every次学习后才写入文件"""
+        store = ColorSignatureStore(dict(self.config, save_every=3))
+        for _ in range(2):
+            store.learn("orange_button", self._create_frame(100, 100), (110, 110))
+        self.assertFalse(self.signature_file.exists())
+        store.learn("orange_button", self._create_frame(100, 100), (110, 110))
+        self.assertTrue(self.signature_file.exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+"""
+坐标缓存库单元测试
+"""
+
+import unittest
+import tempfile
+import json
+import time
+import multiprocessing
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.ui_automation.coordinate_store import CoordinateStore
+
+
+def _worker_update(cache_file: str, worker_id: int, count: int):
+    """并发写入的工作进程"""
+    store = CoordinateStore(cache_file, flush_delay=0.01)
+    for i in range(count):
+        store.set(f"worker{worker_id}_target{i}", (worker_id, i), screen="1920x1080@96")
+    store.close()
+
+
+class TestCoordinateStore(unittest.TestCase):
+    """坐标缓存库测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache_file = Path(self.temp_dir) / "coordinate_cache.json"
+
+    def tearDown(self):
+        """测试后清理"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+
+    def test_resolution_keys(self):
+        """测试按分辨率区分坐标"""
+        store = CoordinateStore(str(self.cache_file), flush_delay=0)
+
+        store.set("ok_button", (100, 200), screen="1920x1080@96")
+        store.set("ok_button", (150, 300), screen="2560x1440@144")
+
+        self.assertEqual(store.get("ok_button", screen="1920x1080@96"), (100, 200))
+        self.assertEqual(store.get("ok_button", screen="2560x1440@144"), (150, 300))
+        self.assertIsNone(store.get("ok_button", screen="1366x768@96"))
+
+    def test_legacy_format_migration(self):
+        """测试旧格式缓存作为不区分分辨率的条目加载"""
+        with open(self.cache_file, 'w', encoding='utf-8') as f:
+            json.dump({"demo_button": [100, 200]}, f)
+
+        store = CoordinateStore(str(self.cache_file), expiry=0)
+
+        self.assertEqual(store.get("demo_button", screen="1920x1080@96"), (100, 200))
+
+    def test_expiry(self):
+        """测试条目过期"""
+        store = CoordinateStore(str(self.cache_file), expiry=60, flush_delay=0)
+        store.set("ok_button", (100, 200), screen="1920x1080@96")
+        store.entries["ok_button|1920x1080@96"]["updated_at"] -= 120
+
+        self.assertIsNone(store.get("ok_button", screen="1920x1080@96"))
+
+    def test_needs_validation(self):
+        """测试校验间隔"""
+        store = CoordinateStore(str(self.cache_file), validation_interval=10, flush_delay=0)
+        store.set("ok_button", (100, 200), screen="1920x1080@96")
+        entry = store.get_entry("ok_button", screen="1920x1080@96")
+        self.assertFalse(store.needs_validation(entry))
+
+        entry["validated_at"] -= 20
+        self.assertTrue(store.needs_validation(entry))
+
+        store.mark_validated(entry)
+        self.assertFalse(store.needs_validation(entry))
+
+    def test_debounced_flush(self):
+        """测试防抖写入：多次更新合并写入"""
+        store = CoordinateStore(str(self.cache_file), flush_delay=30)
+        for i in range(10):
+            store.set(f"target{i}", (i, i), screen="1920x1080@96")
+
+        self.assertFalse(self.cache_file.exists())
+
+        store.close()
+
+        with open(self.cache_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        self.assertEqual(len(data["entries"]), 10)
+
+    def test_concurrent_processes(self):
+        """测试多进程并发写入不丢失条目"""
+        processes = [
+            multiprocessing.Process(target=_worker_update, args=(str(self.cache_file), worker_id, 20))
+            for worker_id in range(4)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(timeout=60)
+
+        store = CoordinateStore(str(self.cache_file))
+
+        self.assertEqual(len(store), 80)
+        self.assertEqual(store.get("worker3_target19", screen="1920x1080@96"), (3, 19))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+"""
+OCR文本模糊匹配索引单元测试
+"""
+
+import random
+import unittest
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.ui_automation.fuzzy_text_index import FuzzyTextIndex, bounded_edit_distance
+from src.ui_automation.ocr_spatial_index import OCRSpatialIndex
+
+
+def edit_distance(a, b):
+    """完整的Levenshtein距离（对照实现）"""
+    previous = list(range(len(b) + 1))
+    for i, char in enumerate(a, 1):
+        current = [i]
+        for j, other in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char != other)))
+        previous = current
+    return previous[-1]
+
+
+def substring_distance(pattern, text):
+    """pattern与text任一子串的最小编辑距离（对照实现）"""
+    best = len(pattern)
+    for start in range(len(text) + 1):
+        for end in range(start, len(text) + 1):
+            best = min(best, edit_distance(pattern, text[start:end]))
+    return best
+
+
+class TestBoundedEditDistance(unittest.TestCase):
+    """有界编辑距离测试类"""
+
+    def test_basic(self):
+        """测试基本距离"""
+        self.assertEqual(bounded_edit_distance("info.json", "info.json", 2), 0)
+        self.assertEqual(bounded_edit_distance("info.json", "inf0.json", 2), 1)
+        self.assertEqual(bounded_edit_distance("info.json", "info.jsn", 2), 1)
+        self.assertIsNone(bounded_edit_distance("info.json", "data.json", 2))
+        self.assertIsNone(bounded_edit_distance("abc", "abcdef", 2))
+
+    def test_substring(self):
+        """测试子串匹配"""
+        self.assertEqual(bounded_edit_distance("info.json", "info.json 2KB", 0, substring=True), 0)
+        self.assertEqual(bounded_edit_distance("回收站", "打开回收站", 0, substring=True), 0)
+        self.assertEqual(bounded_edit_distance("commit", "Commlt to main".lower(), 1, substring=True), 1)
+        self.assertIsNone(bounded_edit_distance("commit", "push origin", 2, substring=True))
+
+    def test_matches_reference(self):
+        """测试与完整计算结果一致"""
+        rng = random.Random(3)
+        alphabet = "abc.j0"
+        for _ in range(300):
+            pattern = "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 6)))
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 8)))
+            limit = rng.randint(0, 3)
+
+            expected = edit_distance(pattern, text)
+            self.assertEqual(bounded_edit_distance(pattern, text, limit),
+                             expected if expected <= limit else None)
+
+            expected = substring_distance(pattern, text)
+            self.assertEqual(bounded_edit_distance(pattern, text, limit, substring=True),
+                             expected if expected <= limit else None)
+
+
+class TestFuzzyTextIndex(unittest.TestCase):
+    """模糊匹配索引测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.texts = ["Commit to maln", "Publish to GitHub", "info.json 2KB", "inf0.json",
+                      "data.json", "回收站", "新建文件夹", ""]
+        self.index = FuzzyTextIndex(self.texts)
+
+    def test_best_prefers_exact(self):
+        """测试优先返回编辑距离最小、长度最接近的文本"""
+        match = self.index.best("info.json")
+        self.assertEqual(match.text, "info.json 2KB")
+        self.assertEqual(match.distance, 0)
+        self.assertEqual(match.score, 1.0)
+
+        matches = self.index.search("info.json")
+        self.assertEqual([m.text for m in matches], ["info.json 2KB", "inf0.json"])
+
+    def test_tolerates_recognition_errors(self):
+        """测试容忍少量识别错误，忽略空白与大小写"""
+        match = self.index.best("commit to main")
+        self.assertEqual(match.index, 0)
+        self.assertEqual(match.distance, 1)
+        self.assertAlmostEqual(match.score, 1 - 1 / 12)
+
+        self.assertEqual(self.index.best("publishtogithub").index, 1)
+
+    def test_no_match(self):
+        """测试超出距离上限时无匹配"""
+        self.assertIsNone(self.index.best("settings"))
+        self.assertIsNone(self.index.best("info.json", max_distance=0, substring=False))
+        self.assertIsNone(self.index.best(""))
+
+    def test_short_targets(self):
+        """测试短目标（n-gram无法过滤时逐个验证）"""
+        self.assertEqual(self.index.best("站").text, "回收站")
+        self.assertEqual(self.index.best("文件").text, "新建文件夹")
+
+    def test_best_many(self):
+        """测试批量查找"""
+        found = self.index.best_many(["回收站", "data.json", "设置"])
+        self.assertEqual(found["回收站"].index, 5)
+        self.assertEqual(found["data.json"].index, 4)
+        self.assertIsNone(found["设置"])
+
+    def test_matches_linear_scan(self):
+        """测试n-gram过滤不漏掉满足距离上限的文本"""
+        rng = random.Random(11)
+        alphabet = "abcdefgh.0"
+        texts = ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 14))) for _ in range(400)]
+        index = FuzzyTextIndex(texts)
+        for _ in range(100):
+            target = "".join(rng.choice(alphabet) for _ in range(rng.randint(3, 9)))
+            limit = rng.randint(0, 2)
+            expected = {i for i, text in enumerate(texts)
+                        if bounded_edit_distance(target, text, limit, substring=True) is not None}
+            self.assertEqual({m.index for m in index.search(target, limit)}, expected)
+
+    def test_spatial_index_shares_fuzzy_index(self):
+        """测试空间索引上的模糊索引按帧构建一次，序号与items一致"""
+        results = [
+            ([[0, 200], [80, 200], [80, 220], [0, 220]], "回收站", 0.9),
+            ([[0, 0], [80, 0], [80, 20], [0, 20]], "info.json", 0.9),
+        ]
+        spatial = OCRSpatialIndex(results)
+        self.assertIs(spatial.fuzzy, spatial.fuzzy)
+        match = spatial.fuzzy.best("info.json")
+        self.assertEqual(spatial.items[match.index].text, "info.json")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+"""
+键盘输入后端单元测试
+"""
+
+import types
+import unittest
+import ctypes
+from pathlib import Path
+from unittest.mock import patch
+
+# 添加项目根目录到Python路径
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.ui_automation.input_backend import (
+    build_key_events, build_hotkey_events, create_input_backend, ClipboardPasteBackend, RecordingBackend,
+    SendInputBackend, INPUT, CF_UNICODETEXT, KEYEVENTF_KEYUP, KEYEVENTF_UNICODE, VK_CONTROL, VK_RETURN
+)
+
+
+def fake_clipboard(contents):
+    """以字典 {格式: 数据} 模拟win32clipboard模块"""
+    module = types.ModuleType("win32clipboard")
+    module.contents = contents
+
+    def enum_formats(previous):
+        formats = list(contents)
+        index = formats.index(previous) + 1 if previous else 0
+        return formats[index] if index < len(formats) else 0
+
+    module.OpenClipboard = lambda: None
+    module.CloseClipboard = lambda: None
+    module.EnumClipboardFormats = enum_formats
+    module.GetClipboardData = lambda fmt: contents[fmt]
+    module.EmptyClipboard = contents.clear
+    module.SetClipboardData = contents.__setitem__
+    return module
+
+
+class TestInputBackend(unittest.TestCase):
+    """键盘输入后端测试类"""
+
+    def test_unicode_events(self):
+        """测试中文字符按Unicode码元注入"""
+        events = build_key_events("中a")
+
+        self.assertEqual(events, [
+            (0, 0x4E2D, KEYEVENTF_UNICODE),
+            (0, 0x4E2D, KEYEVENTF_UNICODE | KEYEVENTF_KEYUP),
+            (0, ord('a'), KEYEVENTF_UNICODE),
+            (0, ord('a'), KEYEVENTF_UNICODE | KEYEVENTF_KEYUP)
+        ])
+
+    def test_surrogate_pair_events(self):
+        """测试非BMP字符拆分为代理对"""
+        events = build_key_events("😀")
+
+        self.assertEqual([scan for _, scan, _ in events], [0xD83D, 0xD83D, 0xDE00, 0xDE00])
+
+    def test_control_chars(self):
+        """测试换行以回车键发送，回车符忽略"""
+        events = build_key_events("\r\n")
+
+        self.assertEqual(events, [(VK_RETURN, 0, 0), (VK_RETURN, 0, KEYEVENTF_KEYUP)])
+
+    def test_hotkey_events(self):
+        """测试组合键按下与逆序抬起"""
+        events = build_hotkey_events([VK_CONTROL, ord('A')])
+
+        self.assertEqual(events, [
+            (VK_CONTROL, 0, 0), (ord('A'), 0, 0),
+            (ord('A'), 0, KEYEVENTF_KEYUP), (VK_CONTROL, 0, KEYEVENTF_KEYUP)
+        ])
+
+    def test_recording_backend(self):
+        """测试记录后端"""
+        backend = create_input_backend("recording")
+        self.assertIsInstance(backend, RecordingBackend)
+
+        backend.hotkey(VK_CONTROL, ord('A'))
+        backend.type_text("测试文本" * 250)
+
+        self.assertEqual(backend.typed_text, "测试文本" * 250)
+        self.assertEqual(len(backend.events), 4 + 2000)
+
+    def test_unknown_backend_falls_back(self):
+        """测试未知后端名称"""
+        self.assertIsInstance(create_input_backend("unknown"), SendInputBackend)
+
+    def test_clipboard_restores_text(self):
+        """测试剪贴板粘贴后恢复原文本，粘贴失败时同样恢复"""
+        clipboard = fake_clipboard({CF_UNICODETEXT: "原内容"})
+        backend = ClipboardPasteBackend(restore_delay=0)
+        pasted = []
+
+        with patch.dict(sys.modules, win32clipboard=clipboard), \
+                patch.object(backend, 'hotkey', side_effect=lambda *keys: pasted.append(dict(clipboard.contents))):
+            backend.type_text("输入文本")
+        self.assertEqual(pasted, [{CF_UNICODETEXT: "输入文本"}])
+        self.assertEqual(clipboard.contents, {CF_UNICODETEXT: "原内容"})
+
+        with patch.dict(sys.modules, win32clipboard=clipboard), \
+                patch.object(backend, 'hotkey', side_effect=OSError("SendInput失败")):
+            with self.assertRaises(OSError):
+                backend.type_text("输入文本")
+        self.assertEqual(clipboard.contents, {CF_UNICODETEXT: "原内容"})
+
+    def test_clipboard_non_text_falls_back(self):
+        """测试剪贴板包含图片等非文本内容时不占用剪贴板，改用SendInput输入"""
+        clipboard = fake_clipboard({CF_UNICODETEXT: "说明", 2: "bitmap", 49300: "html"})
+        backend = ClipboardPasteBackend(restore_delay=0)
+
+        with patch.dict(sys.modules, win32clipboard=clipboard), \
+                patch.object(backend, '_send') as mock_send:
+            backend.type_text("ab")
+        mock_send.assert_called_once_with(build_key_events("ab"))
+        self.assertEqual(clipboard.contents, {CF_UNICODETEXT: "说明", 2: "bitmap", 49300: "html"})
+
+    def test_input_struct_size(self):
+        """测试INPUT结构体与Windows x64布局一致"""
+        if ctypes.sizeof(ctypes.c_void_p) == 8:
+            self.assertEqual(ctypes.sizeof(INPUT), 40)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+"""
+定位器离线基准测试单元测试
+"""
+
+import unittest
+import json
+import tempfile
+import shutil
+import cv2
+import numpy as np
+from pathlib import Path
+from unittest.mock import patch
+
+# 添加项目根目录到Python路径
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.locator_benchmark import (
+    evaluate, summarize, compare_to_baseline, load_ground_truth, run_benchmark
+)
+
+
+class TestLocatorBenchmark(unittest.TestCase):
+    """定位器基准测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """测试后清理"""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_evaluate(self):
+        """测试命中判定与定位误差"""
+        box = (10, 10, 30, 20)
+        self.assertEqual(evaluate((20, 15), box), (True, 0.0))
+        hit, error = evaluate((23, 19), box)
+        self.assertTrue(hit)
+        self.assertAlmostEqual(error, 5.0)
+        self.assertEqual(evaluate((40, 15), box), (False, 20.0))
+        self.assertEqual(evaluate(None, box), (False, None))
+
+    def test_summarize(self):
+        """测试策略汇总"""
+        samples = [
+            {"duration": 0.01, "hit": True, "error": 2.0},
+            {"duration": 0.02, "hit": False, "error": 40.0},
+            {"duration": 0.03, "hit": False, "error": None},
+            {"duration": 0.04, "hit": True, "error": 0.0}
+        ]
+        summary = summarize(samples)
+        self.assertEqual(summary["count"], 4)
+        self.assertEqual(summary["hit_rate"], 0.5)
+        self.assertEqual(summary["false_positives"], 1)
+        self.assertAlmostEqual(summary["mean_error"], 14.0)
+        self.assertAlmostEqual(summary["p50"], 0.025)
+
+    def test_compare_to_baseline(self):
+        """测试基线比较"""
+        baseline = {
+            "image": {"hit_rate": 0.9, "mean_error": 1.0, "p90": 0.1},
+            "ocr": {"hit_rate": 0.8, "mean_error": 3.0, "p90": 2.0}
+        }
+        current = {"image": {"hit_rate": 0.9, "mean_error": 1.5, "p90": 0.12}}
+        # 未测量的ocr不参与比较
+        self.assertEqual(compare_to_baseline(current, baseline), [])
+
+        current = {"image": {"hit_rate": 0.7, "mean_error": 10.0, "p90": 0.5}}
+        regressions = compare_to_baseline(current, baseline)
+        self.assertEqual(len(regressions), 3)
+        self.assertEqual(len(compare_to_baseline(current, baseline, check_latency=False)), 2)
+
+    @patch('src.ui_automation.beike_ui_locator.easyocr')
+    def test_run_benchmark_on_synthetic_frames(self, mock_easyocr):
+        """测试在合成帧上运行完整基准测试"""
+        mock_easyocr.Reader.side_effect = RuntimeError("no models")
+
+        rng = np.random.default_rng(0)
+        frame = rng.integers(0, 255, (240, 320, 3), dtype=np.uint8)
+        frame_path = Path(self.temp_dir) / "frame.png"
+        cv2.imwrite(str(frame_path), frame)
+
+        box = [100, 80, 160, 120]
+        ground_truth_path = Path(self.temp_dir) / "ground_truth.json"
+        with open(ground_truth_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "frames": [{"frame": str(frame_path), "targets": {"button": {"box": box}}}],
+                "templates": {"button": {"frame": str(frame_path), "box": box}}
+            }, f)
+
+        report = run_benchmark(load_ground_truth(ground_truth_path), repeat=2)
+
+        strategies = report["strategies"]
+        self.assertNotIn("ocr", strategies)
+        self.assertEqual(strategies["image"]["hit_rate"], 1.0)
+        self.assertEqual(strategies["auto"]["hit_rate"], 1.0)
+        # 第一轮auto学习坐标后，第二轮坐标缓存命中
+        self.assertEqual(strategies["coordinate"]["hit_rate"], 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
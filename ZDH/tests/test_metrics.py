@@ -0,0 +1,92 @@
+"""
+性能指标单元测试
+"""
+
+import unittest
+import threading
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.utils.metrics import MetricsRegistry, SPAN_METRIC
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    """性能指标注册表测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.registry = MetricsRegistry(buckets=(0.01, 0.1, 1.0))
+
+    def test_span_records_duration(self):
+        """测试计时上下文记录耗时与补充标签"""
+        with self.registry.span("locate", strategy="ocr_text", target="ok_button") as labels:
+            labels["result"] = "hit"
+
+        series = self.registry.snapshot()[SPAN_METRIC]
+        self.assertEqual(len(series), 1)
+        self.assertEqual(series[0]["labels"], {
+            "span": "locate", "strategy": "ocr_text", "target": "ok_button", "result": "hit"
+        })
+        self.assertEqual(series[0]["count"], 1)
+
+    def test_labels_group_series(self):
+        """测试按标签组合分组"""
+        self.registry.observe_span("locate", 0.005, strategy="image_recognition")
+        self.registry.observe_span("locate", 0.5, strategy="image_recognition")
+        self.registry.observe_span("locate", 2.0, strategy="ocr_text")
+
+        series = {s["labels"]["strategy"]: s for s in self.registry.snapshot()[SPAN_METRIC]}
+        self.assertEqual(series["image_recognition"]["count"], 2)
+        self.assertAlmostEqual(series["image_recognition"]["avg"], 0.2525)
+        self.assertEqual(series["ocr_text"]["count"], 1)
+
+    def test_prometheus_format(self):
+        """测试Prometheus文本格式的累计桶"""
+        self.registry.observe_span("capture", 0.005)
+        self.registry.observe_span("capture", 0.05)
+        self.registry.observe_span("capture", 5.0)
+
+        text = self.registry.render_prometheus()
+
+        self.assertIn("# TYPE zdh_span_duration_seconds histogram", text)
+        self.assertIn('zdh_span_duration_seconds_bucket{span="capture",le="0.01"} 1', text)
+        self.assertIn('zdh_span_duration_seconds_bucket{span="capture",le="0.1"} 2', text)
+        self.assertIn('zdh_span_duration_seconds_bucket{span="capture",le="1.0"} 2', text)
+        self.assertIn('zdh_span_duration_seconds_bucket{span="capture",le="+Inf"} 3', text)
+        self.assertIn('zdh_span_duration_seconds_count{span="capture"} 3', text)
+
+    def test_label_escaping(self):
+        """测试标签值转义"""
+        self.registry.observe_span("locate", 0.01, target='say "hi"')
+
+        self.assertIn('target="say \\"hi\\""', self.registry.render_prometheus())
+
+    def test_disabled_registry(self):
+        """测试关闭时不记录"""
+        registry = MetricsRegistry(enabled=False)
+        with registry.span("capture"):
+            pass
+        registry.observe_span("capture", 0.1)
+
+        self.assertEqual(registry.snapshot(), {})
+
+    def test_concurrent_observe(self):
+        """测试多线程并发记录"""
+        def worker():
+            for _ in range(1000):
+                self.registry.observe_span("input", 0.001, action="type")
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.registry.snapshot()[SPAN_METRIC][0]["count"], 4000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,169 @@
+"""
+统一OCR引擎单元测试
+"""
+
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.ui_automation.ocr_engine import (
+    OCREngine, POSTPROCESS_STAGES, boost_confidence, calculate_center, clean_text,
+    clear_shared_readers, register_postprocess_stage, shared_index_cache, shared_reader
+)
+
+
+def make_result(left, top, right, bottom, text, confidence=0.9):
+    return ([[left, top], [right, top], [right, bottom], [left, bottom]], text, confidence)
+
+
+class FakeReader:
+    """记录调用次数的识别器"""
+
+    def __init__(self, languages, **kwargs):
+        self.languages = languages
+        self.kwargs = kwargs
+        self.calls = []
+        self.results = [
+            make_result(10, 10, 130, 38, "info.json", 0.7),
+            make_result(12, 11, 132, 39, "inf0.json", 0.5),
+            make_result(10, 60, 90, 88, "回收站", 0.8),
+            make_result(10, 110, 30, 138, "|", 0.3)
+        ]
+
+    def readtext(self, image, **kwargs):
+        self.calls.append((image.shape, kwargs))
+        return list(self.results)
+
+
+class FailingReader:
+    def __init__(self, languages, **kwargs):
+        raise RuntimeError("模型不可用")
+
+
+class TestTextHelpers(unittest.TestCase):
+    """文本后处理函数测试类"""
+
+    def test_clean_text(self):
+        """测试去除噪声字符与多余空白"""
+        self.assertEqual(clean_text(" |info_json|  2KB "), "infojson 2KB")
+        self.assertEqual(clean_text(""), "")
+
+    def test_boost_confidence(self):
+        """测试按文本质量、扩展名与目标匹配提升置信度"""
+        self.assertAlmostEqual(boost_confidence(0.5, "ab"), 0.65)
+        self.assertAlmostEqual(boost_confidence(0.3, "info.json"), 0.65)
+        self.assertAlmostEqual(boost_confidence(0.3, "info.json", "info"), 0.85)
+        self.assertEqual(boost_confidence(0.9, "info.json", "info"), 1.0)
+
+    def test_calculate_center(self):
+        """测试中心点计算"""
+        bbox, _, _ = make_result(10, 20, 30, 60, "x")
+        self.assertEqual(calculate_center(bbox), (20, 40))
+        self.assertEqual(calculate_center(None), (0, 0))
+
+
+class TestSharedReader(unittest.TestCase):
+    """共享识别器测试类"""
+
+    def tearDown(self):
+        clear_shared_readers()
+
+    def test_same_arguments_share_reader(self):
+        """测试相同语言与参数的识别器只创建一次"""
+        reader = shared_reader(['ch_sim', 'en'], FakeReader, gpu=False)
+        self.assertIs(shared_reader(('ch_sim', 'en'), FakeReader, gpu=False), reader)
+        self.assertIsNot(shared_reader(['en'], FakeReader, gpu=False), reader)
+        self.assertIsNot(shared_reader(['ch_sim', 'en'], FakeReader, gpu=True), reader)
+
+    def test_failure_not_cached(self):
+        """测试创建失败时抛出异常且不缓存"""
+        with self.assertRaises(RuntimeError):
+            shared_reader(['en'], FailingReader)
+        with self.assertRaises(RuntimeError):
+            shared_reader(['en'], FailingReader)
+
+    def test_shared_index_cache(self):
+        """测试同一识别器共用一个按帧缓存"""
+        reader = shared_reader(['en'], FakeReader)
+        self.assertIs(shared_index_cache(reader), shared_index_cache(reader, {'cache_size': 8}))
+
+
+class TestOCREngine(unittest.TestCase):
+    """统一OCR引擎测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.image = np.full((200, 300, 3), 255, dtype=np.uint8)
+        self.config = {'preprocessing': {'stages': [{'name': 'resize', 'factor': 1.5}]}}
+
+    def tearDown(self):
+        clear_shared_readers()
+
+    def test_recognize_postprocesses(self):
+        """测试识别结果经清理、置信度提升、相似文本合并与排序"""
+        engine = OCREngine(self.config, reader_factory=FakeReader)
+        results = engine.recognize(self.image, "info")
+
+        self.assertEqual([r['cleaned_text'] for r in results], ["info.json", "回收站", ""])
+        self.assertEqual(results[0]['merged_count'], 2)
+        self.assertAlmostEqual(results[0]['boosted_confidence'], 1.0)
+        self.assertEqual(results[1]['center'], (50, 74))
+
+        shape, kwargs = engine.reader.calls[0]
+        self.assertEqual(shape[:2], (300, 450))
+        self.assertEqual(kwargs, {'detail': 1, 'paragraph': False})
+
+    def test_frame_recognized_once(self):
+        """测试同一帧只识别一次，使用同一识别器的引擎共享结果"""
+        engine = OCREngine(self.config, reader_factory=FakeReader)
+        other = OCREngine(dict(self.config, postprocessing=['clean']), reader_factory=FakeReader)
+        self.assertIs(other.reader, engine.reader)
+
+        engine.recognize(self.image)
+        engine.find_text(self.image, "回收站")
+        other.index(self.image)
+        self.assertEqual(len(engine.reader.calls), 1)
+
+        # 不同识别参数或不同预处理分别识别
+        engine.index(self.image, allowlist="abc")
+        OCREngine({'preprocessing': {'stages': []}}, reader_factory=FakeReader).index(self.image)
+        self.assertEqual(len(engine.reader.calls), 3)
+
+    def test_find_text(self):
+        """测试查找目标文本"""
+        engine = OCREngine(self.config, reader_factory=FakeReader)
+        self.assertEqual(engine.find_text(self.image, "回收站")['center'], (50, 74))
+        self.assertIsNone(engine.find_text(self.image, "设置"))
+
+    def test_custom_postprocess_stage(self):
+        """测试注册并使用自定义后处理阶段"""
+        register_postprocess_stage(
+            'upper', lambda engine, results, target_text=None:
+            [dict(r, cleaned_text=r['cleaned_text'].upper()) for r in results])
+        try:
+            engine = OCREngine({'postprocessing': ['clean', 'upper']}, reader=FakeReader(['en']))
+            results = engine.postprocess(engine.reader.results[:1])
+            self.assertEqual(results[0]['cleaned_text'], "INFO.JSON")
+        finally:
+            POSTPROCESS_STAGES.pop('upper')
+
+        with self.assertRaises(ValueError):
+            OCREngine({'postprocessing': ['upper']})
+
+    def test_reader_unavailable(self):
+        """测试识别器无法加载时返回空结果且不反复重试"""
+        engine = OCREngine(self.config, reader_factory=FailingReader)
+        with self.assertRaises(RuntimeError):
+            engine.load()
+        self.assertIsNone(engine.reader)
+        self.assertEqual(engine.recognize(self.image), [])
+        self.assertIsNone(engine.index(self.image))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+"""
+OCR受限识别词表单元测试
+"""
+
+import unittest
+import numpy as np
+from pathlib import Path
+from unittest.mock import patch, Mock
+
+# 添加项目根目录到Python路径
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.ui_automation.ocr_lexicon import Lexicon, build_lexicon, similarity
+
+
+class TestOCRLexicon(unittest.TestCase):
+    """受限识别词表测试类"""
+
+    def test_similarity(self):
+        """测试识别文本与词条的相似度"""
+        self.assertEqual(similarity("Info.json", "info.json"), 1.0)
+        self.assertGreater(similarity("info.json 2KB", "info.json"), 0.8)
+        self.assertGreater(similarity("inf0.json", "info.json"), 0.8)
+        self.assertLess(similarity("readme", "info.json"), 0.5)
+        self.assertEqual(similarity("", "info.json"), 0.0)
+
+    def test_allowlist(self):
+        """测试由词条生成字符白名单（西文含大小写）"""
+        lexicon = Lexicon(["文件", "a.JSON"], extra_chars="_")
+        self.assertEqual(set(lexicon.allowlist), set("文件_.aAjJsSoOnN"))
+
+    def test_snap_to_nearest_entry(self):
+        """测试吸附到最接近的词条"""
+        lexicon = build_lexicon(["文件"], {'vocabulary': ["文件夹", "编辑"], 'min_similarity': 0.6})
+
+        self.assertEqual(lexicon.snap("文件")[0], "文件")
+        self.assertEqual(lexicon.snap("文件夹")[0], "文件夹")
+        self.assertEqual(lexicon.snap("编辑")[0], "编辑")
+        self.assertIsNone(lexicon.snap("查看"))
+
+    @patch('src.ui_automation.improved_ocr.easyocr')
+    def test_find_text_constrained(self, mock_easyocr):
+        """测试ImprovedOCR受限识别：传入白名单并按吸附结果匹配"""
+        from src.ui_automation.improved_ocr import ImprovedOCR
+
+        reader = Mock()
+        bbox = [[0, 0], [40, 0], [40, 20], [0, 20]]
+        reader.readtext.return_value = [(bbox, "inf0.json", 0.8)]
+        mock_easyocr.Reader.return_value = reader
+
+        ocr = ImprovedOCR()
+        image = np.zeros((20, 40, 3), dtype=np.uint8)
+
+        self.assertIsNone(ocr.find_text(image, "info.json", constrained=False))
+        self.assertEqual(ocr.find_text(image, "info.json", constrained=True), (20, 10))
+
+        allowlist = reader.readtext.call_args.kwargs['allowlist']
+        self.assertEqual(set(allowlist), set("info.jsonINFOJSON"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+"""
+OCR预处理流水线单元测试
+"""
+
+import unittest
+import threading
+import numpy as np
+from pathlib import Path
+from PIL import Image, ImageEnhance
+
+# 添加项目根目录到Python路径
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.ui_automation.ocr_preprocess import PreprocessPipeline
+
+
+def make_image(width: int = 120, height: int = 80) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    image = rng.integers(60, 200, (height, width, 3), dtype=np.uint8)
+    image[20:40, 30:90] = (20, 20, 20)
+    return image
+
+
+class TestPreprocessPipeline(unittest.TestCase):
+    """OCR预处理流水线测试类"""
+
+    def test_default_pipeline_shape(self):
+        """测试默认流水线输出2倍放大的二值BGR图像"""
+        pipeline = PreprocessPipeline()
+        result = pipeline.run(make_image())
+
+        self.assertEqual(pipeline.scale, 2.0)
+        self.assertEqual(result.shape, (160, 240, 3))
+        self.assertTrue(set(np.unique(result)).issubset({0, 255}))
+
+    def test_grayscale_output(self):
+        """测试直接输出灰度图"""
+        pipeline = PreprocessPipeline({'grayscale_output': True})
+        self.assertEqual(pipeline.run(make_image()).shape, (160, 240))
+        self.assertEqual(pipeline.run(make_image()[:, :, 0]).shape, (160, 240))
+
+    def test_contrast_matches_pil(self):
+        """测试对比度阶段与ImageEnhance.Contrast一致"""
+        gray = np.ascontiguousarray(make_image()[:, :, 1])
+        pipeline = PreprocessPipeline({'stages': [{'name': 'contrast', 'factor': 1.5}],
+                                       'grayscale_output': True})
+        expected = np.array(ImageEnhance.Contrast(Image.fromarray(gray)).enhance(1.5))
+
+        diff = np.abs(pipeline.run(gray).astype(int) - expected.astype(int))
+        self.assertLessEqual(diff.max(), 1)
+
+    def test_sharpen_matches_pil(self):
+        """测试锐化阶段与ImageEnhance.Sharpness一致（不含边缘像素）"""
+        gray = np.ascontiguousarray(make_image()[:, :, 1])
+        pipeline = PreprocessPipeline({'stages': [{'name': 'sharpen', 'factor': 1.3}],
+                                       'grayscale_output': True})
+        expected = np.array(ImageEnhance.Sharpness(Image.fromarray(gray)).enhance(1.3))
+
+        diff = np.abs(pipeline.run(gray).astype(int) - expected.astype(int))
+        self.assertLessEqual(diff[1:-1, 1:-1].max(), 1)
+
+    def test_buffers_reused(self):
+        """测试同尺寸输入复用缓冲区，尺寸变化时重新分配"""
+        pipeline = PreprocessPipeline()
+        first = pipeline.run(make_image())
+        second = pipeline.run(make_image())
+        self.assertTrue(np.shares_memory(first, second))
+
+        third = pipeline.run(make_image(64, 48))
+        self.assertEqual(third.shape, (96, 128, 3))
+
+    def test_buffers_per_thread(self):
+        """测试不同线程使用各自的缓冲区"""
+        pipeline = PreprocessPipeline()
+        results = {}
+
+        def worker(name):
+            results[name] = pipeline.run(make_image())
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertFalse(np.shares_memory(results[0], results[1]))
+
+    def test_unknown_stage(self):
+        """测试不支持的阶段"""
+        with self.assertRaises(ValueError):
+            PreprocessPipeline({'stages': [{'name': 'deskew'}]})
+
+
+if __name__ == '__main__':
+    unittest.main()
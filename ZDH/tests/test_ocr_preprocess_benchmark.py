@@ -0,0 +1,105 @@
+"""
+OCR预处理基准测试单元测试
+"""
+
+import unittest
+import numpy as np
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.ocr_preprocess_benchmark import (
+    match_texts, grid_variants, make_grid_variant, run_benchmark, pareto_front
+)
+
+
+class FakeReader:
+    """按图像尺寸返回固定文本的模拟OCR：原图上只识别出部分文本，放大后全部识别"""
+
+    def __init__(self):
+        self.calls = []
+
+    def readtext(self, image, **kwargs):
+        self.calls.append((image.shape, kwargs))
+        scale = image.shape[1] / 200
+        box = [[10 * scale, 10 * scale], [50 * scale, 10 * scale],
+               [50 * scale, 20 * scale], [10 * scale, 20 * scale]]
+        results = [(box, "info.json", 0.9)]
+        if scale > 1:
+            small = [[100 * scale, 60 * scale], [140 * scale, 60 * scale],
+                     [140 * scale, 70 * scale], [100 * scale, 70 * scale]]
+            results.append((small, "回收 站", 0.6))
+        return results
+
+
+class TestOCRPreprocessBenchmark(unittest.TestCase):
+    """OCR预处理基准测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.corpus = {"samples": [{
+            "name": "synthetic",
+            "image": np.full((100, 200, 3), 128, dtype=np.uint8),
+            "offset": (1000, 500),
+            "texts": [
+                {"text": "info.json", "box": [1005, 505, 1055, 525]},
+                {"text": "回收站", "box": [1095, 555, 1145, 575]}
+            ]
+        }]}
+
+    def test_match_texts_maps_back_to_frame(self):
+        """测试检测框按缩放与区域偏移映射回帧坐标"""
+        detections = [([[20, 20], [100, 20], [100, 40], [20, 40]], "Info.json", 0.8)]
+        matches = match_texts(self.corpus["samples"][0]["texts"], detections, (2.0, 2.0), (1000, 500))
+
+        self.assertTrue(matches[0]["found"])
+        self.assertEqual(matches[0]["similarity"], 1.0)
+        self.assertEqual(matches[0]["confidence"], 0.8)
+        self.assertFalse(matches[1]["found"])
+        self.assertEqual(matches[1]["similarity"], 0.0)
+
+    def test_grid_variants(self):
+        """测试参数网格展开"""
+        variants = grid_variants({"resize": [1.0, 2.0], "gray": [False, True]})
+        self.assertEqual(len(variants), 4)
+        self.assertIn("grid[resize=2,gray=1]", variants)
+
+        image = np.zeros((10, 20, 3), dtype=np.uint8)
+        self.assertEqual(variants["grid[resize=2,gray=1]"](image).shape, (20, 40))
+        self.assertEqual(make_grid_variant(contrast=1.3)(image).shape, (10, 20, 3))
+
+    def test_run_benchmark_and_pareto(self):
+        """测试准确率/耗时统计与Pareto最优"""
+        reader = FakeReader()
+
+        def failing(image):
+            raise ValueError("broken")
+
+        variants = {
+            "original": lambda image: image,
+            "resize2": make_grid_variant(resize=2.0),
+            "failing": failing
+        }
+        results = run_benchmark(self.corpus, variants, reader)
+
+        self.assertEqual(results["original"]["recall"], 0.5)
+        self.assertEqual(results["original"]["missed"], ["回收站"])
+        self.assertEqual(results["resize2"]["recall"], 1.0)
+        self.assertEqual(results["resize2"]["output_pixels"], 200 * 400)
+        self.assertIn("broken", results["failing"]["error"])
+        self.assertEqual(reader.calls[0][1], {"detail": 1, "paragraph": False})
+
+        # 原图更快、放大更准，两者都不被支配
+        self.assertEqual(set(pareto_front(results)), {"original", "resize2"})
+
+    def test_preprocess_only(self):
+        """测试不提供OCR引擎时只测量预处理"""
+        results = run_benchmark(self.corpus, {"original": lambda image: image}, reader=None, repeat=3)
+        self.assertIsNone(results["original"]["recall"])
+        self.assertEqual(pareto_front(results), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,227 @@
+"""
+进程外OCR服务单元测试
+"""
+
+import os
+import time
+import tempfile
+import threading
+import unittest
+import multiprocessing
+from pathlib import Path
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.ui_automation.ocr_server import OCRClient, OCRServer, connect_server, load_authkey, parse_address
+from src.ui_automation.ocr_engine import OCREngine, clear_shared_readers, open_reader
+
+
+class FrameReader:
+    """把帧的形状、像素和与所在进程作为识别结果返回"""
+
+    def readtext(self, image, **kwargs):
+        time.sleep(kwargs.get('delay', 0))
+        height, width = image.shape[:2]
+        bbox = [[0, 0], [width, 0], [width, height], [0, height]]
+        text = f"{image.shape}:{int(image.sum())}:{kwargs.get('allowlist')}"
+        return [(np.array(bbox, dtype=np.int32), text, np.float64(0.9)),
+                ([[0, 0], [1, 0], [1, 1], [0, 1]], str(os.getpid()), 0.5)]
+
+
+def create_frame_reader(languages):
+    if 'xx' in languages:
+        raise RuntimeError("不支持的语言")
+    return FrameReader()
+
+
+class TestOCRServer(unittest.TestCase):
+    """OCR服务测试类"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = OCRServer({'address': '127.0.0.1:0', 'workers': 2, 'authkey': 'test'},
+                               ['ch_sim', 'en'], create_frame_reader)
+        cls.address = cls.server.start(timeout=60)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def tearDown(self):
+        clear_shared_readers()
+
+    def test_parse_address(self):
+        """测试地址解析"""
+        self.assertEqual(parse_address("127.0.0.1:47600"), ("127.0.0.1", 47600))
+        self.assertEqual(parse_address(":80"), ("127.0.0.1", 80))
+        self.assertEqual(parse_address(("localhost", 1)), ("localhost", 1))
+
+    def test_readtext_through_shared_memory(self):
+        """测试帧经共享内存交给服务进程识别，结果为原生类型"""
+        with OCRClient(self.address, 'test') as client:
+            self.assertEqual(client.ping()['workers'], 2)
+
+            frame = np.full((40, 60, 3), 2, dtype=np.uint8)
+            results = client.readtext(frame, allowlist="ab")
+            bbox, text, confidence = results[0]
+            self.assertEqual(text, f"(40, 60, 3):{40 * 60 * 3 * 2}:ab")
+            self.assertEqual(bbox[2], [60, 40])
+            self.assertIsInstance(confidence, float)
+            self.assertNotEqual(results[1][1], str(os.getpid()))
+
+            # 帧变大时重新分配共享内存段，灰度帧同样可用
+            gray = np.ones((100, 200), dtype=np.uint8)
+            self.assertEqual(client.readtext(gray)[0][1], f"(100, 200):{100 * 200}:None")
+
+            # 直接写入共享内存缓冲区
+            buffer = client.frame_buffer((10, 10), np.uint8)
+            buffer[:] = 3
+            self.assertEqual(client.readtext(buffer)[0][1], "(10, 10):300:None")
+
+    def test_concurrent_clients(self):
+        """测试多个客户端并发识别"""
+        errors = []
+
+        def run(value):
+            try:
+                with OCRClient(self.address, 'test') as client:
+                    for _ in range(5):
+                        frame = np.full((20, 20), value, dtype=np.uint8)
+                        text = client.readtext(frame)[0][1]
+                        if text != f"(20, 20):{400 * value}:None":
+                            errors.append(text)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=run, args=(value,)) for value in range(1, 5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_connect_checks_languages(self):
+        """测试连接时检查服务加载的语言"""
+        connect_server(['en'], self.address, 'test').close()
+        with self.assertRaises(ValueError):
+            connect_server(['ja'], self.address, 'test')
+
+    def test_engine_uses_server(self):
+        """测试启用服务时OCR引擎经服务识别，服务不可用时回退到进程内识别器"""
+        server_config = {'enabled': True, 'address': f"{self.address[0]}:{self.address[1]}", 'authkey': 'test'}
+        engine = OCREngine({'server': server_config, 'preprocessing': {'stages': []}})
+        self.assertIsInstance(engine.reader, OCRClient)
+        results = engine.recognize(np.zeros((30, 30, 3), dtype=np.uint8))
+        self.assertIn("(30, 30, 3):0:None", [r['original_text'] for r in results])
+
+        fallback = open_reader(['en'], {'enabled': True, 'address': '127.0.0.1:1', 'authkey': 'test'},
+                               lambda languages: FrameReader())
+        self.assertIsInstance(fallback, FrameReader)
+        engine.reader.close()
+
+    def test_timeout_invalidates_client(self):
+        """测试等待超时后客户端作废，迟到的回复不会作为下一帧的结果返回"""
+        server_config = {'enabled': True, 'address': f"{self.address[0]}:{self.address[1]}",
+                         'authkey': 'test', 'timeout': 0.3}
+        client = open_reader(['en'], server_config)
+        with self.assertRaises(TimeoutError):
+            client.readtext(np.full((10, 10), 1, dtype=np.uint8), delay=1.5)
+        self.assertTrue(client.closed)
+        with self.assertRaises(ConnectionError):
+            client.readtext(np.full((10, 10), 2, dtype=np.uint8))
+
+        # 共享注册表不再返回作废的客户端，新连接识别的是当前帧
+        reader = open_reader(['en'], server_config)
+        self.assertIsNot(reader, client)
+        time.sleep(1.5)
+        self.assertEqual(reader.readtext(np.full((10, 10), 2, dtype=np.uint8))[0][1], "(10, 10):200:None")
+        reader.close()
+
+    def test_authkey_file(self):
+        """测试未配置密钥时生成仅当前用户可读写的随机密钥文件，客户端读取同一文件连接"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            key_file = os.path.join(temp_dir, "run", "ocr.key")
+            with self.assertRaises(FileNotFoundError):
+                load_authkey(key_file)
+
+            server = OCRServer({'address': '127.0.0.1:0', 'authkey_file': key_file}, ['en'], create_frame_reader)
+            authkey = load_authkey(key_file)
+            self.assertEqual(server.authkey, authkey)
+            self.assertGreaterEqual(len(authkey), 32)
+            self.assertEqual(load_authkey(key_file, create=True), authkey)
+            if hasattr(os, 'getuid'):
+                self.assertEqual(os.stat(key_file).st_mode & 0o777, 0o600)
+
+            address = server.start(timeout=60)
+            try:
+                with OCRClient(address, authkey_file=key_file) as client:
+                    self.assertEqual(client.ping()['languages'], ['en'])
+                with self.assertRaises(multiprocessing.AuthenticationError):
+                    OCRClient(address, 'zdh-ocr')
+            finally:
+                server.stop()
+
+            # 其他用户可读的密钥文件视为已泄露
+            if hasattr(os, 'getuid'):
+                os.chmod(key_file, 0o644)
+                with self.assertRaises(PermissionError):
+                    load_authkey(key_file)
+
+    def test_engine_reconnects_after_timeout(self):
+        """测试等待超时后OCR引擎与UI定位器重新连接，之后的帧照常识别"""
+        # 工作进程会导入本模块，定位器依赖较重，只在用到时导入
+        from src.ui_automation.beike_ui_locator import BeikeUILocator
+
+        server_config = {'enabled': True, 'address': f"{self.address[0]}:{self.address[1]}",
+                         'authkey': 'test', 'timeout': 0.3}
+        engine = OCREngine({'server': server_config, 'preprocessing': {'stages': []}})
+        first = engine.reader
+        with self.assertRaises(TimeoutError):
+            first.readtext(np.zeros((10, 10), dtype=np.uint8), delay=1.5)
+        time.sleep(1.5)
+
+        results = engine.recognize(np.zeros((30, 30, 3), dtype=np.uint8))
+        self.assertIn("(30, 30, 3):0:None", [r['original_text'] for r in results])
+        self.assertIsNot(engine.reader, first)
+        self.assertIsNotNone(engine.index(np.zeros((20, 20, 3), dtype=np.uint8)))
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            locator = BeikeUILocator(config={
+                'ocr': {'server': server_config, 'constrained': {'enabled': False}},
+                'window_anchor': {'enabled': False},
+                'adaptive_ordering': {'stats_file': os.path.join(temp_dir, "stats.json")},
+                'coordinate_cache': {'cache_file': os.path.join(temp_dir, "cache.json")},
+                'color_matching': {'signature_file': os.path.join(temp_dir, "colors.json")},
+                'image_templates': {'base_path': temp_dir}
+            })
+            try:
+                locator.ocr_reader.close()
+                frame = np.full((40, 40, 3), 1, dtype=np.uint8)
+                self.assertEqual(locator._locate_by_ocr("(40, 40, 3)", screenshot=frame), (20, 20))
+                self.assertFalse(locator.ocr_reader.closed)
+                self.assertIs(locator.ocr_index_cache.reader, locator.ocr_reader)
+            finally:
+                locator.close()
+        engine.reader.close()
+
+    def test_closed_client_allocates_no_segment(self):
+        """测试已关闭的客户端识别时直接报错，不再分配共享内存段"""
+        client = OCRClient(self.address, 'test')
+        client.close()
+        with self.assertRaises(ConnectionError):
+            client.readtext(np.zeros((10, 10), dtype=np.uint8))
+        self.assertIsNone(client._segment)
+
+    def test_worker_load_failure(self):
+        """测试工作进程无法加载模型时启动失败"""
+        server = OCRServer({'address': '127.0.0.1:0', 'authkey': 'test'}, ['xx'], create_frame_reader)
+        with self.assertRaises(RuntimeError):
+            server.start(timeout=60)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,224 @@
+"""
+OCR空间索引单元测试
+"""
+
+import math
+import random
+import unittest
+import cv2
+import numpy as np
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.ui_automation.ocr_spatial_index import OCRSpatialIndex, OCRIndexCache
+
+
+def make_result(left, top, right, bottom, text, confidence=0.9):
+    return ([[left, top], [right, top], [right, bottom], [left, bottom]], text, confidence)
+
+
+class FakeReader:
+    """模拟easyocr.readtext，记录调用次数"""
+
+    def __init__(self, results):
+        self.results = results
+        self.calls = 0
+
+    def readtext(self, image, **kwargs):
+        self.calls += 1
+        return list(self.results)
+
+
+class TestOCRSpatialIndex(unittest.TestCase):
+    """OCR空间索引测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        # 一个"标签: 值"表单与一列桌面图标名称
+        self.results = [
+            make_result(100, 100, 180, 120, "用户名"),
+            make_result(200, 100, 320, 120, "zhangsan"),
+            make_result(100, 140, 180, 160, "密码"),
+            make_result(200, 140, 320, 160, "******", 0.5),
+            make_result(600, 300, 680, 320, "info.json"),
+            make_result(600, 400, 680, 420, "回收站"),
+        ]
+        self.index = OCRSpatialIndex(self.results)
+
+    def brute_force_nearest(self, items, x, y, k, max_distance=None, min_confidence=0.0):
+        distances = []
+        for item in items:
+            if item.confidence < min_confidence:
+                continue
+            distance = math.hypot(item.center[0] - x, item.center[1] - y)
+            if max_distance is None or distance <= max_distance:
+                distances.append(distance)
+        return sorted(distances)[:k]
+
+    def test_reading_order(self):
+        """测试结果按阅读顺序排列"""
+        texts = [item.text for item in self.index.items]
+        self.assertEqual(texts, ["用户名", "zhangsan", "密码", "******", "info.json", "回收站"])
+        self.assertEqual(len(self.index), 6)
+
+    def test_nearest_returns_closest_not_first(self):
+        """测试返回距离最近的文本而不是第一个足够近的文本"""
+        nearest = self.index.nearest(250, 148, k=1, max_distance=100)
+        self.assertEqual(nearest[0][1].text, "******")
+
+        nearest = self.index.nearest(250, 148, k=1, max_distance=100, min_confidence=0.7)
+        self.assertEqual(nearest[0][1].text, "zhangsan")
+
+    def test_nearest_max_distance(self):
+        """测试最大距离限制"""
+        self.assertEqual(self.index.nearest(1000, 1000, k=1, max_distance=100), [])
+        self.assertEqual(self.index.nearest(1000, 1000, k=1)[0][1].text, "回收站")
+
+    def test_nearest_matches_brute_force(self):
+        """测试网格查询与线性扫描结果一致"""
+        rng = random.Random(7)
+        results = []
+        for i in range(400):
+            left, top = rng.uniform(0, 2800), rng.uniform(0, 1750)
+            results.append(make_result(left, top, left + rng.uniform(20, 200), top + rng.uniform(12, 30),
+                                       f"text{i}", rng.uniform(0.3, 1.0)))
+        index = OCRSpatialIndex(results)
+
+        for _ in range(200):
+            x, y = rng.uniform(-100, 2900), rng.uniform(-100, 1900)
+            k = rng.randint(1, 5)
+            max_distance = rng.choice([None, 50, 150, 400])
+            expected = self.brute_force_nearest(index.items, x, y, k, max_distance, 0.6)
+            actual = [distance for distance, _ in index.nearest(x, y, k, max_distance, min_confidence=0.6)]
+            np.testing.assert_allclose(actual, expected)
+
+    def test_within_radius(self):
+        """测试半径查询"""
+        found = self.index.within_radius(140, 130, 50)
+        self.assertEqual([item.text for _, item in found], ["用户名", "密码"])
+        self.assertEqual(self.index.within_radius(140, 130, 5), [])
+
+    def test_inside_rect(self):
+        """测试矩形查询"""
+        found = self.index.inside_rect((90, 90, 330, 170))
+        self.assertEqual([item.text for item in found], ["用户名", "zhangsan", "密码", "******"])
+
+        # 只有中心在矩形内的文本框不算完全包含
+        found = self.index.inside_rect((90, 90, 300, 170), fully=True)
+        self.assertEqual([item.text for item in found], ["用户名", "密码"])
+
+        found = self.index.inside_rect((0, 0, 2000, 2000), min_confidence=0.7)
+        self.assertNotIn("******", [item.text for item in found])
+
+    def test_right_of(self):
+        """测试查找标签右侧的值"""
+        label = self.index.items[0].box
+        found = self.index.right_of(label)
+        self.assertEqual([item.text for _, item in found], ["zhangsan"])
+        self.assertEqual(found[0][0], 20)
+
+        self.assertEqual(self.index.right_of(label, max_distance=10), [])
+
+    def test_below(self):
+        """测试查找下方的文本"""
+        found = self.index.below(self.index.items[0].box)
+        self.assertEqual([item.text for _, item in found], ["密码"])
+
+        icon = (610, 240, 670, 295)
+        found = self.index.below(icon, max_distance=50)
+        self.assertEqual([item.text for _, item in found], ["info.json"])
+
+    def test_empty_index(self):
+        """测试空结果"""
+        index = OCRSpatialIndex([])
+        self.assertEqual(index.nearest(10, 10), [])
+        self.assertEqual(index.within_radius(10, 10, 100), [])
+        self.assertEqual(index.inside_rect((0, 0, 100, 100)), [])
+        self.assertEqual(index.right_of((0, 0, 10, 10)), [])
+
+    def test_translated(self):
+        """测试平移索引：坐标换算，文本、顺序与查询结果一致"""
+        moved = self.index.translated(1000, 50)
+        self.assertEqual([item.text for item in moved.items], [item.text for item in self.index.items])
+        self.assertEqual(moved.items[0].center, (1140.0, 160.0))
+        self.assertEqual(moved.items[0].bbox[0], [1100, 150])
+        self.assertEqual(moved.nearest(1640, 460)[0][1].text, "回收站")
+        self.assertEqual(moved.fuzzy.best("info.json").index, self.index.fuzzy.best("info.json").index)
+        self.assertIs(self.index.translated(0, 0), self.index)
+
+    def test_as_result(self):
+        """测试还原为readtext格式"""
+        bbox, text, confidence = self.index.items[0].as_result()
+        self.assertEqual(bbox, self.results[0][0])
+        self.assertEqual(text, "用户名")
+
+
+class TestOCRIndexCache(unittest.TestCase):
+    """按帧缓存测试类"""
+
+    def test_same_frame_recognized_once(self):
+        """测试同一帧只识别一次，画面变化后重新识别"""
+        reader = FakeReader([make_result(0, 0, 50, 20, "确定")])
+        cache = OCRIndexCache(reader, {'cache_size': 2})
+        frame = np.zeros((100, 100, 3), dtype=np.uint8)
+
+        first = cache.get(frame)
+        second = cache.get(frame.copy())
+        self.assertIs(first, second)
+        self.assertEqual(reader.calls, 1)
+
+        changed = frame.copy()
+        changed[:50] = 255
+        cache.get(changed)
+        self.assertEqual(reader.calls, 2)
+
+    def test_single_glyph_change_not_shared(self):
+        """测试只差一个字形的两帧不共用索引"""
+        reader = FakeReader([])
+        cache = OCRIndexCache(reader, {'cache_size': 8})
+        indexes = []
+        for text in ("report_1.txt", "report_7.txt", "v1.2.0", "v1.2.8"):
+            frame = np.full((60, 400, 3), 255, dtype=np.uint8)
+            cv2.putText(frame, text, (10, 40), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 0, 0), 1)
+            indexes.append(cache.get(frame))
+        self.assertEqual(reader.calls, 4)
+        self.assertEqual(len({id(index) for index in indexes}), 4)
+
+    def test_prepare_variants_cached_separately(self):
+        """测试同一帧不同预处理的结果分别缓存"""
+        reader = FakeReader([])
+        cache = OCRIndexCache(reader)
+        frame = np.zeros((100, 100, 3), dtype=np.uint8)
+        prepared = []
+
+        def prepare(image):
+            prepared.append(image)
+            return image
+
+        cache.get(frame)
+        cache.get(frame, prepare=prepare)
+        cache.get(frame, prepare=prepare)
+        self.assertEqual(reader.calls, 2)
+        self.assertEqual(len(prepared), 1)
+
+    def test_cache_size(self):
+        """测试缓存淘汰"""
+        reader = FakeReader([])
+        cache = OCRIndexCache(reader, {'cache_size': 1})
+        frames = [np.full((64, 64), value, dtype=np.uint8) for value in (0, 128)]
+
+        cache.get(frames[0])
+        cache.get(frames[1])
+        cache.get(frames[0])
+        self.assertEqual(reader.calls, 3)
+
+        cache.clear()
+        cache.get(frames[0])
+        self.assertEqual(reader.calls, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
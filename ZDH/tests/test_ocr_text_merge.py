@@ -0,0 +1,105 @@
+"""
+OCR相似文本合并单元测试
+"""
+
+import unittest
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.ui_automation.ocr_text_merge import cluster_similar_texts
+from benchmarks.ocr_merge_benchmark import generate_screen, run_benchmark
+
+
+def make_result(left, top, right, bottom, text, confidence=0.9):
+    return ([[left, top], [right, top], [right, bottom], [left, bottom]], text, confidence)
+
+
+class TestClusterSimilarTexts(unittest.TestCase):
+    """相似文本聚类测试类"""
+
+    def test_merges_nearby_duplicates(self):
+        """测试位置相近的相似文本合并为一组"""
+        results = [
+            make_result(100, 100, 220, 128, "info.json"),
+            make_result(500, 100, 620, 128, "回收站"),
+            make_result(102, 98, 222, 126, "inf0.json", 0.6),
+        ]
+        self.assertEqual(cluster_similar_texts(results), [[0, 2], [1]])
+
+    def test_keeps_distant_identical_texts(self):
+        """测试相距较远的相同文本不合并（如列表中重复的文件名）"""
+        results = [
+            make_result(100, 100, 220, 128, "新建文件夹"),
+            make_result(100, 400, 220, 428, "新建文件夹"),
+        ]
+        self.assertEqual(cluster_similar_texts(results), [[0], [1]])
+
+    def test_keeps_nearby_different_texts(self):
+        """测试相邻但文本不同的框不合并（原字符集启发式会合并相同扩展名）"""
+        results = [
+            make_result(100, 100, 220, 128, "report.json"),
+            make_result(100, 120, 220, 148, "config.json"),
+            make_result(100, 140, 220, 168, "notes.txt"),
+        ]
+        self.assertEqual(len(cluster_similar_texts(results)), 3)
+
+    def test_whitespace_and_case_ignored(self):
+        """测试相似度忽略空白与大小写"""
+        results = [
+            make_result(100, 100, 260, 128, "Publish to GitHub"),
+            make_result(104, 102, 262, 130, "publish toGitHub"),
+        ]
+        self.assertEqual(cluster_similar_texts(results), [[0, 1]])
+
+    def test_distance_uses_taller_box(self):
+        """测试距离上限按较高框的行高计算，与输入顺序无关"""
+        short = make_result(100, 100, 220, 110, "Settings")
+        tall = make_result(100, 100, 220, 140, "Settings")
+        self.assertEqual(cluster_similar_texts([short, tall]), [[0, 1]])
+        self.assertEqual(cluster_similar_texts([tall, short]), [[0, 1]])
+
+        far = make_result(100, 150, 220, 160, "Settings")
+        self.assertEqual(cluster_similar_texts([short, far], distance_factor=1.0), [[0], [1]])
+
+    def test_transitive_groups(self):
+        """测试聚类可传递"""
+        results = [
+            make_result(100, 100, 220, 128, "screenshot"),
+            make_result(110, 100, 230, 128, "screensh0t"),
+            make_result(120, 100, 240, 128, "5creensh0t"),
+        ]
+        self.assertEqual(cluster_similar_texts(results), [[0, 1, 2]])
+
+    def test_empty_texts(self):
+        """测试空结果与空文本"""
+        self.assertEqual(cluster_similar_texts([]), [])
+        results = [make_result(0, 0, 10, 10, ""), make_result(0, 0, 10, 10, "")]
+        self.assertEqual(cluster_similar_texts(results), [[0], [1]])
+
+
+class TestOCRMergeBenchmark(unittest.TestCase):
+    """相似文本合并基准测试的测试类"""
+
+    def test_generate_screen(self):
+        """测试合成屏幕的规模与重复框标注"""
+        screen = generate_screen(300, duplicate_ratio=0.2, seed=1)
+        self.assertEqual(len(screen), 300)
+        truths = [truth for *_, truth in screen]
+        self.assertLess(len(set(truths)), len(truths))
+
+    def test_indexed_merge_loses_no_texts(self):
+        """测试索引合并不丢失不同的文本（原实现会误合并）"""
+        rows = run_benchmark([300], duplicate_ratio=0.1, repeat=1)
+        by_key = {(row["layout"], row["method"]): row for row in rows}
+        for layout in ("files", "sheet"):
+            pairwise, indexed = by_key[(layout, "pairwise")], by_key[(layout, "indexed")]
+            self.assertEqual(indexed["lost_texts"], 0)
+            self.assertGreater(pairwise["lost_texts"], 0)
+            self.assertGreater(indexed["postprocess_p50_ms"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+"""
+采样性能分析器单元测试
+"""
+
+import unittest
+import threading
+import time
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.utils.sampling_profiler import SamplingProfiler, OVERFLOW_STACK
+
+
+def _spin_worker(stop_event: threading.Event):
+    """模拟忙等的工作线程"""
+    while not stop_event.is_set():
+        _spin_inner()
+
+
+def _spin_inner():
+    total = 0
+    for i in range(1000):
+        total += i
+    return total
+
+
+class TestSamplingProfiler(unittest.TestCase):
+    """采样性能分析器测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.stop_event = threading.Event()
+        self.worker = threading.Thread(target=_spin_worker, args=(self.stop_event,),
+                                       name="executor-worker")
+        self.worker.start()
+
+    def tearDown(self):
+        """测试后清理"""
+        self.stop_event.set()
+        self.worker.join()
+
+    def test_collapsed_stacks(self):
+        """测试折叠栈包含线程名与调用链"""
+        profiler = SamplingProfiler()
+        for _ in range(20):
+            profiler.sample()
+            time.sleep(0.001)
+
+        collapsed = profiler.collapsed("executor-worker")
+        lines = collapsed.strip().split("\n")
+        self.assertTrue(lines)
+        for line in lines:
+            stack, count = line.rsplit(" ", 1)
+            self.assertTrue(stack.startswith("executor-worker;"))
+            self.assertGreater(int(count), 0)
+        self.assertIn("_spin_worker", collapsed)
+
+        self.assertEqual(profiler.status()["samples"], 20)
+
+    def test_background_sampling(self):
+        """测试后台采样线程与开销统计"""
+        profiler = SamplingProfiler({'interval': 0.005})
+        profiler.start()
+        time.sleep(0.3)
+        profiler.stop()
+
+        status = profiler.status()
+        self.assertFalse(status["running"])
+        self.assertGreater(status["samples"], 5)
+        self.assertLess(status["overhead"], 0.2)
+        # 采样线程自身不出现在结果中
+        self.assertNotIn("sampling-profiler;", profiler.collapsed())
+
+    def test_max_stacks(self):
+        """测试不同栈数量上限"""
+        profiler = SamplingProfiler({'max_stacks': 1})
+        for _ in range(10):
+            profiler.sample()
+
+        self.assertLessEqual(len(profiler.stacks), 2)
+        self.assertIn(OVERFLOW_STACK, profiler.stacks)
+
+    def test_adaptive_interval(self):
+        """测试开销过高时拉长采样间隔"""
+        profiler = SamplingProfiler({'interval': 0.01, 'max_overhead': 0.01})
+        profiler._adapt_interval(0.005)
+        self.assertEqual(profiler.status()["interval"], 0.02)
+
+        profiler._adapt_interval(0.0)
+        self.assertEqual(profiler.status()["interval"], 0.01)
+
+    def test_reset_and_top_frames(self):
+        """测试热点函数与清空"""
+        profiler = SamplingProfiler()
+        for _ in range(10):
+            profiler.sample()
+
+        self.assertTrue(profiler.top_frames(5))
+
+        profiler.reset()
+        self.assertEqual(profiler.collapsed(), "")
+        self.assertEqual(profiler.status()["samples"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
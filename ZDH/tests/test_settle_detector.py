@@ -0,0 +1,127 @@
+"""
+界面稳定检测单元测试
+"""
+
+import unittest
+import time
+import numpy as np
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.ui_automation.settle_detector import SettleDetector
+
+
+class FakeScreen:
+    """按时间变化的模拟屏幕：在changes_until之前每帧都不同"""
+
+    def __init__(self, changes_from: float = 0.0, changes_until: float = 0.0):
+        self.start = time.perf_counter()
+        self.changes_from = changes_from
+        self.changes_until = changes_until
+        self.regions = []
+        self.counter = 0
+
+    def __call__(self, region=None):
+        self.regions.append(region)
+        elapsed = time.perf_counter() - self.start
+        frame = np.zeros((120, 320, 3), dtype=np.uint8)
+        if self.changes_from <= elapsed < self.changes_until:
+            self.counter += 1
+            frame[:, :] = (self.counter * 40) % 256
+        elif elapsed >= self.changes_until:
+            frame[:, :] = 200
+        return frame
+
+
+class TestSettleDetector(unittest.TestCase):
+    """界面稳定检测测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.config = {
+            'quiet_period': 0.1,
+            'poll_interval': 0.01,
+            'max_wait': 2.0,
+            'diff_threshold': 2.0
+        }
+
+    def test_static_screen_settles_quickly(self):
+        """测试静止界面在静止期后立即返回"""
+        detector = SettleDetector(self.config, capture=FakeScreen())
+
+        result = detector.wait(baseline=0.5)
+
+        self.assertTrue(result.settled)
+        self.assertLess(result.waited, 0.4)
+        self.assertGreater(result.saved, 0)
+
+    def test_waits_until_changes_stop(self):
+        """测试界面变化期间持续等待"""
+        detector = SettleDetector(self.config, capture=FakeScreen(changes_until=0.3))
+
+        result = detector.wait(baseline=1.0)
+
+        self.assertTrue(result.settled)
+        self.assertTrue(result.changed)
+        self.assertGreaterEqual(result.waited, 0.35)
+
+    def test_max_wait_bound(self):
+        """测试持续变化时在上限处返回"""
+        detector = SettleDetector(self.config, capture=FakeScreen(changes_until=10.0))
+
+        result = detector.wait(baseline=1.0, max_wait=0.2)
+
+        self.assertFalse(result.settled)
+        self.assertLess(result.waited, 0.5)
+
+    def test_require_change(self):
+        """测试require_change时等待首次变化后再计算静止时间"""
+        screen = FakeScreen(changes_from=0.2, changes_until=0.3)
+        detector = SettleDetector(self.config, capture=screen)
+
+        result = detector.wait(baseline=2.0, require_change=True)
+
+        self.assertTrue(result.settled)
+        self.assertTrue(result.changed)
+        self.assertGreaterEqual(result.waited, 0.35)
+
+    def test_region_passed_to_capture(self):
+        """测试只观察指定区域"""
+        screen = FakeScreen()
+        detector = SettleDetector(self.config, capture=screen)
+
+        detector.wait(region=(10, 20, 110, 220))
+
+        self.assertTrue(all(region == (10, 20, 110, 220) for region in screen.regions))
+
+    def test_capture_failure_falls_back_to_fixed_delay(self):
+        """测试截图失败时退回固定等待"""
+        def broken_capture(region=None):
+            raise OSError("no display")
+
+        detector = SettleDetector(self.config, capture=broken_capture)
+
+        result = detector.wait(baseline=0.1)
+
+        self.assertFalse(result.settled)
+        self.assertGreaterEqual(result.waited, 0.1)
+
+    def test_report_time_saved(self):
+        """测试累计统计节省的时间"""
+        detector = SettleDetector(self.config, capture=FakeScreen())
+        detector.wait(baseline=0.5)
+        detector.wait(baseline=0.5)
+
+        report = detector.report()
+
+        self.assertEqual(report['calls'], 2)
+        self.assertEqual(report['total_baseline'], 1.0)
+        self.assertAlmostEqual(report['time_saved'], 1.0 - report['total_waited'])
+        self.assertGreater(report['time_saved'], 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+"""
+步骤性能分析单元测试
+"""
+
+import unittest
+import tempfile
+import pstats
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.utils.step_profiler import StepProfiler
+
+
+def _busy_step(n: int) -> dict:
+    """模拟耗时的步骤"""
+    total = sum(_square(i) for i in range(n))
+    return {"success": True, "total": total}
+
+
+def _square(value: int) -> int:
+    return value * value
+
+
+class TestStepProfiler(unittest.TestCase):
+    """步骤性能分析测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.profiler = StepProfiler({'output_dir': self.temp_dir, 'top_n': 5})
+
+    def tearDown(self):
+        """测试后清理"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+
+    def test_returns_function_result(self):
+        """测试返回被分析函数的结果"""
+        result, _ = self.profiler.run("exec/step_1", _busy_step, 100)
+
+        self.assertEqual(result["total"], sum(i * i for i in range(100)))
+
+    def test_prof_file_saved(self):
+        """测试保存完整的.prof文件"""
+        _, report = self.profiler.run("exec/step_1", _busy_step, 1000)
+
+        prof_path = Path(report["prof_path"])
+        self.assertTrue(prof_path.exists())
+        self.assertEqual(prof_path, Path(self.temp_dir) / "exec" / "step_1.prof")
+
+        # 文件可被pstats加载
+        stats = pstats.Stats(str(prof_path))
+        self.assertGreater(stats.total_calls, 0)
+
+    def test_retry_keeps_earlier_profiles(self):
+        """测试同一步骤重试时不覆盖之前的.prof文件"""
+        reports = [self.profiler.run("exec/step_1", _busy_step, 100)[1] for _ in range(3)]
+
+        self.assertEqual([Path(r["prof_path"]).name for r in reports],
+                         ["step_1.prof", "step_1.2.prof", "step_1.3.prof"])
+        self.assertEqual([r["attempt"] for r in reports], [1, 2, 3])
+        self.assertIn(reports[0]["threads"], ("all", "calling"))
+        for report in reports:
+            self.assertGreater(pstats.Stats(report["prof_path"]).total_calls, 0)
+
+    def test_top_functions(self):
+        """测试提取累计耗时最高的函数"""
+        _, report = self.profiler.run("exec/step_2", _busy_step, 5000)
+
+        self.assertLessEqual(len(report["top"]), 5)
+        functions = [entry["function"] for entry in report["top"]]
+        self.assertIn("_busy_step", functions)
+
+        square = next((e for e in report["top"] if e["function"] == "_square"), None)
+        if square is not None:
+            self.assertEqual(square["ncalls"], 5000)
+
+        cumtimes = [entry["cumtime"] for entry in report["top"]]
+        self.assertEqual(cumtimes, sorted(cumtimes, reverse=True))
+
+    def test_exception_propagates(self):
+        """测试步骤异常照常抛出"""
+        def failing_step():
+            raise ValueError("step failed")
+
+        with self.assertRaises(ValueError):
+            self.profiler.run("exec/step_3", failing_step)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+"""
+图像模板库单元测试
+"""
+
+import unittest
+import tempfile
+import cv2
+import numpy as np
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.ui_automation.template_store import TemplateStore
+
+
+class TestTemplateStore(unittest.TestCase):
+    """图像模板库测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.templates_dir = Path(self.temp_dir) / "templates"
+        self.templates_dir.mkdir(parents=True)
+
+        for i in range(3):
+            image = np.zeros((40, 40, 3), dtype=np.uint8)
+            image[10:30, 10:30] = [0, 0, 80 * (i + 1)]
+            cv2.imwrite(str(self.templates_dir / f"button_{i}.png"), image)
+
+    def tearDown(self):
+        """测试后清理"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+
+    def test_lazy_loading(self):
+        """测试模板仅在首次使用时加载"""
+        store = TemplateStore(str(self.templates_dir))
+
+        self.assertIn("button_0", store)
+        self.assertEqual(len(store), 3)
+        self.assertEqual(store.cached_names(), [])
+
+        entry = store.get("button_0")
+
+        self.assertEqual(entry.size, (40, 40))
+        self.assertEqual(entry.gray.ndim, 2)
+        self.assertEqual(len(entry.pyramid), 2)
+        self.assertEqual(store.cached_names(), ["button_0"])
+
+    def test_lru_eviction(self):
+        """测试按LRU淘汰"""
+        store = TemplateStore(str(self.templates_dir), cache_size=2)
+
+        store.get("button_0")
+        store.get("button_1")
+        store.get("button_0")
+        store.get("button_2")
+
+        self.assertEqual(store.cached_names(), ["button_0", "button_2"])
+
+    def test_derived_data_memory_mapped(self):
+        """测试派生数据持久化后以内存映射方式加载"""
+        TemplateStore(str(self.templates_dir), build_edges=True).get("button_1")
+        self.assertTrue((self.templates_dir / ".derived" / "button_1" / "meta.json").exists())
+
+        entry = TemplateStore(str(self.templates_dir), build_edges=True).get("button_1")
+
+        self.assertIsInstance(entry.gray, np.memmap)
+        self.assertIsNotNone(entry.edges)
+        self.assertGreater(entry.std, 0)
+
+    def test_add_and_getitem(self):
+        """测试添加模板并按字典方式取回彩色图像"""
+        store = TemplateStore(str(self.templates_dir))
+        image = np.full((20, 30, 3), 127, dtype=np.uint8)
+
+        store.add("new_button", image)
+
+        self.assertTrue((self.templates_dir / "new_button.png").exists())
+        self.assertEqual(store["new_button"].shape, (20, 30, 3))
+        with self.assertRaises(KeyError):
+            store["missing"]
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+"""
+分块多进程OCR单元测试
+"""
+
+import unittest
+import numpy as np
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.ui_automation.tiled_ocr import TiledOCR, tile_grid, merge_detections
+
+
+# 合成图像中的文本：灰度值 -> 文本，每个字符宽10像素
+WORDS = {50: "Commit", 100: "Publish to GitHub", 150: "info.json"}
+CHAR_WIDTH = 10
+
+
+def make_screen() -> np.ndarray:
+    image = np.zeros((300, 400), dtype=np.uint8)
+    for value, (x, y) in ((50, (10, 10)), (100, (110, 100)), (150, (210, 200))):
+        image[y:y + 15, x:x + len(WORDS[value]) * CHAR_WIDTH] = value
+    return image
+
+
+class FakeReader:
+    """按灰度值识别合成文本的模拟OCR：贴着图块边缘的文本只返回可见部分"""
+
+    def readtext(self, image, **kwargs):
+        height, width = image.shape[:2]
+        results = []
+        for value, text in WORDS.items():
+            ys, xs = np.nonzero(image == value)
+            if len(xs) == 0:
+                continue
+            left, right, top, bottom = xs.min(), xs.max() + 1, ys.min(), ys.max() + 1
+            visible = (right - left) // CHAR_WIDTH
+            if left == 0:
+                text = text[-visible:]
+            elif right == width:
+                text = text[:visible]
+            bbox = [[left, top], [right, top], [right, bottom], [left, bottom]]
+            results.append((bbox, text, 0.9 if len(text) == len(WORDS[value]) else 0.5))
+        return results
+
+
+def create_fake_reader(languages):
+    return FakeReader()
+
+
+class TestTiledOCR(unittest.TestCase):
+    """分块OCR测试类"""
+
+    def test_tile_grid_covers_image(self):
+        """测试图块覆盖整幅图像且相邻图块重叠"""
+        tiles = tile_grid(400, 300, 200, 80)
+        self.assertEqual([t[0] for t in tiles[:3]], [0, 120, 200])
+        self.assertEqual(sorted({t[1] for t in tiles}), [0, 100])
+
+        covered = np.zeros((300, 400), dtype=bool)
+        for x, y, w, h in tiles:
+            covered[y:y + h, x:x + w] = True
+        self.assertTrue(covered.all())
+
+        self.assertEqual(tile_grid(100, 50, 200, 80), [(0, 0, 100, 50)])
+
+    def test_merge_removes_duplicates(self):
+        """测试重叠区内重复识别的完整文本只保留置信度最高的一个"""
+        detections = [
+            {"box": (10, 10, 100, 25), "text": "info.json", "confidence": 0.8, "cut": False},
+            {"box": (11, 10, 100, 25), "text": "infojson", "confidence": 0.6, "cut": False},
+            {"box": (60, 10, 100, 25), "text": "json", "confidence": 0.5, "cut": True}
+        ]
+        results = merge_detections(detections)
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0][1], "info.json")
+        self.assertEqual(results[0][0], [[10, 10], [100, 10], [100, 25], [10, 25]])
+
+    def test_merge_joins_fragments(self):
+        """测试比重叠区更长的文本由接缝两侧的片段拼接"""
+        detections = [
+            {"box": (110, 100, 200, 115), "text": "Publish t", "confidence": 0.5, "cut": True},
+            {"box": (120, 100, 280, 115), "text": "ublish to GitHub", "confidence": 0.6, "cut": True}
+        ]
+        results = merge_detections(detections)
+        self.assertEqual(len(results), 1)
+        bbox, text, confidence = results[0]
+        self.assertEqual(text, "Publish to GitHub")
+        self.assertEqual(bbox[0], [110, 100])
+        self.assertEqual(bbox[2], [280, 115])
+        self.assertEqual(confidence, 0.5)
+
+    def test_readtext_in_process_pool(self):
+        """测试进程池分块识别结果与整幅识别一致"""
+        image = make_screen()
+        tiled = TiledOCR({'tile_size': 200, 'overlap': 80, 'workers': 2}, reader_factory=create_fake_reader)
+        try:
+            results = tiled.readtext(image)
+        finally:
+            tiled.close()
+
+        self.assertEqual([text for _, text, _ in results], ["Commit", "Publish to GitHub", "info.json"])
+        expected = FakeReader().readtext(image)
+        for (bbox, _, _), (expected_bbox, _, _) in zip(results, expected):
+            self.assertEqual(bbox, [[int(x), int(y)] for x, y in expected_bbox])
+
+
+if __name__ == '__main__':
+    unittest.main()
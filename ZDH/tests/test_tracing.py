@@ -0,0 +1,89 @@
+"""
+执行轨迹记录单元测试
+"""
+
+import unittest
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.utils import tracing
+from src.utils.metrics import MetricsRegistry
+
+
+class TestTraceRecorder(unittest.TestCase):
+    """执行轨迹记录器测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.registry = MetricsRegistry()
+        self.recorder = tracing.TraceRecorder("exec-1")
+
+    def test_spans_recorded_when_active(self):
+        """测试启用轨迹时记录嵌套区间"""
+        with tracing.activate(self.recorder):
+            with self.registry.span("test_case"):
+                with self.registry.span("locate", strategy="ocr_text", target="ok_button"):
+                    time.sleep(0.01)
+
+        events = [e for e in self.recorder.to_chrome_trace()["traceEvents"] if e["ph"] == "X"]
+        names = [e["name"] for e in events]
+        self.assertEqual(names, ["test_case", "locate:ocr_text"])
+
+        outer, inner = events
+        self.assertLessEqual(outer["ts"], inner["ts"])
+        self.assertGreaterEqual(outer["ts"] + outer["dur"], inner["ts"] + inner["dur"])
+        self.assertEqual(inner["args"]["target"], "ok_button")
+
+    def test_no_recording_when_inactive(self):
+        """测试未启用轨迹时不记录"""
+        with self.registry.span("capture"):
+            pass
+
+        self.assertEqual(self.recorder.events, [])
+
+    def test_context_propagates_to_pool_threads(self):
+        """测试绑定上下文后线程池任务写入同一轨迹"""
+        def work(name):
+            with self.registry.span("locate", strategy=name):
+                time.sleep(0.005)
+
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="race") as pool:
+            with tracing.activate(self.recorder):
+                futures = [pool.submit(tracing.bind_context(work), name)
+                           for name in ("image_recognition", "ocr_text")]
+            for future in futures:
+                future.result()
+
+        trace = self.recorder.to_chrome_trace()
+        self.assertEqual(len([e for e in trace["traceEvents"] if e["ph"] == "X"]), 2)
+        thread_names = [e["args"]["name"] for e in trace["traceEvents"] if e["name"] == "thread_name"]
+        self.assertTrue(all(name.startswith("race") for name in thread_names))
+
+    def test_max_events(self):
+        """测试事件数上限"""
+        recorder = tracing.TraceRecorder("exec-2", max_events=3)
+        with tracing.activate(recorder):
+            for _ in range(5):
+                self.registry.observe_span("sleep", 0.001, action="poll")
+
+        trace = recorder.to_chrome_trace()
+        self.assertEqual(len([e for e in trace["traceEvents"] if e["ph"] == "X"]), 3)
+        self.assertEqual(trace["otherData"]["dropped_events"], 2)
+
+    def test_trace_is_json_serializable(self):
+        """测试导出结果可序列化为JSON"""
+        with tracing.activate(self.recorder):
+            self.registry.sleep(0.001, "retry")
+
+        data = json.loads(json.dumps(self.recorder.to_chrome_trace()))
+        self.assertEqual(data["traceEvents"][-1]["name"], "sleep:retry")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+"""
+两阶段OCR单元测试
+"""
+
+import unittest
+import cv2
+import numpy as np
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.ui_automation.two_stage_ocr import TwoStageOCR, expected_width_units
+
+
+class FakeReader:
+    """模拟easyocr：detect返回固定文本框，recognize按框返回对应文本"""
+
+    def __init__(self, texts):
+        # [(x_min, x_max, y_min, y_max, text)]
+        self.texts = texts
+        self.detect_calls = 0
+        self.recognized = []
+        self.frames = []
+
+    def detect(self, image, **kwargs):
+        self.detect_calls += 1
+        return [[list(t[:4]) for t in self.texts]], [[]]
+
+    def recognize(self, gray, horizontal_list=None, free_list=None, **kwargs):
+        self.frames.append(gray)
+        results = []
+        for box in horizontal_list:
+            text = next(t[4] for t in self.texts if list(t[:4]) == box)
+            self.recognized.append(text)
+            x_min, x_max, y_min, y_max = box
+            results.append(([[x_min, y_min], [x_max, y_min], [x_max, y_max], [x_min, y_max]], text, 0.9))
+        return results
+
+
+class TestTwoStageOCR(unittest.TestCase):
+    """两阶段OCR测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.reader = FakeReader([
+            (10, 30, 10, 30, "文"),                  # 过短，宽高比不符合
+            (10, 200, 50, 70, "Publish to GitHub"),
+            (10, 100, 100, 120, "info.json"),
+            (300, 390, 100, 120, "data.json"),
+            (10, 100, 150, 170, "readme.md")
+        ])
+        self.ocr = TwoStageOCR(self.reader, {'batch_size': 1})
+        self.image = np.zeros((200, 400, 3), dtype=np.uint8)
+
+    def test_expected_width_units(self):
+        """测试文本宽度估算"""
+        self.assertEqual(expected_width_units("回收站"), 3.0)
+        self.assertAlmostEqual(expected_width_units("ab c"), 1.95)
+
+    def test_find_stops_at_first_match(self):
+        """测试只识别候选框且命中即停止"""
+        bbox, text, confidence = self.ocr.find(self.image, "info.json")
+
+        self.assertEqual(text, "info.json")
+        self.assertEqual(bbox[0], [10, 100])
+        self.assertNotIn("文", self.reader.recognized)
+        self.assertLess(self.ocr.last_stats["recognized"], self.ocr.last_stats["detected"])
+
+    def test_detection_cached_per_frame(self):
+        """测试同一帧只检测一次，内容变化后重新检测"""
+        self.ocr.find(self.image, "info.json")
+        self.ocr.find(self.image, "readme.md")
+        self.assertEqual(self.reader.detect_calls, 1)
+
+        changed = self.image.copy()
+        changed[:, :] = 255
+        self.ocr.find(changed, "info.json")
+        self.assertEqual(self.reader.detect_calls, 2)
+
+    def test_single_pixel_change_not_cached(self):
+        """测试只差一个像素或一个字形的两帧使用不同的键，识别总是使用当前帧"""
+        changed = self.image.copy()
+        changed[3, 3] = 1
+        self.assertNotEqual(TwoStageOCR.frame_key(self.image), TwoStageOCR.frame_key(changed))
+
+        self.ocr.find(self.image, "info.json")
+        self.ocr.find(changed, "info.json")
+        self.assertEqual(self.reader.detect_calls, 2)
+        self.assertEqual(int(self.reader.frames[-1][3, 3]), 1)
+
+        keys = set()
+        for text in ("report_1.txt", "report_7.txt", "v1.2.0", "v1.2.8"):
+            frame = np.full((60, 400, 3), 255, dtype=np.uint8)
+            cv2.putText(frame, text, (10, 40), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 0, 0), 1)
+            keys.add(TwoStageOCR.frame_key(frame))
+        self.assertEqual(len(keys), 4)
+
+    def test_roi_filter(self):
+        """测试感兴趣区域过滤"""
+        result = self.ocr.find(self.image, ".json", roi=(200, 0, 400, 200))
+        self.assertEqual(result[1], "data.json")
+        self.assertEqual(self.reader.recognized, ["data.json"])
+
+    def test_not_found(self):
+        """测试无匹配或置信度不足"""
+        self.assertIsNone(self.ocr.find(self.image, "missing.txt"))
+        self.assertIsNone(self.ocr.find(self.image, "info.json", min_confidence=0.95))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+"""
+窗口矩形提供器单元测试
+"""
+
+import os
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# 添加项目根目录到Python路径
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.ui_automation.window_rect import WindowRectProvider
+
+
+class TestWindowRectProvider(unittest.TestCase):
+    """窗口矩形提供器测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.rect = (100, 100, 900, 700)
+        self.calls = 0
+
+        def resolver():
+            self.calls += 1
+            return self.rect
+
+        self.resolver = resolver
+
+    def test_not_attached(self):
+        """测试未关联窗口"""
+        provider = WindowRectProvider()
+        self.assertFalse(provider.attached)
+        self.assertIsNone(provider.get_rect())
+
+    def test_rect_cached_until_invalidated(self):
+        """测试窗口矩形缓存与失效"""
+        provider = WindowRectProvider(ttl=60)
+        provider.attach(key="test_app", resolver=self.resolver)
+
+        self.assertEqual(provider.get_rect(), (100, 100, 900, 700))
+        self.rect = (200, 150, 1000, 750)
+        self.assertEqual(provider.get_rect(), (100, 100, 900, 700))
+        self.assertEqual(self.calls, 1)
+
+        provider.invalidate()
+
+        self.assertEqual(provider.get_rect(), (200, 150, 1000, 750))
+        self.assertEqual(provider.move_count, 1)
+
+    def test_minimized_window(self):
+        """测试最小化窗口视为不可用"""
+        provider = WindowRectProvider(ttl=0)
+        self.rect = (-32000, -32000, -32000, -32000)
+        provider.attach(key="test_app", resolver=self.resolver)
+
+        self.assertIsNone(provider.get_rect())
+
+    @unittest.skipIf(os.name == 'nt', "X11窗口查找仅用于非Windows平台")
+    def test_title_lookup_without_display(self):
+        """测试没有X显示时按标题查找窗口返回None"""
+        provider = WindowRectProvider(ttl=0)
+        provider.attach(title="被测应用")
+        with patch.dict(os.environ, {'DISPLAY': ''}):
+            self.assertIsNone(provider.get_rect())
+
+    def test_relative_round_trip(self):
+        """测试相对坐标换算"""
+        provider = WindowRectProvider()
+        rect = (100, 100, 900, 700)
+
+        offset = provider.to_relative((250, 300), rect)
+
+        self.assertEqual(offset, (150, 200))
+        self.assertEqual(provider.to_screen(offset, (800, 600), (0, 0, 800, 600)), (150, 200))
+
+    def test_resize_anchors_far_edges(self):
+        """测试窗口缩放时右/下半部分的点按右/下边缘锚定"""
+        provider = WindowRectProvider()
+
+        self.assertEqual(provider.to_screen((780, 20), (800, 600), (0, 0, 1000, 700)), (980, 20))
+        self.assertEqual(provider.to_screen((20, 580), (800, 600), (0, 0, 1000, 700)), (20, 680))
+
+
+if __name__ == '__main__':
+    unittest.main()
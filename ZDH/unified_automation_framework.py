@@ -30,6 +30,14 @@ import logging
 from datetime import datetime
 import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from src.ui_automation.settle_detector import SettleDetector
+from src.ui_automation.capture import CaptureBackend, create_capture_backend, frame_origin, grab_frame
+from src.ui_automation.window_rect import WindowRectProvider
+from src.ui_automation.ocr_spatial_index import OCRSpatialIndex
+from src.ui_automation.ocr_engine import open_reader, reader_closed, shared_index_cache
 
 # 配置日志
 logging.basicConfig(
@@ -84,14 +92,29 @@ class UnifiedAutomationFramework:
         self.config_file = config_file
         self.config = self._load_config()
         self.ocr_reader = None
+        self.ocr_index_cache = None
         self.screenshot_dir = "screenshots"
         self.reports_dir = "reports"
         self._ensure_directories()
         self._init_ocr()
         
-        # 设置pyautogui安全设置
+        # 截图后端（Linux/Xvfb下使用X11共享内存，复用预分配缓冲区）
+        capture_config = self.config.get("capture", {})
+        self.capture_backend: CaptureBackend = create_capture_backend(
+            capture_config.get("backend", "auto"), capture_config
+        )
+        # 窗口范围截图：scope为window时只截取按标题找到的被测窗口
+        self.capture_scope = capture_config.get("scope", "screen")
+        self.window_provider = WindowRectProvider(ttl=capture_config.get("rect_ttl", 0.5))
+        if capture_config.get("window_title"):
+            self.window_provider.attach(title=capture_config["window_title"])
+        
+        # 界面稳定检测：操作后等待界面静止，而不是固定等待
+        self.settle_detector = SettleDetector(self.config.get("settle", {}), capture=self.capture_backend.grab)
+        
+        # 设置pyautogui安全设置（启用稳定检测时不再需要每次调用后的固定停顿）
         pyautogui.FAILSAFE = True
-        pyautogui.PAUSE = 0.5
+        pyautogui.PAUSE = 0.05 if self.settle_detector.enabled else 0.5
         
         # 常见软件配置
         self.software_configs = {
@@ -379,6 +402,19 @@ class UnifiedAutomationFramework:
                 "retry_count": 3,
                 "click_delay": 0.5
             },
+            "capture": {
+                "backend": "auto",
+                "scope": "screen",
+                "window_title": ""
+            },
+            "settle": {
+                "enabled": True,
+                "quiet_period": 0.3,
+                "poll_interval": 0.05,
+                "max_wait": 5.0,
+                "launch_max_wait": 10.0,
+                "diff_threshold": 2.0
+            },
             "file_operations": {
                 "desktop_path": os.path.join(os.path.expanduser("~"), "Desktop"),
                 "common_paths": [
@@ -410,11 +446,24 @@ class UnifiedAutomationFramework:
         if self.config.get("ocr", {}).get("enabled", True):
             try:
                 languages = self.config["ocr"]["language"].split("+")
-                self.ocr_reader = easyocr.Reader(languages)
+                # 识别器与按帧缓存的空间索引在进程内共享（与UI定位器等使用同一语言的调用方共用）
+                self.ocr_reader = open_reader(languages, self.config["ocr"].get("server"), easyocr.Reader)
+                self.ocr_index_cache = shared_index_cache(self.ocr_reader, self.config["ocr"].get("spatial_index", {}))
                 logger.info("OCR初始化成功")
             except Exception as e:
                 logger.error(f"OCR初始化失败: {e}")
                 self.ocr_reader = None
+                self.ocr_index_cache = None
+    
+    def attach_window(self, title: str):
+        """按标题正则关联被测窗口，窗口范围截图时只截取该窗口"""
+        self.window_provider.attach(title=title)
+    
+    def _capture_region(self) -> Optional[Tuple[int, int, int, int]]:
+        """截图区域：窗口范围截图且找到被测窗口时为窗口矩形，否则为None（整个屏幕）"""
+        if self.capture_scope != "window":
+            return None
+        return self.window_provider.get_rect()
     
     def _capture_screenshot(self, filename: str = None) -> str:
         """截图"""
@@ -423,11 +472,19 @@ class UnifiedAutomationFramework:
             filename = f"screenshot_{timestamp}.png"
         
         filepath = os.path.join(self.screenshot_dir, filename)
-        screenshot = pyautogui.screenshot()
-        screenshot.save(filepath)
+        cv2.imwrite(filepath, grab_frame(self.capture_backend, self._capture_region()))
         logger.info(f"截图保存: {filepath}")
         return filepath
     
+    def _screen_ocr_index(self) -> OCRSpatialIndex:
+        """截取屏幕并返回OCR空间索引（画面未变化时复用上次的识别结果）"""
+        if reader_closed(self.ocr_reader):
+            # OCR服务等待超时后客户端已作废，重新取识别器与索引缓存
+            self._init_ocr()
+        screenshot = grab_frame(self.capture_backend, self._capture_region())
+        # 窗口范围截图的识别结果平移回屏幕坐标
+        return self.ocr_index_cache.get(screenshot).translated(*frame_origin(screenshot))
+    
     def _find_text_on_screen(self, text: str, confidence: float = None) -> Optional[Tuple[int, int]]:
         """在屏幕上查找文本"""
         if self.ocr_reader is None:
@@ -438,18 +495,14 @@ class UnifiedAutomationFramework:
             confidence = self.config["ocr"]["confidence"]
         
         try:
-            screenshot = pyautogui.screenshot()
-            results = self.ocr_reader.readtext(np.array(screenshot))
+            index = self._screen_ocr_index()
+            matches = index.query(confidence, lambda item: text.lower() in item.text.lower())
             
-            for (bbox, detected_text, conf) in results:
-                if conf >= confidence and text.lower() in detected_text.lower():
-                    # 计算中心点
-                    top_left = bbox[0]
-                    bottom_right = bbox[2]
-                    center_x = int((top_left[0] + bottom_right[0]) / 2)
-                    center_y = int((top_left[1] + bottom_right[1]) / 2)
-                    logger.info(f"找到文本 '{text}' 在位置 ({center_x}, {center_y})")
-                    return (center_x, center_y)
+            for item in matches:
+                # 计算中心点
+                center_x, center_y = (int(value) for value in item.center)
+                logger.info(f"找到文本 '{text}' 在位置 ({center_x}, {center_y})")
+                return (center_x, center_y)
             
             logger.warning(f"未找到文本 '{text}'")
             return None
@@ -483,7 +536,7 @@ class UnifiedAutomationFramework:
             # 方法1: 使用os.startfile
             os.startfile(file_path)
             logger.info(f"使用os.startfile打开文件: {file_path}")
-            time.sleep(2)
+            self._wait_for_launch(2)
             return True
         except Exception as e:
             logger.warning(f"os.startfile失败: {e}")
@@ -492,7 +545,7 @@ class UnifiedAutomationFramework:
                 # 方法2: 使用subprocess
                 subprocess.Popen([file_path], shell=True)
                 logger.info(f"使用subprocess打开文件: {file_path}")
-                time.sleep(2)
+                self._wait_for_launch(2)
                 return True
             except Exception as e2:
                 logger.error(f"subprocess失败: {e2}")
@@ -514,7 +567,7 @@ class UnifiedAutomationFramework:
                 try:
                     subprocess.Popen([path])
                     logger.info(f"启动应用程序: {path}")
-                    time.sleep(3)
+                    self._wait_for_launch(3)
                     
                     # 验证是否成功启动
                     if self._is_process_running(process_name):
@@ -529,11 +582,11 @@ class UnifiedAutomationFramework:
         # 尝试从开始菜单启动
         try:
             pyautogui.press('win')
-            time.sleep(1)
+            self._wait_for_settle(1)
             pyautogui.write(process_name.replace('.exe', ''))
-            time.sleep(1)
+            self._wait_for_settle(1)
             pyautogui.press('enter')
-            time.sleep(3)
+            self._wait_for_launch(3)
             
             if self._is_process_running(process_name):
                 logger.info(f"从开始菜单启动成功: {process_name}")
@@ -559,18 +612,18 @@ class UnifiedAutomationFramework:
         try:
             pyautogui.click(x, y, button=button)
             logger.info(f"点击位置 ({x}, {y})")
-            time.sleep(0.5)
+            self._wait_for_settle(0.5)
             return True
         except Exception as e:
             logger.error(f"点击失败: {e}")
             return False
     
-    def _type_text(self, text: str) -> bool:
-        """输入文本"""
+    def _type_text(self, text: str, baseline: float = 0.5) -> bool:
+        """输入文本，baseline为输入后原固定等待时间"""
         try:
             pyautogui.write(text)
             logger.info(f"输入文本: {text}")
-            time.sleep(0.5)
+            self._wait_for_settle(baseline)
             return True
         except Exception as e:
             logger.error(f"输入文本失败: {e}")
@@ -581,12 +634,24 @@ class UnifiedAutomationFramework:
         try:
             pyautogui.press(key)
             logger.info(f"按键: {key}")
-            time.sleep(0.5)
+            self._wait_for_settle(0.5)
             return True
         except Exception as e:
             logger.error(f"按键失败: {e}")
             return False
     
+    def _wait_for_settle(self, baseline: float) -> bool:
+        """等待界面稳定，baseline为原固定等待时间（用于统计节省的时间）"""
+        return self.settle_detector.wait(baseline=baseline).settled
+    
+    def _wait_for_launch(self, baseline: float) -> bool:
+        """等待新窗口出现并稳定（打开文件、启动应用后使用）"""
+        settle_config = self.config.get("settle", {})
+        return self.settle_detector.wait(
+            baseline=baseline, max_wait=settle_config.get("launch_max_wait", 10.0),
+            require_change=True
+        ).settled
+    
     def _wait_for_element(self, element_description: str, timeout: int = 30) -> bool:
         """等待元素出现"""
         start_time = time.time()
@@ -686,13 +751,12 @@ class UnifiedAutomationFramework:
                 # 打开浏览器并导航到URL
                 app_config = self.config["applications"]["edge"]
                 if self._open_application(app_config):
-                    time.sleep(3)
+                    self._wait_for_settle(3)
                     # 点击地址栏
                     pyautogui.hotkey('ctrl', 'l')
-                    time.sleep(1)
-                    # 输入URL
-                    self._type_text(step.parameters["url"])
-                    time.sleep(1)
+                    self._wait_for_settle(1)
+                    # 输入URL（输入后原有0.5秒和1秒两次固定等待，合并为一次稳定等待）
+                    self._type_text(step.parameters["url"], baseline=1.5)
                     # 按回车
                     self._press_key('enter')
                     success = True
@@ -906,6 +970,7 @@ class UnifiedAutomationFramework:
                 "failed_cases": sum(1 for r in test_results if r["status"] == "failed"),
                 "partial_cases": sum(1 for r in test_results if r["status"] == "partial")
             },
+            "settle_stats": self.settle_detector.report(),
             "test_results": test_results
         }
         
@@ -922,6 +987,9 @@ class UnifiedAutomationFramework:
         print(f"通过: {report['summary']['passed_cases']}")
         print(f"失败: {report['summary']['failed_cases']}")
         print(f"部分通过: {report['summary']['partial_cases']}")
+        settle_stats = report["settle_stats"]
+        print(f"界面稳定等待: {settle_stats['total_waited']:.1f}s "
+              f"(原固定等待 {settle_stats['total_baseline']:.1f}s，节省 {settle_stats['time_saved']:.1f}s)")
         print("="*50)
         
         return report_path
@@ -960,8 +1028,8 @@ class UnifiedAutomationFramework:
         
         if self._open_file(pdf_file):
             logger.info("AI成功打开PDF文件")
-            # 等待文件加载
-            time.sleep(3)
+            # 等待文件加载（_open_file已等待窗口出现，这里等待内容渲染完成，原固定等待3秒）
+            self._wait_for_settle(3)
             return True
         
         logger.error("AI无法打开PDF文件")
@@ -973,7 +1041,7 @@ class UnifiedAutomationFramework:
         
         try:
             # 等待PDF内容加载完成
-            time.sleep(2)
+            self._wait_for_settle(2)
             
             # 使用OCR识别屏幕上的文字，找到可选择的文字区域
             text_regions = self._find_selectable_text_regions()
@@ -1075,21 +1143,12 @@ class UnifiedAutomationFramework:
             return []
         
         try:
-            # 截取屏幕
-            screenshot = pyautogui.screenshot()
-            results = self.ocr_reader.readtext(np.array(screenshot))
-            
-            text_regions = []
-            for (bbox, text, conf) in results:
-                if conf >= 0.6 and len(text.strip()) > 2:  # 过滤低置信度和短文本
-                    # 计算边界框
-                    top_left = bbox[0]
-                    bottom_right = bbox[2]
-                    region = (
-                        int(top_left[0]), int(top_left[1]),
-                        int(bottom_right[0]), int(bottom_right[1])
-                    )
-                    text_regions.append(region)
+            # 截取屏幕（按阅读顺序过滤低置信度和短文本）
+            index = self._screen_ocr_index()
+            text_regions = [
+                tuple(int(value) for value in item.box)
+                for item in index.query(0.6, lambda item: len(item.text.strip()) > 2)
+            ]
             
             logger.info(f"AI找到 {len(text_regions)} 个可选择的文字区域")
             return text_regions